@@ -7,6 +7,7 @@ from servequery.core.datasets import Dataset
 from servequery.core.datasets import MulticlassClassification
 from servequery.core.datasets import Recsys
 from servequery.core.datasets import Regression
+from servequery.core.profile import ReferenceProfile
 from servequery.core.report import Report
 from servequery.core.report import Run
 from servequery.legacy.core import ColumnType
@@ -29,6 +30,7 @@ __all__ = [
     "MulticlassClassification",
     "Regression",
     "Recsys",
+    "ReferenceProfile",
     "compare",
     "ColumnType",  # legacy support
 ]
@@ -1,17 +1,19 @@
 import abc
-import copy
 import dataclasses
-import io
 import json
 import os
 import tarfile
 from abc import abstractmethod
+from collections import OrderedDict
+from copy import deepcopy
 from enum import Enum
 from typing import Any
 from typing import ClassVar
 from typing import Dict
 from typing import Generator
+from typing import Iterator
 from typing import List
+from typing import Mapping
 from typing import Optional
 from typing import Tuple
 from typing import Union
@@ -25,12 +27,19 @@ from servequery.core.base_types import Label
 from servequery.core.tests import GenericTest
 from servequery.legacy.base_metric import DisplayName
 from servequery.legacy.core import ColumnType
+from servequery.legacy.features._text_processing import shared_text_columns
 from servequery.legacy.features.generated_features import GeneratedFeatures
+from servequery.legacy.options.agg_data import DataDefinitionOptions
+from servequery.legacy.options.agg_data import DescriptorExecutionOptions
 from servequery.legacy.options.base import AnyOptions
 from servequery.legacy.options.base import Options
 from servequery.legacy.pipeline.column_mapping import ColumnMapping
 from servequery.legacy.suite.base_suite import MetadataValueType
 from servequery.legacy.utils.data_preprocessing import create_data_definition
+from servequery.legacy.utils.llm.wrapper import shared_llm_responses
+from servequery.legacy.utils.parallel import map_chunks
+from servequery.legacy.utils.parallel import split_picklable
+from servequery.legacy.utils.parallel import split_rows
 from servequery.legacy.utils.types import Numeric
 from servequery.pydantic_utils import AutoAliasMixin
 from servequery.pydantic_utils import ServeQueryBaseModel
@@ -517,6 +526,32 @@ class FeatureDescriptor(Descriptor):
         return [c.display_name for c in self.feature.list_columns()]
 
 
+def _add_chunk_descriptors(
+    data: pd.DataFrame, data_definition: DataDefinition, descriptors: List[Descriptor], options: Options
+) -> Tuple[Dict[str, pd.Series], Dict[str, ColumnType], List[str]]:
+    """Add descriptors to a chunk of rows in a worker process.
+
+    Returns:
+        added columns, their types and names of added test columns.
+    """
+    dataset = PandasDataset(data, data_definition, copy=False)
+    with shared_text_columns():
+        for descriptor in descriptors:
+            dataset.add_descriptor(descriptor, options)
+    result = dataset.as_dataframe()
+    added = [column for column in result.columns if column not in data.columns]
+    added_definition = dataset.data_definition
+    types = {column: ColumnType.Unknown for column in added}
+    for column in added_definition.numerical_descriptors:
+        if column in types:
+            types[column] = ColumnType.Numerical
+    for column in added_definition.categorical_descriptors:
+        if column in types:
+            types[column] = ColumnType.Categorical
+    tests = [column for column in (added_definition.test_descriptors or []) if column in added]
+    return {column: result[column] for column in added}, types, tests
+
+
 def _determine_descriptor_column_name(alias: str, columns: List[str]):
     index = 1
     key = alias
@@ -582,7 +617,7 @@ class ColumnStats:
 class DatasetStats:
     row_count: int
     column_count: int
-    column_stats: Dict[str, ColumnStats]
+    column_stats: Mapping[str, ColumnStats]
 
 
 PossibleDatasetTypes = Union["Dataset", pd.DataFrame]
@@ -602,18 +637,34 @@ class Dataset:
         options: AnyOptions = None,
         metadata: Dict[str, MetadataValueType] = None,
         tags: List[str] = None,
+        copy: bool = True,
     ) -> "Dataset":
-        dataset = PandasDataset(data, data_definition, metadata=metadata, tags=tags)
+        """
+        Create dataset from pandas DataFrame.
+
+        Args:
+            copy: if False, dataset shares the data of given frame instead of copying it.
+                The frame itself is never modified: added descriptor columns are kept
+                by the dataset only. Modifying the frame values afterwards affects the dataset.
+        """
+        dataset = PandasDataset(
+            data,
+            data_definition,
+            metadata=metadata,
+            tags=tags,
+            copy=copy,
+            data_definition_options=Options.from_any_options(options).data_definition_options,
+        )
         if descriptors is not None:
             dataset.add_descriptors(descriptors, options)
         return dataset
 
     @staticmethod
-    def from_any(dataset: PossibleDatasetTypes) -> "Dataset":
+    def from_any(dataset: PossibleDatasetTypes, options: AnyOptions = None) -> "Dataset":
         if isinstance(dataset, Dataset):
             return dataset
         if isinstance(dataset, pd.DataFrame):
-            return Dataset.from_pandas(dataset)
+            return Dataset.from_pandas(dataset, options=options)
         raise ValueError(f"Unsupported dataset type: {type(dataset)}")
 
     @abstractmethod
@@ -628,6 +679,10 @@ class Dataset:
     def subdataset(self, column_name: str, label: object) -> "Dataset":
         raise NotImplementedError()
 
+    def group_by(self, column_name: str) -> Dict[object, "Dataset"]:
+        labels = self.column(column_name).data.unique()
+        return {label: self.subdataset(column_name, label) for label in labels}
+
     @abstractmethod
     def stats(self) -> DatasetStats:
         raise NotImplementedError()
@@ -675,75 +730,172 @@ class Dataset:
 
 
 INTEGER_CARDINALITY_LIMIT = 10
-
-
-def infer_column_type(column_data: pd.Series) -> ColumnType:
-    if column_data.dtype.name.startswith("float"):
+INFERRED_DEFINITIONS_CACHE_SIZE = 128
+# verdicts of an inference sample are verified on a sample this many times larger
+INFERENCE_VERIFICATION_FACTOR = 10
+
+
+def _sample(column_data: pd.Series, sample_size: Optional[int], random_seed: int) -> pd.Series:
+    if sample_size is None or len(column_data) <= sample_size:
+        return column_data
+    positions = np.random.default_rng(random_seed).choice(len(column_data), size=sample_size, replace=False)
+    return column_data.iloc[np.sort(positions)]
+
+
+def infer_column_type(
+    column_data: pd.Series,
+    sample_size: Optional[int] = None,
+    random_seed: int = 0,
+) -> ColumnType:
+    """Infer column type from column values.
+
+    With sample_size, rules are checked on a random sample of rows,
+    verdicts the sample can't prove are verified on a sample
+    `INFERENCE_VERIFICATION_FACTOR` times larger (or on the whole column if it is smaller).
+    """
+    sample = _sample(column_data, sample_size, random_seed)
+    verification_size = sample_size * INFERENCE_VERIFICATION_FACTOR if sample_size is not None else None
+    if sample.dtype.name.startswith("float"):
         return ColumnType.Numerical
-    if column_data.dtype.name.startswith("int"):
-        if column_data.nunique() <= INTEGER_CARDINALITY_LIMIT:
+    if sample.dtype.name.startswith("int"):
+        # unique values of a sample are a subset of the column ones, so only a low cardinality needs verification
+        if sample.nunique() <= INTEGER_CARDINALITY_LIMIT and (
+            sample is column_data
+            or _sample(column_data, verification_size, random_seed + 1).nunique() <= INTEGER_CARDINALITY_LIMIT
+        ):
             return ColumnType.Categorical
         else:
             return ColumnType.Numerical
-    if column_data.dtype.name in ["string"]:
-        if column_data.nunique() > (column_data.count() * 0.5):
-            return ColumnType.Text
-        else:
-            return ColumnType.Categorical
-    if column_data.dtype.name == "object":
-        without_na = column_data.dropna()
+    if sample.dtype.name in ["string"]:
+        return _text_or_categorical(sample, column_data, verification_size, random_seed)
+    if sample.dtype.name == "object":
+        without_na = sample.dropna()
         if without_na.count() == 0:
             return ColumnType.Unknown
         if isinstance(without_na.iloc[0], str) and isinstance(without_na.iloc[-1], str):
-            if column_data.nunique() > (column_data.count() * 0.5):
-                return ColumnType.Text
-            else:
-                return ColumnType.Categorical
+            return _text_or_categorical(sample, column_data, verification_size, random_seed)
         elif isinstance(without_na.iloc[0], (list, tuple)) and isinstance(without_na.iloc[-1], (list, tuple)):
             return ColumnType.List
         return ColumnType.Unknown
-    if column_data.dtype.name in ["bool", "category"]:
+    if sample.dtype.name in ["bool", "category"]:
         return ColumnType.Categorical
-    if column_data.dtype.name.startswith("datetime"):
+    if sample.dtype.name.startswith("datetime"):
         return ColumnType.Datetime
     return ColumnType.Unknown
 
 
+def _text_or_categorical(
+    sample: pd.Series,
+    column_data: pd.Series,
+    verification_size: Optional[int],
+    random_seed: int,
+) -> ColumnType:
+    """Text if more than a half of values are unique.
+
+    On average a sample has at least the share of unique values of the whole column,
+    so only a text verdict of a sample is verified on a larger sample.
+    """
+    if sample.nunique() <= sample.count() * 0.5:
+        return ColumnType.Categorical
+    if sample is not column_data:
+        verification = _sample(column_data, verification_size, random_seed + 1)
+        if verification.nunique() <= verification.count() * 0.5:
+            return ColumnType.Categorical
+    return ColumnType.Text
+
+
 MARKER_CONTENT = """{"version": "1.0"}"""
+MARKER_CONTENT_V2 = """{"version": "2.0"}"""
 MARKER_FILENAME = ".servequery_dataset"
 DATA_FILENAME = "data.parquet"
+ARROW_DATA_FILENAME = "data.arrow"
 META_FILENAME = "dataset.json"
+WRITE_BATCH_ROWS = 65536
 
 
-def _write_servequery_dataset(dataset: Dataset, uri: str):
-    with tarfile.open(uri, "w") as tar:  # todo: use fsspec location
-        # Add marker file
-        marker_data = MARKER_CONTENT.encode("utf-8")
-        marker_info = tarfile.TarInfo(MARKER_FILENAME)
-        marker_info.size = len(marker_data)
-        tar.addfile(marker_info, io.BytesIO(marker_data))
-
-        # Add dataframe as parquet
-        buffer = io.BytesIO()
-        dataset.as_dataframe().to_parquet(buffer, index=False)
-        buffer.seek(0)
-        data_info = tarfile.TarInfo(DATA_FILENAME)
-        data_info.size = len(buffer.getbuffer())
-        tar.addfile(data_info, buffer)
-
-        # Add metadata as JSON
-        metadata = {
-            "tags": dataset.tags,
-            "metadata": dataset.metadata,
-            "data_definition": dataset.data_definition.dict(),
-        }
-        meta_bytes = json.dumps(metadata, indent=2).encode("utf-8")
-        meta_info = tarfile.TarInfo(META_FILENAME)
-        meta_info.size = len(meta_bytes)
-        tar.addfile(meta_info, io.BytesIO(meta_bytes))
+class _LazyColumnStats(Mapping[str, ColumnStats]):
+    """Column stats of PandasDataset, collected on first access."""
+
+    def __init__(self, dataset: "PandasDataset"):
+        self._dataset = dataset
+
+    def __getitem__(self, column_name: str) -> ColumnStats:
+        if column_name not in self._dataset.as_dataframe().columns:
+            raise KeyError(column_name)
+        return self._dataset.column_stats(column_name)
 
+    def __iter__(self) -> Iterator[str]:
+        self._dataset._collect_columns_stats(list(self._dataset.as_dataframe().columns))
+        return iter(self._dataset.as_dataframe().columns)
 
-def _read_servequery_dataset(uri: str) -> Dataset:
+    def __len__(self) -> int:
+        return len(self._dataset.as_dataframe().columns)
+
+
+def _write_servequery_dataset(dataset: Dataset, uri: str):
+    """
+    Write dataset as an uncompressed tar with marker, metadata and Arrow IPC data members.
+
+    Data is the last member and is streamed into the file in record batches, so the frame is never
+    serialized in memory, and its 512-byte aligned offset lets readers memory-map it.
+    """
+    import pyarrow as pa
+
+    data = dataset.as_dataframe()
+    metadata = {
+        "tags": dataset.tags,
+        "metadata": dataset.metadata,
+        "data_definition": dataset.data_definition.dict(),
+    }
+    with open(uri, "wb") as f:  # todo: use fsspec location
+        _write_tar_member(f, MARKER_FILENAME, MARKER_CONTENT_V2.encode("utf-8"))
+        _write_tar_member(f, META_FILENAME, json.dumps(metadata, indent=2).encode("utf-8"))
+
+        header_offset = f.tell()
+        f.write(_tar_header(ARROW_DATA_FILENAME, 0))
+        data_offset = f.tell()
+        schema = pa.Schema.from_pandas(data, preserve_index=False)
+        with pa.ipc.new_file(f, schema) as writer:
+            for start in range(0, len(data), WRITE_BATCH_ROWS):
+                batch = data.iloc[start : start + WRITE_BATCH_ROWS]
+                writer.write_batch(pa.RecordBatch.from_pandas(batch, schema=schema, preserve_index=False))
+        size = f.tell() - data_offset
+        f.write(b"\0" * (-size % tarfile.BLOCKSIZE))
+        f.write(b"\0" * (2 * tarfile.BLOCKSIZE))
+        f.write(b"\0" * (-f.tell() % tarfile.RECORDSIZE))
+        f.seek(header_offset)
+        f.write(_tar_header(ARROW_DATA_FILENAME, size))
+
+
+def _tar_header(name: str, size: int) -> bytes:
+    info = tarfile.TarInfo(name)
+    info.size = size
+    # GNU format stores sizes over 8 GiB in base-256 and keeps the header one block long, so it can be patched in place
+    return info.tobuf(tarfile.GNU_FORMAT, tarfile.ENCODING, "surrogateescape")
+
+
+def _write_tar_member(f, name: str, data: bytes):
+    f.write(_tar_header(name, len(data)))
+    f.write(data)
+    f.write(b"\0" * (-len(data) % tarfile.BLOCKSIZE))
+
+
+def _read_servequery_dataset(uri: str, columns: Optional[List[str]] = None) -> Dataset:
+    (dataset,) = iter_servequery_dataset(uri, columns, batch_rows=None)
+    return dataset
+
+
+def iter_servequery_dataset(
+    uri: str, columns: Optional[List[str]] = None, batch_rows: Optional[int] = WRITE_BATCH_ROWS
+) -> Iterator[Dataset]:
+    """
+    Read a ServeQuery dataset file in chunks of rows.
+
+    Args:
+        uri: path to the dataset file.
+        columns: columns to read, all columns if None. Data definition is narrowed to these columns.
+        batch_rows: rows per yielded dataset (approximately, chunks follow stored row groups), whole file if None.
+    """
     with tarfile.open(uri, "r") as tar:
         names = tar.getnames()
 
@@ -751,17 +903,10 @@ def _read_servequery_dataset(uri: str) -> Dataset:
         if MARKER_FILENAME not in names:
             raise ValueError("Not a valid ServeQuery dataset: missing marker")
         marker_file = tar.extractfile(MARKER_FILENAME)
-        if marker_file is None or marker_file.read().decode("utf-8") != MARKER_CONTENT:
+        marker = marker_file.read().decode("utf-8") if marker_file is not None else None
+        if marker not in (MARKER_CONTENT, MARKER_CONTENT_V2):
             raise ValueError("Invalid ServeQuery dataset marker content")
 
-        # Load dataframe
-        if DATA_FILENAME not in names:
-            raise ValueError("Missing data file in ServeQuery dataset")
-        data_file = tar.extractfile(DATA_FILENAME)
-        if data_file is None:
-            raise ValueError("Missing data file in ServeQuery dataset")
-        df = pd.read_parquet(data_file)
-
         # Load metadata
         if META_FILENAME not in names:
             raise ValueError("Missing metadata file in ServeQuery dataset")
@@ -769,22 +914,135 @@ def _read_servequery_dataset(uri: str) -> Dataset:
         if meta_file is None:
             raise ValueError("Missing metadata file in ServeQuery dataset")
         metadata = json.load(meta_file)
+        data_definition = DataDefinition.parse_obj(metadata["data_definition"])
+
+        if marker == MARKER_CONTENT:
+            if DATA_FILENAME not in names:
+                raise ValueError("Missing data file in ServeQuery dataset")
+            data_file = tar.extractfile(DATA_FILENAME)
+            if data_file is None:
+                raise ValueError("Missing data file in ServeQuery dataset")
+            frames, all_columns = _iter_parquet(data_file, columns, batch_rows)
+        else:
+            if ARROW_DATA_FILENAME not in names:
+                raise ValueError("Missing data file in ServeQuery dataset")
+            member = tar.getmember(ARROW_DATA_FILENAME)
+            frames, all_columns = _iter_arrow(uri, member.offset_data, member.size, columns, batch_rows)
+
+        for df in frames:
+            definition = data_definition
+            if columns is not None:
+                definition = _project_data_definition(data_definition, columns, all_columns)
+            yield Dataset.from_pandas(
+                df,
+                data_definition=definition,
+                metadata=metadata["metadata"],
+                tags=metadata["tags"],
+                copy=False,
+            )
 
-    return Dataset.from_pandas(
-        df,
-        data_definition=DataDefinition.parse_obj(metadata["data_definition"]),
-        metadata=metadata["metadata"],
-        tags=metadata["tags"],
-    )
+
+def _iter_parquet(
+    data_file, columns: Optional[List[str]], batch_rows: Optional[int]
+) -> Tuple[Iterator[pd.DataFrame], List[str]]:
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(data_file)
+
+    def frames() -> Iterator[pd.DataFrame]:
+        if batch_rows is None:
+            yield parquet_file.read(columns=columns).to_pandas()
+            return
+        for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=columns):
+            yield batch.to_pandas()
+
+    return frames(), parquet_file.schema_arrow.names
+
+
+def _iter_arrow(
+    uri: str, offset: int, size: int, columns: Optional[List[str]], batch_rows: Optional[int]
+) -> Tuple[Iterator[pd.DataFrame], List[str]]:
+    import pyarrow as pa
+
+    def open_reader(source: "pa.MemoryMappedFile") -> "pa.ipc.RecordBatchFileReader":
+        source.seek(offset)
+        return pa.ipc.open_file(source.read_buffer(size))
+
+    with pa.memory_map(uri, "r") as source:
+        names = open_reader(source).schema.names
+
+    def frames() -> Iterator[pd.DataFrame]:
+        # the file is mapped only while frames are read, closing the iterator unmaps it
+        with pa.memory_map(uri, "r") as source:
+            reader = open_reader(source)
+            if batch_rows is None:
+                table = reader.read_all()
+                yield (table if columns is None else table.select(columns)).to_pandas()
+                return
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                yield (batch if columns is None else batch.select(columns)).to_pandas()
+
+    return frames(), names
+
+
+def _project_data_definition(definition: DataDefinition, columns: List[str], all_columns: List[str]) -> DataDefinition:
+    """Narrow data definition to selected columns, dropping column roles and tasks that use other columns."""
+    dropped = set(all_columns) - set(columns)
+
+    def _uses_dropped(value: Any) -> bool:
+        if isinstance(value, str):
+            return value in dropped
+        if isinstance(value, BaseModel):
+            return _uses_dropped(value.dict())
+        if isinstance(value, dict):
+            return any(_uses_dropped(v) for v in value.values())
+        if isinstance(value, (list, tuple)):
+            return any(_uses_dropped(v) for v in value)
+        return False
+
+    projected = deepcopy(definition)
+    for field in ("id_column", "timestamp"):
+        if getattr(projected, field) in dropped:
+            setattr(projected, field, None)
+    for field in (
+        "numerical_columns",
+        "categorical_columns",
+        "text_columns",
+        "datetime_columns",
+        "numerical_descriptors",
+        "categorical_descriptors",
+        "test_descriptors",
+    ):
+        values = getattr(projected, field)
+        if values is not None:
+            setattr(projected, field, [c for c in values if c not in dropped])
+    for field in ("classification", "regression", "ranking"):
+        values = getattr(projected, field)
+        if values is not None:
+            setattr(projected, field, [v for v in values if not _uses_dropped(v)])
+    if projected.llm is not None and _uses_dropped(projected.llm):
+        projected.llm = None
+    if projected.service_columns is not None and _uses_dropped(projected.service_columns):
+        projected.service_columns = None
+    return projected
+
+
+_inferred_definitions: "OrderedDict[tuple, DataDefinition]" = OrderedDict()
 
 
 class PandasDataset(Dataset):
-    SUPPORTED_FORMATS = {"csv": pd.read_csv, "parquet": pd.read_parquet, SERVEQUERY_DATASET_EXT: _read_servequery_dataset}
+    SUPPORTED_FORMATS = {
+        "csv": pd.read_csv,
+        "parquet": pd.read_parquet,
+        SERVEQUERY_DATASET_EXT: _read_servequery_dataset,
+    }
     _data: pd.DataFrame
     _data_definition: DataDefinition
-    _dataset_stats: DatasetStats
+    _column_stats: Dict[str, ColumnStats]
     _metadata: Dict[str, MetadataValueType]
     _tags: List[str]
+    _groups: Dict[str, Dict[object, "PandasDataset"]]
 
     def __init__(
         self,
@@ -792,8 +1050,12 @@ class PandasDataset(Dataset):
         data_definition: Optional[DataDefinition] = None,
         metadata: Dict[str, MetadataValueType] = None,
         tags: List[str] = None,
+        copy: bool = True,
+        data_definition_options: Optional[DataDefinitionOptions] = None,
     ):
-        self._data = data.copy()
+        # without copy the frame is copied shallowly: column data is shared, but added columns stay out of it
+        self._data = data.copy(deep=copy)
+        self._groups = {}
         if (
             data_definition is None
             or data_definition.datetime_columns is None
@@ -826,11 +1088,12 @@ class PandasDataset(Dataset):
                 data,
                 reserved_fields,
                 data_definition.service_columns if data_definition is not None else None,
+                data_definition_options or DataDefinitionOptions(),
             )
             if data_definition is None:
                 self._data_definition = generated_data_definition
             else:
-                self._data_definition = copy.deepcopy(data_definition)
+                self._data_definition = deepcopy(data_definition)
                 if self._data_definition.datetime_columns is None:
                     if self._data_definition.timestamp is not None and generated_data_definition.timestamp is not None:
                         self._data_definition.datetime_columns = [generated_data_definition.timestamp]
@@ -850,13 +1113,8 @@ class PandasDataset(Dataset):
                 ):
                     self._data_definition.service_columns = generated_data_definition.service_columns
         else:
-            self._data_definition = copy.deepcopy(data_definition)
-        (rows, columns) = data.shape
-
-        column_stats = {}
-        for column in data.columns:
-            column_stats[column] = self._collect_stats(self._data_definition.get_column_type(column), data[column])
-        self._dataset_stats = DatasetStats(rows, columns, column_stats)
+            self._data_definition = deepcopy(data_definition)
+        self._column_stats = {}
         self._metadata = metadata or {}
         self._tags = tags or []
 
@@ -867,13 +1125,57 @@ class PandasDataset(Dataset):
         return DatasetColumn(self._data_definition.get_column_type(column_name), self._data[column_name])
 
     def subdataset(self, column_name: str, label: object):
-        return PandasDataset(self._data[self._data[column_name] == label], self._data_definition)
+        group = self.group_by(column_name).get(label)
+        if group is None:
+            return PandasDataset(self._data.iloc[:0].copy(), self._data_definition, copy=False)
+        return group
+
+    def group_by(self, column_name: str) -> Dict[object, "Dataset"]:
+        groups = self._groups.get(column_name)
+        if groups is None:
+            # partition once: every group is taken by row positions, so there is no per-label mask over the frame.
+            # take copies rows of the group, together groups copy the frame once and copy=False skips another copy
+            indices = self._data.groupby(column_name, sort=False, observed=True).indices
+            groups = {
+                label: PandasDataset(self._data.take(positions), self._data_definition, copy=False)
+                for label, positions in indices.items()
+            }
+            self._groups[column_name] = groups
+        return groups  # type: ignore[return-value]
 
     def _generate_data_definition(
         self,
         data: pd.DataFrame,
         reserved_fields: List[str],
         service_columns: Optional[ServiceColumns] = None,
+        options: Optional[DataDefinitionOptions] = None,
+    ) -> DataDefinition:
+        options = options or DataDefinitionOptions()
+        if not options.cache_inferred_definition:
+            return self._infer_data_definition(data, reserved_fields, service_columns, options)
+        key = (
+            tuple((column, str(dtype)) for column, dtype in data.dtypes.items()),
+            tuple(reserved_fields),
+            None if service_columns is None else service_columns.trace_link,
+            options.inference_sample_size,
+            options.inference_random_seed,
+        )
+        cached = _inferred_definitions.get(key)
+        if cached is None:
+            cached = self._infer_data_definition(data, reserved_fields, service_columns, options)
+            _inferred_definitions[key] = cached
+            if len(_inferred_definitions) > INFERRED_DEFINITIONS_CACHE_SIZE:
+                _inferred_definitions.popitem(last=False)
+        else:
+            _inferred_definitions.move_to_end(key)
+        return deepcopy(cached)
+
+    def _infer_data_definition(
+        self,
+        data: pd.DataFrame,
+        reserved_fields: List[str],
+        service_columns: Optional[ServiceColumns],
+        options: DataDefinitionOptions,
     ) -> DataDefinition:
         numerical = []
         categorical = []
@@ -889,7 +1191,7 @@ class PandasDataset(Dataset):
                 else:
                     service.trace_link = column
                 continue
-            column_type = infer_column_type(data[column])
+            column_type = infer_column_type(data[column], options.inference_sample_size, options.inference_random_seed)
             if column_type == ColumnType.Numerical:
                 numerical.append(column)
             if column_type == ColumnType.Categorical:
@@ -909,11 +1211,40 @@ class PandasDataset(Dataset):
         )
 
     def stats(self) -> DatasetStats:
-        return self._dataset_stats
+        (rows, columns) = self._data.shape
+        return DatasetStats(rows, columns, _LazyColumnStats(self))
+
+    def column_stats(self, column_name: str) -> ColumnStats:
+        if column_name not in self._column_stats:
+            self._collect_columns_stats([column_name])
+        return self._column_stats[column_name]
+
+    def _collect_columns_stats(self, columns: List[str]):
+        """Collect stats for given columns, numerical columns are aggregated in one vectorized pass."""
+        columns = [column for column in columns if column not in self._column_stats]
+        numerical = [
+            column
+            for column in columns
+            if self._data_definition.get_column_type(column) == ColumnType.Numerical
+            and pd.api.types.is_numeric_dtype(self._data[column].dtype)
+            and not pd.api.types.is_bool_dtype(self._data[column].dtype)
+        ]
+        if len(numerical) > 0:
+            for column, numerical_stats in _collect_numerical_frame_stats(self._data[numerical]).items():
+                self._column_stats[column] = ColumnStats(
+                    general_stats=GeneralColumnStats(missing_values=StatCountValue(0, 0)),
+                    numerical_stats=numerical_stats,
+                    categorical_stats=None,
+                )
+        for column in columns:
+            if column not in self._column_stats:
+                self._column_stats[column] = self._collect_stats(
+                    self._data_definition.get_column_type(column), self._data[column]
+                )
 
     def add_column(self, key: str, data: DatasetColumn):
-        self._dataset_stats.column_count += 1
-        self._dataset_stats.column_stats[key] = self._collect_stats(data.type, data.data)
+        self._groups = {}
+        self._column_stats.pop(key, None)
         self._data[key] = data.data
         if data.type == ColumnType.Numerical:
             self._data_definition.numerical_descriptors.append(key)
@@ -935,6 +1266,42 @@ class PandasDataset(Dataset):
         for sub in descriptor.get_sub_descriptors():
             self.add_descriptor(sub, options)
 
+    def add_descriptors(self, descriptors: List[Descriptor], options: AnyOptions = None):
+        options = Options.from_any_options(options)
+        execution = options.get(DescriptorExecutionOptions)
+        with shared_llm_responses(), shared_text_columns():
+            if execution.processes <= 1 or len(self._data) == 0:
+                super().add_descriptors(descriptors, options)
+                return
+            for picklable, run in split_picklable(descriptors):
+                if picklable:
+                    self._add_descriptors_in_processes(run, options, execution)
+                else:
+                    super().add_descriptors(run, options)
+
+    def _add_descriptors_in_processes(
+        self, descriptors: List[Descriptor], options: Options, execution: DescriptorExecutionOptions
+    ):
+        """Compute descriptors for chunks of rows in a process pool and add their columns in the same order"""
+        for descriptor in descriptors:
+            descriptor.validate_input(self._data_definition)
+        chunks = map_chunks(
+            _add_chunk_descriptors,
+            split_rows(self._data, execution),
+            execution,
+            self._data_definition,
+            descriptors,
+            options,
+        )
+        columns, types, test_descriptors = chunks[0]
+        for name in columns:
+            data = pd.concat([chunk_columns[name] for chunk_columns, _, _ in chunks])
+            self.add_column(name, DatasetColumn(types[name], data))
+        if test_descriptors:
+            if self._data_definition.test_descriptors is None:
+                self._data_definition.test_descriptors = []
+            self._data_definition.test_descriptors.extend(test_descriptors)
+
     def _collect_stats(self, column_type: ColumnType, data: pd.Series):
         numerical_stats = None
         if column_type == ColumnType.Numerical:
@@ -973,7 +1340,7 @@ class PandasDataset(Dataset):
         data = cls.SUPPORTED_FORMATS[ext](uri)  # type: ignore[operator]
         if isinstance(data, Dataset):
             return data
-        return Dataset.from_pandas(data)
+        return Dataset.from_pandas(data, copy=False)
 
 
 def _collect_numerical_stats(data: pd.Series):
@@ -991,6 +1358,30 @@ def _collect_numerical_stats(data: pd.Series):
     )
 
 
+def _collect_numerical_frame_stats(data: pd.DataFrame) -> Dict[str, NumericalColumnStats]:
+    infinite_counts = np.isinf(data).sum()
+    counts = data.count()
+    maxs = data.max()
+    mins = data.min()
+    means = data.mean()
+    stds = data.std()
+    quantiles = data.quantile([0.25, 0.75])
+    return {
+        column: NumericalColumnStats(
+            max=maxs[column],
+            min=mins[column],
+            mean=means[column],
+            std=stds[column],
+            quantiles={
+                "p25": quantiles[column][0.25],
+                "p75": quantiles[column][0.75],
+            },
+            infinite=StatCountValue(infinite_counts[column], infinite_counts[column] / counts[column]),
+        )
+        for column in data.columns
+    }
+
+
 def _collect_categorical_stats(data: pd.Series):
     total_count = data.count()
     return CategoricalColumnStats(
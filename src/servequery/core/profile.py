@@ -0,0 +1,315 @@
+import json
+import os
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Literal
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from servequery._pydantic_compat import BaseModel
+from servequery.core.datasets import DataDefinition
+from servequery.core.datasets import Dataset
+from servequery.core.datasets import DatasetColumn
+from servequery.core.datasets import DatasetStats
+from servequery.core.datasets import Descriptor
+from servequery.core.datasets import PossibleDatasetTypes
+from servequery.legacy.calculations.stattests import PossibleStatTestType
+from servequery.legacy.calculations.stattests import StatTest
+from servequery.legacy.calculations.stattests.registry import StatTestResult
+from servequery.legacy.calculations.stattests.registry import get_default_stattest_for_size
+from servequery.legacy.calculations.stattests.registry import get_profile_stattest_impl
+from servequery.legacy.calculations.stattests.registry import get_registered_stattest
+from servequery.legacy.core import ColumnType
+from servequery.legacy.metric_results import Distribution
+from servequery.legacy.options.base import AnyOptions
+from servequery.legacy.suite.base_suite import MetadataValueType
+from servequery.legacy.utils.visualizations import histogram_bin_edges_doane
+
+SERVEQUERY_PROFILE_EXT = "servequery_profile"
+# reference quantiles are kept on this many evenly spaced levels, from 0 to 1
+PROFILE_QUANTILES = 1001
+# this many smallest and largest values are kept as they are, so tail buckets are estimated precisely
+PROFILE_TAIL_VALUES = 100
+# numerical columns with more unique values than this keep no value counts, only quantiles
+PROFILE_MAX_VALUE_COUNTS = 1000
+
+
+class ColumnProfile(BaseModel):
+    """
+    Summary of a reference column, enough to compare a current column with it.
+
+    Missing values are NaNs, drift statistics (`count`, `nunique`, `quantiles`, `value_counts`) are
+    collected over values cleaned like for drift calculation, i.e. without infinite values.
+    """
+
+    type: ColumnType
+    size: int
+    missing: int
+    count: int
+    nunique: int
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    finite_std: Optional[float] = None
+    quantile_levels: Optional[List[float]] = None
+    quantiles: Optional[List[float]] = None
+    value_counts: Optional[List[Tuple[Any, int]]] = None
+    histogram_edges: Optional[List[float]] = None
+    histogram_counts: Optional[List[int]] = None
+
+    @classmethod
+    def from_series(cls, column_type: ColumnType, data: pd.Series) -> "ColumnProfile":
+        if column_type == ColumnType.Numerical and not pd.api.types.is_numeric_dtype(data):
+            raise ValueError(f"Column '{data.name}' should contain numerical values only.")
+        missing = int(data.isna().sum())
+        cleaned = data.replace([-np.inf, np.inf], np.nan).dropna()
+        profile = cls(
+            type=column_type,
+            size=len(data),
+            missing=missing,
+            count=len(cleaned),
+            nunique=cleaned.nunique(),
+        )
+        if column_type == ColumnType.Categorical or profile.nunique <= PROFILE_MAX_VALUE_COUNTS:
+            profile.value_counts = [
+                (_python_value(value), int(count)) for value, count in cleaned.value_counts().items()
+            ]
+        if column_type != ColumnType.Numerical:
+            return profile
+        profile.min = float(data.min())
+        profile.max = float(data.max())
+        profile.mean = float(data.mean())
+        profile.std = float(data.std())
+        if profile.count > 0:
+            values = np.sort(cleaned.to_numpy(dtype=float))
+            profile.finite_std = float(np.std(values))
+            tail = np.arange(min(PROFILE_TAIL_VALUES, len(values))) / max(len(values) - 1, 1)
+            levels = np.unique(np.concatenate([np.linspace(0, 1, PROFILE_QUANTILES), tail, 1 - tail]))
+            profile.quantile_levels = levels.tolist()
+            profile.quantiles = np.quantile(values, levels).tolist()
+            counts, edges = np.histogram(values, bins=histogram_bin_edges_doane(values))
+            profile.histogram_edges = edges.tolist()
+            profile.histogram_counts = counts.tolist()
+        return profile
+
+    @property
+    def data(self) -> pd.Series:
+        raise ValueError("Reference profile keeps no column values, a reference dataset is required")
+
+    def quantile(self, q: float) -> float:
+        """Quantile of finite values, interpolated between the kept quantiles"""
+        levels, quantiles = self._quantiles()
+        return float(np.interp(q, levels, quantiles))
+
+    def cdf(self, values: np.ndarray, side: Literal["left", "right"] = "right") -> np.ndarray:
+        """Share of finite reference values less or equal (less for side="left") than given values"""
+        if self.value_counts is not None:
+            keys, counts = self.sorted_value_counts()
+            cumulative = np.concatenate([[0], np.cumsum(counts)])
+            return cumulative[np.searchsorted(keys, values, side=side)] / self.count
+        levels, quantiles = self._quantiles()
+        return np.interp(values, quantiles, levels, left=0, right=1)
+
+    def weighted_values(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Finite reference values with their weights: exact value counts if they are kept, otherwise
+        every interval between the kept quantiles is represented by its middle"""
+        if self.value_counts is not None:
+            return self.sorted_value_counts()
+        levels, quantiles = self._quantiles()
+        return (quantiles[1:] + quantiles[:-1]) / 2, np.diff(levels)
+
+    def _quantiles(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self.quantile_levels is None or self.quantiles is None:
+            raise ValueError("Reference profile keeps no quantiles for the column")
+        return np.array(self.quantile_levels), np.array(self.quantiles)
+
+    def counts(self, keys: List[Any]) -> np.ndarray:
+        if self.value_counts is None:
+            raise ValueError("Reference profile keeps no value counts for the column")
+        value_counts = dict(self.value_counts)
+        return np.array([value_counts.get(key, 0) for key in keys])
+
+    def distribution(self) -> Distribution:
+        """Distribution of the column values for rendering, the same as `get_distribution_for_column` makes"""
+        if self.type == ColumnType.Numerical:
+            if self.histogram_edges is None or self.histogram_counts is None:
+                return Distribution(x=[], y=[])
+            return Distribution(x=np.array(self.histogram_edges), y=np.array(self.histogram_counts))
+        value_counts = list(self.value_counts or [])
+        if self.missing > 0:
+            value_counts.append((np.nan, self.missing))
+        value_counts.sort(key=lambda item: -item[1])
+        return Distribution(x=[value for value, _ in value_counts], y=[count for _, count in value_counts])
+
+    def sorted_value_counts(self) -> Tuple[np.ndarray, np.ndarray]:
+        value_counts = sorted(self.value_counts or [])
+        return np.array([value for value, _ in value_counts], dtype=float), np.array(
+            [count for _, count in value_counts]
+        )
+
+
+def _python_value(value: Any) -> Any:
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class ReferenceProfile(Dataset):
+    """
+    Reference dataset summary: per column bin edges, histograms, value counts, quantiles and moments.
+
+    It is built once from a reference dataset and can be used instead of it in `Report.run`,
+    so every run only scans the current data. Metrics that need reference rows fail with a ValueError.
+    """
+
+    _columns: Dict[str, ColumnProfile]
+    _row_count: int
+
+    def __init__(
+        self,
+        columns: Dict[str, ColumnProfile],
+        data_definition: DataDefinition,
+        row_count: int,
+        metadata: Dict[str, MetadataValueType] = None,
+        tags: List[str] = None,
+    ):
+        self._columns = columns
+        self._data_definition = data_definition
+        self._row_count = row_count
+        self._metadata = metadata or {}
+        self._tags = tags or []
+
+    @classmethod
+    def from_dataset(cls, dataset: PossibleDatasetTypes) -> "ReferenceProfile":
+        dataset = Dataset.from_any(dataset)
+        if isinstance(dataset, ReferenceProfile):
+            return dataset
+        definition = dataset.data_definition
+        data = dataset.as_dataframe()
+        columns = {}
+        for column_type, names in (
+            (ColumnType.Numerical, definition.get_numerical_columns()),
+            (ColumnType.Categorical, definition.get_categorical_columns()),
+        ):
+            for name in names:
+                if name in data:
+                    columns[name] = ColumnProfile.from_series(column_type, data[name])
+        return cls(columns, definition, len(data), dataset.metadata, dataset.tags)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def column_profile(self, column_name: str) -> ColumnProfile:
+        if column_name not in self._columns:
+            raise ValueError(f"Column '{column_name}' is not profiled, only numerical and categorical columns are")
+        return self._columns[column_name]
+
+    def as_dataframe(self) -> pd.DataFrame:
+        raise ValueError("Reference profile keeps no rows, a reference dataset is required")
+
+    def column(self, column_name: str) -> DatasetColumn:
+        raise ValueError("Reference profile keeps no rows, a reference dataset is required")
+
+    def subdataset(self, column_name: str, label: object) -> "Dataset":
+        raise ValueError("Reference profile cannot be split into groups, a reference dataset is required")
+
+    def group_by(self, column_name: str) -> Dict[object, "Dataset"]:
+        raise ValueError("Reference profile cannot be split into groups, a reference dataset is required")
+
+    def stats(self) -> DatasetStats:
+        raise ValueError("Reference profile keeps no dataset stats, a reference dataset is required")
+
+    def add_descriptor(self, descriptor: Descriptor, options: AnyOptions = None):
+        raise ValueError("Descriptors cannot be added to a reference profile, add them before profiling")
+
+    def save(self, uri: str):
+        if not uri.endswith(f".{SERVEQUERY_PROFILE_EXT}"):
+            uri += f".{SERVEQUERY_PROFILE_EXT}"
+        with open(uri, "w") as f:
+            json.dump(
+                {
+                    "row_count": self._row_count,
+                    "tags": self._tags,
+                    "metadata": self._metadata,
+                    "data_definition": self._data_definition.dict(),
+                    "columns": {name: json.loads(column.json()) for name, column in self._columns.items()},
+                },
+                f,
+            )
+
+    @classmethod
+    def _can_load(cls, uri: str) -> bool:
+        return uri.endswith(f".{SERVEQUERY_PROFILE_EXT}") or os.path.exists(f"{uri}.{SERVEQUERY_PROFILE_EXT}")
+
+    @classmethod
+    def _load(cls, uri: str) -> "ReferenceProfile":
+        if not uri.endswith(f".{SERVEQUERY_PROFILE_EXT}"):
+            uri += f".{SERVEQUERY_PROFILE_EXT}"
+        with open(uri) as f:
+            data = json.load(f)
+        return cls(
+            {name: ColumnProfile.parse_obj(column) for name, column in data["columns"].items()},
+            DataDefinition.parse_obj(data["data_definition"]),
+            data["row_count"],
+            data["metadata"],
+            data["tags"],
+        )
+
+    @classmethod
+    def load(cls, uri: str) -> "ReferenceProfile":
+        return cls._load(uri)
+
+
+def get_profile_column_drift(
+    reference: ColumnProfile,
+    current_data: pd.Series,
+    stattest: Optional[PossibleStatTestType],
+    threshold: Optional[float],
+) -> Tuple[StatTest, StatTestResult]:
+    """
+    Calculate drift of a current column from a reference column profile
+
+    Stattests are computed by their profile implementations registered with `register_profile_stattest`.
+    Stattests on counts are exact. For numerical columns without value counts the reference values are
+    approximated by the kept quantiles: `wasserstein`, `ks`, `psi`, `kl_div` and `jensenshannon` are
+    supported, `ks` p-values of such columns are asymptotic.
+    Args:
+        reference: reference column profile
+        current_data: current column values
+        stattest: stattest to use, default stattest is selected the same way as for a reference dataset
+        threshold: stattest threshold
+    Returns:
+        stattest: used stattest
+        result: stattest result
+    """
+    column_type = reference.type
+    current_data = current_data.replace([-np.inf, np.inf], np.nan).dropna()
+    if reference.count == 0:
+        raise ValueError(
+            f"An empty column '{current_data.name}' was provided for drift calculation in the reference dataset."
+        )
+    if current_data.empty:
+        raise ValueError(
+            f"An empty column '{current_data.name}' was provided for drift calculation in the current dataset."
+        )
+    if column_type == ColumnType.Numerical and not pd.api.types.is_numeric_dtype(current_data):
+        raise ValueError(f"Column '{current_data.name}' in current dataset should contain numerical values only.")
+
+    if stattest is None:
+        if reference.value_counts is None:
+            n_values = reference.nunique
+        else:
+            n_values = len(set(value for value, _ in reference.value_counts) | set(current_data.unique()))
+        stat_test = get_default_stattest_for_size(reference.count, n_values, column_type)
+    else:
+        stat_test = get_registered_stattest(stattest, column_type)
+    impl = get_profile_stattest_impl(stat_test)
+    if impl is None:
+        raise ValueError(f"Stattest '{stat_test.display_name}' cannot be calculated with a reference profile")
+    actual_threshold = stat_test.default_threshold if threshold is None else threshold
+    drift_score, drifted = impl(reference, current_data, column_type, actual_threshold)
+    return stat_test, StatTestResult(drift_score=drift_score, drifted=drifted, actual_threshold=actual_threshold)
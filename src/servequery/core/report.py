@@ -1,7 +1,9 @@
 import dataclasses
 import json
 import pathlib
+import threading
 import typing
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from itertools import chain
 from typing import Callable
@@ -29,6 +31,7 @@ from servequery.legacy.base_metric import MetricResult as LegacyMetricResult
 from servequery.legacy.core import ColumnType
 from servequery.legacy.model.widget import BaseWidgetInfo
 from servequery.legacy.model.widget import link_metric
+from servequery.legacy.options.base import AnyOptions
 from servequery.legacy.pipeline.column_mapping import ColumnMapping
 from servequery.legacy.renderers.base_renderer import DEFAULT_RENDERERS
 from servequery.legacy.renderers.html_widgets import CounterData
@@ -87,10 +90,11 @@ class Context:
     _metrics: Dict[MetricId, MetricResult]
     _reference_metrics: Dict[MetricId, MetricResult]
     _metrics_graph: dict
+    _prefetched_graph: dict
     _input_data: Tuple[Dataset, Optional[Dataset]]
-    _current_graph_level: dict
     _legacy_metrics: Dict[str, Tuple[object, List[BaseWidgetInfo]]]
     _metrics_container: Dict[Fingerprint, List[MetricOrContainer]]
+    _group_values: Dict[Tuple[Fingerprint, str], Tuple[dict, Optional[dict]]]
     _labels: Optional[List[Label]]
 
     def __init__(self, report: "Report"):
@@ -99,9 +103,13 @@ class Context:
         self._configuration = report
         self._reference_metrics = {}
         self._metrics_graph = {}
-        self._current_graph_level = self._metrics_graph
+        self._prefetched_graph = {}
+        self._graph_local = threading.local()
+        self._metric_locks: Dict[MetricId, threading.RLock] = {}
+        self._metric_locks_guard = threading.Lock()
         self._legacy_metrics = {}
         self._metrics_container = {}
+        self._group_values = {}
         self._labels = None
 
     def init_dataset(self, current_data: Dataset, reference_data: Optional[Dataset]):
@@ -110,29 +118,57 @@ class Context:
     def column(self, column_name: str) -> ContextColumnData:
         return ContextColumnData(self._input_data[0].column(column_name))
 
+    @property
+    def _current_graph_level(self) -> dict:
+        # each thread walks its own branch of the metrics graph
+        return getattr(self._graph_local, "level", self._metrics_graph)
+
+    @_current_graph_level.setter
+    def _current_graph_level(self, value: dict):
+        self._graph_local.level = value
+
+    def _metric_lock(self, metric_id: MetricId) -> threading.RLock:
+        with self._metric_locks_guard:
+            if metric_id not in self._metric_locks:
+                self._metric_locks[metric_id] = threading.RLock()
+            return self._metric_locks[metric_id]
+
+    def calculate_metrics(self, calculations: Sequence[MetricCalculationBase], max_workers: int) -> None:
+        """Calculate independent metrics in a thread pool, results are stored in context."""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(self._prefetch_metric, calculations))
+
+    def _prefetch_metric(self, calc: MetricCalculationBase) -> None:
+        level: dict = {}
+        self._current_graph_level = level
+        self.calculate_metric(calc)
+        self._prefetched_graph[calc.id] = level[calc.id]
+
     def calculate_metric(self, calc: MetricCalculationBase[TResultType]) -> TResultType:
         if calc.id not in self._current_graph_level:
-            self._current_graph_level[calc.id] = {"_self": calc}
+            self._current_graph_level[calc.id] = self._prefetched_graph.pop(calc.id, None) or {"_self": calc}
         prev_level = self._current_graph_level
         self._current_graph_level = prev_level[calc.id]
-        if calc.id not in self._metrics:
-            current_result, reference_result = calc.call(self)
-            link_metric(current_result.widget, calc.to_metric())
-            metric_config = calc.to_metric_config()
-            current_result.set_metric_location(metric_config)
-            self._metrics[calc.id] = current_result
-            if reference_result is not None:
-                link_metric(reference_result.widget, calc.to_metric())
-                reference_result.set_metric_location(metric_config)
-                self._reference_metrics[calc.id] = reference_result
-            test_results = {
-                tc: tc.run_test(self, calc, current_result) for tc in calc.to_metric().get_bound_tests(self)
-            }
-            if test_results and len(test_results) > 0:
-                current_result.set_tests(list(test_results.values()))
+        with self._metric_lock(calc.id):
+            if calc.id not in self._metrics:
+                self._calculate_metric(calc)
         self._current_graph_level = prev_level
         return typing.cast(TResultType, self._metrics[calc.id])
 
+    def _calculate_metric(self, calc: MetricCalculationBase[TResultType]) -> None:
+        current_result, reference_result = calc.call(self)
+        link_metric(current_result.widget, calc.to_metric())
+        metric_config = calc.to_metric_config()
+        current_result.set_metric_location(metric_config)
+        self._metrics[calc.id] = current_result
+        if reference_result is not None:
+            link_metric(reference_result.widget, calc.to_metric())
+            reference_result.set_metric_location(metric_config)
+            self._reference_metrics[calc.id] = reference_result
+        test_results = {tc: tc.run_test(self, calc, current_result) for tc in calc.to_metric().get_bound_tests(self)}
+        if test_results and len(test_results) > 0:
+            current_result.set_tests(list(test_results.values()))
+
     def get_metric_result(self, metric: Union[MetricId, Metric, MetricCalculationBase[TResultType]]) -> MetricResult:
         if isinstance(metric, MetricId):
             return self._metrics[metric]
@@ -191,6 +227,14 @@ class Context:
     ) -> None:
         self._metrics_container[metric_container_fingerprint] = items
 
+    def group_values(self, metric_fingerprint: Fingerprint, column_name: str) -> Optional[Tuple[dict, Optional[dict]]]:
+        return self._group_values.get((metric_fingerprint, column_name))
+
+    def set_group_values(
+        self, metric_fingerprint: Fingerprint, column_name: str, values: Tuple[dict, Optional[dict]]
+    ) -> None:
+        self._group_values[(metric_fingerprint, column_name)] = values
+
     def get_labels(self, target: str, prediction: Optional[str]) -> List[Label]:
         if self._labels is not None:
             return self._labels
@@ -341,9 +385,21 @@ class Snapshot:
                 snapshot_items.append(SnapshotItem(calc.id, widget))
         return snapshot_items, widgets
 
+    def _collect_calculations(self, items: Sequence[MetricOrContainer]) -> List[MetricCalculationBase]:
+        calculations: List[MetricCalculationBase] = []
+        for item in items:
+            if isinstance(item, MetricContainer):
+                calculations.extend(self._collect_calculations(item.metrics(self.context)))
+            else:
+                calculations.append(item.to_calculation())
+        return calculations
+
     def run(self, current_data: Dataset, reference_data: Optional[Dataset]):
         self.context.init_dataset(current_data, reference_data)
         self._metrics = {}
+        if self.report.max_workers > 1:
+            # calculate in parallel first, the ordered pass below then only collects results and widgets
+            self.context.calculate_metrics(self._collect_calculations(self.report.items()), self.report.max_workers)
         self._snapshot_item, self._widgets = self._run_items(self.report.items(), self._metrics)
         self._top_level_metrics = list(self.context._metrics_graph.keys())
         metrics_results = [self._metrics.get(result) for result in self._top_level_metrics]
@@ -469,6 +525,8 @@ class Report:
     metadata: Dict[str, MetadataValueType]
     tags: List[str]
     include_tests: bool
+    max_workers: int
+    options: AnyOptions
 
     def __init__(
         self,
@@ -480,6 +538,8 @@ class Report:
         batch_size: str = None,
         dataset_id: str = None,
         include_tests: bool = False,
+        max_workers: int = 1,
+        options: AnyOptions = None,
     ):
         self.metrics = metrics
         self.metadata = metadata or {}
@@ -494,6 +554,8 @@ class Report:
         if dataset_id is not None:
             self.set_dataset_id(dataset_id)
         self.include_tests = include_tests
+        self.max_workers = max_workers
+        self.options = options
 
     def run(
         self,
@@ -503,8 +565,8 @@ class Report:
         metadata: Dict[str, MetadataValueType] = None,
         tags: List[str] = None,
     ) -> Snapshot:
-        current_dataset = Dataset.from_any(current_data)
-        reference_dataset = Dataset.from_any(reference_data) if reference_data is not None else None
+        current_dataset = Dataset.from_any(current_data, self.options)
+        reference_dataset = Dataset.from_any(reference_data, self.options) if reference_data is not None else None
         _timestamp = timestamp or datetime.now()
         _metadata = self.metadata.copy()
         if metadata is not None:
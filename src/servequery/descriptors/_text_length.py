@@ -11,6 +11,7 @@ from servequery.core.datasets import Dataset
 from servequery.core.datasets import DatasetColumn
 from servequery.core.datasets import Descriptor
 from servequery.legacy.core import ColumnType
+from servequery.legacy.features._text_processing import apply_text
 from servequery.legacy.options.base import Options
 
 
@@ -22,7 +23,10 @@ class TextLength(Descriptor):
         super().__init__(alias=alias or "text_length", tests=tests)
 
     def generate_data(self, dataset: "Dataset", options: Options) -> Union[DatasetColumn, Dict[str, DatasetColumn]]:
-        column_items_lengths = dataset.as_dataframe()[self.column_name].apply(_apply)
+        column = dataset.as_dataframe()[self.column_name]
+        column_items_lengths = apply_text(column, lambda text: text.length)
+        if column_items_lengths is None:
+            column_items_lengths = column.apply(_apply)
         return DatasetColumn(type=ColumnType.Numerical, data=column_items_lengths)
 
     def list_input_columns(self) -> Optional[List[str]]:
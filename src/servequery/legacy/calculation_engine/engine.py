@@ -18,11 +18,13 @@ from servequery.legacy.base_metric import Metric
 from servequery.legacy.base_metric import MetricResult
 from servequery.legacy.base_metric import TEngineDataType
 from servequery.legacy.calculation_engine.metric_implementation import MetricImplementation
+from servequery.legacy.features._text_processing import shared_text_columns
 from servequery.legacy.features.generated_features import FeatureResult
 from servequery.legacy.features.generated_features import GeneratedFeatures
 from servequery.legacy.options.base import Options
 from servequery.legacy.pipeline.column_mapping import ColumnMapping
 from servequery.legacy.utils.data_preprocessing import DataDefinition
+from servequery.legacy.utils.llm.wrapper import shared_llm_responses
 from servequery.pydantic_utils import Fingerprint
 
 if TYPE_CHECKING:
@@ -61,7 +63,8 @@ class Engine(Generic[TMetricImplementation, TInputData, TEngineDataType]):
         converted_data = self.convert_input_data(data)
 
         features_list = self.get_additional_features(converted_data.data_definition)
-        features = self.calculate_additional_features(converted_data, features_list, context.options)
+        with shared_llm_responses(), shared_text_columns():
+            features = self.calculate_additional_features(converted_data, features_list, context.options)
         context.set_features(features)
         self.inject_additional_features(converted_data, features)
         context.data = converted_data
@@ -14,16 +14,44 @@ from servequery.legacy.calculation_engine.engine import Engine
 from servequery.legacy.calculation_engine.engine import EngineDatasets
 from servequery.legacy.calculation_engine.engine import TInputData
 from servequery.legacy.calculation_engine.metric_implementation import MetricImplementation
+from servequery.legacy.features._text_processing import shared_text_columns
 from servequery.legacy.features.generated_features import FeatureResult
 from servequery.legacy.features.generated_features import GeneratedFeatures
+from servequery.legacy.options.agg_data import DescriptorExecutionOptions
 from servequery.legacy.options.base import Options
 from servequery.legacy.pipeline.column_mapping import ColumnMapping
 from servequery.legacy.utils.data_preprocessing import DataDefinition
 from servequery.legacy.utils.data_preprocessing import create_data_definition
+from servequery.legacy.utils.parallel import is_picklable
+from servequery.legacy.utils.parallel import map_chunks
+from servequery.legacy.utils.parallel import split_rows
 
 TMetric = TypeVar("TMetric", bound=Metric)
 
 
+def _generate_chunk_features(
+    data: pd.DataFrame, features: List[GeneratedFeatures], data_definition: DataDefinition, options: Options
+) -> List[pd.DataFrame]:
+    with shared_text_columns():
+        return [feature.generate_features_renamed(data, data_definition, options) for feature in features]
+
+
+def _generate_features_in_processes(
+    data: pd.DataFrame,
+    features: List[GeneratedFeatures],
+    data_definition: DataDefinition,
+    options: Options,
+    execution: DescriptorExecutionOptions,
+) -> Dict[GeneratedFeatures, pd.DataFrame]:
+    """Generate features for chunks of rows in a process pool and concatenate chunks of every feature"""
+    if len(features) == 0 or len(data) == 0:
+        return {}
+    chunks = map_chunks(
+        _generate_chunk_features, split_rows(data, execution), execution, features, data_definition, options
+    )
+    return {feature: pd.concat([chunk[i] for chunk in chunks]) for i, feature in enumerate(features)}
+
+
 class PythonEngine(Engine["PythonMetricImplementation", InputData, pd.DataFrame]):
     def convert_input_data(self, data: GenericInputData[pd.DataFrame]) -> InputData:
         if not isinstance(data.current_data, pd.DataFrame) or (
@@ -56,8 +84,21 @@ class PythonEngine(Engine["PythonMetricImplementation", InputData, pd.DataFrame]
     def calculate_additional_features(
         self, data: TInputData, features: List[GeneratedFeatures], options: Options
     ) -> Dict[GeneratedFeatures, FeatureResult[pd.DataFrame]]:
+        execution = options.get(DescriptorExecutionOptions)
+        in_processes = [feature for feature in features if is_picklable(feature)] if execution.processes > 1 else []
+        currents = _generate_features_in_processes(
+            data.current_data, in_processes, data.data_definition, options, execution
+        )
+        references = (
+            _generate_features_in_processes(data.reference_data, in_processes, data.data_definition, options, execution)
+            if data.reference_data is not None
+            else {}
+        )
         result: Dict[GeneratedFeatures, FeatureResult[pd.DataFrame]] = {}
         for feature in features:
+            if feature in currents:
+                result[feature] = FeatureResult(currents[feature], references.get(feature))
+                continue
             current = feature.generate_features_renamed(data.current_data, data.data_definition, options)
             reference = (
                 feature.generate_features_renamed(data.reference_data, data.data_definition, options)
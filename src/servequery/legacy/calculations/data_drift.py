@@ -13,7 +13,14 @@ import pandas as pd
 
 from servequery.legacy.base_metric import ColumnMetricResult
 from servequery.legacy.base_metric import MetricResult
+from servequery.legacy.calculations.stattests import PossibleStatTestType
+from servequery.legacy.calculations.stattests import StatTest
 from servequery.legacy.calculations.stattests import get_stattest
+from servequery.legacy.calculations.stattests.registry import BatchStatTestData
+from servequery.legacy.calculations.stattests.registry import StatTestResult
+from servequery.legacy.calculations.stattests.registry import get_batch_stattest_impl
+from servequery.legacy.calculations.stattests.registry import get_default_stattest_for_size
+from servequery.legacy.calculations.stattests.registry import get_registered_stattest
 from servequery.legacy.core import ColumnType
 from servequery.legacy.core import IncludeTags
 from servequery.legacy.metric_results import DatasetColumns
@@ -29,6 +36,9 @@ from servequery.legacy.utils.types import Numeric
 from servequery.legacy.utils.visualizations import get_distribution_for_column
 from servequery.legacy.utils.visualizations import prepare_df_for_time_index_plot
 
+# max number of values (rows of both datasets times columns) prepared at once for batch stattests
+BATCH_STATTEST_MAX_VALUES = 2**22
+
 Examples = List[str]
 Words = List[str]
 
@@ -110,6 +120,7 @@ def get_one_column_drift(
     agg_data: bool,
     num_correlations: Optional[tuple] = None,
     is_contains_nans: Optional[Tuple[pd.Series, pd.Series]] = None,
+    precomputed_drift: Optional[Tuple[StatTest, StatTestResult]] = None,
 ) -> ColumnDataDriftMetrics:
     if column_name not in current_data:
         raise ValueError(f"Cannot find column '{column_name}' in current dataset")
@@ -120,17 +131,7 @@ def get_one_column_drift(
     if column_type not in (ColumnType.Numerical, ColumnType.Categorical, ColumnType.Text):
         raise ValueError(f"Cannot calculate drift metric for column '{column_name}' with type {column_type}")
 
-    stattest = None
-
-    if column_name == dataset_columns.utility_columns.target and column_type == ColumnType.Numerical:
-        stattest = options.num_target_stattest_func
-
-    elif column_name == dataset_columns.utility_columns.target and column_type == ColumnType.Categorical:
-        stattest = options.cat_target_stattest_func
-
-    if not stattest:
-        stattest = options.get_feature_stattest_func(column_name, column_type.value)
-
+    stattest = _get_column_stattest_func(column_name, column_type, options, dataset_columns)
     threshold = options.get_threshold(column_name, column_type.value)
     current_column = current_data[column_name]
     reference_column = reference_data[column_name]
@@ -170,8 +171,11 @@ def get_one_column_drift(
         if not pd.api.types.is_numeric_dtype(current_column):
             raise ValueError(f"Column '{column_name}' in current dataset should contain numerical values only.")
 
-    drift_test_function = get_stattest(reference_column, current_column, column_type, stattest)
-    drift_result = drift_test_function(reference_column, current_column, column_type, threshold)
+    if precomputed_drift is None:
+        drift_test_function = get_stattest(reference_column, current_column, column_type, stattest)
+        drift_result = drift_test_function(reference_column, current_column, column_type, threshold)
+    else:
+        drift_test_function, drift_result = precomputed_drift
 
     scatter: Optional[Union[ScatterField, ScatterAggField]] = None
     if column_type == ColumnType.Numerical:
@@ -214,11 +218,13 @@ def get_one_column_drift(
                 x_name = "Index"
         else:
             current_scatter = {}
+            # the plot needs only the column, the datetime column and the index, don't copy the whole frame
+            scatter_columns = [column_name]
+            if datetime_column_name is not None and datetime_column_name != column_name:
+                scatter_columns.append(datetime_column_name)
+            curr_data = current_data[scatter_columns]
             if is_contains_nans is None or is_contains_nans[0].any():
-                curr_data = current_data.copy()
-                curr_data.dropna(axis=0, how="any", inplace=True, subset=[column_name])
-            else:
-                curr_data = current_data
+                curr_data = curr_data.dropna(axis=0, how="any", subset=[column_name])
 
             df, prefix = prepare_df_for_time_index_plot(
                 curr_data,
@@ -352,6 +358,107 @@ def get_one_column_drift(
     return metrics
 
 
+def _get_column_stattest_func(
+    column_name: str, column_type: ColumnType, options: DataDriftOptions, dataset_columns: DatasetColumns
+) -> Optional[PossibleStatTestType]:
+    stattest = None
+
+    if column_name == dataset_columns.utility_columns.target and column_type == ColumnType.Numerical:
+        stattest = options.num_target_stattest_func
+
+    elif column_name == dataset_columns.utility_columns.target and column_type == ColumnType.Categorical:
+        stattest = options.cat_target_stattest_func
+
+    if not stattest:
+        stattest = options.get_feature_stattest_func(column_name, column_type.value)
+    return stattest
+
+
+def get_numerical_drift_batch(
+    *,
+    current_data: pd.DataFrame,
+    reference_data: pd.DataFrame,
+    columns: List[str],
+    options: DataDriftOptions,
+    dataset_columns: DatasetColumns,
+) -> Dict[str, Tuple[StatTest, StatTestResult]]:
+    """Run stattests which have batch implementations for many numerical columns at once.
+
+    Columns are skipped and left for `get_one_column_drift` if their stattest has no batch implementation
+    or if they can't be handled exactly the same way: non-numerical dtypes, empty columns
+    and infinite values in columns without NaNs, which are not cleaned.
+    Columns are processed in chunks of at most BATCH_STATTEST_MAX_VALUES values.
+    """
+    columns = [
+        column
+        for column in columns
+        if column in current_data
+        and column in reference_data
+        and current_data[column].dtype.kind in "iuf"
+        and reference_data[column].dtype.kind in "iuf"
+    ]
+    chunk_size = max(BATCH_STATTEST_MAX_VALUES // max(len(reference_data) + len(current_data), 1), 1)
+    result: Dict[str, Tuple[StatTest, StatTestResult]] = {}
+    for start in range(0, len(columns), chunk_size):
+        result.update(
+            _get_numerical_drift_chunk(
+                current_data, reference_data, columns[start : start + chunk_size], options, dataset_columns
+            )
+        )
+    return result
+
+
+def _get_numerical_drift_chunk(
+    current_data: pd.DataFrame,
+    reference_data: pd.DataFrame,
+    columns: List[str],
+    options: DataDriftOptions,
+    dataset_columns: DatasetColumns,
+) -> Dict[str, Tuple[StatTest, StatTestResult]]:
+    reference_values = reference_data[columns].to_numpy(dtype=float)
+    current_values = current_data[columns].to_numpy(dtype=float)
+    supported = _is_cleaned_as_finite(reference_values) & _is_cleaned_as_finite(current_values)
+    data = BatchStatTestData.from_arrays(reference_values[:, supported], current_values[:, supported])
+    columns = [column for column, is_supported in zip(columns, supported) if is_supported]
+
+    columns_by_stattest: Dict[StatTest, List[int]] = {}
+    for index, column in enumerate(columns):
+        if data.reference_size[index] == 0 or data.current_size[index] == 0:
+            continue
+        stattest_func = _get_column_stattest_func(column, ColumnType.Numerical, options, dataset_columns)
+        try:
+            if stattest_func is None:
+                stattest = get_default_stattest_for_size(
+                    data.reference_size[index], data.nunique[index], ColumnType.Numerical
+                )
+            else:
+                stattest = get_registered_stattest(stattest_func, ColumnType.Numerical)
+        except ValueError:
+            # let the column raise its error in get_one_column_drift
+            continue
+        if get_batch_stattest_impl(stattest) is not None:
+            columns_by_stattest.setdefault(stattest, []).append(index)
+
+    result: Dict[str, Tuple[StatTest, StatTestResult]] = {}
+    for stattest, indices in columns_by_stattest.items():
+        thresholds = [options.get_threshold(columns[index], ColumnType.Numerical.value) for index in indices]
+        actual_thresholds = np.array(
+            [stattest.default_threshold if threshold is None else threshold for threshold in thresholds]
+        )
+        scores, drifted = get_batch_stattest_impl(stattest)(data.select(np.array(indices)), actual_thresholds)
+        for index, score, is_drifted, threshold in zip(indices, scores, drifted, actual_thresholds):
+            result[columns[index]] = (
+                stattest,
+                StatTestResult(drift_score=float(score), drifted=bool(is_drifted), actual_threshold=threshold),
+            )
+    return result
+
+
+def _is_cleaned_as_finite(values: np.ndarray) -> np.ndarray:
+    # get_one_column_drift drops infinite values only from columns with NaNs
+    return np.isfinite(values).all(axis=0) | np.isnan(values).any(axis=0)
+
+
 def _get_pred_labels_from_prob(dataframe: pd.DataFrame, prediction_column: list) -> List[str]:
     """Get labels from probabilities from columns by prediction columns list"""
     array_prediction = dataframe[prediction_column].to_numpy()
@@ -495,6 +602,14 @@ def get_drift_for_columns(
         reference_correlations,
     )
 
+    precomputed_drift = get_numerical_drift_batch(
+        current_data=current_data,
+        reference_data=reference_data,
+        columns=num_columns,
+        options=data_drift_options,
+        dataset_columns=dataset_columns,
+    )
+
     for column_name in columns:
         drift_by_columns[column_name] = get_one_column_drift(
             current_data=current_data,
@@ -506,6 +621,7 @@ def get_drift_for_columns(
             agg_data=agg_data,
             num_correlations=num_correlations,
             is_contains_nans=(is_current_contains_nans, is_reference_contains_nans),
+            precomputed_drift=precomputed_drift.get(column_name),
         )
 
     dataset_drift = get_dataset_drift(drift_by_columns, drift_share_threshold)
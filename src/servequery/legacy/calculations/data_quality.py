@@ -1,6 +1,7 @@
 """Methods for overall dataset quality calculations - rows count, a specific values count, etc."""
 
 import dataclasses
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable
 from typing import Dict
 from typing import List
@@ -11,7 +12,7 @@ from typing import Union
 
 import numpy as np
 import pandas as pd
-from scipy.stats import chi2_contingency
+from scipy import stats
 
 from servequery.legacy.calculations.utils import relabel_data
 from servequery.legacy.core import ColumnType
@@ -19,6 +20,7 @@ from servequery.legacy.metric_results import ColumnCorrelations
 from servequery.legacy.metric_results import DatasetColumns
 from servequery.legacy.metric_results import Distribution
 from servequery.legacy.metric_results import DistributionIncluded
+from servequery.legacy.options.agg_data import CorrelationOptions
 from servequery.legacy.utils.data_preprocessing import DataDefinition
 from servequery.legacy.utils.types import ColumnDistribution
 
@@ -334,16 +336,52 @@ def _cramer_v(x: pd.Series, y: pd.Series) -> float:
     Returns:
         Value of the Cramér's V
     """
-    arr = pd.crosstab(x, y).values
-    chi2_stat = chi2_contingency(arr, correction=False)
-    phi2 = chi2_stat[0] / arr.sum()
-    n_rows, n_cols = arr.shape
-    if min(n_cols - 1, n_rows - 1) == 0:
-        value = np.nan
-    else:
-        value = np.sqrt(phi2 / min(n_cols - 1, n_rows - 1))
+    return _cramer_v_codes(_encode_categorical(x), _encode_categorical(y))
+
+
+EncodedColumn = Tuple[np.ndarray, int]
+
 
-    return value
+def _encode_categorical(column: pd.Series) -> EncodedColumn:
+    """Encode column values with integer codes, missing values get -1
+    Returns:
+        codes: code of every value
+        size: number of distinct codes
+    """
+    codes, uniques = pd.factorize(column)
+    return codes.astype(np.int64), len(uniques)
+
+
+def _cramer_v_codes(x: EncodedColumn, y: EncodedColumn) -> float:
+    """Cramér's V of encoded columns, the same as `chi2_contingency` of their crosstab gives"""
+    x_codes, x_size = x
+    y_codes, y_size = y
+    valid = (x_codes >= 0) & (y_codes >= 0)
+    if not valid.all():
+        x_codes = x_codes[valid]
+        y_codes = y_codes[valid]
+    cells = x_codes * y_size + y_codes
+    if x_size * y_size <= max(len(cells), 1024):
+        table = np.bincount(cells, minlength=x_size * y_size).reshape(x_size, y_size)
+        table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+        n_rows, n_cols = table.shape
+        n = table.sum()
+        expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+        chi2_stat = np.sum((table - expected) ** 2 / expected)
+    else:
+        # too many possible cells for a dense table: sum over observed cells only, zero cells add their expected
+        # frequencies, which sum up to n with the observed ones, so chi2 = sum(observed^2 / expected) - n
+        cells, counts = np.unique(cells, return_counts=True)
+        rows, row_index = np.unique(cells // y_size, return_inverse=True)
+        cols, col_index = np.unique(cells % y_size, return_inverse=True)
+        n_rows, n_cols = len(rows), len(cols)
+        n = counts.sum()
+        row_sums = np.bincount(row_index, weights=counts)
+        col_sums = np.bincount(col_index, weights=counts)
+        chi2_stat = np.sum(counts**2 / (row_sums[row_index] * col_sums[col_index] / n)) - n
+    if min(n_cols - 1, n_rows - 1) <= 0:
+        return np.nan
+    return np.sqrt(chi2_stat / n / min(n_cols - 1, n_rows - 1))
 
 
 def get_pairwise_correlation(df, func: Callable[[pd.Series, pd.Series], float]) -> pd.DataFrame:
@@ -371,6 +409,92 @@ def get_pairwise_correlation(df, func: Callable[[pd.Series, pd.Series], float])
         return pd.DataFrame(data=corr_array, columns=columns, index=columns)
 
 
+def _pairwise_matrix(
+    columns: pd.Index, func: Callable[[int, int], float], pairs: List[Tuple[int, int]], max_workers: int
+) -> pd.DataFrame:
+    """Fill symmetric correlation matrix with func values for given pairs of column indexes"""
+    corr_array = np.eye(len(columns))
+
+    def fill(pair: Tuple[int, int]):
+        i, j = pair
+        corr_array[i, j] = corr_array[j, i] = func(i, j)
+
+    if max_workers > 1 and len(pairs) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(fill, pairs))
+    else:
+        for pair in pairs:
+            fill(pair)
+    return pd.DataFrame(data=corr_array, columns=columns, index=columns)
+
+
+def get_pairwise_cramer_v(df: pd.DataFrame, max_workers: int = 1) -> pd.DataFrame:
+    """Compute Cramér's V of all pairs of columns, every column is encoded once
+    Args:
+        df: initial data frame.
+        max_workers: number of threads to compute pairs in.
+    Returns:
+        Correlation matrix.
+    """
+    if df.shape[1] <= 1:
+        return pd.DataFrame()
+    encoded = [_encode_categorical(df[column]) for column in df.columns]
+    pairs = [(i, j) for i in range(df.shape[1]) for j in range(i)]
+    return _pairwise_matrix(df.columns, lambda i, j: _cramer_v_codes(encoded[i], encoded[j]), pairs, max_workers)
+
+
+def _get_rank_correlations(df: pd.DataFrame, options: CorrelationOptions) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Compute spearman and kendall correlation matrices, the same as `df.corr` does, ranking columns once
+    Args:
+        df: numerical columns.
+        options: correlation options.
+    Returns:
+        spearman: Spearman rank correlation matrix.
+        kendall: Kendall Tau correlation matrix, over sampled rows if `kendall_sample_size` is set.
+    """
+    ranks = df.rank()
+    complete = ranks.notna().all().to_numpy()
+    values = ranks.to_numpy(dtype=float)
+    # for complete columns spearman is pearson correlation of ranks,
+    # other columns are ranked again over rows where both columns are present
+    spearman = ranks.loc[:, complete].corr().reindex(index=df.columns, columns=df.columns)
+
+    def spearman_pair(i: int, j: int) -> float:
+        valid = ~np.isnan(values[:, i]) & ~np.isnan(values[:, j])
+        if valid.sum() < 2:
+            return np.nan
+        x = stats.rankdata(values[valid, i]) - (valid.sum() + 1) / 2
+        y = stats.rankdata(values[valid, j]) - (valid.sum() + 1) / 2
+        denominator = np.sqrt(np.dot(x, x) * np.dot(y, y))
+        # a constant column has no rank variance, its correlation is undefined as in `df.corr`
+        if denominator == 0:
+            return np.nan
+        return float(np.dot(x, y) / denominator)
+
+    incomplete_pairs = [(i, j) for i in range(df.shape[1]) for j in range(i + 1) if not complete[i] or not complete[j]]
+    if incomplete_pairs:
+        incomplete = _pairwise_matrix(df.columns, spearman_pair, incomplete_pairs, options.max_workers).to_numpy()
+        spearman_values = spearman.to_numpy(copy=True)
+        rows, cols = (np.array(index) for index in zip(*incomplete_pairs))
+        spearman_values[rows, cols] = spearman_values[cols, rows] = incomplete[rows, cols]
+        spearman = pd.DataFrame(data=spearman_values, columns=df.columns, index=df.columns)
+
+    kendall_values = values
+    if options.kendall_sample_size is not None and len(values) > options.kendall_sample_size:
+        rng = np.random.default_rng(options.kendall_random_seed)
+        kendall_values = values[np.sort(rng.choice(len(values), options.kendall_sample_size, replace=False))]
+
+    def kendall_pair(i: int, j: int) -> float:
+        valid = ~np.isnan(kendall_values[:, i]) & ~np.isnan(kendall_values[:, j])
+        if valid.sum() < 2:
+            return np.nan
+        return stats.kendalltau(kendall_values[valid, i], kendall_values[valid, j])[0]
+
+    pairs = [(i, j) for i in range(df.shape[1]) for j in range(i)]
+    kendall = _pairwise_matrix(df.columns, kendall_pair, pairs, options.max_workers)
+    return spearman, kendall
+
+
 def _calculate_correlations(df: pd.DataFrame, num_for_corr, cat_for_corr, kind):
     """Calculate correlation matrix depending on the kind parameter
     Args:
@@ -392,19 +516,33 @@ def _calculate_correlations(df: pd.DataFrame, num_for_corr, cat_for_corr, kind):
     elif kind == "kendall":
         return df[num_for_corr].corr("kendall")
     elif kind == "cramer_v":
-        return get_pairwise_correlation(df[cat_for_corr], _cramer_v)
+        return get_pairwise_cramer_v(df[cat_for_corr])
 
 
 def calculate_correlations(
-    dataset: pd.DataFrame, data_definition: DataDefinition, add_text_columns: Optional[list] = None
+    dataset: pd.DataFrame,
+    data_definition: DataDefinition,
+    add_text_columns: Optional[list] = None,
+    options: Optional[CorrelationOptions] = None,
 ) -> Dict:
+    """Calculate pearson, spearman, kendall and cramer_v correlation matrices
+    Args:
+        dataset: data for processing
+        data_definition: definition for all columns in data
+        add_text_columns: additional numerical columns
+        options: correlation options
+    Returns:
+        Correlation matrices by their kind.
+    """
+    options = options or CorrelationOptions()
     num_for_corr, cat_for_corr = _select_features_for_corr(dataset, data_definition)
     if add_text_columns is not None:
         num_for_corr += add_text_columns
     correlations = {}
 
-    for kind in ["pearson", "spearman", "kendall", "cramer_v"]:
-        correlations[kind] = _calculate_correlations(dataset, num_for_corr, cat_for_corr, kind)
+    correlations["pearson"] = _calculate_correlations(dataset, num_for_corr, cat_for_corr, "pearson")
+    correlations["spearman"], correlations["kendall"] = _get_rank_correlations(dataset[num_for_corr], options)
+    correlations["cramer_v"] = get_pairwise_cramer_v(dataset[cat_for_corr], options.max_workers)
 
     return correlations
 
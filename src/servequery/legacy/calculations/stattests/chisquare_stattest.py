@@ -23,16 +23,23 @@ Example:
     >>> options = DataDriftOptions(all_features_stattest="chisquare")
 """
 
+from typing import TYPE_CHECKING
 from typing import Tuple
 
+import numpy as np
 import pandas as pd
 from scipy.stats import chisquare
 
 from servequery.legacy.calculations.stattests.registry import StatTest
+from servequery.legacy.calculations.stattests.registry import register_profile_stattest
 from servequery.legacy.calculations.stattests.registry import register_stattest
+from servequery.legacy.calculations.stattests.utils import get_profile_category_counts
 from servequery.legacy.calculations.stattests.utils import get_unique_not_nan_values_list_from_series
 from servequery.legacy.core import ColumnType
 
+if TYPE_CHECKING:
+    from servequery.core.profile import ColumnProfile
+
 
 def _chi_stat_test(
     reference_data: pd.Series, current_data: pd.Series, feature_type: ColumnType, threshold: float
@@ -40,10 +47,27 @@ def _chi_stat_test(
     keys = get_unique_not_nan_values_list_from_series(current_data=current_data, reference_data=reference_data)
     ref_feature_dict = {**dict.fromkeys(keys, 0), **dict(reference_data.value_counts())}
     current_feature_dict = {**dict.fromkeys(keys, 0), **dict(current_data.value_counts())}
-    k_norm = current_data.shape[0] / reference_data.shape[0]
-    f_exp = [ref_feature_dict[key] * k_norm for key in keys]
-    f_obs = [current_feature_dict[key] for key in keys]
-    p_value = chisquare(f_obs, f_exp)[1]
+    return _chi_counts_test(
+        np.array([ref_feature_dict[key] for key in keys]),
+        np.array([current_feature_dict[key] for key in keys]),
+        reference_data.shape[0],
+        current_data.shape[0],
+        threshold,
+    )
+
+
+def _chi_stat_test_profile(
+    reference: "ColumnProfile", current_data: pd.Series, feature_type: ColumnType, threshold: float
+) -> Tuple[float, bool]:
+    _, reference_counts, current_counts = get_profile_category_counts(reference, current_data)
+    return _chi_counts_test(reference_counts, current_counts, reference.count, current_data.shape[0], threshold)
+
+
+def _chi_counts_test(
+    reference_counts: np.ndarray, current_counts: np.ndarray, reference_size: int, current_size: int, threshold: float
+) -> Tuple[float, bool]:
+    k_norm = current_size / reference_size
+    p_value = chisquare(current_counts, reference_counts * k_norm)[1]
     return p_value, p_value < threshold
 
 
@@ -54,3 +78,4 @@ chi_stat_test = StatTest(
 )
 
 register_stattest(chi_stat_test, default_impl=_chi_stat_test)
+register_profile_stattest(chi_stat_test, _chi_stat_test_profile)
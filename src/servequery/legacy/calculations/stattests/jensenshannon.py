@@ -23,17 +23,28 @@ Example:
     >>> options = DataDriftOptions(all_features_stattest="jensenshannon")
 """
 
+from typing import TYPE_CHECKING
 from typing import Optional
 from typing import Tuple
 
+import numpy as np
 import pandas as pd
+from scipy import special
 from scipy.spatial import distance
 
+from servequery.legacy.calculations.stattests.registry import BatchStatTestData
 from servequery.legacy.calculations.stattests.registry import StatTest
+from servequery.legacy.calculations.stattests.registry import register_batch_stattest
+from servequery.legacy.calculations.stattests.registry import register_profile_stattest
 from servequery.legacy.calculations.stattests.registry import register_stattest
 from servequery.legacy.calculations.stattests.utils import get_binned_data
+from servequery.legacy.calculations.stattests.utils import get_binned_data_batch
+from servequery.legacy.calculations.stattests.utils import get_binned_data_profile
 from servequery.legacy.core import ColumnType
 
+if TYPE_CHECKING:
+    from servequery.core.profile import ColumnProfile
+
 
 def _jensenshannon(
     reference_data: pd.Series,
@@ -56,10 +67,48 @@ def _jensenshannon(
         test_result: whether the drift is detected
     """
     reference_percents, current_percents = get_binned_data(reference_data, current_data, feature_type, n_bins, False)
+    return _jensenshannon_percents(reference_percents, current_percents, threshold, base)
+
+
+def _jensenshannon_profile(
+    reference: "ColumnProfile",
+    current_data: pd.Series,
+    feature_type: ColumnType,
+    threshold: float,
+    n_bins: int = 30,
+    base: Optional[float] = None,
+) -> Tuple[float, bool]:
+    reference_percents, current_percents = get_binned_data_profile(reference, current_data, feature_type, n_bins, False)
+    return _jensenshannon_percents(reference_percents, current_percents, threshold, base)
+
+
+def _jensenshannon_percents(
+    reference_percents: np.ndarray, current_percents: np.ndarray, threshold: float, base: Optional[float]
+) -> Tuple[float, bool]:
     jensenshannon_value = distance.jensenshannon(reference_percents, current_percents, base)
     return jensenshannon_value, jensenshannon_value >= threshold
 
 
+def _jensenshannon_batch(
+    data: BatchStatTestData,
+    threshold: np.ndarray,
+    n_bins: int = 30,
+    base: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    reference_percents, current_percents = get_binned_data_batch(data, n_bins, False)
+    # the same as distance.jensenshannon for every column
+    reference_percents = reference_percents / np.nansum(reference_percents, axis=0)
+    current_percents = current_percents / np.nansum(current_percents, axis=0)
+    middle = (reference_percents + current_percents) / 2.0
+    js = np.nansum(special.rel_entr(reference_percents, middle), axis=0) + np.nansum(
+        special.rel_entr(current_percents, middle), axis=0
+    )
+    if base is not None:
+        js /= np.log(base)
+    jensenshannon_value = np.sqrt(js / 2.0)
+    return jensenshannon_value, jensenshannon_value >= threshold
+
+
 jensenshannon_stat_test = StatTest(
     name="jensenshannon",
     display_name="Jensen-Shannon distance",
@@ -68,3 +117,5 @@ jensenshannon_stat_test = StatTest(
 )
 
 register_stattest(jensenshannon_stat_test, _jensenshannon)
+register_batch_stattest(jensenshannon_stat_test, _jensenshannon_batch)
+register_profile_stattest(jensenshannon_stat_test, _jensenshannon_profile)
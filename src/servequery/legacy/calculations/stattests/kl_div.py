@@ -23,16 +23,27 @@ Example:
     >>> options = DataDriftOptions(all_features_stattest="kl_div")
 """
 
+from typing import TYPE_CHECKING
 from typing import Tuple
 
+import numpy as np
 import pandas as pd
+from scipy import special
 from scipy import stats
 
+from servequery.legacy.calculations.stattests.registry import BatchStatTestData
 from servequery.legacy.calculations.stattests.registry import StatTest
+from servequery.legacy.calculations.stattests.registry import register_batch_stattest
+from servequery.legacy.calculations.stattests.registry import register_profile_stattest
 from servequery.legacy.calculations.stattests.registry import register_stattest
 from servequery.legacy.calculations.stattests.utils import get_binned_data
+from servequery.legacy.calculations.stattests.utils import get_binned_data_batch
+from servequery.legacy.calculations.stattests.utils import get_binned_data_profile
 from servequery.legacy.core import ColumnType
 
+if TYPE_CHECKING:
+    from servequery.core.profile import ColumnProfile
+
 
 def _kl_div(
     reference_data: pd.Series, current_data: pd.Series, feature_type: ColumnType, threshold: float, n_bins: int = 30
@@ -49,10 +60,32 @@ def _kl_div(
         test_result: whether the drift is detected
     """
     reference_percents, current_percents = get_binned_data(reference_data, current_data, feature_type, n_bins)
+    return _kl_div_percents(reference_percents, current_percents, threshold)
+
+
+def _kl_div_profile(
+    reference: "ColumnProfile", current_data: pd.Series, feature_type: ColumnType, threshold: float, n_bins: int = 30
+) -> Tuple[float, bool]:
+    reference_percents, current_percents = get_binned_data_profile(reference, current_data, feature_type, n_bins)
+    return _kl_div_percents(reference_percents, current_percents, threshold)
+
+
+def _kl_div_percents(
+    reference_percents: np.ndarray, current_percents: np.ndarray, threshold: float
+) -> Tuple[float, bool]:
     kl_div_value = stats.entropy(reference_percents, current_percents)
     return kl_div_value, kl_div_value >= threshold
 
 
+def _kl_div_batch(data: BatchStatTestData, threshold: np.ndarray, n_bins: int = 30) -> Tuple[np.ndarray, np.ndarray]:
+    reference_percents, current_percents = get_binned_data_batch(data, n_bins)
+    # the same as stats.entropy for every column
+    reference_percents = reference_percents / np.nansum(reference_percents, axis=0)
+    current_percents = current_percents / np.nansum(current_percents, axis=0)
+    kl_div_value = np.nansum(special.rel_entr(reference_percents, current_percents), axis=0)
+    return kl_div_value, kl_div_value >= threshold
+
+
 kl_div_stat_test = StatTest(
     name="kl_div",
     display_name="Kullback-Leibler divergence",
@@ -61,3 +94,5 @@ kl_div_stat_test = StatTest(
 )
 
 register_stattest(kl_div_stat_test, _kl_div)
+register_batch_stattest(kl_div_stat_test, _kl_div_batch)
+register_profile_stattest(kl_div_stat_test, _kl_div_profile)
@@ -23,15 +23,27 @@ Example:
     >>> options = DataDriftOptions(all_features_stattest="ks")
 """
 
+from typing import TYPE_CHECKING
 from typing import Tuple
 
+import numpy as np
 import pandas as pd
 from scipy.stats import ks_2samp
+from scipy.stats import kstwo
 
+from servequery.legacy.calculations.stattests.registry import BatchStatTestData
 from servequery.legacy.calculations.stattests.registry import StatTest
+from servequery.legacy.calculations.stattests.registry import register_batch_stattest
+from servequery.legacy.calculations.stattests.registry import register_profile_stattest
 from servequery.legacy.calculations.stattests.registry import register_stattest
 from servequery.legacy.core import ColumnType
 
+if TYPE_CHECKING:
+    from servequery.core.profile import ColumnProfile
+
+# the same limit as in `scipy.stats.ks_2samp`: larger samples get an asymptotic p-value
+KS_EXACT_SIZE = 10000
+
 
 def _ks_stat_test(
     reference_data: pd.Series, current_data: pd.Series, feature_type: ColumnType, threshold: float
@@ -50,6 +62,48 @@ def _ks_stat_test(
     return p_value, p_value <= threshold
 
 
+def _ks_stat_test_profile(
+    reference: "ColumnProfile", current_data: pd.Series, feature_type: ColumnType, threshold: float
+) -> Tuple[float, bool]:
+    """Kolmogorov-Smirnov test against a reference column profile.
+
+    Reference values are restored from value counts while `ks_2samp` would compute an exact p-value,
+    otherwise the statistic is taken from the reference cdf and the p-value is asymptotic, as `ks_2samp` does.
+    """
+    reference_size = reference.count
+    current_size = len(current_data)
+    if reference.value_counts is not None and max(reference_size, current_size) <= KS_EXACT_SIZE:
+        values, counts = reference.sorted_value_counts()
+        return _ks_stat_test(pd.Series(np.repeat(values, counts)), current_data, feature_type, threshold)
+    current_values = np.sort(current_data.to_numpy(dtype=float))
+    if reference.value_counts is not None:
+        points = np.concatenate([current_values, reference.sorted_value_counts()[0]])
+        current_cdf = np.searchsorted(current_values, points, side="right") / current_size
+        statistic = np.max(np.abs(current_cdf - reference.cdf(points)))
+    else:
+        # the reference cdf is continuous, current one jumps at its values
+        points = np.concatenate([current_values, reference.quantiles or []])
+        reference_cdf = reference.cdf(points)
+        statistic = max(
+            np.max(np.abs(np.searchsorted(current_values, points, side="right") / current_size - reference_cdf)),
+            np.max(np.abs(np.searchsorted(current_values, points, side="left") / current_size - reference_cdf)),
+        )
+    m, n = sorted([float(reference_size), float(current_size)], reverse=True)
+    p_value = float(np.clip(kstwo.sf(statistic, np.round(m * n / (m + n))), 0, 1))
+    return p_value, p_value <= threshold
+
+
+def _ks_stat_test_batch(data: BatchStatTestData, threshold: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # exact p-values are computed by scipy per column, columns are already cleaned and sorted
+    p_value = np.array(
+        [
+            ks_2samp(data.reference_column(index), data.current_column(index))[1]
+            for index in range(data.reference_data.shape[1])
+        ]
+    )
+    return p_value, p_value <= threshold
+
+
 ks_stat_test = StatTest(
     name="ks",
     display_name="K-S p_value",
@@ -58,3 +112,5 @@ ks_stat_test = StatTest(
 )
 
 register_stattest(ks_stat_test, _ks_stat_test)
+register_batch_stattest(ks_stat_test, _ks_stat_test_batch)
+register_profile_stattest(ks_stat_test, _ks_stat_test_profile)
@@ -1,3 +1,4 @@
+from typing import Iterator
 from typing import Optional
 from typing import Tuple
 
@@ -8,6 +9,14 @@ from servequery.legacy.calculations.stattests.registry import StatTest
 from servequery.legacy.calculations.stattests.registry import register_stattest
 from servequery.legacy.core import ColumnType
 
+MMD_PERMUTATIONS = 100
+# Upper bound of kernel matrix elements held in memory at once (~200MB of float64).
+MMD_MAX_KERNEL_ELEMENTS = 25_000_000
+MMD_RFF_FEATURES = 512
+# Fewer random Fourier features approximate the kernel too coarsely, so smaller budgets are rejected.
+MMD_MIN_RFF_FEATURES = 64
+MMD_SIGMA_SAMPLE = 1000
+
 
 def squared_paired_dist(x: np.ndarray, y: np.ndarray) -> np.ndarray:
     """Calculates the squared euclidean pairwise distance
@@ -100,22 +109,140 @@ def mmd_2samp(kernel_matrix: np.ndarray, no_y_values: int, permute: bool = False
     return mmd
 
 
-def mmd_pval(x: np.ndarray, y: np.ndarray) -> Tuple[float, float]:
+def rff_features(data: np.ndarray, sigma: float, n_features: int, random_state: int = 0) -> np.ndarray:
+    """Map data to random Fourier features approximating the RBF kernel
+    Args:
+        data: data as 2-d numpy array
+        sigma: RBF kernel width
+        n_features: number of random features
+        random_state: seed of the random projection, reuse it to map reference and current data together
+    Returns:
+        features: array of shape (len(data), n_features) whose inner products approximate the kernel
+    """
+    rng = np.random.RandomState(random_state)
+    weights = rng.normal(scale=1.0 / sigma, size=(data.shape[1], n_features))
+    offsets = rng.uniform(0, 2 * np.pi, size=n_features)
+    features = np.dot(data, weights)
+    features += offsets
+    np.cos(features, out=features)
+    features *= np.sqrt(2.0 / n_features)
+    return features
+
+
+def label_matrix(indices: np.ndarray, size: int) -> np.ndarray:
+    """Build 0/1 (or count) indicator columns for batches of sample indices
+    Args:
+        indices: array of shape (batch, k) with sampled row indices
+        size: number of rows in the kernel matrix
+    Returns:
+        labels: array of shape (size, batch) counting how often each row is sampled
+    """
+    labels = np.zeros((size, indices.shape[0]))
+    np.add.at(labels, (indices, np.arange(indices.shape[0])[:, None]), 1)
+    return labels
+
+
+def kernel_quadratic_sums(
+    kernel_matrix: np.ndarray, labels: np.ndarray, other: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Compute labels[:, i] @ kernel_matrix @ other[:, i] for every column without reindexing the matrix
+    Args:
+        kernel_matrix: kernel matrix
+        labels: indicator columns, see `label_matrix`
+        other: indicator columns of the second sample, defaults to labels
+    Returns:
+        sums: array of kernel sums, one per column
+    """
+    product = np.dot(kernel_matrix, labels if other is None else other)
+    return np.einsum("ij,ij->j", labels, product)
+
+
+def features_quadratic_sums(features: np.ndarray, labels: np.ndarray, other: Optional[np.ndarray] = None) -> np.ndarray:
+    """Same as `kernel_quadratic_sums` for the kernel matrix features @ features.T, never materializing it"""
+    left = np.dot(labels.T, features)
+    right = left if other is None else np.dot(other.T, features)
+    return np.einsum("ij,ij->i", left, right)
+
+
+def rff_size(size: int, max_kernel_elements: int) -> int:
+    """Number of random Fourier features that keeps a (size, n_features) array within the budget,
+    raises ValueError if the budget fits less than MMD_MIN_RFF_FEATURES features"""
+    n_features = min(MMD_RFF_FEATURES, max_kernel_elements // size)
+    if n_features < MMD_MIN_RFF_FEATURES:
+        raise ValueError(
+            f"max_kernel_elements={max_kernel_elements} is too small for {size} rows:"
+            f" the kernel approximation needs at least {size * MMD_MIN_RFF_FEATURES} elements"
+        )
+    return n_features
+
+
+def label_batches(size: int, iterations: int, max_kernel_elements: int) -> Iterator[range]:
+    """Split iterations into batches whose (size, batch) label matrices stay within the budget"""
+    batch = max(1, min(iterations, max_kernel_elements // size))
+    for start in range(0, iterations, batch):
+        yield range(start, min(start + batch, iterations))
+
+
+def mmd_pval(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_kernel_elements: int = MMD_MAX_KERNEL_ELEMENTS,
+    iterations: int = MMD_PERMUTATIONS,
+) -> Tuple[float, float]:
     """Run the mmd test with permutations
     Args:
         x:reference data as numpy array
         y:current data as numpy array
+        max_kernel_elements: memory budget in matrix elements; when the full kernel matrix does not fit,
+            the kernel is approximated with random Fourier features, which need at least
+            MMD_MIN_RFF_FEATURES elements per row
+        iterations: number of permutations
     Returns:
         p_value:p_value
         mmd:mmd distance between x and y
     """
-    kernel_mat = kernel_matrix(x, y)
-    kernel_mat = kernel_mat - np.diag(np.diagonal(kernel_mat))
+    no_x_values = x.shape[0]
+    no_y_values = y.shape[0]
+    size = no_x_values + no_y_values
+    if size * size <= max_kernel_elements:
+        kernel_mat = kernel_matrix(x, y)
+        np.fill_diagonal(kernel_mat, 0)
+        row_sums = kernel_mat.sum(axis=1)
+
+        def quadratic_sums(labels: np.ndarray) -> np.ndarray:
+            return kernel_quadratic_sums(kernel_mat, labels)
+
+    else:
+        sample = x[np.random.RandomState(0).choice(no_x_values, min(no_x_values, MMD_SIGMA_SAMPLE), replace=False)]
+        sigma = sigma_median(squared_paired_dist(sample, sample))
+        features = rff_features(np.concatenate((x, y)), sigma, rff_size(size, max_kernel_elements))
+        norms = np.einsum("ij,ij->i", features, features)
+        row_sums = np.dot(features, features.sum(axis=0)) - norms
+
+        def quadratic_sums(labels: np.ndarray) -> np.ndarray:
+            return features_quadratic_sums(features, labels) - np.dot(labels.T, norms)
+
+    total = row_sums.sum()
+    A = 1 / (no_x_values * (no_x_values - 1))
+    B = 1 / (no_y_values * (no_y_values - 1))
+
+    def statistic(indices: np.ndarray) -> np.ndarray:
+        labels = label_matrix(indices[:, no_x_values:], size)
+        kyy = quadratic_sums(labels)
+        kxy = np.dot(labels.T, row_sums) - kyy
+        kxx = total - 2 * kxy - kyy
+        return A * kxx + B * kyy - 2.0 * kxy / (no_x_values * no_y_values)
 
-    mmd = mmd_2samp(kernel_mat, y.shape[0], permute=False)
-    mmd_permuted = np.array([mmd_2samp(kernel_mat, y.shape[0], permute=True) for _ in range(100)])
+    mmd = statistic(np.arange(size)[None, :])[0]
+    mmd_permuted = np.concatenate(
+        [
+            statistic(np.stack([np.random.permutation(size) for _ in batch]))
+            for batch in label_batches(size, iterations, max_kernel_elements)
+        ]
+    )
 
-    p_val = (mmd <= mmd_permuted).mean()
+    # batched sums are accumulated in a different order for every labeling, so exact ties may differ by rounding
+    p_val = ((mmd <= mmd_permuted) | np.isclose(mmd, mmd_permuted, rtol=1e-9, atol=1e-12)).mean()
 
     return p_val, mmd
 
@@ -125,6 +252,7 @@ def _mmd_stattest(
     current_data: pd.Series,
     feature_type: ColumnType,
     threshold: float,
+    max_kernel_elements: int = MMD_MAX_KERNEL_ELEMENTS,
 ) -> Tuple[float, bool]:
     """Run the  empirical maximum mean discrepancy test.
     Args:
@@ -132,6 +260,7 @@ def _mmd_stattest(
         current_data: current data
         feature_type: feature type
         threshold: level of significance
+        max_kernel_elements: memory budget of the kernel matrix in elements
     Returns:
         p_value: p-value
         test_result: whether the drift is detected
@@ -139,7 +268,7 @@ def _mmd_stattest(
     transformed_ref = reference_data.to_numpy().reshape(-1, 1)
     transformed_curr = current_data.to_numpy().reshape(-1, 1)
 
-    p_value, mmd = mmd_pval(transformed_ref, transformed_curr)
+    p_value, mmd = mmd_pval(transformed_ref, transformed_curr, max_kernel_elements)
 
     return p_value, p_value < threshold
 
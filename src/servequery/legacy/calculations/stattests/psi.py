@@ -23,16 +23,25 @@ Example:
     >>> options = DataDriftOptions(all_features_stattest="psi")
 """
 
+from typing import TYPE_CHECKING
 from typing import Tuple
 
 import numpy as np
 import pandas as pd
 
+from servequery.legacy.calculations.stattests.registry import BatchStatTestData
 from servequery.legacy.calculations.stattests.registry import StatTest
+from servequery.legacy.calculations.stattests.registry import register_batch_stattest
+from servequery.legacy.calculations.stattests.registry import register_profile_stattest
 from servequery.legacy.calculations.stattests.registry import register_stattest
 from servequery.legacy.calculations.stattests.utils import get_binned_data
+from servequery.legacy.calculations.stattests.utils import get_binned_data_batch
+from servequery.legacy.calculations.stattests.utils import get_binned_data_profile
 from servequery.legacy.core import ColumnType
 
+if TYPE_CHECKING:
+    from servequery.core.profile import ColumnProfile
+
 
 def _psi(
     reference_data: pd.Series, current_data: pd.Series, feature_type: ColumnType, threshold: float, n_bins: int = 30
@@ -49,13 +58,30 @@ def _psi(
         test_result: whether the drift is detected
     """
     reference_percents, current_percents = get_binned_data(reference_data, current_data, feature_type, n_bins)
+    return _psi_percents(reference_percents, current_percents, threshold)
+
+
+def _psi_profile(
+    reference: "ColumnProfile", current_data: pd.Series, feature_type: ColumnType, threshold: float, n_bins: int = 30
+) -> Tuple[float, bool]:
+    reference_percents, current_percents = get_binned_data_profile(reference, current_data, feature_type, n_bins)
+    return _psi_percents(reference_percents, current_percents, threshold)
+
 
+def _psi_percents(reference_percents: np.ndarray, current_percents: np.ndarray, threshold: float) -> Tuple[float, bool]:
     psi_values = (reference_percents - current_percents) * np.log(reference_percents / current_percents)
     psi_value = np.sum(psi_values)
 
     return psi_value, psi_value >= threshold
 
 
+def _psi_batch(data: BatchStatTestData, threshold: np.ndarray, n_bins: int = 30) -> Tuple[np.ndarray, np.ndarray]:
+    reference_percents, current_percents = get_binned_data_batch(data, n_bins)
+    psi_values = (reference_percents - current_percents) * np.log(reference_percents / current_percents)
+    psi_value = np.nansum(psi_values, axis=0)
+    return psi_value, psi_value >= threshold
+
+
 psi_stat_test = StatTest(
     name="psi",
     display_name="PSI",
@@ -64,3 +90,5 @@ psi_stat_test = StatTest(
 )
 
 register_stattest(psi_stat_test, _psi)
+register_batch_stattest(psi_stat_test, _psi_batch)
+register_profile_stattest(psi_stat_test, _psi_profile)
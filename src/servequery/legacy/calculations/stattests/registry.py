@@ -1,4 +1,5 @@
 import dataclasses
+from typing import TYPE_CHECKING
 from typing import Any
 from typing import Callable
 from typing import ClassVar
@@ -11,6 +12,7 @@ from typing import Type
 from typing import TypeVar
 from typing import Union
 
+import numpy as np
 import pandas as pd
 
 from servequery.legacy.calculation_engine.engine import Engine
@@ -19,6 +21,9 @@ from servequery.legacy.calculations import stattests
 from servequery.legacy.core import ColumnType
 from servequery.legacy.utils.numpy_encoder import add_type_mapping
 
+if TYPE_CHECKING:
+    from servequery.core.profile import ColumnProfile
+
 StatTestFuncReturns = Tuple[float, bool]
 StatTestFuncType = Callable[[pd.Series, pd.Series, ColumnType, float], StatTestFuncReturns]
 
@@ -126,6 +131,102 @@ def create_impl_wrapper(func: StatTestFuncType):
     return PythonStatTestWrapper(func)
 
 
+@dataclasses.dataclass
+class BatchStatTestData:
+    """Several numerical columns prepared for batch stattests.
+
+    Arrays have one column per data column. Values are sorted along the first axis, non-finite values
+    are replaced with NaN and moved to the end of every column.
+    """
+
+    reference_data: np.ndarray
+    current_data: np.ndarray
+    reference_size: np.ndarray
+    current_size: np.ndarray
+    reference_nunique: np.ndarray
+    nunique: np.ndarray
+
+    @classmethod
+    def from_arrays(cls, reference_data: np.ndarray, current_data: np.ndarray) -> "BatchStatTestData":
+        reference_data = _sorted_finite(reference_data)
+        current_data = _sorted_finite(current_data)
+        combined = np.sort(np.concatenate([reference_data, current_data]), axis=0)
+        return cls(
+            reference_data=reference_data,
+            current_data=current_data,
+            reference_size=np.sum(~np.isnan(reference_data), axis=0),
+            current_size=np.sum(~np.isnan(current_data), axis=0),
+            reference_nunique=_sorted_nunique(reference_data),
+            nunique=_sorted_nunique(combined),
+        )
+
+    def select(self, indices: np.ndarray) -> "BatchStatTestData":
+        return BatchStatTestData(
+            reference_data=self.reference_data[:, indices],
+            current_data=self.current_data[:, indices],
+            reference_size=self.reference_size[indices],
+            current_size=self.current_size[indices],
+            reference_nunique=self.reference_nunique[indices],
+            nunique=self.nunique[indices],
+        )
+
+    def reference_column(self, index: int) -> np.ndarray:
+        return self.reference_data[: self.reference_size[index], index]
+
+    def current_column(self, index: int) -> np.ndarray:
+        return self.current_data[: self.current_size[index], index]
+
+
+def _sorted_finite(data: np.ndarray) -> np.ndarray:
+    data = np.array(data, dtype=float)
+    data[~np.isfinite(data)] = np.nan
+    data.sort(axis=0)
+    return data
+
+
+def _sorted_nunique(data: np.ndarray) -> np.ndarray:
+    if data.shape[0] == 0:
+        return np.zeros(data.shape[1], dtype=int)
+    new_values = ~np.isnan(data[1:]) & (data[1:] != data[:-1])
+    return (~np.isnan(data[0])).astype(int) + np.sum(new_values, axis=0)
+
+
+BatchStatTestFuncType = Callable[[BatchStatTestData, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+_batch_impls: Dict[StatTest, BatchStatTestFuncType] = {}
+
+
+def register_batch_stattest(stat_test: StatTest, batch_impl: BatchStatTestFuncType):
+    """Register an implementation computing stattest for many numerical columns at once.
+
+    It takes BatchStatTestData and an array of thresholds per column, returns arrays of drift scores
+    and drift detection flags per column.
+    """
+    _batch_impls[stat_test] = batch_impl
+
+
+def get_batch_stattest_impl(stat_test: StatTest) -> Optional[BatchStatTestFuncType]:
+    return _batch_impls.get(stat_test)
+
+
+ProfileStatTestFuncType = Callable[["ColumnProfile", pd.Series, ColumnType, float], StatTestFuncReturns]
+
+_profile_impls: Dict[StatTest, ProfileStatTestFuncType] = {}
+
+
+def register_profile_stattest(stat_test: StatTest, profile_impl: ProfileStatTestFuncType):
+    """Register an implementation computing stattest against a reference column profile.
+
+    It takes `ColumnProfile` of the reference column instead of its values, the rest of arguments
+    and the result are the same as of the default implementation.
+    """
+    _profile_impls[stat_test] = profile_impl
+
+
+def get_profile_stattest_impl(stat_test: StatTest) -> Optional[ProfileStatTestFuncType]:
+    return _profile_impls.get(stat_test)
+
+
 def register_stattest(stat_test: StatTest, default_impl: StatTestFuncType = None):
     _registered_stat_tests[stat_test.name] = {ft: stat_test for ft in stat_test.allowed_feature_types}
     _impls[stat_test] = {}
@@ -136,11 +237,15 @@ def register_stattest(stat_test: StatTest, default_impl: StatTestFuncType = None
 
 def _get_default_stattest(reference_data: pd.Series, current_data: pd.Series, feature_type: ColumnType) -> StatTest:
     n_values = pd.concat([reference_data, current_data]).nunique()
+    return get_default_stattest_for_size(reference_data.shape[0], n_values, feature_type)
+
+
+def get_default_stattest_for_size(reference_size: int, n_values: int, feature_type: ColumnType) -> StatTest:
     if feature_type == ColumnType.Text:
-        if reference_data.shape[0] > 1000:
+        if reference_size > 1000:
             return stattests.abs_text_content_drift_stat_test
         return stattests.perc_text_content_drift_stat_test
-    elif reference_data.shape[0] <= 1000:
+    elif reference_size <= 1000:
         if feature_type == ColumnType.Numerical:
             if n_values <= 5:
                 return stattests.chi_stat_test if n_values > 2 else stattests.z_stat_test
@@ -148,9 +253,8 @@ def _get_default_stattest(reference_data: pd.Series, current_data: pd.Series, fe
                 return stattests.ks_stat_test
         elif feature_type == ColumnType.Categorical:
             return stattests.chi_stat_test if n_values > 2 else stattests.z_stat_test
-    elif reference_data.shape[0] > 1000:
+    elif reference_size > 1000:
         if feature_type == ColumnType.Numerical:
-            n_values = pd.concat([reference_data, current_data]).nunique()
             if n_values <= 5:
                 return stattests.jensenshannon_stat_test
             elif n_values > 5:
@@ -23,6 +23,7 @@ Example:
     >>> options = DataDriftOptions(all_features_stattest="TVD")
 """
 
+from typing import Optional
 from typing import Tuple
 
 import numpy as np
@@ -30,8 +31,9 @@ import pandas as pd
 
 from servequery.legacy.calculations.stattests.registry import StatTest
 from servequery.legacy.calculations.stattests.registry import register_stattest
+from servequery.legacy.calculations.stattests.utils import get_category_counts
 from servequery.legacy.calculations.stattests.utils import get_unique_not_nan_values_list_from_series
-from servequery.legacy.calculations.stattests.utils import permutation_test
+from servequery.legacy.calculations.stattests.utils import permutation_test_counts
 from servequery.legacy.core import ColumnType
 
 
@@ -52,11 +54,28 @@ def _total_variation_distance(reference_data, current_data):
     return tvd
 
 
+def _total_variation_distance_counts(reference_counts: np.ndarray, current_counts: np.ndarray) -> np.ndarray:
+    """Compute the Total variation distance for batches of category counts
+    Args:
+        reference_counts: (batch, categories) reference counts, NaNs counted in the last category
+        current_counts: (batch, categories) current counts, NaNs counted in the last category
+    Returns:
+        total_variation_distance: computed distance for every batch row
+    """
+    ref = reference_counts[..., :-1]
+    curr = current_counts[..., :-1]
+    return 0.5 * np.sum(
+        np.abs(ref / ref.sum(axis=-1, keepdims=True) - curr / curr.sum(axis=-1, keepdims=True)), axis=-1
+    )
+
+
 def _tvd_stattest(
     reference_data: pd.Series,
     current_data: pd.Series,
     feature_type: ColumnType,
     threshold: float,
+    iterations: int = 1000,
+    seed: Optional[int] = 0,
 ) -> Tuple[float, bool]:
     """Compute the Total variation distance (TVD) between two arrays
     Args:
@@ -64,18 +83,22 @@ def _tvd_stattest(
         current_data: current data
         feature_type: feature type
         threshold: all values above this threshold means data drift
+        iterations: number of permutations
+        seed: seed of the permutations
     Returns:
         p_value: two-sided p_value
         test_result: whether the drift is detected
     """
 
-    observed = _total_variation_distance(reference_data, current_data)
-    p_value = permutation_test(
-        reference_data=reference_data,
-        current_data=current_data,
+    reference_counts, current_counts = get_category_counts(reference_data, current_data)
+    observed = _total_variation_distance_counts(reference_counts, current_counts)
+    p_value = permutation_test_counts(
+        reference_counts=reference_counts,
+        current_counts=current_counts,
         observed=observed,
-        test_statistic_func=_total_variation_distance,
-        iterations=1000,
+        test_statistic_func=_total_variation_distance_counts,
+        iterations=iterations,
+        seed=seed,
     )
 
     return p_value, p_value < threshold
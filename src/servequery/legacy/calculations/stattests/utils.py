@@ -1,10 +1,20 @@
 from collections import Counter
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Tuple
 
 import numpy as np
 import pandas as pd
 
+from servequery.legacy.calculations.stattests.registry import BatchStatTestData
 from servequery.legacy.core import ColumnType
 
+if TYPE_CHECKING:
+    from servequery.core.profile import ColumnProfile
+
 
 def get_unique_not_nan_values_list_from_series(current_data: pd.Series, reference_data: pd.Series) -> list:
     """Get unique values from current and reference series, drop NaNs"""
@@ -39,24 +49,156 @@ def get_binned_data(
         current_percents = np.array([current_feature_dict[key] / len(current_data) for key in keys])
 
     if feel_zeroes:
-        np.place(
-            reference_percents,
-            reference_percents == 0,
-            min(reference_percents[reference_percents != 0]) / 10**6
-            if min(reference_percents[reference_percents != 0]) <= 0.0001
-            else 0.0001,
-        )
-        np.place(
-            current_percents,
-            current_percents == 0,
-            min(current_percents[current_percents != 0]) / 10**6
-            if min(current_percents[current_percents != 0]) <= 0.0001
-            else 0.0001,
+        _feel_zeroes(reference_percents)
+        _feel_zeroes(current_percents)
+
+    return reference_percents, current_percents
+
+
+def _feel_zeroes(percents: np.ndarray):
+    non_zero = min(percents[percents != 0])
+    np.place(percents, percents == 0, non_zero / 10**6 if non_zero <= 0.0001 else 0.0001)
+
+
+def get_binned_data_profile(
+    reference: "ColumnProfile", current_data: pd.Series, feature_type: ColumnType, n: int, feel_zeroes: bool = True
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Version of `get_binned_data` for a reference column profile
+    Args:
+        reference: reference column profile
+        current_data: current data
+        feature_type: feature type
+        n: number of quantiles
+    Returns:
+        reference_percents: % of records in each bucket for reference, buckets of columns
+            without value counts are estimated from the reference quantiles
+        current_percents: % of records in each bucket for current
+    """
+    if feature_type == ColumnType.Numerical and reference.nunique > 20:
+        current_values = current_data.to_numpy(dtype=float)
+        first_edge = min(reference.quantile(0), current_values.min())
+        last_edge = max(reference.quantile(1), current_values.max())
+        # the same edges as np.histogram_bin_edges(..., bins="sturges") over both samples
+        width = (last_edge - first_edge) / (np.log2(reference.count + len(current_values)) + 1.0)
+        bins = np.linspace(first_edge, last_edge, int(np.ceil((last_edge - first_edge) / width)) + 1)
+        reference_cdf = reference.cdf(bins[1:-1], side="left")
+        reference_percents = np.diff(np.concatenate([[0.0], reference_cdf, [1.0]]))
+        current_percents = np.histogram(current_values, bins)[0] / len(current_values)
+    else:
+        _, reference_counts, current_counts = get_profile_category_counts(reference, current_data)
+        reference_percents = reference_counts / reference.count
+        current_percents = current_counts / len(current_data)
+
+    if feel_zeroes:
+        _feel_zeroes(reference_percents)
+        _feel_zeroes(current_percents)
+
+    return reference_percents, current_percents
+
+
+def get_profile_category_counts(
+    reference: "ColumnProfile", current_data: pd.Series
+) -> Tuple[List[Any], np.ndarray, np.ndarray]:
+    """Count values of a reference column profile and current data over their common categories
+    Args:
+        reference: reference column profile
+        current_data: current data without NaNs
+    Returns:
+        keys: categories
+        reference_counts: counts of every category in reference data
+        current_counts: counts of every category in current data
+    """
+    current_counts = current_data.value_counts()
+    keys = list(dict.fromkeys([value for value, _ in reference.value_counts or []] + list(current_counts.index)))
+    return keys, reference.counts(keys), current_counts.reindex(keys, fill_value=0).to_numpy()
+
+
+def get_binned_data_batch(data: BatchStatTestData, n: int, feel_zeroes: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """Batch version of `get_binned_data` for numerical columns
+    Args:
+        data: prepared numerical columns
+        n: number of quantiles
+    Returns:
+        reference_percents: (buckets, columns) array of % of records in each bucket for reference,
+            NaN for buckets a column does not have
+        current_percents: the same for current
+    """
+    columns = data.reference_data.shape[1]
+    histogram = data.reference_nunique > 20
+    reference_counts: List[np.ndarray] = [np.empty(0)] * columns
+    current_counts: List[np.ndarray] = [np.empty(0)] * columns
+
+    if histogram.any():
+        (indices,) = np.nonzero(histogram)
+        reference_binned, current_binned = _histogram_batch(
+            data.reference_data[:, indices],
+            data.current_data[:, indices],
+            data.reference_size[indices],
+            data.current_size[indices],
         )
+        for i, index in enumerate(indices):
+            reference_counts[index] = reference_binned[i]
+            current_counts[index] = current_binned[i]
+
+    for index in np.nonzero(~histogram)[0]:
+        reference_column = data.reference_column(index)
+        current_column = data.current_column(index)
+        keys = np.unique(np.concatenate([reference_column, current_column]))
+        reference_counts[index] = _sorted_counts(reference_column, keys)
+        current_counts[index] = _sorted_counts(current_column, keys)
+
+    size = max(len(counts) for counts in reference_counts)
+    reference_percents = np.full((size, columns), np.nan)
+    current_percents = np.full((size, columns), np.nan)
+    for index in range(columns):
+        reference_percents[: len(reference_counts[index]), index] = reference_counts[index] / data.reference_size[index]
+        current_percents[: len(current_counts[index]), index] = current_counts[index] / data.current_size[index]
+
+    if feel_zeroes:
+        _feel_zeroes_batch(reference_percents)
+        _feel_zeroes_batch(current_percents)
 
     return reference_percents, current_percents
 
 
+def _sorted_counts(sorted_data: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    return np.searchsorted(sorted_data, keys, side="right") - np.searchsorted(sorted_data, keys, side="left")
+
+
+def _histogram_batch(
+    reference_data: np.ndarray, current_data: np.ndarray, reference_size: np.ndarray, current_size: np.ndarray
+) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    # same edges as np.histogram_bin_edges(..., bins="sturges") over both samples, computed for every column
+    columns = np.arange(reference_data.shape[1])
+    first_edge = np.fmin(reference_data[0], current_data[0])
+    last_edge = np.fmax(reference_data[reference_size - 1, columns], current_data[current_size - 1, columns])
+    ptp = last_edge - first_edge
+    width = ptp / (np.log2(reference_size + current_size) + 1.0)
+    n_bins = np.ceil(ptp / width).astype(int)
+    edges = np.arange(n_bins.max() + 1)[:, None] * (ptp / n_bins) + first_edge
+    edges[n_bins, columns] = last_edge
+
+    def counts(values: np.ndarray) -> List[np.ndarray]:
+        valid = ~np.isnan(values)
+        # the same bucket search as np.histogram: estimate the bucket, then correct it by comparing with edges
+        bins = np.zeros(values.shape, dtype=int)
+        bins[valid] = ((values - first_edge) * (n_bins / ptp))[valid].astype(int)
+        bins = np.minimum(bins, n_bins - 1)
+        bins -= valid & (values < np.take_along_axis(edges, bins, axis=0))
+        bins += valid & (values >= np.take_along_axis(edges, bins + 1, axis=0)) & (bins != n_bins - 1)
+        flat = (bins + columns * edges.shape[0])[valid]
+        totals = np.bincount(flat, minlength=edges.shape[0] * len(columns)).reshape(len(columns), -1)
+        return [totals[i, : n_bins[i]] for i in columns]
+
+    return counts(reference_data), counts(current_data)
+
+
+def _feel_zeroes_batch(percents: np.ndarray):
+    non_zero = np.where(np.isnan(percents) | (percents == 0), np.inf, percents).min(axis=0)
+    filler = np.where(non_zero <= 0.0001, non_zero / 10**6, 0.0001)
+    np.copyto(percents, np.broadcast_to(filler, percents.shape), where=percents == 0)
+
+
 def permutation_test(reference_data, current_data, observed, test_statistic_func, iterations=100):
     """Perform a two-sided permutation test
     Args:
@@ -69,19 +211,72 @@ def permutation_test(reference_data, current_data, observed, test_statistic_func
         p_value: two-sided p_value
     """
     np.random.seed(0)
+    combined_data = reference_data.tolist() + current_data.tolist()
+    # np.random.choice samples from the pool converted to an array (mixed values may be coerced, e.g. to strings),
+    # while the rest of the pool keeps original values
+    pool = np.array(combined_data)
+    count_combined = Counter(combined_data)
+    reference_size = len(reference_data)
     hold_test_statistic = []
     for i in range(iterations):
-        combined_data = reference_data.tolist() + current_data.tolist()
-        new_reference = np.random.choice(combined_data, len(reference_data), replace=False).tolist()
-        count_combined = Counter(combined_data)
-        count_new_reference = Counter(new_reference)
-        new_current = list((count_combined - count_new_reference).elements())
+        # same draws as np.random.choice(combined_data, reference_size, replace=False)
+        new_reference = pool[np.random.permutation(len(pool))[:reference_size]].tolist()
+        new_current = list((count_combined - Counter(new_reference)).elements())
         hold_test_statistic.append(test_statistic_func(pd.Series(new_reference), pd.Series(new_current)))
 
     p_val = sum(observed <= abs(np.array(hold_test_statistic))) / len(hold_test_statistic)
     return p_val
 
 
+def get_category_counts(reference_data: pd.Series, current_data: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Count values of both series over their common categories
+    Args:
+        reference_data: reference data
+        current_data: current data
+    Returns:
+        reference_counts: counts of every category in reference data, NaNs are counted in the last position
+        current_counts: counts of every category in current data, NaNs are counted in the last position
+    """
+    keys = get_unique_not_nan_values_list_from_series(current_data=current_data, reference_data=reference_data)
+
+    def counts(data: pd.Series) -> np.ndarray:
+        return np.append(data.value_counts().reindex(keys, fill_value=0).to_numpy(), data.isna().sum())
+
+    return counts(reference_data), counts(current_data)
+
+
+def permutation_test_counts(
+    reference_counts: np.ndarray,
+    current_counts: np.ndarray,
+    observed: float,
+    test_statistic_func: Callable[[np.ndarray, np.ndarray], np.ndarray],
+    iterations: int = 100,
+    seed: Optional[int] = 0,
+) -> float:
+    """Perform a two-sided permutation test for statistics depending only on category counts
+
+    Shuffling the pooled data only changes how many values of each category fall into the reference sample,
+    which follows the multivariate hypergeometric distribution. Its draws are generated for all iterations
+    at once, so the cost does not depend on the number of rows.
+    Args:
+        reference_counts: counts of every category in reference data
+        current_counts: counts of every category in current data
+        observed: observed value
+        test_statistic_func: vectorized test statistic, takes (iterations, categories) arrays of reference and
+            current counts and returns statistics of every iteration
+        iterations: number of times to permute
+        seed: seed of the random generator
+    Returns:
+        p_value: two-sided p_value
+    """
+    total_counts = np.asarray(reference_counts, dtype=np.int64) + np.asarray(current_counts, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    new_reference = rng.multivariate_hypergeometric(total_counts, int(np.sum(reference_counts)), size=iterations)
+    new_current = total_counts - new_reference
+    hold_test_statistic = test_statistic_func(new_reference, new_current)
+    return np.mean(observed <= np.abs(hold_test_statistic))
+
+
 def generate_fisher2x2_contingency_table(reference_data: pd.Series, current_data: pd.Series) -> np.ndarray:
     """Generate 2x2 contingency matrix for fisher exact test
     Args:
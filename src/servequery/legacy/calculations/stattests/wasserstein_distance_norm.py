@@ -23,16 +23,25 @@ Example:
     >>> options = DataDriftOptions(all_features_stattest="wasserstein")
 """
 
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Optional
 from typing import Tuple
 
 import numpy as np
 import pandas as pd
 from scipy import stats
 
+from servequery.legacy.calculations.stattests.registry import BatchStatTestData
 from servequery.legacy.calculations.stattests.registry import StatTest
+from servequery.legacy.calculations.stattests.registry import register_batch_stattest
+from servequery.legacy.calculations.stattests.registry import register_profile_stattest
 from servequery.legacy.calculations.stattests.registry import register_stattest
 from servequery.legacy.core import ColumnType
 
+if TYPE_CHECKING:
+    from servequery.core.profile import ColumnProfile
+
 
 def _wasserstein_distance_norm(
     reference_data: pd.Series, current_data: pd.Series, feature_type: ColumnType, threshold: float
@@ -47,8 +56,41 @@ def _wasserstein_distance_norm(
         wasserstein_distance_norm: normed Wasserstein distance
         test_result: whether the drift is detected
     """
-    norm = max(np.std(reference_data), 0.001)
-    wd_norm_value = stats.wasserstein_distance(reference_data, current_data) / norm
+    return _wasserstein_distance_norm_values(
+        reference_data, None, float(np.std(reference_data)), current_data, threshold
+    )
+
+
+def _wasserstein_distance_norm_profile(
+    reference: "ColumnProfile", current_data: pd.Series, feature_type: ColumnType, threshold: float
+) -> Tuple[float, bool]:
+    values, weights = reference.weighted_values()
+    return _wasserstein_distance_norm_values(values, weights, reference.finite_std or 0.0, current_data, threshold)
+
+
+def _wasserstein_distance_norm_values(
+    reference_values: Any,
+    reference_weights: Optional[np.ndarray],
+    reference_std: float,
+    current_data: pd.Series,
+    threshold: float,
+) -> Tuple[float, bool]:
+    norm = max(reference_std, 0.001)
+    wd_norm_value = stats.wasserstein_distance(reference_values, current_data, u_weights=reference_weights) / norm
+    return wd_norm_value, wd_norm_value >= threshold
+
+
+def _wasserstein_distance_norm_batch(data: BatchStatTestData, threshold: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    norm = np.maximum(np.nanstd(data.reference_data, axis=0), 0.001)
+    # area between the empirical CDFs, integrated over the sorted values of both samples
+    combined = np.concatenate([data.reference_data, data.current_data])
+    order = np.argsort(combined, axis=0, kind="mergesort")
+    values = np.take_along_axis(combined, order, axis=0)
+    is_reference = order < data.reference_data.shape[0]
+    reference_cdf = np.cumsum(is_reference, axis=0)[:-1] / data.reference_size
+    current_cdf = np.cumsum(~is_reference, axis=0)[:-1] / data.current_size
+    deltas = np.nan_to_num(np.diff(values, axis=0))
+    wd_norm_value = np.sum(np.abs(reference_cdf - current_cdf) * deltas, axis=0) / norm
     return wd_norm_value, wd_norm_value >= threshold
 
 
@@ -60,3 +102,5 @@ wasserstein_stat_test = StatTest(
 )
 
 register_stattest(wasserstein_stat_test, _wasserstein_distance_norm)
+register_batch_stattest(wasserstein_stat_test, _wasserstein_distance_norm_batch)
+register_profile_stattest(wasserstein_stat_test, _wasserstein_distance_norm_profile)
@@ -23,6 +23,7 @@ Example:
     >>> options = DataDriftOptions(all_features_stattest="z")
 """
 
+from typing import TYPE_CHECKING
 from typing import Tuple
 
 import numpy as np
@@ -30,10 +31,15 @@ import pandas as pd
 from scipy.stats import norm
 
 from servequery.legacy.calculations.stattests.registry import StatTest
+from servequery.legacy.calculations.stattests.registry import register_profile_stattest
 from servequery.legacy.calculations.stattests.registry import register_stattest
+from servequery.legacy.calculations.stattests.utils import get_profile_category_counts
 from servequery.legacy.calculations.stattests.utils import get_unique_not_nan_values_list_from_series
 from servequery.legacy.core import ColumnType
 
+if TYPE_CHECKING:
+    from servequery.core.profile import ColumnProfile
+
 
 def proportions_diff_z_stat_ind(ref: pd.Series, curr: pd.Series):
     # pylint: disable=invalid-name
@@ -42,6 +48,11 @@ def proportions_diff_z_stat_ind(ref: pd.Series, curr: pd.Series):
 
     p1 = float(sum(ref)) / n1
     p2 = float(sum(curr)) / n2
+    return _proportions_diff_z_stat(p1, p2, n1, n2)
+
+
+def _proportions_diff_z_stat(p1: float, p2: float, n1: int, n2: int):
+    # pylint: disable=invalid-name
     P = float(p1 * n1 + p2 * n2) / (n1 + n2)
 
     return (p1 - p2) / np.sqrt(P * (1 - P) * (1.0 / n1 + 1.0 / n2))
@@ -92,6 +103,28 @@ def _z_stat_test(
     return p_value, p_value < threshold
 
 
+def _z_stat_test_profile(
+    reference: "ColumnProfile", current_data: pd.Series, feature_type: ColumnType, threshold: float
+) -> Tuple[float, bool]:
+    keys, reference_counts, current_counts = get_profile_category_counts(reference, current_data)
+    if reference.nunique == 1 and current_data.nunique() == 1 and reference_counts[0] > 0 and current_counts[0] > 0:
+        p_value = 1
+    else:
+        # the same statistic as of indicators "value is not the first key" of both samples
+        first = keys.index(sorted(keys)[0])
+        reference_size = reference.count
+        current_size = len(current_data)
+        p_value = proportions_diff_z_test(
+            _proportions_diff_z_stat(
+                float(reference_size - reference_counts[first]) / reference_size,
+                float(current_size - current_counts[first]) / current_size,
+                reference_size,
+                current_size,
+            )
+        )
+    return p_value, p_value < threshold
+
+
 z_stat_test = StatTest(
     name="z",
     display_name="Z-test p_value",
@@ -99,3 +132,4 @@ z_stat_test = StatTest(
 )
 
 register_stattest(z_stat_test, _z_stat_test)
+register_profile_stattest(z_stat_test, _z_stat_test_profile)
@@ -1,6 +1,7 @@
 import asyncio
 import contextlib
 import logging
+import math
 import os.path
 from typing import Any
 from typing import AsyncGenerator
@@ -9,6 +10,7 @@ from typing import List
 from typing import Optional
 
 import pandas as pd
+import pyarrow as pa
 import uvicorn
 from litestar import Litestar
 from litestar import Request
@@ -22,6 +24,9 @@ from litestar.exceptions import NotAuthorizedException
 from litestar.handlers import BaseRouteHandler
 from litestar.params import Dependency
 from litestar.params import Parameter
+from litestar.status_codes import HTTP_400_BAD_REQUEST
+from litestar.status_codes import HTTP_415_UNSUPPORTED_MEDIA_TYPE
+from litestar.status_codes import HTTP_429_TOO_MANY_REQUESTS
 from litestar.status_codes import HTTP_500_INTERNAL_SERVER_ERROR
 from litestar.types import ASGIApp
 from litestar.types import ExceptionHandlersMap
@@ -34,11 +39,15 @@ from servequery._pydantic_compat import SecretStr
 from servequery.legacy.collector.config import CONFIG_PATH
 from servequery.legacy.collector.config import CollectorConfig
 from servequery.legacy.collector.config import CollectorServiceConfig
+from servequery.legacy.collector.incremental import IncrementalReport
+from servequery.legacy.collector.scheduler import CollectorMetrics
+from servequery.legacy.collector.scheduler import ReportScheduler
+from servequery.legacy.collector.serialization import UnsupportedContentTypeError
+from servequery.legacy.collector.serialization import concat_data
+from servequery.legacy.collector.serialization import decode_data
 from servequery.legacy.collector.storage import CollectorStorage
-from servequery.legacy.collector.storage import CreateReportEvent
 from servequery.legacy.collector.storage import LogEvent
-from servequery.legacy.collector.storage import UploadReportEvent
-from servequery.legacy.pipeline.column_mapping import ColumnMapping
+from servequery.legacy.collector.storage import StorageFullError
 from servequery.legacy.ui.components.security import NoSecurityComponent
 from servequery.legacy.ui.security.no_security import NoSecurityService
 from servequery.legacy.ui.security.service import SecurityService
@@ -62,6 +71,11 @@ def create_collector(
     service_config_path: str,
 ) -> CollectorConfig:
     parsed_json.id = id
+    if parsed_json.incremental:
+        try:
+            IncrementalReport(parsed_json.report_config.to_report_base(), parsed_json.reference)
+        except (ValueError, OSError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
     service.collectors[id] = parsed_json
     storage.init(id)
     if service.autosave:
@@ -102,14 +116,33 @@ def set_reference(
 @post("/{id:str}/data")
 async def push_data(
     id: Annotated[str, Parameter(description="Collector ID")],
-    data: Any,
+    request: Request,
     service: Annotated[CollectorServiceConfig, Dependency(skip_validation=True)],
     storage: Annotated[CollectorStorage, Dependency(skip_validation=True)],
 ) -> Dict[str, str]:
     if id not in service.collectors:
         raise HTTPException(status_code=404, detail=f"Collector config with id '{id}' not found")
+    try:
+        data = await sync_to_thread(decode_data, await request.body(), request.headers.get("content-type"))
+    except UnsupportedContentTypeError as e:
+        raise HTTPException(status_code=HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+    except (ValueError, pa.ArrowException) as e:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=f"Malformed data: {e}")
+    collector = service.collectors[id]
     async with storage.lock(id):
-        storage.append(id, data)
+        try:
+            if collector.incremental:
+                await sync_to_thread(storage.aggregate, id, concat_data([data]), collector.create_window)
+            else:
+                await sync_to_thread(storage.append, id, data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except StorageFullError as e:
+            raise HTTPException(
+                status_code=HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(e),
+                headers={"Retry-After": str(math.ceil(service.check_interval))},
+            )
     return {}
 
 
@@ -124,65 +157,26 @@ async def get_logs(
     return storage.get_logs(id)
 
 
-async def check_snapshots_factory(service: CollectorServiceConfig, storage: CollectorStorage) -> None:
-    for _, collector in service.collectors.items():
-        if not collector.trigger.is_ready(collector, storage):
-            continue
-        await create_snapshot(collector, storage)
-        await send_snapshot(collector, storage)
+@get("/{id:str}/metrics")
+async def get_metrics(
+    id: Annotated[str, Parameter(description="Collector ID")],
+    service: Annotated[CollectorServiceConfig, Dependency(skip_validation=True)],
+    scheduler: Annotated[ReportScheduler, Dependency(skip_validation=True)],
+) -> CollectorMetrics:
+    if id not in service.collectors:
+        raise HTTPException(status_code=404, detail=f"Collector config with id '{id}' not found")
+    return scheduler.metrics[id]
 
 
-async def create_snapshot(collector: CollectorConfig, storage: CollectorStorage) -> None:
-    async with storage.lock(collector.id):
-        current = await sync_to_thread(storage.get_and_flush, collector.id)  # FIXME: sync function
-        if current is None:
-            return
-        current.index = current.index.astype(int)
-        report_conf = collector.report_config
-        report = report_conf.to_report_base()
-        try:
-            await sync_to_thread(
-                report.run, reference_data=collector.reference, current_data=current, column_mapping=ColumnMapping()
-            )  # FIXME: sync function
-            report._inner_suite.raise_for_error()
-        except Exception as e:
-            logger.exception(f"Error running report: {e}")
-            storage.log(
-                collector.id,
-                CreateReportEvent(
-                    report_id=str(report.id),
-                    ok=False,
-                    error=f"Error running report: {e.__class__.__name__}: {e.args}",
-                ),
-            )
-            return
-        storage.add_report(collector.id, report)
-        storage.log(collector.id, CreateReportEvent(report_id=str(report.id), ok=True))
-
-
-async def send_snapshot(collector: CollectorConfig, storage: CollectorStorage) -> None:
-    async with storage.lock(collector.id):
-        for report_item in storage.take_reports(collector.id):
-            try:
-                with report_item as report:
-                    await sync_to_thread(
-                        collector.workspace._add_report_base,
-                        collector.project_id,
-                        report,
-                        collector.save_datasets and collector.is_cloud_resolved,  # only save datasets to cloud
-                    )  # FIXME: sync function
-            except Exception as e:
-                logger.exception(f"Error saving snapshot: {e}")
-                storage.log(
-                    collector.id,
-                    UploadReportEvent(
-                        report_id=str(report.id),
-                        ok=False,
-                        error=f"Error saving snapshot: {e.__class__.__name__}: {e.args}",
-                    ),
-                )
-                return
-            storage.log(collector.id, UploadReportEvent(report_id=str(report.id), ok=True))
+async def check_snapshots_factory(service: CollectorServiceConfig) -> None:
+    """Create and upload reports of ready collectors once and wait for them, see `ReportScheduler.check`"""
+    scheduler = ReportScheduler(service)
+    await scheduler.start()
+    try:
+        await scheduler.check()
+        await scheduler.wait()
+    finally:
+        await scheduler.stop()
 
 
 def create_app(config_path: str = CONFIG_PATH, secret: Optional[str] = None, debug: bool = False) -> Litestar:
@@ -222,6 +216,8 @@ def create_app(config_path: str = CONFIG_PATH, secret: Optional[str] = None, deb
         if not connection.scope["auth"]["authenticated"]:
             raise NotAuthorizedException()
 
+    scheduler = ReportScheduler(service)
+
     @contextlib.asynccontextmanager
     async def check_snapshots_factory_lifespan(app: Litestar) -> AsyncGenerator[None, None]:
         stop_event = asyncio.Event()
@@ -229,17 +225,19 @@ def create_app(config_path: str = CONFIG_PATH, secret: Optional[str] = None, deb
         async def check_service_snapshots_periodically():
             while not stop_event.is_set():
                 try:
-                    await check_snapshots_factory(service, service.storage)
+                    await scheduler.check()
                 except Exception as e:
                     logger.exception(f"Check snapshots factory error: {e}")
                 await asyncio.sleep(service.check_interval)
 
+        await scheduler.start()
         task = asyncio.create_task(check_service_snapshots_periodically())
         try:
             yield
         finally:
             stop_event.set()
             await task
+            await scheduler.stop()
 
     exception_handlers: ExceptionHandlersMap = {}
     if debug:
@@ -256,11 +254,13 @@ def create_app(config_path: str = CONFIG_PATH, secret: Optional[str] = None, deb
             set_reference,
             push_data,
             get_logs,
+            get_metrics,
         ],
         dependencies={
             "security": Provide(lambda: security, use_cache=True, sync_to_thread=False),
             "service": Provide(lambda: service, use_cache=True, sync_to_thread=False),
             "storage": Provide(lambda: service.storage, use_cache=True, sync_to_thread=False),
+            "scheduler": Provide(lambda: scheduler, use_cache=True, sync_to_thread=False),
             "parsed_json": Provide(parse_json, sync_to_thread=False),
             "service_config_path": Provide(lambda: config_path, sync_to_thread=False),
             "service_workspace": Provide(lambda: os.path.dirname(config_path), sync_to_thread=False),
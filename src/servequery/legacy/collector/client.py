@@ -4,6 +4,9 @@ from typing import Dict
 import pandas as pd
 
 from servequery.legacy.collector.config import CollectorConfig
+from servequery.legacy.collector.serialization import JSON_CONTENT_TYPE
+from servequery.legacy.collector.serialization import encode_data
+from servequery.legacy.collector.serialization import get_content_type
 from servequery.legacy.ui.utils import RemoteClientBase
 
 
@@ -11,8 +14,21 @@ class CollectorClient(RemoteClientBase):
     def create_collector(self, id: str, collector: CollectorConfig) -> Dict[str, Any]:
         return self._request(f"/{id}", "POST", body=collector.dict()).json()
 
-    def send_data(self, id: str, data: pd.DataFrame) -> Dict[str, Any]:
-        return self._request(f"/{id}/data", "POST", body=data.to_dict()).json()
+    def send_data(self, id: str, data: pd.DataFrame, format: str = "json") -> Dict[str, Any]:
+        """Send data to collector buffer.
+
+        Args:
+            id: collector id
+            data: data to send
+            format: request body format, one of "json" (default), "arrow" or "parquet".
+                Binary formats need a collector server that accepts them.
+        """
+        content_type = get_content_type(format)
+        if content_type == JSON_CONTENT_TYPE:
+            return self._request(f"/{id}/data", "POST", body=data.to_dict()).json()
+        return self._request(
+            f"/{id}/data", "POST", content=encode_data(data, content_type), content_type=content_type
+        ).json()
 
     def set_reference(self, id: str, reference: pd.DataFrame) -> Dict[str, Any]:
         return self._request(f"/{id}/reference", "POST", body=reference.to_dict()).json()
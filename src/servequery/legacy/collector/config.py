@@ -14,6 +14,7 @@ from servequery._pydantic_compat import BaseModel
 from servequery._pydantic_compat import Field
 from servequery._pydantic_compat import parse_obj_as
 from servequery.legacy.base_metric import Metric
+from servequery.legacy.collector.incremental import IncrementalReport
 from servequery.legacy.collector.storage import CollectorStorage
 from servequery.legacy.collector.storage import InMemoryStorage
 from servequery.legacy.options.base import Options
@@ -149,6 +150,7 @@ class CollectorConfig(Config):
     cache_reference: bool = True
     is_cloud: Optional[bool] = None  # None means autodetect
     save_datasets: bool = False
+    incremental: bool = False  # aggregate pushed data instead of buffering it, see IncrementalReport
 
     _reference: Any = None
     _workspace: Optional[WorkspaceView] = None
@@ -184,12 +186,20 @@ class CollectorConfig(Config):
         self._reference = self._read_reference()
         return self._reference
 
+    def create_window(self) -> IncrementalReport:
+        return IncrementalReport(self.report_config.to_report_base(), self.reference)
+
 
 class CollectorServiceConfig(Config):
     check_interval: float = 1
     collectors: Dict[str, CollectorConfig] = {}
     storage: CollectorStorage = InMemoryStorage()
     autosave: bool = True
+    report_processes: int = 0  # reports run in threads if 0
+    max_concurrent_reports: int = 1  # per collector
+    upload_workers: int = 4
+    upload_retries: int = 3
+    upload_retry_delay: float = 1
 
     @classmethod
     def load_or_default(cls, path: str):
@@ -0,0 +1,576 @@
+"""Incremental reports for collectors.
+
+Instead of buffering raw rows until a trigger fires, every pushed batch is folded into mergeable running
+aggregates, so memory of a collector window does not depend on its length. A trigger finalizes the aggregates
+into a report snapshot with the same results the metrics compute from raw rows, where it is possible.
+"""
+
+import copy
+import datetime
+import heapq
+import math
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from servequery.legacy.calculations.data_quality import FeatureQualityStats
+from servequery.legacy.calculations.data_quality import get_features_stats
+from servequery.legacy.calculations.utils import MAX_CATEGORIES
+from servequery.legacy.core import ColumnType
+from servequery.legacy.core import new_id
+from servequery.legacy.metric_results import Histogram
+from servequery.legacy.metric_results import HistogramData
+from servequery.legacy.metrics import ColumnSummaryMetric
+from servequery.legacy.metrics.data_integrity.column_summary_metric import CategoricalCharacteristics
+from servequery.legacy.metrics.data_integrity.column_summary_metric import ColumnSummaryResult
+from servequery.legacy.metrics.data_integrity.column_summary_metric import DataQualityPlot
+from servequery.legacy.pipeline.column_mapping import ColumnMapping
+from servequery.legacy.report import Report
+from servequery.legacy.suite.base_suite import ContextPayload
+from servequery.legacy.suite.base_suite import Snapshot
+from servequery.legacy.utils.data_preprocessing import create_data_definition
+from servequery.legacy.utils.visualizations import histogram_bin_edges_doane
+from servequery.legacy.utils.visualizations import make_hist_df
+
+# numerical columns keep value counts (for unique and most common values) while they have no more distinct values
+INCREMENTAL_MAX_VALUE_COUNTS = 1000
+# categorical columns keep counts of this many most common values, counts of other values are folded into one
+INCREMENTAL_MAX_CATEGORIES = 1000
+# histograms widened to new values are coarsened to keep at most this number of bins (or initial number of bins)
+INCREMENTAL_MAX_BINS = 50
+
+SUPPORTED_METRICS = (ColumnSummaryMetric,)
+SUPPORTED_COLUMN_TYPES = (ColumnType.Numerical, ColumnType.Categorical)
+
+
+def _bin_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Histogram of values over fixed edges, values outside of edges are counted in the outer bins"""
+    bins = len(edges) - 1
+    return np.bincount(np.clip(np.searchsorted(edges, values, side="right") - 1, 0, bins - 1), minlength=bins)
+
+
+def _edges(values: np.ndarray) -> Optional[np.ndarray]:
+    return np.asarray(histogram_bin_edges_doane(values), dtype=float) if len(values) > 0 else None
+
+
+def _positive_log(values: np.ndarray) -> np.ndarray:
+    return np.log10(values[values > 0])
+
+
+class _Bins:
+    """Histogram over uniform bins of a grid fixed by initial edges.
+
+    Bins are added when values fall outside of the histogram and bin width is doubled (merging aligned pairs
+    of bins) when there are more than `max_bins` bins, so histograms of the same grid can always be merged.
+    """
+
+    def __init__(self, edges: np.ndarray):
+        self.origin = float(edges[0])
+        self.base_width = float(edges[1] - edges[0])
+        self.level = 0
+        self.start = 0
+        self.counts = np.zeros(len(edges) - 1, dtype=np.int64)
+        self.max_bins = max(len(self.counts), INCREMENTAL_MAX_BINS)
+
+    @property
+    def width(self) -> float:
+        return math.ldexp(self.base_width, self.level)
+
+    @property
+    def edges(self) -> np.ndarray:
+        return self.origin + self.width * (self.start + np.arange(len(self.counts) + 1))
+
+    def _index(self, values: np.ndarray) -> np.ndarray:
+        """Bin indexes of values as floats, so indexes of values far from the histogram do not overflow"""
+        with np.errstate(over="ignore"):
+            index = np.floor((values - self.origin) / self.width)
+        # the upper edge is inclusive, as in np.histogram
+        return np.where(np.isclose(values, self.edges[-1], rtol=1e-9, atol=0), self.start + len(self.counts) - 1, index)
+
+    def widened(self, low: float, high: float) -> "_Bins":
+        """Copy of the histogram widened to cover values from low to high, raises ValueError if it is impossible"""
+        bins = copy.deepcopy(self)
+        bins._widen(low, high)
+        return bins
+
+    def add(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        self._widen(float(values.min()), float(values.max()))
+        index = self._index(values).astype(np.int64) - self.start
+        self.counts += np.bincount(np.clip(index, 0, len(self.counts) - 1), minlength=len(self.counts))
+
+    def merge(self, other: "_Bins"):
+        if (self.origin, self.base_width) != (other.origin, other.base_width):
+            # bins of another grid are re-binned by their centers
+            edges = other.edges
+            centers = np.repeat((edges[:-1] + edges[1:]) / 2, other.counts)
+            self.add(centers)
+            return
+        while self.level < other.level:
+            self._coarsen()
+        scale = 2.0 ** (self.level - other.level)
+        self._extend(math.floor(other.start / scale), math.floor((other.start + len(other.counts) - 1) / scale))
+        # extending may coarsen the histogram, so other counts are halved to the final level
+        other_counts, other_start = other.counts, other.start
+        for _ in range(other.level, self.level):
+            other_counts, other_start = self._halve(other_counts, other_start)
+        offset = other_start - self.start
+        self.counts[offset : offset + len(other_counts)] += other_counts
+
+    def _widen(self, low: float, high: float):
+        indexes = self._index(np.array([low, high]))
+        self._extend(float(indexes[0]), float(indexes[1]))
+
+    def _extend(self, first: float, last: float):
+        """Add bins to cover bin indexes from first to last (of current level)"""
+        end = self.start + len(self.counts) - 1
+        new_start, new_end = min(first, self.start), max(last, end)
+        if (new_start, new_end) == (self.start, end):
+            return
+        span = new_end - new_start + 1
+        if not math.isfinite(span):
+            raise ValueError("values are too far from the histogram bins")
+        # the level is chosen before adding bins, so a distant value does not allocate bins of the current width
+        levels = max(0, math.ceil(math.log2(span / self.max_bins)))
+        while math.floor(new_end / 2.0**levels) - math.floor(new_start / 2.0**levels) + 1 > self.max_bins:
+            levels += 1
+        for _ in range(levels):
+            self._coarsen()
+        new_start, new_end = math.floor(new_start / 2.0**levels), math.floor(new_end / 2.0**levels)
+        end = self.start + len(self.counts) - 1
+        self.counts = np.concatenate(
+            [
+                np.zeros(self.start - new_start, dtype=np.int64),
+                self.counts,
+                np.zeros(new_end - end, dtype=np.int64),
+            ]
+        )
+        self.start = new_start
+
+    def _coarsen(self):
+        self.counts, self.start = self._halve(self.counts, self.start)
+        self.level += 1
+
+    @staticmethod
+    def _halve(counts: np.ndarray, start: int):
+        # pairs of bins are aligned to the grid origin: bins 2k and 2k + 1 are merged into bin k
+        if start % 2:
+            counts, start = np.concatenate([[0], counts]), start - 1
+        if len(counts) % 2:
+            counts = np.concatenate([counts, [0]])
+        return counts.reshape(-1, 2).sum(axis=1), start // 2
+
+
+class _PreparedBatch(NamedTuple):
+    present: pd.Series
+    data: Optional[np.ndarray]
+    bins: Optional[_Bins]
+    log_bins: Optional[_Bins]
+
+
+class ColumnAggregate:
+    """Mergeable running statistics of one column.
+
+    Histograms are counted over uniform bins taken from reference data (from the first batch with values
+    if the reference has no finite values) and widened as new values come. Mean and std are over finite values,
+    merged with Chan's parallel algorithm.
+    Categorical columns keep counts of `INCREMENTAL_MAX_CATEGORIES` most common values, the rest are counted
+    in `other_count`, so the unique count of such a column is unknown.
+    """
+
+    def __init__(self, column_type: ColumnType, reference: Optional[pd.Series] = None):
+        self.column_type = column_type
+        self.number_of_rows = 0
+        self.missing = 0
+        self.count = 0
+        self.infinite = 0
+        self.finite = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.value_counts: Optional[Dict[Any, int]] = {}
+        self.other_count = 0
+        self.bins: Optional[_Bins] = None
+        self.log_bins: Optional[_Bins] = None
+        if column_type == ColumnType.Numerical and reference is not None:
+            finite = self._finite(reference.dropna())
+            self.bins = self._create_bins(finite)
+            self.log_bins = self._create_bins(_positive_log(finite))
+
+    @staticmethod
+    def _create_bins(values: np.ndarray) -> Optional[_Bins]:
+        edges = _edges(values)
+        return _Bins(edges) if edges is not None else None
+
+    @property
+    def edges(self) -> Optional[np.ndarray]:
+        return self.bins.edges if self.bins is not None else None
+
+    @property
+    def histogram(self) -> Optional[np.ndarray]:
+        return self.bins.counts if self.bins is not None else None
+
+    @property
+    def log_edges(self) -> Optional[np.ndarray]:
+        return self.log_bins.edges if self.log_bins is not None else None
+
+    @property
+    def log_histogram(self) -> Optional[np.ndarray]:
+        return self.log_bins.counts if self.log_bins is not None else None
+
+    @staticmethod
+    def _finite(values: pd.Series) -> np.ndarray:
+        data = values.to_numpy(dtype=float)
+        return data[np.isfinite(data)]
+
+    def prepare(self, values: pd.Series) -> _PreparedBatch:
+        """Present values of a batch, their floats and histograms widened to them for numerical column.
+
+        Raises ValueError for non-numeric values or values histograms cannot cover, the aggregate is not changed.
+        """
+        present = values.dropna()
+        if self.column_type != ColumnType.Numerical:
+            return _PreparedBatch(present, None, None, None)
+        try:
+            data = present.to_numpy(dtype=float)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Numerical column '{values.name}' has non-numeric values") from e
+        finite = data[np.isfinite(data)]
+        try:
+            bins = self._widened_bins(self.bins, finite)
+            log_bins = self._widened_bins(self.log_bins, _positive_log(finite))
+        except ValueError as e:
+            raise ValueError(f"Numerical column '{values.name}' has values too far from its histogram bins") from e
+        return _PreparedBatch(present, data, bins, log_bins)
+
+    @classmethod
+    def _widened_bins(cls, bins: Optional[_Bins], values: np.ndarray) -> Optional[_Bins]:
+        if len(values) == 0:
+            return bins
+        if bins is None:
+            return cls._create_bins(values)
+        return bins.widened(float(values.min()), float(values.max()))
+
+    def update(self, values: pd.Series, prepared: Optional[_PreparedBatch] = None):
+        present, data, bins, log_bins = prepared if prepared is not None else self.prepare(values)
+        self.number_of_rows += len(values)
+        self.missing += len(values) - len(present)
+        self.count += len(present)
+        self._update_value_counts(present.value_counts().items())
+        if data is None or len(data) == 0:
+            return
+        self.min = float(data.min()) if self.min is None else min(self.min, float(data.min()))
+        self.max = float(data.max()) if self.max is None else max(self.max, float(data.max()))
+        finite = data[np.isfinite(data)]
+        self.infinite += len(data) - len(finite)
+        if len(finite) == 0:
+            return
+        with np.errstate(over="ignore"):
+            # moments of values near the float limit overflow to infinity, as they do for raw values
+            self._merge_moments(len(finite), float(finite.mean()), float(((finite - finite.mean()) ** 2).sum()))
+        # prepared histograms already cover the values, so adding them does not allocate bins
+        self.bins, self.log_bins = bins, log_bins
+        if bins is not None:
+            bins.add(finite)
+        if log_bins is not None:
+            log_bins.add(_positive_log(finite))
+
+    def merge(self, other: "ColumnAggregate"):
+        """Merge aggregate of the same column, histograms of other bins are re-binned by bin centers"""
+        self.number_of_rows += other.number_of_rows
+        self.missing += other.missing
+        self.count += other.count
+        self.infinite += other.infinite
+        self.other_count += other.other_count
+        if other.value_counts is None:
+            self.value_counts = None
+        else:
+            self._update_value_counts(other.value_counts.items())
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        if other.finite > 0:
+            self._merge_moments(other.finite, other.mean, other.m2)
+        self.bins = self._merge_bins(self.bins, other.bins)
+        self.log_bins = self._merge_bins(self.log_bins, other.log_bins)
+
+    @staticmethod
+    def _merge_bins(bins: Optional[_Bins], other: Optional[_Bins]) -> Optional[_Bins]:
+        if other is None:
+            return bins
+        if bins is None:
+            return copy.deepcopy(other)
+        bins.merge(other)
+        return bins
+
+    def _merge_moments(self, count: int, mean: float, m2: float):
+        total = self.finite + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.finite * count / total
+        self.finite = total
+
+    def _update_value_counts(self, value_counts):
+        if self.value_counts is None:
+            return
+        for value, count in value_counts:
+            value = value.item() if isinstance(value, np.generic) else value
+            self.value_counts[value] = self.value_counts.get(value, 0) + int(count)
+        if self.column_type == ColumnType.Numerical and len(self.value_counts) > INCREMENTAL_MAX_VALUE_COUNTS:
+            self.value_counts = None
+        elif self.column_type == ColumnType.Categorical and len(self.value_counts) > INCREMENTAL_MAX_CATEGORIES:
+            kept = dict(heapq.nlargest(INCREMENTAL_MAX_CATEGORIES, self.value_counts.items(), key=lambda item: item[1]))
+            self.other_count += sum(self.value_counts.values()) - sum(kept.values())
+            self.value_counts = kept
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Quantile of values, exact while value counts are kept, otherwise approximated by interpolation
+        inside histogram bins (with error up to the bin width)"""
+        if self.value_counts is not None:
+            if self.count == 0:
+                return None
+            values, counts = zip(*sorted(self.value_counts.items()))
+            # linear interpolation between closest ranks, as pandas does
+            position = (self.count - 1) * q
+            ranks = np.cumsum(counts)
+            lower = values[np.searchsorted(ranks, np.floor(position), side="right")]
+            upper = values[np.searchsorted(ranks, np.ceil(position), side="right")]
+            return float(lower + (upper - lower) * (position - np.floor(position)))
+        if self.bins is None or self.finite == 0:
+            return None
+        cumulative = np.concatenate([[0], np.cumsum(self.bins.counts)]) / self.bins.counts.sum()
+        return float(np.interp(q, cumulative, self.bins.edges))
+
+    def stats(self) -> FeatureQualityStats:
+        """Stats of the column, the same as `get_features_stats` computes from all values of the column"""
+        result = FeatureQualityStats(feature_type=self.column_type.value)
+        if self.number_of_rows == 0:
+            return result
+
+        def percentage(value: int) -> float:
+            return np.round(100 * value / self.number_of_rows, 2)
+
+        result.number_of_rows = self.number_of_rows
+        result.missing_count = self.missing
+        result.missing_percentage = percentage(self.missing)
+        result.count = self.count
+        if self.value_counts is not None:
+            if self.other_count == 0:
+                result.unique_count = len(self.value_counts)
+                result.unique_percentage = percentage(len(self.value_counts))
+            most_common = max(self.value_counts.items(), key=lambda item: item[1], default=None)
+            if most_common is None or self.missing > most_common[1]:
+                result.most_common_value = np.nan
+                result.most_common_value_percentage = percentage(self.missing)
+                if most_common is not None:
+                    result.most_common_not_null_value = most_common[0]
+                    result.most_common_not_null_value_percentage = percentage(most_common[1])
+            else:
+                result.most_common_value, count = most_common
+                result.most_common_value_percentage = percentage(count)
+        if self.column_type == ColumnType.Numerical:
+            if isinstance(result.most_common_value, float):
+                result.most_common_value = np.round(result.most_common_value, 5)
+            result.infinite_count = self.infinite
+            result.infinite_percentage = percentage(self.infinite)
+            result.min = np.round(self.min, 2) if self.min is not None else np.nan
+            result.max = np.round(self.max, 2) if self.max is not None else np.nan
+            result.mean = np.round(self.mean, 2) if self.finite > 0 else np.nan
+            result.std = np.round(np.sqrt(self.m2 / (self.finite - 1)), 2) if self.finite > 1 else np.nan
+            for name, q in (("percentile_25", 0.25), ("percentile_50", 0.5), ("percentile_75", 0.75)):
+                value = self.quantile(q)
+                setattr(result, name, np.round(value, 2) if value is not None else np.nan)
+        return result
+
+    def counts_of_values(self) -> Optional[pd.DataFrame]:
+        if self.value_counts is None:
+            return None
+        counts = list(self.value_counts.items())
+        if self.missing > 0:
+            counts.append((np.nan, self.missing))
+        counts.sort(key=lambda item: -item[1])
+        return pd.DataFrame(counts[:10], columns=["x", "count"])
+
+
+def _histogram_data(counts: Optional[np.ndarray], edges: Optional[np.ndarray]) -> HistogramData:
+    if counts is None or edges is None:
+        counts, edges = np.histogram([], bins=[0, 1])
+    return HistogramData.from_df(make_hist_df((counts, edges)))
+
+
+def _numerical_histogram(aggregate: ColumnAggregate, reference: Optional[pd.Series]) -> Histogram:
+    reference_hist = None
+    reference_log = None
+    if reference is not None:
+        finite = ColumnAggregate._finite(reference.dropna())
+        if aggregate.edges is not None:
+            reference_hist = _histogram_data(_bin_counts(finite, aggregate.edges), aggregate.edges)
+        if aggregate.log_edges is not None:
+            reference_log = _histogram_data(
+                _bin_counts(_positive_log(finite), aggregate.log_edges), aggregate.log_edges
+            )
+    return Histogram(
+        current=_histogram_data(aggregate.histogram, aggregate.edges),
+        reference=reference_hist,
+        current_log=_histogram_data(aggregate.log_histogram, aggregate.log_edges),
+        reference_log=reference_log,
+    )
+
+
+def _categorical_histogram(aggregate: ColumnAggregate, reference: Optional[pd.Series]) -> Histogram:
+    current = pd.Series(aggregate.value_counts or {}, dtype=float)
+    current = current.groupby(current.index.astype(str)).sum()
+    if aggregate.other_count > 0:
+        # folded values are not known, they are shown in "other" together with small categories
+        current["other"] = current.get("other", 0) + aggregate.other_count
+    reference_counts = reference.dropna().astype(str).value_counts() if reference is not None else None
+    # the same merging of small categories as `relabel_data` does
+    categories = current.index if reference_counts is None else current.index.union(reference_counts.index)
+    if len(categories) > MAX_CATEGORIES:
+        shares = current / max(current.sum(), 1)
+        if reference_counts is not None:
+            shares = pd.concat([shares, reference_counts / max(reference_counts.sum(), 1)])
+        kept = shares.sort_values(ascending=False).index.drop_duplicates(keep="first")[:MAX_CATEGORIES]
+
+        def relabel(counts: pd.Series) -> pd.Series:
+            return counts.groupby([value if value in kept else "other" for value in counts.index]).sum()
+
+        current = relabel(current)
+        reference_counts = relabel(reference_counts) if reference_counts is not None else None
+
+    def histogram_data(counts: pd.Series) -> HistogramData:
+        counts = counts[counts > 0].sort_values(ascending=False, kind="stable")
+        return HistogramData(x=pd.Series(counts.index), count=pd.Series(counts.to_numpy(dtype=int)))
+
+    return Histogram(
+        current=histogram_data(current),
+        reference=histogram_data(reference_counts) if reference_counts is not None else None,
+    )
+
+
+class IncrementalReport:
+    """Running aggregates of a collector window for a report of supported metrics.
+
+    Supported metrics are `ColumnSummaryMetric` over numerical and categorical columns. Column types are taken
+    from reference data, so they do not depend on values of the first pushed batch.
+    """
+
+    def __init__(self, report: Report, reference: Optional[pd.DataFrame]):
+        if not isinstance(report, Report):
+            raise ValueError("Incremental reports support only reports without tests")
+        unsupported = [metric for metric in report.metrics if not isinstance(metric, SUPPORTED_METRICS)]
+        if unsupported:
+            raise ValueError(
+                f"Incremental reports support only {[m.__name__ for m in SUPPORTED_METRICS]},"
+                f" got {[type(m).__name__ for m in unsupported]}"
+            )
+        if reference is None:
+            raise ValueError("Incremental reports require reference data to fix column types")
+        self.report = report
+        self.reference: pd.DataFrame = reference
+        self.rows = 0
+        self.pushes = 0
+        self.columns: Dict[str, ColumnAggregate] = self._init_columns(reference)
+
+    @property
+    def metrics(self) -> List[ColumnSummaryMetric]:
+        return self.report.metrics  # type: ignore[return-value]
+
+    def _init_columns(self, reference: pd.DataFrame) -> Dict[str, ColumnAggregate]:
+        missing = [metric.column_name.name for metric in self.metrics if metric.column_name.name not in reference]
+        if missing:
+            raise ValueError(f"Columns {missing} not found in reference data.")
+        definition = create_data_definition(
+            None,
+            reference,
+            ColumnMapping(),
+            self.report.options.data_definition_options.categorical_features_cardinality,
+        )
+        column_types: Dict[str, ColumnType] = {}
+        for metric in self.metrics:
+            name = metric.column_name.name
+            column = definition.get_column(name)
+            if column.column_type not in SUPPORTED_COLUMN_TYPES:
+                raise ValueError(f"Incremental reports do not support {column.column_type.value} column '{name}'")
+            column_types[name] = column.column_type
+        return {name: ColumnAggregate(column_type, reference[name]) for name, column_type in column_types.items()}
+
+    def update(self, data: pd.DataFrame):
+        """Fold pushed batch into the aggregates.
+
+        All columns are checked before any aggregate is updated, so a rejected batch leaves the window unchanged.
+        """
+        missing = [name for name in self.columns if name not in data]
+        if missing:
+            raise ValueError(f"Columns {missing} not found in pushed data.")
+        prepared = {name: aggregate.prepare(data[name]) for name, aggregate in self.columns.items()}
+        for name, aggregate in self.columns.items():
+            aggregate.update(data[name], prepared[name])
+        self.rows += len(data)
+        self.pushes += 1
+
+    def _result(self, metric: ColumnSummaryMetric) -> ColumnSummaryResult:
+        name = metric.column_name.name
+        aggregate = self.columns[name]
+        column_type = aggregate.column_type
+        reference = self.reference[name]
+        current_characteristics = ColumnSummaryMetric.map_data(aggregate.stats())
+        reference_characteristics = ColumnSummaryMetric.map_data(get_features_stats(reference, column_type))
+        if column_type == ColumnType.Categorical and aggregate.value_counts is not None and aggregate.other_count == 0:
+            current_values = set(aggregate.value_counts)
+            reference_values = set(reference.dropna().unique())
+            assert isinstance(current_characteristics, CategoricalCharacteristics)
+            current_characteristics.new_in_current_values_count = len(current_values - reference_values)
+            current_characteristics.unused_in_current_values_count = len(reference_values - current_values)
+        counts_of_values = {}
+        current_counts = aggregate.counts_of_values()
+        if current_counts is not None:
+            counts_of_values["current"] = current_counts
+        reference_counts = reference.value_counts(dropna=False).reset_index()
+        reference_counts.columns = pd.Index(["x", "count"])
+        counts_of_values["reference"] = reference_counts.head(10)
+        if column_type == ColumnType.Numerical:
+            histogram = _numerical_histogram(aggregate, reference)
+        else:
+            histogram = _categorical_histogram(aggregate, reference)
+        return ColumnSummaryResult(
+            column_name=metric.column_name.display_name,
+            column_type=column_type.value,
+            reference_characteristics=reference_characteristics,
+            current_characteristics=current_characteristics,
+            plot_data=DataQualityPlot(
+                bins_for_hist=histogram,
+                data_in_time=None,
+                data_by_target=None,
+                counts_of_values=counts_of_values,
+            ),
+        )
+
+    def finalize(self, timestamp: Optional[datetime.datetime] = None) -> Report:
+        """Build report with results of the aggregated window"""
+        report = self.report
+        snapshot = Snapshot(
+            id=new_id(),
+            name=report.name,
+            timestamp=timestamp or datetime.datetime.now(),
+            metadata=report.metadata,
+            tags=report.tags,
+            suite=ContextPayload(
+                metrics=list(self.metrics),
+                metric_results=[self._result(metric) for metric in self.metrics],
+                tests=[],
+                test_results=[],
+                options=report.options,
+            ),
+            metrics_ids=list(range(len(self.metrics))),
+            options=report.options,
+        )
+        return Report._parse_snapshot(snapshot)
@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import pandas as pd
+from litestar.concurrency import sync_to_thread
+
+from servequery._pydantic_compat import BaseModel
+from servequery.legacy.collector.config import CollectorConfig
+from servequery.legacy.collector.config import CollectorServiceConfig
+from servequery.legacy.collector.incremental import IncrementalReport
+from servequery.legacy.collector.storage import CreateReportEvent
+from servequery.legacy.collector.storage import UploadReportEvent
+from servequery.legacy.pipeline.column_mapping import ColumnMapping
+from servequery.legacy.suite.base_suite import ReportBase
+from servequery.legacy.suite.base_suite import Snapshot
+from servequery.legacy.utils.parallel import is_picklable
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyStats(BaseModel):
+    count: int = 0
+    mean: float = 0
+    max: float = 0
+    last: float = 0
+
+    def add(self, value: float):
+        self.count += 1
+        self.mean += (value - self.mean) / self.count
+        self.max = max(self.max, value)
+        self.last = value
+
+
+class CollectorMetrics(BaseModel):
+    """Scheduler metrics of one collector
+
+    - report_queue_depth - number of flushed windows waiting for a report or being reported
+    - upload_queue_depth - number of reports waiting for upload or being uploaded
+    - reports_failed - number of reports which failed to run
+    - uploads_failed - number of uploads which failed after all retries
+    - upload_retries - number of retried uploads
+    - report_latency - time of report runs in seconds
+    - upload_latency - time of successful uploads in seconds
+    """
+
+    report_queue_depth: int = 0
+    upload_queue_depth: int = 0
+    reports_failed: int = 0
+    uploads_failed: int = 0
+    upload_retries: int = 0
+    report_latency: LatencyStats = LatencyStats()
+    upload_latency: LatencyStats = LatencyStats()
+
+
+def _run_report_snapshot(report: ReportBase, reference: Optional[pd.DataFrame], current: pd.DataFrame) -> Snapshot:
+    # results of a report are bound to its metric objects, so only the snapshot is sent back from a worker process
+    report.run(reference_data=reference, current_data=current, column_mapping=ColumnMapping())
+    return report.to_snapshot()
+
+
+class ReportScheduler:
+    """Runs collector reports and uploads off the event loop.
+
+    Reports run in a process pool (or in threads if `report_processes` is 0) with at most
+    `max_concurrent_reports` reports of a collector at a time, so a slow collector does not delay others.
+    Created reports are uploaded by `upload_workers` tasks from a separate queue with retries,
+    collector locks are only held to flush buffered data.
+    """
+
+    def __init__(self, service: CollectorServiceConfig):
+        self.service = service
+        self.metrics: Dict[str, CollectorMetrics] = defaultdict(CollectorMetrics)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._pending: Dict[str, int] = defaultdict(int)
+        self._reports: Set[asyncio.Task] = set()
+        self._uploads: "Optional[asyncio.Queue[Tuple[CollectorConfig, ReportBase]]]" = None
+        self._upload_workers: List[asyncio.Task] = []
+
+    async def start(self):
+        if self.service.report_processes > 0:
+            self._executor = ProcessPoolExecutor(self.service.report_processes)
+        self._uploads = asyncio.Queue()
+        self._upload_workers = [
+            asyncio.create_task(self._upload_worker()) for _ in range(max(self.service.upload_workers, 1))
+        ]
+
+    async def stop(self):
+        """Wait for running reports and stop uploads, reports which are not uploaded are kept in storage"""
+        await asyncio.gather(*self._reports, return_exceptions=True)
+        for worker in self._upload_workers:
+            worker.cancel()
+        await asyncio.gather(*self._upload_workers, return_exceptions=True)
+        self._upload_workers = []
+        if self._uploads is not None:
+            while not self._uploads.empty():
+                collector, report = self._uploads.get_nowait()
+                self.service.storage.add_report(collector.id, report)
+                self.metrics[collector.id].upload_queue_depth -= 1
+                self._uploads.task_done()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def check(self):
+        """Start reports for ready collectors and queue reports for upload.
+
+        Collectors which already have `max_concurrent_reports` reports started are not flushed again,
+        so their data stays in (bounded) storage until a report slot is free.
+        """
+        for collector in list(self.service.collectors.values()):
+            has_slot = self._pending[collector.id] < max(self.service.max_concurrent_reports, 1)
+            if has_slot and collector.trigger.is_ready(collector, self.service.storage):
+                self._pending[collector.id] += 1
+                task = asyncio.create_task(self._pending_snapshot(collector))
+                self._reports.add(task)
+                task.add_done_callback(self._reports.discard)
+            self._queue_uploads(collector)
+
+    async def wait(self):
+        """Wait until all started reports are created and uploaded (or failed)"""
+        while self._reports:
+            await asyncio.gather(*self._reports, return_exceptions=True)
+        if self._uploads is not None:
+            await self._uploads.join()
+
+    def _semaphore(self, id: str) -> asyncio.Semaphore:
+        if id not in self._semaphores:
+            self._semaphores[id] = asyncio.Semaphore(max(self.service.max_concurrent_reports, 1))
+        return self._semaphores[id]
+
+    async def _pending_snapshot(self, collector: CollectorConfig):
+        try:
+            await self.create_snapshot(collector)
+        finally:
+            self._pending[collector.id] -= 1
+
+    async def create_snapshot(self, collector: CollectorConfig):
+        storage = self.service.storage
+        metrics = self.metrics[collector.id]
+        # data is flushed only after a report slot is acquired, so waiting reports do not hold buffered data
+        async with self._semaphore(collector.id):
+            window: Optional[IncrementalReport] = None
+            current: Optional[pd.DataFrame] = None
+            # flushed data stays in storage until the report is stored, so it is not lost if the service stops
+            flush_id = str(uuid.uuid4())
+            async with storage.lock(collector.id):
+                if collector.incremental:
+                    window = storage.take_window(collector.id)
+                else:
+                    current = await sync_to_thread(storage.get_and_flush, collector.id, flush_id)
+            if current is None and window is None:
+                return
+            metrics.report_queue_depth += 1
+            try:
+                report = window.report if window is not None else collector.report_config.to_report_base()
+                start = time.perf_counter()
+                try:
+                    if window is not None:
+                        report = await sync_to_thread(window.finalize)
+                    else:
+                        assert current is not None
+                        current.index = current.index.astype(int)
+                        report = await self._run_report(collector, report, current)
+                except Exception as e:
+                    logger.exception(f"Error running report: {e}")
+                    metrics.reports_failed += 1
+                    storage.complete_flush(collector.id, flush_id)
+                    storage.log(
+                        collector.id,
+                        CreateReportEvent(
+                            report_id=str(report.id),
+                            ok=False,
+                            error=f"Error running report: {e.__class__.__name__}: {e.args}",
+                        ),
+                    )
+                    return
+                metrics.report_latency.add(time.perf_counter() - start)
+            finally:
+                metrics.report_queue_depth -= 1
+        storage.add_report(collector.id, report)
+        storage.complete_flush(collector.id, flush_id)
+        storage.log(collector.id, CreateReportEvent(report_id=str(report.id), ok=True))
+        self._queue_uploads(collector)
+
+    async def _run_report(self, collector: CollectorConfig, report: ReportBase, current: pd.DataFrame) -> ReportBase:
+        reference = await sync_to_thread(lambda: collector.reference)
+        include_data = collector.save_datasets and collector.is_cloud_resolved
+        if self._executor is not None and not include_data and is_picklable(report):
+            loop = asyncio.get_running_loop()
+            snapshot = await loop.run_in_executor(self._executor, _run_report_snapshot, report, reference, current)
+            return type(report)._parse_snapshot(snapshot)
+        await sync_to_thread(report.run, reference_data=reference, current_data=current, column_mapping=ColumnMapping())
+        report._inner_suite.raise_for_error()
+        return report
+
+    def _queue_uploads(self, collector: CollectorConfig):
+        if self._uploads is None:
+            return
+        for report_item in self.service.storage.take_reports(collector.id):
+            with report_item as report:
+                self._uploads.put_nowait((collector, report))
+                self.metrics[collector.id].upload_queue_depth += 1
+
+    async def _upload_worker(self):
+        assert self._uploads is not None
+        while True:
+            collector, report = await self._uploads.get()
+            try:
+                await self._upload(collector, report)
+            except asyncio.CancelledError:
+                self.service.storage.add_report(collector.id, report)
+                raise
+            finally:
+                self.metrics[collector.id].upload_queue_depth -= 1
+                self._uploads.task_done()
+
+    async def _upload(self, collector: CollectorConfig, report: ReportBase):
+        storage = self.service.storage
+        metrics = self.metrics[collector.id]
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                await sync_to_thread(
+                    collector.workspace._add_report_base,
+                    collector.project_id,
+                    report,
+                    collector.save_datasets and collector.is_cloud_resolved,  # only save datasets to cloud
+                )
+            except Exception as e:
+                if attempt < self.service.upload_retries:
+                    metrics.upload_retries += 1
+                    await asyncio.sleep(self.service.upload_retry_delay * 2**attempt)
+                    attempt += 1
+                    continue
+                logger.exception(f"Error saving snapshot: {e}")
+                metrics.uploads_failed += 1
+                # kept in storage to be uploaded again at the next check
+                storage.add_report(collector.id, report)
+                storage.log(
+                    collector.id,
+                    UploadReportEvent(
+                        report_id=str(report.id),
+                        ok=False,
+                        error=f"Error saving snapshot: {e.__class__.__name__}: {e.args}",
+                    ),
+                )
+                return
+            metrics.upload_latency.add(time.perf_counter() - start)
+            storage.log(collector.id, UploadReportEvent(report_id=str(report.id), ok=True))
+            return
@@ -0,0 +1,81 @@
+from typing import Any
+from typing import List
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet
+
+from servequery.legacy.ui.utils import parse_json
+
+JSON_CONTENT_TYPE = "application/json"
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_CONTENT_TYPE = "application/vnd.apache.parquet"
+
+DATA_FORMATS = {
+    "json": JSON_CONTENT_TYPE,
+    "arrow": ARROW_CONTENT_TYPE,
+    "parquet": PARQUET_CONTENT_TYPE,
+}
+
+
+class UnsupportedContentTypeError(ValueError):
+    pass
+
+
+def get_content_type(format: str) -> str:
+    if format not in DATA_FORMATS:
+        raise ValueError(f"Unsupported data format '{format}', expected one of {list(DATA_FORMATS)}")
+    return DATA_FORMATS[format]
+
+
+def to_table(data: pd.DataFrame) -> pa.Table:
+    # index is always stored as a column so tables from different pushes can be concatenated
+    return pa.Table.from_pandas(data, preserve_index=True)
+
+
+def encode_data(data: pd.DataFrame, content_type: str) -> bytes:
+    """Serialize data frame to request body of given content type (arrow or parquet)"""
+    table = to_table(data)
+    sink = pa.BufferOutputStream()
+    if content_type == ARROW_CONTENT_TYPE:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    elif content_type == PARQUET_CONTENT_TYPE:
+        pa.parquet.write_table(table, sink)
+    else:
+        raise ValueError(f"Unsupported content type '{content_type}'")
+    return sink.getvalue().to_pybytes()
+
+
+def decode_data(body: bytes, content_type: Optional[str]) -> Any:
+    """Deserialize pushed data from request body.
+
+    Returns:
+        arrow table for columnar content types, parsed json otherwise.
+    """
+    media_type = (content_type or JSON_CONTENT_TYPE).split(";")[0].strip().lower()
+    if media_type == ARROW_CONTENT_TYPE:
+        return pa.ipc.open_stream(body).read_all()
+    if media_type == PARQUET_CONTENT_TYPE:
+        return pa.parquet.read_table(pa.BufferReader(body))
+    if media_type == JSON_CONTENT_TYPE:
+        return parse_json(body)
+    raise UnsupportedContentTypeError(f"Unsupported content type '{content_type}'")
+
+
+def concat_data(items: List[Any]) -> pd.DataFrame:
+    """Build one data frame from pushed items.
+
+    Arrow tables are concatenated without copying and converted to pandas once,
+    json payloads (and tables with mismatching schemas) fall back to per-item frames.
+    """
+    if all(isinstance(item, pa.Table) for item in items):
+        try:
+            return pa.concat_tables(items).to_pandas()
+        except pa.ArrowInvalid:
+            pass
+    return pd.concat(
+        [item.to_pandas() if isinstance(item, pa.Table) else pd.DataFrame.from_dict(item) for item in items]
+    )
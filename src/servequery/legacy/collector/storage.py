@@ -1,17 +1,33 @@
 import abc
+import logging
+import os
 from asyncio import Lock
 from typing import Any
+from typing import Callable
 from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Sequence
+from typing import Tuple
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
 
 from servequery._pydantic_compat import BaseModel
+from servequery.legacy.collector.incremental import IncrementalReport
+from servequery.legacy.collector.serialization import concat_data
+from servequery.legacy.collector.serialization import to_table
 from servequery.legacy.suite.base_suite import ReportBase
 from servequery.pydantic_utils import PolymorphicModel
 from servequery.pydantic_utils import autoregister
 
+logger = logging.getLogger(__name__)
+
+
+class StorageFullError(Exception):
+    """Raised by `CollectorStorage.append` when data cannot be buffered until it is flushed"""
+
 
 class LogEvent(BaseModel):
     type: str
@@ -47,10 +63,27 @@ class CollectorStorage(PolymorphicModel):
         is_base_type = True
 
     _locks: Dict[str, Lock] = {}
+    _windows: Dict[str, IncrementalReport] = {}
 
     def lock(self, id: str):
         return self._locks[id]
 
+    def aggregate(self, id: str, data: pd.DataFrame, create_window: Callable[[], IncrementalReport]):
+        """Fold pushed data into running aggregates of incremental collector window"""
+        window = self._windows.get(id)
+        if window is None:
+            window = create_window()
+        window.update(data)
+        # a new window is kept only after its first batch is accepted
+        self._windows[id] = window
+
+    def take_window(self, id: str) -> Optional[IncrementalReport]:
+        return self._windows.pop(id, None)
+
+    def get_window_size(self, id: str) -> int:
+        window = self._windows.get(id)
+        return window.pushes if window is not None else 0
+
     def init(self, id: str):
         self._locks[id] = Lock()
 
@@ -67,9 +100,12 @@ class CollectorStorage(PolymorphicModel):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get_and_flush(self, id: str):
+    def get_and_flush(self, id: str, flush_id: Optional[str] = None):
         raise NotImplementedError
 
+    def complete_flush(self, id: str, flush_id: str):
+        """Release data taken by `get_and_flush` with `flush_id` after its report is stored"""
+
     @abc.abstractmethod
     def log(self, id: str, event: LogEvent):
         raise NotImplementedError
@@ -108,13 +144,13 @@ class InMemoryStorage(CollectorStorage):
         self._buffers[id].append(data)
 
     def get_buffer_size(self, id: str):
-        return len(self._buffers[id])
+        return len(self._buffers[id]) + self.get_window_size(id)
 
-    def get_and_flush(self, id: str):
+    def get_and_flush(self, id: str, flush_id: Optional[str] = None):
         if id not in self._buffers or len(self._buffers[id]) == 0:
             return None
 
-        res = pd.concat([pd.DataFrame.from_dict(o) for o in self._buffers[id]])
+        res = concat_data(self._buffers[id])
         self._buffers[id].clear()
         return res
 
@@ -133,3 +169,219 @@ class InMemoryStorage(CollectorStorage):
         report_list = self._reports.get(id, [])
         while len(report_list) > 0:
             yield ReportPopper(report_list.pop(0), report_list)
+
+
+SEGMENT_SUFFIX = ".arrow"
+
+
+class _Segment(BaseModel):
+    path: str
+    pushes: int
+    size: int
+
+
+def _record_batch(table: pa.Table) -> pa.RecordBatch:
+    # every push is written as one record batch, so pushes can be counted when segments are recovered
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.concat_arrays(column.chunks) if column.num_chunks else pa.array([], column.type)
+            for column in table.columns
+        ],
+        schema=table.schema,
+    )
+
+
+def _read_segment(path: str) -> Tuple[List[pa.RecordBatch], bool]:
+    """Read complete record batches of a segment, a torn batch at the end (after a crash) is dropped.
+    Returns batches and whether the segment was read to its end.
+    """
+    batches = []
+    with pa.OSFile(path) as f:
+        reader = pa.ipc.open_stream(f)
+        try:
+            while True:
+                batches.append(reader.read_next_batch())
+        except StopIteration:
+            return batches, True
+        except (pa.ArrowInvalid, OSError) as e:
+            logger.warning(f"Collector buffer segment {path} is truncated after {len(batches)} pushes: {e}")
+            return batches, False
+
+
+class _SegmentWriter:
+    def __init__(self, segment: _Segment, schema: pa.Schema):
+        self.segment = segment
+        self.schema = schema
+        self.file = open(segment.path, "wb")
+        self.writer = pa.ipc.new_stream(self.file, schema)
+
+    def write(self, table: pa.Table, fsync: bool):
+        self.writer.write_batch(_record_batch(table))
+        self.file.flush()
+        if fsync:
+            os.fsync(self.file.fileno())
+        self.segment.pushes += 1
+        self.segment.size = self.file.tell()
+
+    def close(self):
+        self.writer.close()
+        self.file.close()
+        self.segment.size = os.path.getsize(self.segment.path)
+
+
+@autoregister
+class DiskStorage(InMemoryStorage):
+    """Storage that writes every push ahead to append-only arrow stream segments before it is accepted,
+    so buffered data survives crashes and restarts. Segments are deleted only after a report
+    of their data is stored. The latest pushes are also kept in memory up to `memory_limit` bytes
+    to build reports without reading segments back.
+
+    - path - directory for segment files, one subdirectory per collector
+    - memory_limit - max bytes of pushed data kept in memory per collector, 0 reads all data from disk
+    - disk_limit - max bytes of buffered data on disk per collector,
+      pushes over the limit are rejected with `StorageFullError` until the buffer is flushed
+    - fsync - sync every push to disk before it is accepted
+    """
+
+    class Config:
+        type_alias = "servequery:collector_storage:DiskStorage"
+
+    path: str = "collector_buffer"
+    memory_limit: int = 64 * 2**20
+    disk_limit: Optional[int] = None
+    fsync: bool = True
+
+    _memory_sizes: Dict[str, int] = {}
+    # False when some of buffered data was dropped from memory and has to be read from segments
+    _in_memory: Dict[str, bool] = {}
+    _segments: Dict[str, List[_Segment]] = {}
+    _writers: Dict[str, Optional[_SegmentWriter]] = {}
+    _flushed: Dict[str, Dict[str, List[_Segment]]] = {}
+    _next_segment: Dict[str, int] = {}
+
+    def init(self, id: str):
+        super().init(id)
+        self._memory_sizes[id] = 0
+        self._segments[id] = self._recover_segments(id)
+        self._in_memory[id] = not self._segments[id]
+        self._writers[id] = None
+        self._flushed[id] = {}
+        self._next_segment[id] = self._segment_number(self._segments[id][-1].path) + 1 if self._segments[id] else 0
+
+    def _collector_path(self, id: str) -> str:
+        return os.path.join(self.path, id)
+
+    @staticmethod
+    def _segment_number(path: str) -> int:
+        return int(os.path.basename(path)[: -len(SEGMENT_SUFFIX)])
+
+    def _recover_segments(self, id: str) -> List[_Segment]:
+        collector_path = self._collector_path(id)
+        os.makedirs(collector_path, exist_ok=True)
+        segments = []
+        for name in sorted(os.listdir(collector_path)):
+            path = os.path.join(collector_path, name)
+            if name.endswith(SEGMENT_SUFFIX + ".tmp"):
+                # leftovers of segments which were not completely rewritten
+                os.remove(path)
+                continue
+            if not name.endswith(SEGMENT_SUFFIX):
+                continue
+            try:
+                batches, complete = _read_segment(path)
+            except (pa.ArrowInvalid, OSError) as e:
+                batches, complete = [], False
+                logger.warning(f"Skipping broken collector buffer segment {path}: {e}")
+            if not batches:
+                os.rename(path, path + ".broken")
+                continue
+            if not complete:
+                self._rewrite_segment(path, batches)
+            segments.append(_Segment(path=path, pushes=len(batches), size=os.path.getsize(path)))
+        return segments
+
+    @staticmethod
+    def _rewrite_segment(path: str, batches: List[pa.RecordBatch]):
+        """Drop a torn batch at the end of a recovered segment"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            with pa.ipc.new_stream(f, batches[0].schema) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _disk_size(self, id: str) -> int:
+        flushed = (segment for segments in self._flushed[id].values() for segment in segments)
+        return sum(segment.size for segment in self._segments[id]) + sum(segment.size for segment in flushed)
+
+    def append(self, id: str, data: Any):
+        table = data if isinstance(data, pa.Table) else to_table(pd.DataFrame.from_dict(data))
+        if self.disk_limit is not None and self._disk_size(id) + table.nbytes > self.disk_limit:
+            raise StorageFullError(f"Buffer of collector '{id}' exceeds {self.disk_limit} bytes")
+        writer = self._writers[id]
+        if writer is None or not writer.schema.equals(table.schema):
+            writer = self._open_segment(id, table.schema)
+        writer.write(table, self.fsync)
+        if self._in_memory[id]:
+            self._buffers[id].append(table)
+            self._memory_sizes[id] += table.nbytes
+            if self._memory_sizes[id] > self.memory_limit:
+                self.drop_memory(id)
+
+    def _open_segment(self, id: str, schema: pa.Schema) -> _SegmentWriter:
+        self._close_segment(id)
+        path = os.path.join(self._collector_path(id), f"{self._next_segment[id]:012d}{SEGMENT_SUFFIX}")
+        self._next_segment[id] += 1
+        segment = _Segment(path=path, pushes=0, size=0)
+        self._segments[id].append(segment)
+        writer = self._writers[id] = _SegmentWriter(segment, schema)
+        return writer
+
+    def _close_segment(self, id: str):
+        writer = self._writers[id]
+        if writer is not None:
+            writer.close()
+            self._writers[id] = None
+
+    def drop_memory(self, id: str):
+        """Drop buffered data from memory, it is read back from segments when flushed"""
+        self._buffers[id].clear()
+        self._memory_sizes[id] = 0
+        self._in_memory[id] = False
+
+    def get_buffer_size(self, id: str):
+        return sum(segment.pushes for segment in self._segments[id]) + self.get_window_size(id)
+
+    def get_and_flush(self, id: str, flush_id: Optional[str] = None):
+        """Take buffered data. Its segments are deleted when `complete_flush` is called with the same `flush_id`,
+        until then they are recovered as buffered data after a restart. Without `flush_id` they are deleted at once.
+        """
+        if id not in self._segments or len(self._segments[id]) == 0:
+            return None
+        self._close_segment(id)
+        if self._in_memory[id]:
+            items: List[Any] = list(self._buffers[id])
+        else:
+            items = [pa.Table.from_batches(_read_segment(segment.path)[0]) for segment in self._segments[id]]
+        res = concat_data(items)
+        segments = list(self._segments[id])
+        self._segments[id].clear()
+        self._buffers[id].clear()
+        self._memory_sizes[id] = 0
+        self._in_memory[id] = True
+        if flush_id is None:
+            self._delete_segments(segments)
+        else:
+            self._flushed[id][flush_id] = segments
+        return res
+
+    def complete_flush(self, id: str, flush_id: str):
+        self._delete_segments(self._flushed[id].pop(flush_id, []))
+
+    @staticmethod
+    def _delete_segments(segments: List[_Segment]):
+        for segment in segments:
+            if os.path.exists(segment.path):
+                os.remove(segment.path)
@@ -11,6 +11,8 @@ from nltk.corpus import words
 from nltk.stem.wordnet import WordNetLemmatizer
 
 from servequery.legacy.core import ColumnType
+from servequery.legacy.features._text_processing import TextColumn
+from servequery.legacy.features._text_processing import apply_text
 from servequery.legacy.features.generated_features import ApplyColumnGeneratedFeature
 from servequery.legacy.utils.data_preprocessing import DataDefinition
 
@@ -51,4 +53,20 @@ class OOVWordsPercentage(ApplyColumnGeneratedFeature):
             self._lem = WordNetLemmatizer()
             self._eng_words = set(words.words())
 
-        return super().generate_feature(data, data_definition)
+        values = apply_text(data[self.column_name], self._oov_percentage)
+        if values is None:
+            return super().generate_feature(data, data_definition)
+        return pd.DataFrame({self._feature_column_name(): values})
+
+    def _oov_percentage(self, text: TextColumn) -> np.ndarray:
+        lemmas = text.lemmas(self._lem.lemmatize)
+        oov = np.array(
+            [
+                token not in self.ignore_words and lemma not in self._eng_words
+                for token, lemma in zip(text.tokens, lemmas)
+            ],
+            dtype=bool,
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percentage = 100 * text.count_tokens(oov) / text.token_count
+        return np.where(text.token_count > 0, percentage, 0)
@@ -0,0 +1,163 @@
+"""Shared processing of text columns for text features.
+
+Every text column is normalized and tokenized once per feature computation pass (see `shared_text_columns`),
+so features over the same column (length, word count, words presence, ...) do not repeat per-row Python work.
+"""
+
+import contextlib
+import re
+import threading
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+# same normalization as per-row features use: leave only letters, digits and spaces, split by spaces
+_NOT_WORD_CHARACTERS = "[^A-Za-z0-9 ]+"
+_LETTER = re.compile("[A-Za-z]")
+_SENTENCE_BOUNDARY = r"(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s"
+
+
+class _SharedTextColumns:
+    def __init__(self):
+        # processed columns keyed by id of column values, values are kept referenced so ids are not reused
+        self.columns: Optional[Dict[int, Tuple[np.ndarray, "TextColumn"]]] = None
+        self.users = 0
+        self.lock = threading.Lock()
+
+
+_shared = _SharedTextColumns()
+
+
+@contextlib.contextmanager
+def shared_text_columns() -> Iterator[None]:
+    """Share processed text columns between all text features computed inside.
+
+    Columns are kept until the outermost block exits, column values are not expected to be changed inplace inside it.
+    """
+    with _shared.lock:
+        if _shared.users == 0:
+            _shared.columns = {}
+        _shared.users += 1
+    try:
+        yield
+    finally:
+        with _shared.lock:
+            _shared.users -= 1
+            if _shared.users == 0:
+                _shared.columns = None
+
+
+class TextColumn:
+    """Text column normalized and tokenized once.
+
+    Tokens are lowercased words of the normalized text, stored as `token_rows` (row of every token occurrence)
+    and `token_codes` (index of the occurrence in `tokens`, array of unique tokens).
+    """
+
+    def __init__(self, values: pd.Series):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        self.size = len(values)
+        self._text = pa.array(values.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+        self.missing = self._text.is_null().to_numpy(zero_copy_only=False)
+        self._sentence_count: Optional[np.ndarray] = None
+        self._non_letter_percentage: Optional[np.ndarray] = None
+        self._lemmas: Optional[np.ndarray] = None
+
+        words = pc.split_pattern(pc.ascii_lower(pc.replace_substring_regex(self._text, _NOT_WORD_CHARACTERS, "")), " ")
+        flat_words = pc.list_flatten(words)
+        not_empty = pc.greater(pc.binary_length(flat_words), 0)
+        encoded = pc.filter(flat_words, not_empty).dictionary_encode()
+        self.token_rows = pc.filter(pc.list_parent_indices(words), not_empty).to_numpy().astype(np.int64)
+        self.token_codes = encoded.indices.to_numpy().astype(np.int64)
+        self.tokens = encoded.dictionary.to_numpy(zero_copy_only=False)
+        self.token_count = np.bincount(self.token_rows, minlength=self.size)
+        self.length = pc.fill_null(pc.utf8_length(self._text), 0).to_numpy().astype(np.int64)
+
+    @property
+    def sentence_count(self) -> np.ndarray:
+        if self._sentence_count is None:
+            # lookbehinds of the sentence boundary are not supported by arrow regex engine
+            counts = self._text.to_pandas().str.count(_SENTENCE_BOUNDARY)
+            self._sentence_count = np.where(self.missing, 0, counts.fillna(-1).to_numpy().astype(np.int64) + 1)
+        return self._sentence_count
+
+    @property
+    def non_letter_percentage(self) -> np.ndarray:
+        """share of characters that are not letters or spaces, in percents"""
+        if self._non_letter_percentage is None:
+            import pyarrow.compute as pc
+
+            non_letters = pc.fill_null(pc.count_substring_regex(self._text, r"[^\p{L} ]"), 0).to_numpy()
+            with np.errstate(divide="ignore", invalid="ignore"):
+                percentage = 100 * non_letters / self.length
+            self._non_letter_percentage = np.where(self.length > 0, percentage, 0)
+        return self._non_letter_percentage
+
+    @property
+    def word_count(self) -> np.ndarray:
+        """number of words with at least one letter"""
+        return self.count_tokens(np.array([_LETTER.search(token) is not None for token in self.tokens], dtype=bool))
+
+    def lemmas(self, lemmatize: Callable[[str], str]) -> np.ndarray:
+        """lemmatized unique tokens, lemmatizers are expected to be the same for all features"""
+        if self._lemmas is None:
+            self._lemmas = np.array([lemmatize(token) for token in self.tokens], dtype=object)
+        return self._lemmas
+
+    def count_tokens(self, selected: np.ndarray) -> np.ndarray:
+        """number of token occurrences in every row, selected is a mask over unique tokens"""
+        return np.bincount(self.token_rows[selected[self.token_codes]], minlength=self.size)
+
+    def count_distinct(self, codes: np.ndarray, size: int) -> np.ndarray:
+        """number of distinct values in every row, codes map unique tokens to values from 0 to size or -1"""
+        size = max(size, 1)
+        occurrence_codes = codes[self.token_codes]
+        found = occurrence_codes >= 0
+        pairs = np.unique(self.token_rows[found] * size + occurrence_codes[found])
+        return np.bincount(pairs // size, minlength=self.size)
+
+
+def get_text_column(values: pd.Series) -> Optional[TextColumn]:
+    """Get processed text column for values.
+    Inside `shared_text_columns` the same column values are processed only at first call.
+
+    Returns:
+        processed column or None if the column has values other than strings and missing values.
+    """
+    columns = _shared.columns
+    key_values = values.values
+    cached = columns.get(id(key_values)) if columns is not None else None
+    if cached is not None and cached[0] is key_values and cached[1].size == len(values):
+        return cached[1]
+    if pd.api.types.infer_dtype(values, skipna=True) not in ("string", "empty"):
+        return None
+    text = TextColumn(values)
+    if columns is not None:
+        columns[id(key_values)] = (key_values, text)
+    return text
+
+
+def words_codes(tokens: np.ndarray, words: Iterable[str]) -> Tuple[np.ndarray, int]:
+    """map unique tokens to indexes of words, tokens which are not in words get -1"""
+    index = {word: i for i, word in enumerate(dict.fromkeys(words))}
+    return np.array([index.get(token, -1) for token in tokens], dtype=np.int64), len(index)
+
+
+def apply_text(values: pd.Series, compute: Callable[[TextColumn], np.ndarray]) -> Optional[pd.Series]:
+    """Compute feature values from processed text column.
+
+    Returns:
+        feature values or None if values are not a text column and feature should be computed per row.
+    """
+    text = get_text_column(values)
+    if text is None:
+        return None
+    return pd.Series(compute(text), index=values.index)
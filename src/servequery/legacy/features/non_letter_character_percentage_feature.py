@@ -3,9 +3,12 @@ from typing import ClassVar
 from typing import Optional
 
 import numpy as np
+import pandas as pd
 
 from servequery.legacy.core import ColumnType
+from servequery.legacy.features._text_processing import apply_text
 from servequery.legacy.features.generated_features import ApplyColumnGeneratedFeature
+from servequery.legacy.utils.data_preprocessing import DataDefinition
 
 
 class NonLetterCharacterPercentage(ApplyColumnGeneratedFeature):
@@ -22,10 +25,16 @@ class NonLetterCharacterPercentage(ApplyColumnGeneratedFeature):
 
     def apply(self, value: Any):
         """counts share of characters that are not letters or spaces"""
-        if value is None or (isinstance(value, float) and np.isnan(value)):
+        if value is None or (isinstance(value, float) and np.isnan(value)) or len(value) == 0:
             return 0
         non_letters_num = 0
         for ch in value:
             if not ch.isalpha() and ch != " ":
                 non_letters_num += 1
         return 100 * non_letters_num / len(value)
+
+    def generate_feature(self, data: pd.DataFrame, data_definition: DataDefinition) -> pd.DataFrame:
+        values = apply_text(data[self.column_name], lambda text: text.non_letter_percentage)
+        if values is None:
+            return super().generate_feature(data, data_definition)
+        return pd.DataFrame({self._feature_column_name(): values})
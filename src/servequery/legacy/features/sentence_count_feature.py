@@ -4,9 +4,12 @@ from typing import ClassVar
 from typing import Optional
 
 import numpy as np
+import pandas as pd
 
 from servequery.legacy.core import ColumnType
+from servequery.legacy.features._text_processing import apply_text
 from servequery.legacy.features.generated_features import ApplyColumnGeneratedFeature
+from servequery.legacy.utils.data_preprocessing import DataDefinition
 
 
 class SentenceCount(ApplyColumnGeneratedFeature):
@@ -27,3 +30,9 @@ class SentenceCount(ApplyColumnGeneratedFeature):
             return 0
         number = len(self._reg.split(value))
         return max(1, number)
+
+    def generate_feature(self, data: pd.DataFrame, data_definition: DataDefinition) -> pd.DataFrame:
+        values = apply_text(data[self.column_name], lambda text: text.sentence_count)
+        if values is None:
+            return super().generate_feature(data, data_definition)
+        return pd.DataFrame({self._feature_column_name(): values})
@@ -3,9 +3,12 @@ from typing import ClassVar
 from typing import Optional
 
 import numpy as np
+import pandas as pd
 
 from servequery.legacy.core import ColumnType
+from servequery.legacy.features._text_processing import apply_text
 from servequery.legacy.features.generated_features import ApplyColumnGeneratedFeature
+from servequery.legacy.utils.data_preprocessing import DataDefinition
 
 
 class TextLength(ApplyColumnGeneratedFeature):
@@ -24,3 +27,9 @@ class TextLength(ApplyColumnGeneratedFeature):
         if value is None or (isinstance(value, float) and np.isnan(value)):
             return 0
         return len(value)
+
+    def generate_feature(self, data: pd.DataFrame, data_definition: DataDefinition) -> pd.DataFrame:
+        values = apply_text(data[self.column_name], lambda text: text.length)
+        if values is None:
+            return super().generate_feature(data, data_definition)
+        return pd.DataFrame({self._feature_column_name(): values})
@@ -5,11 +5,15 @@ from typing import List
 from typing import Optional
 
 import numpy as np
+import pandas as pd
 from nltk.stem.wordnet import WordNetLemmatizer
 
 from servequery._pydantic_compat import PrivateAttr
 from servequery.legacy.core import ColumnType
+from servequery.legacy.features._text_processing import TextColumn
+from servequery.legacy.features._text_processing import apply_text
 from servequery.legacy.features.generated_features import ApplyColumnGeneratedFeature
+from servequery.legacy.utils.data_preprocessing import DataDefinition
 
 
 class TriggerWordsPresent(ApplyColumnGeneratedFeature):
@@ -55,6 +59,17 @@ class TriggerWordsPresent(ApplyColumnGeneratedFeature):
                 return 1
         return 0
 
+    def generate_feature(self, data: pd.DataFrame, data_definition: DataDefinition) -> pd.DataFrame:
+        values = apply_text(data[self.column_name], self._words_present)
+        if values is None:
+            return super().generate_feature(data, data_definition)
+        return pd.DataFrame({self._feature_column_name(): values})
+
+    def _words_present(self, text: TextColumn) -> np.ndarray:
+        tokens = text.lemmas(self.lem.lemmatize) if self.lemmatize else text.tokens
+        listed = np.array([token in self.words_list for token in tokens], dtype=bool)
+        return (text.count_tokens(listed) > 0).astype(np.int64)
+
     def _feature_column_name(self):
         return self.column_name + "_" + "_".join(self.words_list) + "_" + str(self.lemmatize)
 
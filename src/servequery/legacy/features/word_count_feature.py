@@ -4,9 +4,12 @@ from typing import ClassVar
 from typing import Optional
 
 import numpy as np
+import pandas as pd
 
 from servequery.legacy.core import ColumnType
+from servequery.legacy.features._text_processing import apply_text
 from servequery.legacy.features.generated_features import ApplyColumnGeneratedFeature
+from servequery.legacy.utils.data_preprocessing import DataDefinition
 
 
 class WordCount(ApplyColumnGeneratedFeature):
@@ -26,3 +29,9 @@ class WordCount(ApplyColumnGeneratedFeature):
         if value is None or (isinstance(value, float) and np.isnan(value)):
             return 0
         return len(self._reg.sub("", value).split())
+
+    def generate_feature(self, data: pd.DataFrame, data_definition: DataDefinition) -> pd.DataFrame:
+        values = apply_text(data[self.column_name], lambda text: text.word_count)
+        if values is None:
+            return super().generate_feature(data, data_definition)
+        return pd.DataFrame({self._feature_column_name(): values})
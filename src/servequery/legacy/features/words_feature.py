@@ -11,6 +11,9 @@ from nltk.stem.wordnet import WordNetLemmatizer
 from servequery._pydantic_compat import PrivateAttr
 from servequery.legacy.base_metric import ColumnName
 from servequery.legacy.core import ColumnType
+from servequery.legacy.features._text_processing import TextColumn
+from servequery.legacy.features._text_processing import apply_text
+from servequery.legacy.features._text_processing import words_codes
 from servequery.legacy.features.generated_features import ApplyColumnGeneratedFeature
 from servequery.legacy.features.generated_features import GeneratedFeature
 from servequery.legacy.utils.data_preprocessing import DataDefinition
@@ -83,6 +86,23 @@ class WordsPresence(ApplyColumnGeneratedFeature):
     def apply(self, value: Any):
         return _listed_words_present(value, self.mode, self.lem, self.words_list, self.lemmatize)
 
+    def generate_feature(self, data: pd.DataFrame, data_definition: DataDefinition) -> pd.DataFrame:
+        values = apply_text(data[self.column_name], self._words_present)
+        if values is None:
+            return super().generate_feature(data, data_definition)
+        return pd.DataFrame({self._feature_column_name(): values})
+
+    def _words_present(self, text: TextColumn) -> np.ndarray:
+        tokens = text.lemmas(self.lem.lemmatize) if self.lemmatize else text.tokens
+        codes, size = words_codes(tokens, self.words_list)
+        if self.mode in ("includes_all", "excludes_any"):
+            result = text.count_distinct(codes, size) == size
+        else:
+            result = text.count_tokens(codes >= 0) > 0
+        if self.mode.startswith("excludes"):
+            result = ~result
+        return result & ~text.missing
+
 
 class IncludesWords(WordsPresence):
     class Config:
@@ -17,6 +17,13 @@ from sklearn.metrics import roc_auc_score
 from sklearn.model_selection import train_test_split
 
 from servequery.legacy.calculations.stattests import get_stattest
+from servequery.legacy.calculations.stattests.mmd_stattest import MMD_MAX_KERNEL_ELEMENTS
+from servequery.legacy.calculations.stattests.mmd_stattest import features_quadratic_sums
+from servequery.legacy.calculations.stattests.mmd_stattest import kernel_quadratic_sums
+from servequery.legacy.calculations.stattests.mmd_stattest import label_batches
+from servequery.legacy.calculations.stattests.mmd_stattest import label_matrix
+from servequery.legacy.calculations.stattests.mmd_stattest import rff_features
+from servequery.legacy.calculations.stattests.mmd_stattest import rff_size
 from servequery.legacy.core import ColumnType
 from servequery.pydantic_utils import ServeQueryBaseModel
 from servequery.pydantic_utils import autoregister
@@ -255,13 +262,40 @@ def MMD2u(K, m, n):
 
 def MMD2u_bstrp(K, m, n, x_idx, y_idx):
     """The MMD^2_u unbiased statistic for bootstrap subsample."""
-    Kx = K[[[idx] for idx in x_idx], x_idx]
-    Ky = K[[[idx] for idx in y_idx], y_idx]
-    Kxy = K[[[idx] for idx in x_idx], y_idx]
+    return MMD2u_bstrp_batch(K, m, n, np.array([x_idx]), np.array([y_idx]))[0]
+
+
+def MMD2u_features(features, m, n):
+    """The MMD^2_u unbiased statistic for the kernel approximated by features @ features.T."""
+    norms = np.einsum("ij,ij->i", features, features)
+    sx = features[:m].sum(axis=0)
+    sy = features[m:].sum(axis=0)
     return (
-        1.0 / (m * (m - 1.0)) * (Kx.sum() - Kx.diagonal().sum())
-        + 1.0 / (n * (n - 1.0)) * (Ky.sum() - Ky.diagonal().sum())
-        - 2.0 / (m * n) * Kxy.sum()
+        1.0 / (m * (m - 1.0)) * (sx.dot(sx) - norms[:m].sum())
+        + 1.0 / (n * (n - 1.0)) * (sy.dot(sy) - norms[m:].sum())
+        - 2.0 / (m * n) * sx.dot(sy)
+    )
+
+
+def MMD2u_bstrp_batch(K, m, n, x_idxs, y_idxs, features: bool = False):
+    """MMD^2_u statistics for a batch of bootstrap subsamples, one per row of x_idxs and y_idxs.
+
+    Subsamples are represented by index counts, so K is never reindexed. If features is True,
+    K holds kernel features instead of the kernel matrix itself.
+    """
+    size = K.shape[0]
+    x_labels = label_matrix(x_idxs, size)
+    y_labels = label_matrix(y_idxs, size)
+    if features:
+        diagonal = np.einsum("ij,ij->i", K, K)
+        quadratic_sums = features_quadratic_sums
+    else:
+        diagonal = K.diagonal()
+        quadratic_sums = kernel_quadratic_sums
+    return (
+        1.0 / (m * (m - 1.0)) * (quadratic_sums(K, x_labels) - np.dot(x_labels.T, diagonal))
+        + 1.0 / (n * (n - 1.0)) * (quadratic_sums(K, y_labels) - np.dot(y_labels.T, diagonal))
+        - 2.0 / (m * n) * quadratic_sums(K, x_labels, y_labels)
     )
 
 
@@ -274,6 +308,14 @@ class MMDDriftMethod(DriftMethod):
     bootstrap: Optional[bool] = None
     quantile_probability: float = 0.05
     pca_components: Optional[int] = None
+    max_kernel_elements: int = MMD_MAX_KERNEL_ELEMENTS
+
+    def _kernel(self, data: np.ndarray, sigma2: float) -> Tuple[np.ndarray, bool]:
+        # falls back to random Fourier features when the full kernel matrix exceeds the memory budget
+        if len(data) * len(data) <= self.max_kernel_elements:
+            return pairwise_kernels(data, metric="rbf", gamma=1.0 / sigma2), False
+        n_features = rff_size(len(data), self.max_kernel_elements)
+        return rff_features(data, np.sqrt(sigma2 / 2), n_features), True
 
     def __call__(self, current_emb: pd.DataFrame, reference_emb: pd.DataFrame) -> Tuple[float, bool, str]:
         if self.pca_components:
@@ -290,23 +332,24 @@ class MMDDriftMethod(DriftMethod):
             n_jobs=-1,
         )
         sigma2 = np.median(pair_dists) ** 2
-        xy = np.vstack([x, y])
-        K = pairwise_kernels(xy, metric="rbf", gamma=1.0 / sigma2)
-        mmd2u = MMD2u(K, m, n)
+        K, features = self._kernel(np.vstack([x, y]), sigma2)
+        mmd2u = MMD2u_features(K, m, n) if features else MMD2u(K, m, n)
         if self.bootstrap:
             pair_dists_bstrp = pairwise_distances(x.sample(min(m, 1000), random_state=0), metric="euclidean", n_jobs=-1)
             sigma2_x = np.median(pair_dists_bstrp) ** 2
-            gamma_x = 1.0 / sigma2_x
-            K = pairwise_kernels(x, metric="rbf", gamma=gamma_x)
+            K, features = self._kernel(x.to_numpy(), sigma2_x)
             x_size = max(int(m * m / (m + n)), 1)
             y_size = max(int(m * n / (m + n)), 1)
             bstrp_res = []
-            for i in range(N_BOOTSTRAP):
-                np.random.seed(i)
-                x_idxs = np.random.choice(m, x_size)
-                y_idxs = np.random.choice(m, y_size)
-                bstrp_res.append(MMD2u_bstrp(K, x_size, y_size, x_idxs, y_idxs))
-                perc = np.percentile(bstrp_res, 100 * self.quantile_probability)
+            for batch in label_batches(m, N_BOOTSTRAP, self.max_kernel_elements):
+                x_idxs = []
+                y_idxs = []
+                for i in batch:
+                    np.random.seed(i)
+                    x_idxs.append(np.random.choice(m, x_size))
+                    y_idxs.append(np.random.choice(m, y_size))
+                bstrp_res.extend(MMD2u_bstrp_batch(K, x_size, y_size, np.array(x_idxs), np.array(y_idxs), features))
+            perc = np.percentile(bstrp_res, 100 * self.quantile_probability)
             return max(mmd2u, 0), mmd2u > perc, "mmd"
         else:
             return max(mmd2u, 0), mmd2u > self.threshold, "mmd"
@@ -317,6 +360,7 @@ def mmd(
     bootstrap: Optional[bool] = None,
     quantile_probability: float = 0.05,
     pca_components: Optional[int] = None,
+    max_kernel_elements: int = MMD_MAX_KERNEL_ELEMENTS,
 ) -> DriftMethod:
     """Returns a function for calculating drift on embeddings using the mmd method with specified parameters
     Args:
@@ -324,6 +368,9 @@ def mmd(
         bootstrap: boolean parameter to determine whether to apply statistical hypothesis testing
         quantile_probability: applies when bootstrap == True
         pca_components: number of components to keep
+        max_kernel_elements: memory budget of the kernel matrix in elements; larger data uses
+            a random Fourier features approximation of the kernel, which needs at least
+            MMD_MIN_RFF_FEATURES elements per row
     Returns:
         func: a function for calculating drift, which takes in reference and current embeddings data
         and returns a tuple: drift score, whether there is drift, and the name of the drift calculation method.
@@ -333,4 +380,5 @@ def mmd(
         bootstrap=bootstrap,
         quantile_probability=quantile_probability,
         pca_components=pca_components,
+        max_kernel_elements=max_kernel_elements,
     )
@@ -18,6 +18,7 @@ from servequery.legacy.features.non_letter_character_percentage_feature import N
 from servequery.legacy.features.OOV_words_percentage_feature import OOVWordsPercentage
 from servequery.legacy.features.text_length_feature import TextLength
 from servequery.legacy.model.widget import BaseWidgetInfo
+from servequery.legacy.options.agg_data import CorrelationOptions
 from servequery.legacy.options.base import AnyOptions
 from servequery.legacy.renderers.base_renderer import MetricRenderer
 from servequery.legacy.renderers.base_renderer import default_renderer
@@ -201,7 +202,9 @@ class DatasetCorrelationsMetric(Metric[DatasetCorrelationsMetricResult]):
         # process predictions. If task == 'classification' add prediction labels
 
         if add_text_columns is not None:
-            correlations_calculate = calculate_correlations(dataset, data_definition, sum(add_text_columns, []))
+            correlations_calculate = calculate_correlations(
+                dataset, data_definition, sum(add_text_columns, []), self.get_options().get(CorrelationOptions)
+            )
             correlations = copy.deepcopy(correlations_calculate)
             for name, correlation in correlations_calculate.items():
                 if name != "cramer_v":
@@ -209,7 +212,9 @@ class DatasetCorrelationsMetric(Metric[DatasetCorrelationsMetricResult]):
                         correlation.loc[col_idx, col_idx] = 0
                     correlations_calculate[name] = correlation
         else:
-            correlations_calculate = calculate_correlations(dataset, data_definition)
+            correlations_calculate = calculate_correlations(
+                dataset, data_definition, options=self.get_options().get(CorrelationOptions)
+            )
             correlations = copy.deepcopy(correlations_calculate)
 
         prediction_columns = data_definition.get_prediction_columns()
@@ -8,4 +8,39 @@ class RenderOptions(Option):
 
 
 class DataDefinitionOptions(Option):
+    """Options for data definition inference
+
+    - categorical_features_cardinality - max number of unique values for a feature to be categorical
+    - inference_sample_size - infer column types from a random sample of this many rows instead of whole columns
+    - inference_random_seed - seed for the inference sample
+    - cache_inferred_definition - reuse the definition inferred earlier for a frame with the same columns and dtypes
+    """
+
     categorical_features_cardinality: Optional[int] = None
+    inference_sample_size: Optional[int] = None
+    inference_random_seed: int = 0
+    cache_inferred_definition: bool = False
+
+
+class CorrelationOptions(Option):
+    """Options for dataset correlations calculation
+
+    - max_workers - number of threads to compute pairwise correlations in
+    - kendall_sample_size - compute kendall correlation over a random sample of this many rows instead of all rows
+    - kendall_random_seed - seed for the kendall sample
+    """
+
+    max_workers: int = 1
+    kendall_sample_size: Optional[int] = None
+    kendall_random_seed: int = 0
+
+
+class DescriptorExecutionOptions(Option):
+    """Options for descriptors and features computation
+
+    - processes - number of processes to compute row-wise descriptors in, rows are split into chunks between them
+    - chunk_size - number of rows in a chunk, by default rows are split evenly between processes
+    """
+
+    processes: int = 1
+    chunk_size: Optional[int] = None
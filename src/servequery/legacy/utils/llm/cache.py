@@ -0,0 +1,161 @@
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from servequery.legacy.options.option import Option
+from servequery.legacy.utils.llm.base import LLMMessage
+
+LLM_CACHE_FILENAME = "llm_cache.db"
+# access times of cache hits are written in batches of this size
+LLM_CACHE_ACCESS_BATCH = 100
+# a cache over max_entries evicts this share of max_entries at once, so eviction does not run on every insert
+LLM_CACHE_EVICTION_SHARE = 0.1
+
+
+class LLMCacheOptions(Option):
+    """Options for LLM response cache
+
+    - path - directory to keep cached responses in, cache is disabled if not set
+    - max_entries - max number of cached responses, least recently used ones are evicted
+    - ttl - time to keep cached responses for
+    """
+
+    path: Optional[str] = None
+    max_entries: Optional[int] = None
+    ttl: Optional[datetime.timedelta] = None
+
+
+class LLMResponseCache:
+    """Content-addressed cache of LLM completions stored in SQLite database.
+
+    Responses are keyed by hash of wrapper parameters (provider, model, ...) and rendered messages.
+    Access times of hits are kept in memory and written in batches, so recency of least recently used
+    eviction is approximate for entries accessed by other processes.
+    """
+
+    def __init__(self, path: str, max_entries: Optional[int] = None, ttl: Optional[datetime.timedelta] = None):
+        os.makedirs(path, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(os.path.join(path, LLM_CACHE_FILENAME), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, input_tokens INTEGER NOT NULL,"
+            " output_tokens INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+        self._connection.commit()
+        self._accessed: Dict[str, float] = {}
+        self._count = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def key(params: Dict[str, Any], messages: List[LLMMessage]) -> str:
+        payload = json.dumps(
+            {"params": params, "messages": [[m.role, m.content] for m in messages]}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, int, int]]:
+        """Get cached response with its input and output tokens"""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response, input_tokens, output_tokens, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[3] > self.ttl.total_seconds():
+                self._count -= self._connection.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount
+                self._accessed.pop(key, None)
+                self._connection.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._accessed[key] = now
+            if len(self._accessed) >= LLM_CACHE_ACCESS_BATCH:
+                self._write_accessed()
+                self._connection.commit()
+        return row[0], row[1], row[2]
+
+    def _write_accessed(self):
+        if self._accessed:
+            self._connection.executemany(
+                "UPDATE responses SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._accessed.items()],
+            )
+            self._accessed = {}
+
+    def put(self, key: str, response: str, input_tokens: int, output_tokens: int):
+        now = time.time()
+        with self._lock:
+            self._accessed.pop(key, None)
+            inserted = self._connection.execute(
+                "INSERT OR IGNORE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response, input_tokens, output_tokens, now, now),
+            ).rowcount
+            if inserted:
+                self._count += 1
+            else:
+                self._connection.execute(
+                    "UPDATE responses SET response = ?, input_tokens = ?, output_tokens = ?, created = ?, accessed = ?"
+                    " WHERE key = ?",
+                    (response, input_tokens, output_tokens, now, now, key),
+                )
+            if self.ttl is not None:
+                self._count -= self._connection.execute(
+                    "DELETE FROM responses WHERE created < ?", (now - self.ttl.total_seconds(),)
+                ).rowcount
+            if self.max_entries is not None and self._count > self.max_entries:
+                self._evict(self.max_entries)
+            self._connection.commit()
+
+    def _evict(self, max_entries: int):
+        """Evict least recently used entries, down to LLM_CACHE_EVICTION_SHARE of max_entries below the limit"""
+        self._write_accessed()
+        # other processes may share the database, so the count is refreshed before eviction
+        self._count = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        excess = self._count - max_entries + int(max_entries * LLM_CACHE_EVICTION_SHARE)
+        if excess > 0 and self._count > max_entries:
+            self._count -= self._connection.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                (excess,),
+            ).rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._write_accessed()
+            self._connection.commit()
+            self._connection.close()
+
+
+_caches: Dict[Tuple[str, Optional[int], Optional[datetime.timedelta]], LLMResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_llm_cache(options: LLMCacheOptions) -> Optional[LLMResponseCache]:
+    """Get cache for options, caches are shared between wrappers so hit and miss counters are per cache"""
+    if options.path is None:
+        return None
+    key = (os.path.abspath(options.path), options.max_entries, options.ttl)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = LLMResponseCache(options.path, options.max_entries, options.ttl)
+        return _caches[key]
@@ -1,19 +1,31 @@
 import asyncio
+import contextlib
 import dataclasses
 import datetime
+import itertools
 import json
+import os
+import random
+import threading
+import time
 from abc import ABC
 from abc import abstractmethod
 from asyncio import Lock
 from asyncio import Semaphore
 from asyncio import sleep
+from collections import OrderedDict
+from collections import deque
 from importlib.util import find_spec
 from typing import Any
+from typing import AsyncIterator
 from typing import Awaitable
 from typing import Callable
 from typing import ClassVar
+from typing import Deque
 from typing import Dict
 from typing import Generic
+from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Optional
 from typing import Sequence
@@ -26,6 +38,9 @@ from servequery._pydantic_compat import SecretStr
 from servequery.legacy.options.base import Options
 from servequery.legacy.options.option import Option
 from servequery.legacy.utils.llm.base import LLMMessage
+from servequery.legacy.utils.llm.cache import LLMCacheOptions
+from servequery.legacy.utils.llm.cache import LLMResponseCache
+from servequery.legacy.utils.llm.cache import get_llm_cache
 from servequery.legacy.utils.llm.errors import LLMRateLimitError
 from servequery.legacy.utils.llm.errors import LLMRequestError
 from servequery.legacy.utils.sync import sync_api
@@ -177,8 +192,132 @@ class LimitRequest(Generic[TBatchItem]):
     # estimated_output: int
 
 
+class AdaptiveConcurrency:
+    """Concurrency limit adapted with AIMD: it grows by one after every `limit` successful requests and halves
+    on rate limit errors or on latency getting over `latency_factor` times the lowest observed one.
+    Decreases happen at most once per `limit` completed requests, so a burst of errors halves it once.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, latency_factor: float = 3.0):
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.latency_factor = latency_factor
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+        self._completed = 0
+        self._last_decrease: Optional[int] = None
+        self._best_latency: Optional[float] = None
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self, latency: float):
+        self._completed += 1
+        if self._best_latency is None or latency < self._best_latency:
+            self._best_latency = latency
+        if latency > self.latency_factor * self._best_latency:
+            self._decrease()
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+
+    def on_rate_limit(self):
+        self._decrease()
+
+    def _decrease(self):
+        if self._last_decrease is not None and self._completed - self._last_decrease < self.limit:
+            return
+        self._last_decrease = self._completed
+        self.limit = max(float(self.min_limit), self.limit / 2)
+
+
+class _BatchCheckpoint:
+    """Results of a batch run stored in a JSON lines file in order, so the run can be resumed after a crash"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.results: List[Any] = []
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        self.results.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # partially written last line
+                        break
+        with open(path, "w") as f:
+            f.writelines(json.dumps(result) + "\n" for result in self.results)
+
+    def append(self, result: Any):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(result) + "\n")
+
+
+SHARED_LLM_RESPONSES_MAX_SIZE = 10000
+
+
+class _SharedResponses:
+    def __init__(self):
+        self.responses: Optional["OrderedDict[str, LLMResult[str]]"] = None
+        self.users = 0
+        self.lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.responses is not None
+
+    def get(self, key: str) -> Optional["LLMResult[str]"]:
+        with self.lock:
+            if self.responses is None or key not in self.responses:
+                return None
+            self.responses.move_to_end(key)
+            return self.responses[key]
+
+    def put(self, key: str, response: "LLMResult[str]"):
+        with self.lock:
+            if self.responses is None:
+                return
+            self.responses[key] = response
+            self.responses.move_to_end(key)
+            while len(self.responses) > SHARED_LLM_RESPONSES_MAX_SIZE:
+                self.responses.popitem(last=False)
+
+
+_shared = _SharedResponses()
+
+
+@contextlib.contextmanager
+def shared_llm_responses() -> Iterator[None]:
+    """Share responses between all LLM requests made inside, so identical requests are sent to providers once.
+
+    Up to SHARED_LLM_RESPONSES_MAX_SIZE most recently used responses are kept until the outermost block exits.
+    """
+    with _shared.lock:
+        if _shared.users == 0:
+            _shared.responses = OrderedDict()
+        _shared.users += 1
+    try:
+        yield
+    finally:
+        with _shared.lock:
+            _shared.users -= 1
+            if _shared.users == 0:
+                _shared.responses = None
+
+
 class LLMWrapper(ABC):
     __used_options__: ClassVar[List[Type[Option]]] = []
+    cache: Optional[LLMResponseCache] = None
+    retry_backoff: ClassVar[float] = 0.5
+    retry_backoff_max: ClassVar[float] = 30.0
 
     @abstractmethod
     async def complete(self, messages: List[LLMMessage]) -> LLMResult[str]:
@@ -212,34 +351,213 @@ class LLMWrapper(ABC):
         batch_size: Optional[int] = None,
         limits: Optional[RateLimits] = None,
     ) -> List[str]:
-        requests = [LimitRequest(msgs, sum(self.estimate_tokens(m) for m in msgs)) for msgs in messages_batch]
-        return await self._batch(self.complete, requests, batch_size, limits)
+        messages_batch = list(messages_batch)
+        results: List[Optional[str]] = [None] * len(messages_batch)
+        # identical messages are requested once
+        missed: Dict[Tuple[LLMMessage, ...], List[int]] = {}
+        for i, msgs in enumerate(messages_batch):
+            cached = self._get_cached(msgs)
+            if cached is None:
+                missed.setdefault(tuple(msgs), []).append(i)
+            else:
+                results[i] = cached.result
+        requests = [LimitRequest(list(msgs), sum(self.estimate_tokens(m) for m in msgs)) for msgs in missed]
+        for indexes, result in zip(missed.values(), await self._batch(self._complete, requests, batch_size, limits)):
+            for i in indexes:
+                results[i] = result
+        return results  # type: ignore[return-value]
+
+    async def _complete(self, messages: List[LLMMessage]) -> LLMResult[str]:
+        response = await self.complete(messages)
+        self._put_cached(messages, response)
+        return response
 
     async def run(self, request: LLMRequest[TResult]) -> TResult:
+        cached = self._get_cached_result(request)
+        if cached is not None:
+            return cached.result
         return (await self._run(request)).result
 
-    async def _run(self, request: LLMRequest[TResult]) -> LLMResult[TResult]:
+    async def _run(
+        self, request: LLMRequest[TResult], concurrency: Optional[AdaptiveConcurrency] = None
+    ) -> LLMResult[TResult]:
+        return (await self._run_with_response(request, concurrency))[0]
+
+    async def _run_with_response(
+        self, request: LLMRequest[TResult], concurrency: Optional[AdaptiveConcurrency] = None
+    ) -> Tuple[LLMResult[TResult], LLMResult[str]]:
         num_retries = request.retries
         error = None
+        attempt = 0
         while num_retries >= 0:
             num_retries -= 1
             try:
+                start = time.monotonic()
                 response = await self.complete(request.messages)
-                return LLMResult(
+                if concurrency is not None:
+                    concurrency.on_success(time.monotonic() - start)
+                result = LLMResult(
                     request.response_parser(response.result), response.input_tokens, response.output_tokens
                 )
+                self._put_cached(request.messages, response)
+                return result, response
+            except LLMRequestError as e:
+                error = e
+                if isinstance(e, LLMRateLimitError) and concurrency is not None:
+                    concurrency.on_rate_limit()
+                if num_retries >= 0:
+                    await sleep(self._retry_delay(attempt))
             except Exception as e:
                 error = e
+            attempt += 1
         raise error
 
+    def _retry_delay(self, attempt: int) -> float:
+        """exponential backoff with full jitter"""
+        return random.uniform(0, min(self.retry_backoff_max, self.retry_backoff * 2**attempt))
+
     async def run_batch(
         self,
-        requests: Sequence[LLMRequest[TResult]],
+        requests: Iterable[LLMRequest[TResult]],
         batch_size: Optional[int] = None,
         limits: Optional[RateLimits] = None,
+        checkpoint_path: Optional[str] = None,
     ) -> List[TResult]:
-        rs = [LimitRequest(r, sum(self.estimate_tokens(m) for m in r.messages)) for r in requests]
-        return await self._batch(self._run, rs, batch_size, limits)
+        return [result async for result in self.run_stream(requests, batch_size, limits, checkpoint_path)]
+
+    async def run_stream(
+        self,
+        requests: Iterable[LLMRequest[TResult]],
+        batch_size: Optional[int] = None,
+        limits: Optional[RateLimits] = None,
+        checkpoint_path: Optional[str] = None,
+    ) -> AsyncIterator[TResult]:
+        """Run requests from iterable and yield their results in order.
+
+        Requests are taken from the iterable only when there is room in the window of `2 * batch_size` requests,
+        so memory does not grow with the number of requests. Requests run concurrently up to a limit adapted
+        to latency and rate limit errors, `batch_size` at most.
+
+        Args:
+            requests: requests to run
+            batch_size: max number of concurrent requests
+            limits: rate limits
+            checkpoint_path: JSON lines file to save results to. If it has results of a previous run,
+                they are yielded and the same number of requests are skipped. Results should be JSON serializable.
+        """
+        if batch_size is None:
+            batch_size = self.get_batch_size()
+        rate_limiter = RateLimiter(limits=limits or self.get_limits())
+        concurrency = AdaptiveConcurrency(batch_size)
+        checkpoint = _BatchCheckpoint(checkpoint_path) if checkpoint_path is not None else None
+        requests_iter = iter(requests)
+        if checkpoint is not None:
+            for result in checkpoint.results:
+                yield result
+            requests_iter = itertools.islice(requests_iter, len(checkpoint.results), None)
+
+        # identical requests in the window wait for the first one and reuse its response
+        leaders: Dict[str, "asyncio.Future[TResult]"] = {}
+        responses: Dict[str, LLMResult[str]] = {}
+        key_pending: Dict[str, int] = {}
+
+        async def work(request: LLMRequest[TResult], key: str, leader: Optional["asyncio.Future[TResult]"]) -> TResult:
+            if leader is not None:
+                await asyncio.wait([leader])
+            response = responses.get(key) or self._get_cached(request.messages)
+            if response is not None:
+                parsed = self._parse_response(request, response)
+                if parsed is not None:
+                    return parsed.result
+            limit_request = LimitRequest(request, sum(self.estimate_tokens(m) for m in request.messages))
+            async with concurrency, rate_limiter.enter(limit_request) as rate:
+                res, response = await self._run_with_response(request, concurrency)
+                rate.record(res.input_tokens, res.output_tokens)
+            responses[key] = response
+            return res.result
+
+        def start(request: LLMRequest[TResult]) -> Tuple[str, "asyncio.Future[TResult]"]:
+            key = self._request_key(request.messages)
+            key_pending[key] = key_pending.get(key, 0) + 1
+            leader = leaders.get(key)
+            task = asyncio.ensure_future(work(request, key, leader))
+            if leader is None:
+                leaders[key] = task
+            return key, task
+
+        async def finish(key: str, task: "asyncio.Future[TResult]") -> TResult:
+            try:
+                return await task
+            finally:
+                key_pending[key] -= 1
+                if key_pending[key] == 0:
+                    del key_pending[key]
+                    leaders.pop(key, None)
+                    responses.pop(key, None)
+
+        pending: Deque[Tuple[str, "asyncio.Future[TResult]"]] = deque()
+        try:
+            for request in requests_iter:
+                pending.append(start(request))
+                if len(pending) < 2 * batch_size:
+                    continue
+                result = await finish(*pending.popleft())
+                if checkpoint is not None:
+                    checkpoint.append(result)
+                yield result
+            while pending:
+                result = await finish(*pending.popleft())
+                if checkpoint is not None:
+                    checkpoint.append(result)
+                yield result
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    def get_cache_params(self) -> Dict[str, Any]:
+        """Parameters of the wrapper that affect responses, part of response cache keys"""
+        return {"wrapper": f"{type(self).__module__}.{type(self).__qualname__}", "model": getattr(self, "model", None)}
+
+    def _request_key(self, messages: List[LLMMessage]) -> str:
+        return LLMResponseCache.key(self.get_cache_params(), messages)
+
+    def _get_cached(self, messages: List[LLMMessage]) -> Optional[LLMResult[str]]:
+        """Get response from shared responses or from the cache"""
+        if not _shared.active and self.cache is None:
+            return None
+        key = self._request_key(messages)
+        response = _shared.get(key)
+        if response is not None:
+            return response
+        if self.cache is None:
+            return None
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        response = LLMResult(*cached)
+        _shared.put(key, response)
+        return response
+
+    def _get_cached_result(self, request: LLMRequest[TResult]) -> Optional[LLMResult[TResult]]:
+        cached = self._get_cached(request.messages)
+        if cached is None:
+            return None
+        return self._parse_response(request, cached)
+
+    def _parse_response(self, request: LLMRequest[TResult], response: LLMResult[str]) -> Optional[LLMResult[TResult]]:
+        try:
+            return LLMResult(request.response_parser(response.result), response.input_tokens, response.output_tokens)
+        except Exception:
+            # response was parsed by another request or parser: request it again
+            return None
+
+    def _put_cached(self, messages: List[LLMMessage], response: LLMResult[str]):
+        if not _shared.active and self.cache is None:
+            return
+        key = self._request_key(messages)
+        _shared.put(key, response)
+        if self.cache is not None:
+            self.cache.put(key, response.result, response.input_tokens, response.output_tokens)
 
     def get_batch_size(self) -> int:
         return 100
@@ -273,6 +591,12 @@ def llm_provider(name: LLMProvider, model: Optional[LLMModel]) -> Callable[[LLMW
 
 
 def get_llm_wrapper(provider: LLMProvider, model: LLMModel, options: Options) -> LLMWrapper:
+    wrapper = _create_llm_wrapper(provider, model, options)
+    wrapper.cache = get_llm_cache(options.get(LLMCacheOptions))
+    return wrapper
+
+
+def _create_llm_wrapper(provider: LLMProvider, model: LLMModel, options: Options) -> LLMWrapper:
     key: Tuple[str, Optional[str]] = (provider, model)
     if key in _wrappers:
         return _wrappers[key](model, options)
@@ -368,6 +692,9 @@ class OpenAIWrapper(LLMWrapper):
     def get_limits(self) -> RateLimits:
         return self.options.limits
 
+    def get_cache_params(self) -> Dict[str, Any]:
+        return {"provider": "openai", "model": self.model, "api_url": self.options.api_url}
+
 
 def get_litellm_wrapper(provider: LLMProvider, model: LLMModel, options: Options) -> Optional[LLMWrapper]:
     from litellm import BadRequestError
@@ -418,6 +745,9 @@ class LiteLLMWrapper(LLMWrapper):
     def get_limits(self) -> RateLimits:
         return self.options.limits
 
+    def get_cache_params(self) -> Dict[str, Any]:
+        return {"model": self.full_model_name, "api_url": self.options.api_url}
+
 
 class AnthropicOptions(LLMOptions):
     __provider_name__: ClassVar = "anthropic"
@@ -0,0 +1,53 @@
+"""Row-sharded execution of descriptors and features in a process pool."""
+
+import math
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Tuple
+from typing import TypeVar
+
+import pandas as pd
+
+from servequery.legacy.options.agg_data import DescriptorExecutionOptions
+
+T = TypeVar("T")
+
+
+def is_picklable(obj: Any) -> bool:
+    """Check if obj can be sent to a worker process"""
+    try:
+        pickle.dumps(obj)
+    except Exception:
+        return False
+    return True
+
+
+def split_picklable(items: List[T]) -> List[Tuple[bool, List[T]]]:
+    """Split items into consecutive runs of picklable and not picklable items, keeping their order"""
+    runs: List[Tuple[bool, List[T]]] = []
+    for item in items:
+        picklable = is_picklable(item)
+        if runs and runs[-1][0] == picklable:
+            runs[-1][1].append(item)
+        else:
+            runs.append((picklable, [item]))
+    return runs
+
+
+def split_rows(data: pd.DataFrame, options: DescriptorExecutionOptions) -> List[pd.DataFrame]:
+    """Split data by rows into chunks of `options.chunk_size` rows or into one chunk for every process"""
+    chunk_size = options.chunk_size or math.ceil(len(data) / options.processes)
+    return [data.iloc[start : start + chunk_size] for start in range(0, len(data), max(chunk_size, 1))]
+
+
+def map_chunks(
+    func: Callable[..., T], chunks: List[pd.DataFrame], options: DescriptorExecutionOptions, *args: Any
+) -> List[T]:
+    """Call func(chunk, *args) for every chunk in a process pool, results are in the order of chunks"""
+    if len(chunks) <= 1:
+        return [func(chunk, *args) for chunk in chunks]
+    with ProcessPoolExecutor(max_workers=min(options.processes, len(chunks))) as executor:
+        return list(executor.map(func, chunks, *([arg] * len(chunks) for arg in args)))
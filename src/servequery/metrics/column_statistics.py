@@ -7,6 +7,10 @@ from typing import Optional
 from typing import TypeVar
 from typing import Union
 
+import numpy as np
+import pandas as pd
+from pandas.core.groupby import SeriesGroupBy
+
 from servequery.core.base_types import Label
 from servequery.core.datasets import Dataset
 from servequery.core.datasets import DatasetColumn
@@ -27,8 +31,13 @@ from servequery.core.metric_types import SingleValueMetric
 from servequery.core.metric_types import TestConfig
 from servequery.core.metric_types import TMetric
 from servequery.core.metric_types import TResult
+from servequery.core.metric_types import get_default_render
+from servequery.core.profile import ColumnProfile
+from servequery.core.profile import ReferenceProfile
+from servequery.core.profile import get_profile_column_drift
 from servequery.core.report import Context
 from servequery.legacy.calculations.data_drift import ColumnDataDriftMetrics
+from servequery.legacy.calculations.data_drift import DriftStatsField
 from servequery.legacy.calculations.data_drift import get_one_column_drift
 from servequery.legacy.calculations.stattests import PossibleStatTestType
 from servequery.legacy.core import ColumnType
@@ -56,6 +65,7 @@ from servequery.legacy.utils.visualizations import plot_agg_line_data
 from servequery.legacy.utils.visualizations import plot_distr_with_perc_button
 from servequery.legacy.utils.visualizations import plot_scatter_for_data_drift
 from servequery.metrics._legacy import LegacyMetricCalculation
+from servequery.metrics.group_by import GroupedCalculation
 from servequery.tests import Reference
 from servequery.tests import eq
 from servequery.tests import lt
@@ -64,13 +74,15 @@ from servequery.tests import lt
 def distribution(
     title: str,
     current: DatasetColumn,
-    reference: Optional[DatasetColumn],
+    reference: Optional[Union[DatasetColumn, ColumnProfile]],
 ) -> List[BaseWidgetInfo]:
     distr_cur, distr_ref = get_distribution_for_column(
         column_type=current.type.value,
         current=current.data,
-        reference=reference.data if reference is not None else None,
+        reference=reference.data if isinstance(reference, DatasetColumn) else None,
     )
+    if isinstance(reference, ColumnProfile):
+        distr_ref = reference.distribution()
     distr_fig = plot_distr_with_perc_button(
         hist_curr=HistogramData.from_distribution(distr_cur),
         hist_ref=HistogramData.from_distribution(distr_ref),
@@ -98,24 +110,49 @@ class StatisticsMetric(ColumnMetric, SingleValueMetric):
 TStatisticsMetric = TypeVar("TStatisticsMetric", bound=StatisticsMetric)
 
 
-class StatisticsCalculation(SingleValueCalculation[TStatisticsMetric]):
+class StatisticsCalculation(SingleValueCalculation[TStatisticsMetric], GroupedCalculation):
     @property
     def column(self):
         return self.metric.column
 
     def calculate(self, context: "Context", current_data: Dataset, reference_data: Optional[Dataset]):
-        value = self.calculate_value(current_data.column(self.column))
+        return self.calculate_group(context, current_data, reference_data, None, None)
+
+    def group_values(self, column_name: str, data: Dataset) -> Dict[object, Union[float, int]]:
+        grouped = data.as_dataframe().groupby(column_name, sort=False, observed=True)[self.column]
+        values = self.calculate_group_value(grouped)
+        if values is None:
+            column_type = data.column(self.column).type
+            return {label: self.calculate_value(DatasetColumn(column_type, group)) for label, group in grouped}
+        return values.to_dict()
+
+    def calculate_group(
+        self,
+        context: "Context",
+        current_data: Dataset,
+        reference_data: Optional[Dataset],
+        value: Optional[Union[float, int]],
+        reference_value: Optional[Union[float, int]],
+    ):
+        if value is None:
+            value = self.calculate_value(current_data.column(self.column))
 
         header = f"current: {value:.3f}"
         ref_value = None
-        if reference_data is not None:
-            ref_value = self.calculate_value(reference_data.column(self.column))
+        reference_column: Optional[Union[DatasetColumn, ColumnProfile]] = None
+        if isinstance(reference_data, ReferenceProfile):
+            reference_column = reference_data.column_profile(self.column)
+            ref_value = self.calculate_profile_value(reference_column)
+        elif reference_data is not None:
+            reference_column = reference_data.column(self.column)
+            ref_value = reference_value if reference_value is not None else self.calculate_value(reference_column)
+        if ref_value is not None:
             header += f", reference: {ref_value:.3f}"
         result = self.result(value)
         result.widget = distribution(
             f"{self.display_name()}: {header}",
             current_data.column(self.column),
-            None if reference_data is None else reference_data.column(self.column),
+            reference_column,
         )
         return (
             result,
@@ -126,6 +163,13 @@ class StatisticsCalculation(SingleValueCalculation[TStatisticsMetric]):
     def calculate_value(self, column: DatasetColumn) -> Union[float, int]:
         raise NotImplementedError()
 
+    def calculate_group_value(self, grouped: SeriesGroupBy) -> Optional[pd.Series]:
+        """Values of all groups in one aggregation, None to call `calculate_value` for every group"""
+        return None
+
+    def calculate_profile_value(self, column: ColumnProfile) -> Union[float, int]:
+        raise ValueError(f"{self.display_name()} cannot be calculated with a reference profile")
+
 
 class MinValue(StatisticsMetric):
     pass
@@ -135,6 +179,12 @@ class MinValueCalculation(StatisticsCalculation[MinValue]):
     def calculate_value(self, column: DatasetColumn) -> Union[float, int]:
         return column.data.min()
 
+    def calculate_group_value(self, grouped: SeriesGroupBy) -> pd.Series:
+        return grouped.min()
+
+    def calculate_profile_value(self, column: ColumnProfile) -> Union[float, int]:
+        return column.min
+
     def display_name(self) -> str:
         return f"Minimal value of '{self.column}'"
 
@@ -147,6 +197,12 @@ class MeanValueCalculation(StatisticsCalculation[MeanValue]):
     def calculate_value(self, column: DatasetColumn) -> Union[float, int]:
         return column.data.mean()
 
+    def calculate_group_value(self, grouped: SeriesGroupBy) -> pd.Series:
+        return grouped.mean()
+
+    def calculate_profile_value(self, column: ColumnProfile) -> Union[float, int]:
+        return column.mean
+
     def display_name(self) -> str:
         return f"Mean value of '{self.column}'"
 
@@ -159,6 +215,12 @@ class MaxValueCalculation(StatisticsCalculation[MaxValue]):
     def calculate_value(self, column: DatasetColumn) -> Union[float, int]:
         return column.data.max()
 
+    def calculate_group_value(self, grouped: SeriesGroupBy) -> pd.Series:
+        return grouped.max()
+
+    def calculate_profile_value(self, column: ColumnProfile) -> Union[float, int]:
+        return column.max
+
     def display_name(self) -> str:
         return f"Maximum value of '{self.column}'"
 
@@ -171,6 +233,12 @@ class StdValueCalculation(StatisticsCalculation[StdValue]):
     def calculate_value(self, column: DatasetColumn) -> Union[float, int]:
         return column.data.std()
 
+    def calculate_group_value(self, grouped: SeriesGroupBy) -> pd.Series:
+        return grouped.std()
+
+    def calculate_profile_value(self, column: ColumnProfile) -> Union[float, int]:
+        return column.std
+
     def display_name(self) -> str:
         return f"Std value of '{self.column}'"
 
@@ -183,6 +251,12 @@ class MedianValueCalculation(StatisticsCalculation[MedianValue]):
     def calculate_value(self, column: DatasetColumn) -> Union[float, int]:
         return column.data.median()
 
+    def calculate_group_value(self, grouped: SeriesGroupBy) -> pd.Series:
+        return grouped.median()
+
+    def calculate_profile_value(self, column: ColumnProfile) -> Union[float, int]:
+        return column.quantile(0.5)
+
     def display_name(self) -> str:
         return f"Median value of '{self.column}'"
 
@@ -195,6 +269,12 @@ class QuantileValueCalculation(StatisticsCalculation[QuantileValue]):
     def calculate_value(self, column: DatasetColumn) -> Union[float, int]:
         return column.data.quantile(self.metric.quantile)
 
+    def calculate_group_value(self, grouped: SeriesGroupBy) -> pd.Series:
+        return grouped.quantile(self.metric.quantile)
+
+    def calculate_profile_value(self, column: ColumnProfile) -> Union[float, int]:
+        return column.quantile(self.metric.quantile)
+
     def display_name(self) -> str:
         return f"Quantile {self.metric.quantile} of '{self.column}'"
 
@@ -388,6 +468,9 @@ class MissingValueCountCalculation(CountCalculation[MissingValueCount]):
         return f"Column '{self.metric.column}' missing values"
 
     def _calculate_value(self, dataset: Dataset):
+        if isinstance(dataset, ReferenceProfile):
+            profile = dataset.column_profile(self.metric.column)
+            return self.result(profile.missing, profile.missing / profile.size)
         column = dataset.column(self.metric.column)
         value = column.data.count()
         total = len(column.data)
@@ -423,22 +506,25 @@ class ValueDriftCalculation(SingleValueCalculation[ValueDrift]):
             all_features_threshold=self.metric.threshold,
         )
 
-        drift = get_one_column_drift(
-            current_data=current_data.as_dataframe(),
-            reference_data=reference_data.as_dataframe(),
-            column_name=column,
-            options=options,
-            dataset_columns=DatasetColumns(
-                utility_columns=DatasetUtilityColumns(),
-                num_feature_names=[column] if column_type == ColumnType.Numerical else [],
-                cat_feature_names=[column] if column_type == ColumnType.Categorical else [],
-                text_feature_names=[column] if column_type == ColumnType.Text else [],
-                datetime_feature_names=[column] if column_type == ColumnType.Datetime else [],
-                target_names=None,
-            ),
-            column_type=column_type,
-            agg_data=True,
-        )
+        if isinstance(reference_data, ReferenceProfile):
+            drift = self._profile_drift(current_data, reference_data)
+        else:
+            drift = get_one_column_drift(
+                current_data=current_data.as_dataframe(),
+                reference_data=reference_data.as_dataframe(),
+                column_name=column,
+                options=options,
+                dataset_columns=DatasetColumns(
+                    utility_columns=DatasetUtilityColumns(),
+                    num_feature_names=[column] if column_type == ColumnType.Numerical else [],
+                    cat_feature_names=[column] if column_type == ColumnType.Categorical else [],
+                    text_feature_names=[column] if column_type == ColumnType.Text else [],
+                    datetime_feature_names=[column] if column_type == ColumnType.Datetime else [],
+                    target_names=None,
+                ),
+                column_type=column_type,
+                agg_data=True,
+            )
 
         result = self.result(drift.drift_score)
         result.widget = self._render(drift, Options(), ColorOptions())
@@ -467,6 +553,26 @@ class ValueDriftCalculation(SingleValueCalculation[ValueDrift]):
     def display_name(self) -> str:
         return f"Value drift for {self.metric.column}"
 
+    def _profile_drift(self, current_data: Dataset, reference_data: ReferenceProfile) -> ColumnDataDriftMetrics:
+        reference = reference_data.column_profile(self.metric.column)
+        current = current_data.column(self.metric.column).data
+        stattest, drift = get_profile_column_drift(reference, current, self.metric.method, self.metric.threshold)
+        current_distribution, _ = get_distribution_for_column(
+            column_type=reference.type.value,
+            current=current.replace([-np.inf, np.inf], np.nan).dropna(),
+        )
+        return ColumnDataDriftMetrics(
+            column_name=self.metric.column,
+            column_type=reference.type.value,
+            stattest_name=stattest.display_name,
+            stattest_threshold=drift.actual_threshold,
+            drift_score=drift.drift_score,
+            drift_detected=drift.drifted,
+            current=DriftStatsField(distribution=current_distribution),
+            reference=DriftStatsField(distribution=reference.distribution()),
+            scatter=None,
+        )
+
     def _render(self, result: ColumnDataDriftMetrics, options, color_options):
         if result.drift_detected:
             drift = "detected"
@@ -630,6 +736,42 @@ class DriftedColumnCalculation(CountCalculation[DriftedColumnsCount], LegacyDrif
             per_column_stattest_threshold=self.metric.per_column_threshold,
         )
 
+    def calculate(self, context: "Context", current_data: Dataset, reference_data: Optional[Dataset]):
+        if not isinstance(reference_data, ReferenceProfile):
+            return super().calculate(context, current_data, reference_data)
+        legacy_metric = self.legacy_metric()
+        columns = self.metric.columns if self.metric.columns is not None else reference_data.columns
+        text_columns = [
+            column
+            for column in reference_data.data_definition.get_text_columns()
+            if self.metric.columns is None or column in columns
+        ]
+        if len(text_columns) > 0:
+            raise ValueError(
+                f"Text columns {text_columns} are not profiled, a reference dataset is required for their drift"
+            )
+        drifted = 0
+        for column in columns:
+            column_type = reference_data.column_profile(column).type.value
+            _, drift = get_profile_column_drift(
+                reference_data.column_profile(column),
+                current_data.column(column).data,
+                legacy_metric.drift_options.get_feature_stattest_func(column, column_type),
+                legacy_metric.drift_options.get_threshold(column, column_type),
+            )
+            drifted += drift.drifted
+        share = drifted / len(columns) if len(columns) > 0 else 0.0
+        legacy_result = DatasetDriftMetricResults(
+            drift_share=self.metric.drift_share,
+            number_of_columns=len(columns),
+            number_of_drifted_columns=drifted,
+            share_of_drifted_columns=share,
+            dataset_drift=share >= self.metric.drift_share,
+        )
+        result = self.calculate_value(context, legacy_result, [])
+        result.widget = get_default_render(self.display_name(), result)
+        return result, None
+
     def calculate_value(
         self, context: Context, legacy_result: DatasetDriftMetricResults, render: List[BaseWidgetInfo]
     ) -> CountValue:
@@ -1,4 +1,7 @@
+import abc
+from typing import Any
 from typing import Callable
+from typing import Dict
 from typing import Optional
 from typing import Sequence
 
@@ -8,6 +11,7 @@ from servequery.core.datasets import Dataset
 from servequery.core.metric_types import BoundTest
 from servequery.core.metric_types import Metric
 from servequery.core.metric_types import MetricCalculation
+from servequery.core.metric_types import TMetricResult
 from servequery.core.metric_types import TResult
 from servequery.core.report import Context
 
@@ -29,6 +33,30 @@ def _patched_display_name(original: Callable[[], str], metric: GroupByMetric) ->
     return _wrapped
 
 
+class GroupedCalculation(abc.ABC):
+    """
+    Calculation which can compute its values for all groups of a column in one pass.
+
+    GroupBy calls `group_values` once per dataset and column and then `calculate_group`
+    for every label with the precomputed values.
+    """
+
+    @abc.abstractmethod
+    def group_values(self, column_name: str, data: Dataset) -> Dict[object, Any]:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def calculate_group(
+        self,
+        context: "Context",
+        current_data: Dataset,
+        reference_data: Optional[Dataset],
+        value: Optional[Any],
+        reference_value: Optional[Any],
+    ) -> TMetricResult:
+        raise NotImplementedError()
+
+
 class GroupByMetricCalculation(MetricCalculation[TResult, GroupByMetric]):
     _calculation: Optional[MetricCalculation[TResult, GroupByMetric]] = None
 
@@ -37,7 +65,17 @@ class GroupByMetricCalculation(MetricCalculation[TResult, GroupByMetric]):
         ref = reference_data.subdataset(self.metric.column_name, self.metric.label) if reference_data else None
         dn = self.calculation.display_name
         self.calculation.display_name = _patched_display_name(dn, self.metric)  # type: ignore[method-assign]
-        res = self.calculation.calculate(context, curr, ref)
+        if isinstance(self.calculation, GroupedCalculation):
+            values, reference_values = self._group_values(context, self.calculation, current_data, reference_data)
+            res = self.calculation.calculate_group(
+                context,
+                curr,
+                ref,
+                values.get(self.metric.label),
+                None if reference_values is None else reference_values.get(self.metric.label),
+            )
+        else:
+            res = self.calculation.calculate(context, curr, ref)
         if isinstance(res, tuple):
             curr_res, ref_res = res
         else:
@@ -47,6 +85,23 @@ class GroupByMetricCalculation(MetricCalculation[TResult, GroupByMetric]):
             ref_res.set_display_name(self.display_name())
         return curr_res, ref_res
 
+    def _group_values(
+        self,
+        context: "Context",
+        calculation: GroupedCalculation,
+        current_data: Dataset,
+        reference_data: Optional[Dataset],
+    ):
+        fingerprint = self.metric.metric.get_fingerprint()
+        values = context.group_values(fingerprint, self.metric.column_name)
+        if values is None:
+            values = (
+                calculation.group_values(self.metric.column_name, current_data),
+                None if reference_data is None else calculation.group_values(self.metric.column_name, reference_data),
+            )
+            context.set_group_values(fingerprint, self.metric.column_name, values)
+        return values
+
     def display_name(self) -> str:
         return (
             f"{self.calculation.display_name()} group by '{self.metric.column_name}' for label: '{self.metric.label}'"
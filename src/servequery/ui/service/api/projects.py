@@ -155,13 +155,11 @@ async def get_snapshot_graph_data(
     graph_id: Annotated[str, Parameter(title="id of graph in snapshot")],
     log_event: Callable,
 ) -> str:
-    snapshot = await project_manager.load_snapshot(user_id, project_id, snapshot_id)
+    graph = await project_manager.get_snapshot_graph(user_id, project_id, snapshot_id, graph_id)
     log_event("get_snapshot_graph_data")
-    for widget in snapshot.widgets:
-        for graph in widget.additionalGraphs:
-            if graph_id == graph.id:
-                return json.dumps(graph.dict() if not isinstance(graph, dict) else graph, cls=NumpyEncoder)
-    raise HTTPException(status_code=404, detail="Graph not found")
+    if graph is None:
+        raise HTTPException(status_code=404, detail="Graph not found")
+    return json.dumps(graph.dict() if not isinstance(graph, dict) else graph, cls=NumpyEncoder)
 
 
 @get("/{project_id:uuid}/{snapshot_id:uuid}/download")
@@ -13,6 +13,8 @@ from servequery.ui.service.storage.local import FSSpecBlobStorage
 from servequery.ui.service.storage.local import InMemoryDataStorage
 from servequery.ui.service.storage.local import JsonFileProjectMetadataStorage
 from servequery.ui.service.storage.local import LocalState
+from servequery.ui.service.storage.sqlite import SQLiteDataStorage
+from servequery.ui.service.storage.sqlite import SQLiteProjectMetadataStorage
 
 
 class FSSpecBlobComponent(BlobStorageComponent):
@@ -51,6 +53,26 @@ class InmemoryDataComponent(DataStorageComponent):
         return inmemory_data
 
 
+class SQLiteMetadataComponent(MetadataStorageComponent):
+    class Config:
+        type_alias = "sqlite"
+
+    path: str
+
+    def dependency_factory(self) -> Callable[..., ProjectMetadataStorage]:
+        return lambda: SQLiteProjectMetadataStorage(path=self.path)
+
+
+class SQLiteDataComponent(DataStorageComponent):
+    class Config:
+        type_alias = "sqlite"
+
+    path: str
+
+    def dependency_factory(self) -> Callable[..., DataStorage]:
+        return lambda: SQLiteDataStorage(path=self.path)
+
+
 class LocalStateComponent(FactoryComponent[LocalState]):
     __section__: ClassVar = "local_state"
     dependency_name: ClassVar = "local_state"
@@ -11,6 +11,7 @@ from servequery.ui.service.components.base import FactoryComponent
 from servequery.ui.service.managers.projects import ProjectManager
 from servequery.ui.service.storage.common import NoopAuthManager
 from servequery.ui.service.storage.local import create_local_project_manager
+from servequery.ui.service.storage.sqlite import create_sqlite_project_manager
 
 
 class StorageComponent(FactoryComponent[ProjectManager], ABC):
@@ -23,10 +24,24 @@ class StorageComponent(FactoryComponent[ProjectManager], ABC):
 
 
 class LocalStorageComponent(StorageComponent):
+    """
+    Workspace directory storage.
+
+    - backend - "json" keeps metadata in JSON files and metric points in memory,
+      "sqlite" keeps both in a SQLite database in the workspace
+    """
+
     path: str = "workspace"
     autorefresh: bool = True
+    backend: str = "json"
 
     def dependency_factory(self) -> Callable[..., ProjectManager]:
+        if self.backend == "sqlite":
+            return lambda: create_sqlite_project_manager(
+                self.path, autorefresh=self.autorefresh, auth=NoopAuthManager()
+            )
+        if self.backend != "json":
+            raise ValueError(f"Unknown local storage backend '{self.backend}'")
         return lambda: create_local_project_manager(self.path, autorefresh=self.autorefresh, auth=NoopAuthManager())
 
 
@@ -69,3 +84,9 @@ register_type_alias(
 register_type_alias(
     DataStorageComponent, "servequery.ui.service.components.local_storage.InmemoryDataComponent", "inmemory"
 )
+register_type_alias(
+    MetadataStorageComponent, "servequery.ui.service.components.local_storage.SQLiteMetadataComponent", "sqlite"
+)
+register_type_alias(
+    DataStorageComponent, "servequery.ui.service.components.local_storage.SQLiteDataComponent", "sqlite"
+)
@@ -1,9 +1,13 @@
 import json
 import posixpath
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from typing import Any
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
 
 from litestar.exceptions import HTTPException
 from litestar.params import Dependency
@@ -35,6 +39,88 @@ from servequery.ui.service.type_aliases import TeamID
 from servequery.ui.service.type_aliases import UserID
 
 SNAPSHOTS = "snapshots"
+DEFAULT_SNAPSHOT_CACHE_SIZE = 256 * 2**20
+# parsed snapshot models take several times more memory than their json blobs
+PARSED_SNAPSHOT_SIZE_FACTOR = 6
+
+
+class CachedSnapshot:
+    def __init__(self, snapshot: SnapshotModel, size: int):
+        self.snapshot = snapshot
+        self.size = size
+        self.graphs: Dict[str, Any] = {}
+        for widget in snapshot.widgets:
+            for graph in widget.additionalGraphs:
+                # first graph with an id wins, same as scanning widgets in order
+                self.graphs.setdefault(graph.id, graph)
+
+
+class SnapshotCache:
+    """LRU cache of parsed snapshots bounded by their estimated memory size in bytes.
+
+    Size of an entry is estimated as its blob length times PARSED_SNAPSHOT_SIZE_FACTOR.
+
+    Entries are invalidated on snapshot or project deletion and by workspace watcher on file changes.
+    Snapshots which were invalidated while being loaded are not cached.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_SNAPSHOT_CACHE_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[ProjectID, SnapshotID], CachedSnapshot]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, project_id: ProjectID, snapshot_id: SnapshotID) -> Optional[CachedSnapshot]:
+        with self._lock:
+            entry = self._entries.get((project_id, snapshot_id))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end((project_id, snapshot_id))
+            return entry
+
+    def put(self, project_id: ProjectID, snapshot_id: SnapshotID, entry: CachedSnapshot, generation: int):
+        with self._lock:
+            if generation != self._generation or entry.size > self.max_size:
+                return
+            self._pop((project_id, snapshot_id))
+            self._entries[(project_id, snapshot_id)] = entry
+            self.size += entry.size
+            while self.size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+
+    def invalidate(self, project_id: ProjectID, snapshot_id: Optional[SnapshotID] = None):
+        """Drop cached snapshot or all cached snapshots of a project if `snapshot_id` is not set"""
+        with self._lock:
+            self._generation += 1
+            if snapshot_id is not None:
+                self._pop((project_id, snapshot_id))
+                return
+            for key in [key for key in self._entries if key[0] == project_id]:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.size = 0
+
+    def _pop(self, key: Tuple[ProjectID, SnapshotID]):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def __len__(self):
+        return len(self._entries)
 
 
 class ProjectManager(BaseManager):
@@ -51,9 +137,11 @@ class ProjectManager(BaseManager):
         blob_storage: Annotated[BlobStorage, Dependency()],
         data_storage: Annotated[DataStorage, Dependency()],
         dashboard_manager: Annotated[DashboardManager, Dependency()],
+        snapshot_cache_size: int = DEFAULT_SNAPSHOT_CACHE_SIZE,
         **dependencies,
     ):
         super().__init__(**dependencies)
+        self.snapshot_cache = SnapshotCache(snapshot_cache_size)
         self.project_metadata: ProjectMetadataStorage = project_metadata
         self.auth_manager: AuthManager = auth_manager
         self.blob_storage = blob_storage
@@ -126,7 +214,9 @@ class ProjectManager(BaseManager):
             user.id, EntityType.Project, project_id, Permission.PROJECT_DELETE
         ):
             raise ProjectNotFound()
-        return await self.project_metadata.delete_project(project_id)
+        result = await self.project_metadata.delete_project(project_id)
+        self.snapshot_cache.invalidate(project_id)
+        return result
 
     async def list_projects(self, user_id: UserID, team_id: Optional[TeamID], org_id: Optional[OrgID]) -> List[Project]:
         user = await self.auth_manager.get_or_default_user(user_id)
@@ -173,6 +263,7 @@ class ProjectManager(BaseManager):
         )
         # TODO: Support points for dashboard.
         await self.project_metadata.delete_snapshot(project_id, snapshot_id)
+        self.snapshot_cache.invalidate(project_id, snapshot_id)
 
     async def list_snapshots(
         self,
@@ -199,8 +290,35 @@ class ProjectManager(BaseManager):
             Permission.PROJECT_READ,
         ):
             raise ProjectNotFound()
-        with self.blob_storage.open_blob(self._create_path_for_snapshot(project_id, snapshot)) as f:
-            return parse_obj_as(SnapshotModel, json.load(f))
+        return self._load_cached_snapshot(project_id, snapshot).snapshot
+
+    async def get_snapshot_graph(
+        self,
+        user_id: UserID,
+        project_id: ProjectID,
+        snapshot: SnapshotID,
+        graph_id: str,
+    ) -> Optional[Any]:
+        """Get additional graph of snapshot widget by id, None if there is no such graph"""
+        if not await self.auth_manager.check_entity_permission(
+            user_id,
+            EntityType.Project,
+            project_id,
+            Permission.PROJECT_READ,
+        ):
+            raise ProjectNotFound()
+        return self._load_cached_snapshot(project_id, snapshot).graphs.get(graph_id)
+
+    def _load_cached_snapshot(self, project_id: ProjectID, snapshot_id: SnapshotID) -> CachedSnapshot:
+        entry = self.snapshot_cache.get(project_id, snapshot_id)
+        if entry is not None:
+            return entry
+        generation = self.snapshot_cache.generation
+        with self.blob_storage.open_blob(self._create_path_for_snapshot(project_id, snapshot_id)) as f:
+            data = f.read()
+        entry = CachedSnapshot(parse_obj_as(SnapshotModel, json.loads(data)), len(data) * PARSED_SNAPSHOT_SIZE_FACTOR)
+        self.snapshot_cache.put(project_id, snapshot_id, entry, generation)
+        return entry
 
     async def get_snapshot_metadata(
         self, user_id: UserID, project_id: ProjectID, snapshot_id: SnapshotID
@@ -221,6 +339,7 @@ class ProjectManager(BaseManager):
         ):
             raise NotEnoughPermissions()
         await self.project_metadata.reload_snapshots(project_id)
+        self.snapshot_cache.invalidate(project_id)
 
     def _create_path_for_snapshot(self, project_id: ProjectID, snapshot_id: SnapshotID):
         return posixpath.join(str(project_id), SNAPSHOTS, str(snapshot_id)) + ".json"
@@ -1,5 +1,8 @@
 import contextlib
+import datetime
 import posixpath
+from typing import Dict
+from typing import Optional
 
 from fsspec import AbstractFileSystem
 from fsspec import get_fs_token_paths
@@ -30,6 +33,15 @@ class FSLocation:
         except FileNotFoundError:
             return []
 
+    def listdir_modified(self, path: str) -> Dict[str, Optional[float]]:
+        """List directory entries with their modification time (None if the filesystem does not report it)."""
+        try:
+            fullpath = posixpath.join(self.path, path)
+            entries = self.fs.listdir(fullpath, detail=True)
+        except FileNotFoundError:
+            return {}
+        return {posixpath.relpath(entry["name"], fullpath): _modified(entry) for entry in entries}
+
     def isdir(self, path: str):
         return self.fs.isdir(posixpath.join(self.path, path))
 
@@ -42,5 +54,17 @@ class FSLocation:
     def invalidate_cache(self, path):
         self.fs.invalidate_cache(posixpath.join(self.path, path))
 
+    def move(self, path: str, destination: str):
+        self.fs.mv(posixpath.join(self.path, path), posixpath.join(self.path, destination))
+
     def size(self, path):
         return self.fs.size(posixpath.join(self.path, path))
+
+
+def _modified(entry: dict) -> Optional[float]:
+    modified = entry.get("mtime", entry.get("LastModified"))
+    if isinstance(modified, datetime.datetime):
+        return modified.timestamp()
+    if isinstance(modified, (int, float)):
+        return float(modified)
+    return None
@@ -1,17 +1,27 @@
 import contextlib
 import datetime
+import itertools
 import json
+import os
 import posixpath
 import re
-import uuid
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+from typing import Callable
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Mapping
+from typing import MutableMapping
 from typing import Optional
 from typing import Set
+from typing import Tuple
 
 import uuid6
 
-from servequery._pydantic_compat import BaseModel
 from servequery._pydantic_compat import PrivateAttr
 from servequery._pydantic_compat import ValidationError
 from servequery._pydantic_compat import parse_obj_as
@@ -21,6 +31,7 @@ from servequery.core.metric_types import CountValue
 from servequery.core.metric_types import MeanStdValue
 from servequery.core.metric_types import SingleValue
 from servequery.core.serialization import SnapshotModel
+from servequery.legacy.suite.base_suite import MetadataValueType
 from servequery.legacy.suite.base_suite import Snapshot
 from servequery.legacy.suite.base_suite import SnapshotLinks
 from servequery.legacy.utils import NumpyEncoder
@@ -48,8 +59,14 @@ from servequery.ui.storage.local.base import LocalState as WorkspaceLocalState
 
 SNAPSHOTS = "snapshots"
 METADATA_PATH = "metadata.json"
+POINTS_CACHE_PATH = "points_cache.json"
+POINTS_CACHE_VERSION = 2
+PARALLEL_LOAD_MIN_SNAPSHOTS = 64
+PARSED_SNAPSHOTS_CACHE_SIZE = 16
 
 
+SnapshotKey = Tuple[datetime.datetime, SnapshotID]
+
 UUID_REGEX = re.compile("^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
 
 
@@ -94,17 +111,110 @@ def load_project(location: FSLocation, path: str) -> Optional[Project]:
         return None
 
 
+class SnapshotHeader:
+    """Snapshot fields needed to list and filter snapshots without parsing the whole snapshot."""
+
+    __slots__ = ("timestamp", "tags", "metadata")
+
+    def __init__(self, timestamp: datetime.datetime, tags: List[str], metadata: Dict[str, MetadataValueType]):
+        self.timestamp = timestamp
+        self.tags = tags
+        self.metadata = metadata
+
+    @classmethod
+    def from_snapshot(cls, snapshot: SnapshotModel) -> "SnapshotHeader":
+        return cls(snapshot.timestamp, snapshot.tags, snapshot.metadata)
+
+
+SnapshotPoint = Tuple[str, Dict[str, str], float]
+SnapshotMetrics = List[Dict[str, Any]]
+
+
+class ProjectSnapshots(MutableMapping[SnapshotID, SnapshotModel]):
+    """
+    Snapshots of a project keyed by snapshot id.
+
+    Only headers are kept for snapshots loaded from disk, full snapshot models
+    are parsed on access and only the most recently used ones are kept.
+    Ids of added, replaced and deleted snapshots are logged, so indexes of the snapshots
+    can be kept in sync without comparing all snapshots.
+    """
+
+    def __init__(self, location: FSLocation, project_id: ProjectID):
+        self.location = location
+        self.project_id = project_id
+        self._headers: Dict[SnapshotID, SnapshotHeader] = {}
+        self._models: "OrderedDict[SnapshotID, SnapshotModel]" = OrderedDict()
+        self._changes: List[SnapshotID] = []
+
+    def __getitem__(self, snapshot_id: SnapshotID) -> SnapshotModel:
+        model = self._models.get(snapshot_id)
+        if model is None:
+            if snapshot_id not in self._headers:
+                raise KeyError(snapshot_id)
+            with self.location.open(_snapshot_path(self.project_id, snapshot_id)) as f:
+                model = parse_obj_as(SnapshotModel, json.load(f))
+        self._cache_model(snapshot_id, model)
+        return model
+
+    def __setitem__(self, snapshot_id: SnapshotID, snapshot: SnapshotModel):
+        self._headers[snapshot_id] = SnapshotHeader.from_snapshot(snapshot)
+        self._changes.append(snapshot_id)
+        self._cache_model(snapshot_id, snapshot)
+
+    def _cache_model(self, snapshot_id: SnapshotID, model: SnapshotModel):
+        self._models[snapshot_id] = model
+        self._models.move_to_end(snapshot_id)
+        while len(self._models) > PARSED_SNAPSHOTS_CACHE_SIZE:
+            self._models.popitem(last=False)
+
+    def __delitem__(self, snapshot_id: SnapshotID):
+        del self._headers[snapshot_id]
+        self._changes.append(snapshot_id)
+        self._models.pop(snapshot_id, None)
+
+    def __iter__(self):
+        return iter(self._headers)
+
+    def __len__(self):
+        return len(self._headers)
+
+    def __contains__(self, snapshot_id):
+        return snapshot_id in self._headers
+
+    def header(self, snapshot_id: SnapshotID) -> SnapshotHeader:
+        return self._headers[snapshot_id]
+
+    def headers(self) -> Dict[SnapshotID, SnapshotHeader]:
+        return self._headers
+
+    def add_header(self, snapshot_id: SnapshotID, header: SnapshotHeader):
+        self._headers[snapshot_id] = header
+        self._changes.append(snapshot_id)
+        self._models.pop(snapshot_id, None)
+
+    @property
+    def version(self) -> int:
+        """Number of changes made to the snapshots"""
+        return len(self._changes)
+
+    def changed_since(self, version: int) -> List[SnapshotID]:
+        """Ids of snapshots added, replaced or deleted after the given version"""
+        return self._changes[version:]
+
+
 class LocalState(WorkspaceLocalState):
-    def __init__(self, path: str, project_manager: Optional[ProjectManager]):
+    def __init__(self, path: str, project_manager: Optional[ProjectManager], max_workers: Optional[int] = None):
         super().__init__(path)
         self.project_manager = project_manager
+        self.max_workers = max_workers
         self.projects: Dict[ProjectID, Project] = {}
-        self.snapshots: Dict[ProjectID, Dict[SnapshotID, SnapshotModel]] = {}
+        self.snapshots: Dict[ProjectID, ProjectSnapshots] = {}
         self.snapshot_data: Dict[ProjectID, Dict[SnapshotID, Snapshot]] = {}
 
     @classmethod
-    def load(cls, path: str, project_manager: Optional[ProjectManager]):
-        state = LocalState(path, project_manager)
+    def load(cls, path: str, project_manager: Optional[ProjectManager], max_workers: Optional[int] = None):
+        state = LocalState(path, project_manager, max_workers)
 
         state.location.makedirs("")
         state.reload()
@@ -114,36 +224,86 @@ class LocalState(WorkspaceLocalState):
         self.location.invalidate_cache("")
         projects = [load_project(self.location, p) for p in self.location.listdir("") if self.location.isdir(p)]
         self.projects = {p.id: p.bind(self.project_manager, NO_USER.id) for p in projects if p is not None}
-        self.snapshots = {p: {} for p in self.projects}
+        self.snapshots = {p: ProjectSnapshots(self.location, p) for p in self.projects}
         self.snapshot_data = {p: {} for p in self.projects}
 
         for project_id in self.projects:
             self.reload_snapshots(project_id, force=force, skip_errors=False)
 
     def reload_snapshots(self, project_id: ProjectID, force: bool = False, skip_errors: bool = True):
+        """
+        Load headers of snapshots not loaded yet, full snapshots are parsed on access.
+
+        Headers of unchanged snapshot files are read from the project points cache,
+        which is streamed line by line and rewritten only when snapshot files changed.
+        """
         path = posixpath.join(str(project_id), SNAPSHOTS)
-        if force:
-            self.snapshots[project_id] = {}
+        if force or project_id not in self.snapshots:
+            self.snapshots[project_id] = ProjectSnapshots(self.location, project_id)
             self.snapshot_data[project_id] = {}
 
-        project = self.projects[project_id]
         self.location.invalidate_cache(path)
-        for file in self.location.listdir(path):
+        snapshots = self.snapshots[project_id]
+        files: Dict[str, Tuple[SnapshotID, Optional[float]]] = {}
+        for file, mtime in self.location.listdir_modified(path).items():
             filename = posixpath.basename(file)
             if not filename.endswith(".json"):
                 continue
             sid_str = filename[: -len(".json")]
             if not UUID_REGEX.match(sid_str):
                 continue
-            snapshot_id = uuid6.UUID(sid_str)
-            if snapshot_id in self.snapshots[project_id]:
+            files[sid_str] = (uuid6.UUID(sid_str), mtime)
+
+        cached: Set[str] = set()
+        stale = False
+        for entry in self._iter_points_cache(project_id):
+            snapshot_id, mtime = files.get(entry["id"], (None, None))
+            if snapshot_id is None or mtime is None or entry["mtime"] != mtime:
+                stale = True
                 continue
-            self.reload_snapshot(project, snapshot_id, skip_errors)
+            cached.add(entry["id"])
+            if snapshot_id not in snapshots:
+                snapshots.add_header(snapshot_id, _header_from_cache(entry))
+        missing = [
+            snapshot_id
+            for sid_str, (snapshot_id, _) in files.items()
+            if sid_str not in cached and snapshot_id not in snapshots
+        ]
+        if not stale and not missing:
+            return
+
+        entries = itertools.chain(
+            (entry for entry in self._iter_points_cache(project_id) if entry["id"] in cached),
+            self._load_snapshots(project_id, missing, files, skip_errors),
+        )
+        if not self._write_points_cache(project_id, entries):
+            # headers of missing snapshots are still loaded when the cache can't be written
+            for _ in entries:
+                pass
+
+    def _load_snapshots(
+        self,
+        project_id: ProjectID,
+        snapshot_ids: List[SnapshotID],
+        files: Dict[str, Tuple[SnapshotID, Optional[float]]],
+        skip_errors: bool,
+    ) -> Iterator[dict]:
+        """Parse snapshot files, add their headers and yield points cache entries for them."""
+        snapshots = self.snapshots[project_id]
+        for snapshot_id, loaded in zip(snapshot_ids, self._read_snapshots_points(project_id, snapshot_ids)):
+            if loaded is None:
+                if not skip_errors:
+                    raise ValueError(f"{snapshot_id} is malformed")
+                continue
+            header, points, metrics = loaded
+            snapshots.add_header(snapshot_id, header)
+            mtime = files[str(snapshot_id)][1]
+            if mtime is not None:
+                yield _cache_entry(snapshot_id, mtime, header, points, metrics)
 
     def reload_snapshot(self, project: Project, snapshot_id: SnapshotID, skip_errors: bool = True):
         try:
-            snapshot_path = posixpath.join(str(project.id), SNAPSHOTS, str(snapshot_id) + ".json")
-            with self.location.open(snapshot_path) as f:
+            with self.location.open(_snapshot_path(project.id, snapshot_id)) as f:
                 model = parse_obj_as(SnapshotModel, json.load(f))
             self.snapshots[project.id][snapshot_id] = model
             # self.snapshot_data[project.id][snapshot_id] = suite
@@ -151,6 +311,166 @@ class LocalState(WorkspaceLocalState):
             if not skip_errors:
                 raise ValueError(f"{snapshot_id} is malformed") from e
 
+    def iter_snapshot_points(
+        self, project_id: ProjectID
+    ) -> Iterator[Tuple[SnapshotID, List[SnapshotPoint], SnapshotMetrics]]:
+        """Points and metric params of project snapshots, read from the points cache where possible."""
+        snapshots = self.snapshots[project_id]
+        read: Set[SnapshotID] = set()
+        for entry in self._iter_points_cache(project_id):
+            snapshot_id = uuid6.UUID(entry["id"])
+            if snapshot_id in snapshots and snapshot_id not in read:
+                read.add(snapshot_id)
+                yield snapshot_id, _points_from_cache(entry), entry["metrics"]
+        for snapshot_id in [snapshot_id for snapshot_id in snapshots if snapshot_id not in read]:
+            snapshot = snapshots[snapshot_id]
+            yield snapshot_id, snapshot_points(snapshot), snapshot_metrics(snapshot)
+
+    def _read_snapshots_points(
+        self, project_id: ProjectID, snapshot_ids: List[SnapshotID]
+    ) -> Iterator[Optional[Tuple[SnapshotHeader, List[SnapshotPoint], SnapshotMetrics]]]:
+        paths = [_snapshot_path(project_id, snapshot_id) for snapshot_id in snapshot_ids]
+        max_workers = self.max_workers or os.cpu_count() or 1
+        if max_workers <= 1 or len(paths) < PARALLEL_LOAD_MIN_SNAPSHOTS:
+            for i in range(0, len(paths), PARALLEL_LOAD_MIN_SNAPSHOTS):
+                yield from _read_snapshots_points(self.location.base_path, paths[i : i + PARALLEL_LOAD_MIN_SNAPSHOTS])
+            return
+        chunk_size = min(-(-len(paths) // (max_workers * 4)), PARALLEL_LOAD_MIN_SNAPSHOTS)
+        chunks = [paths[i : i + chunk_size] for i in range(0, len(paths), chunk_size)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for chunk in executor.map(_read_snapshots_points, itertools.repeat(self.location.base_path), chunks):
+                yield from chunk
+
+    def _iter_points_cache(self, project_id: ProjectID) -> Iterator[dict]:
+        """Stream points cache entries: a version line followed by one JSON entry per line."""
+        try:
+            with self.location.open(posixpath.join(str(project_id), POINTS_CACHE_PATH)) as f:
+                if _points_cache_version(f.readline()) != POINTS_CACHE_VERSION:
+                    return
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        return
+        except FileNotFoundError:
+            return
+
+    def _write_points_cache(self, project_id: ProjectID, entries: Iterable[dict]) -> bool:
+        path = posixpath.join(str(project_id), POINTS_CACHE_PATH)
+        moved = False
+        try:
+            with self.location.open(path + ".tmp", "w") as f:
+                f.write(json.dumps({"version": POINTS_CACHE_VERSION}) + "\n")
+                for entry in entries:
+                    f.write(json.dumps(entry, cls=NumpyEncoder) + "\n")
+            self.location.move(path + ".tmp", path)
+            moved = True
+        except OSError:
+            return False
+        finally:
+            # entries are produced while loading snapshots, which may raise
+            if not moved:
+                with contextlib.suppress(OSError):
+                    if self.location.exists(path + ".tmp"):
+                        self.location.rmtree(path + ".tmp")
+        return True
+
+
+def _snapshot_path(project_id: ProjectID, snapshot_id: SnapshotID) -> str:
+    return posixpath.join(str(project_id), SNAPSHOTS, str(snapshot_id) + ".json")
+
+
+def snapshot_points(snapshot: SnapshotModel) -> List[SnapshotPoint]:
+    """Extract (metric type, params, value) points of all snapshot metric results."""
+    points: List[SnapshotPoint] = []
+    for result in snapshot.metric_results.values():
+        if isinstance(result, SingleValue):
+            points.append(_value_point(result))
+        elif isinstance(result, ByLabelValue):
+            points.extend(_value_point(value) for value in result.values.values())
+        elif isinstance(result, CountValue):
+            points.append(_value_point(result.count))
+            points.append(_value_point(result.share))
+        elif isinstance(result, MeanStdValue):
+            points.append(_value_point(result.mean))
+            points.append(_value_point(result.std))
+        elif isinstance(result, ByLabelCountValue):
+            points.extend(_value_point(value) for value in result.counts.values())
+            points.extend(_value_point(value) for value in result.shares.values())
+        else:
+            raise ValueError(f"type {type(result)} isn't supported")
+    return points
+
+
+def snapshot_metrics(snapshot: SnapshotModel) -> SnapshotMetrics:
+    """Params of all snapshot metric results."""
+    return [result.metric_value_location.metric.params for result in snapshot.metric_results.values()]
+
+
+def _value_point(result: SingleValue) -> SnapshotPoint:
+    params = {}
+    if result.metric_value_location is None:
+        raise ValueError("metric_value_location should be set")
+    for k, v in result.metric_value_location.param.items():
+        if k in params:
+            raise ValueError("duplicated key?")
+        params[k] = str(v)
+    for k, v in result.metric_value_location.metric.params.items():
+        if k in ["type", "tests", "count_tests", "share_tests", "mean_tests", "std_tests"]:
+            continue
+        params[k] = str(v)
+    return result.metric_value_location.metric.params["type"], params, result.value
+
+
+def _read_snapshots_points(
+    base_path: str, paths: List[str]
+) -> List[Optional[Tuple[SnapshotHeader, List[SnapshotPoint], SnapshotMetrics]]]:
+    location = FSLocation(base_path)
+    loaded: List[Optional[Tuple[SnapshotHeader, List[SnapshotPoint], SnapshotMetrics]]] = []
+    for path in paths:
+        try:
+            with location.open(path) as f:
+                model = parse_obj_as(SnapshotModel, json.load(f))
+        except ValidationError:
+            loaded.append(None)
+            continue
+        loaded.append((SnapshotHeader.from_snapshot(model), snapshot_points(model), snapshot_metrics(model)))
+    return loaded
+
+
+def _points_cache_version(line: str) -> Optional[int]:
+    try:
+        header = json.loads(line)
+    except ValueError:
+        return None
+    return header.get("version") if isinstance(header, dict) else None
+
+
+def _cache_entry(
+    snapshot_id: SnapshotID,
+    mtime: float,
+    header: SnapshotHeader,
+    points: List[SnapshotPoint],
+    metrics: SnapshotMetrics,
+) -> dict:
+    return {
+        "id": str(snapshot_id),
+        "mtime": mtime,
+        "timestamp": header.timestamp.isoformat(),
+        "tags": header.tags,
+        "metadata": header.metadata,
+        "points": points,
+        "metrics": metrics,
+    }
+
+
+def _header_from_cache(entry: dict) -> SnapshotHeader:
+    return SnapshotHeader(datetime.datetime.fromisoformat(entry["timestamp"]), entry["tags"], entry["metadata"])
+
+
+def _points_from_cache(entry: dict) -> List[SnapshotPoint]:
+    return [(metric_type, params, value) for metric_type, params, value in entry["points"]]
+
 
 class JsonFileProjectMetadataStorage(ProjectMetadataStorage):
     path: str
@@ -207,7 +527,7 @@ class JsonFileProjectMetadataStorage(ProjectMetadataStorage):
     async def delete_snapshot(self, project_id: ProjectID, snapshot_id: SnapshotID):
         if project_id in self.state.projects and snapshot_id in self.state.snapshots[project_id]:
             del self.state.snapshots[project_id][snapshot_id]
-            del self.state.snapshot_data[project_id][snapshot_id]
+            self.state.snapshot_data[project_id].pop(snapshot_id, None)
         path = posixpath.join(str(project_id), SNAPSHOTS, f"{snapshot_id}.json")
         if self.state.location.exists(path):
             self.state.location.rmtree(path)
@@ -230,11 +550,11 @@ class JsonFileProjectMetadataStorage(ProjectMetadataStorage):
                 timestamp=snapshot.timestamp,
                 links=SnapshotLinks(),
             )
-            for snapshot_id, snapshot in self.state.snapshots[project_id].items()
+            for snapshot_id, snapshot in self.state.snapshots[project_id].headers().items()
         ]
 
     async def get_snapshot_metadata(self, project_id: ProjectID, snapshot_id: SnapshotID) -> SnapshotMetadataModel:
-        snapshot = self.state.snapshots[project_id][snapshot_id]
+        snapshot = self.state.snapshots[project_id].header(snapshot_id)
         return SnapshotMetadataModel(
             id=snapshot_id,
             metadata=snapshot.metadata,
@@ -250,28 +570,230 @@ class JsonFileProjectMetadataStorage(ProjectMetadataStorage):
         pass
 
 
-class MetricItem(BaseModel):
-    snapshot_id: SnapshotID
-    timestamp: datetime.datetime
-    metric_id: str
-    metric_type: str
-    params: Dict[str, str]
-    value: float
+class SeriesPoints:
+    """
+    Points of one series ordered by snapshot timestamp, snapshot id and insertion order.
+
+    Metric type and params are stored once per series, points are kept in typed arrays:
+    snapshot references into the project snapshot table, insertion sequence numbers and values.
+    """
+
+    __slots__ = ("metric_type", "params", "snapshots", "seqs", "values")
+
+    def __init__(self, metric_type: str, params: Dict[str, str]):
+        self.metric_type = metric_type
+        self.params = params
+        self.snapshots = array("l")
+        self.seqs = array("q")
+        self.values = array("d")
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, snapshot: int, seq: int, value: float, snapshot_key: Callable[[int], SnapshotKey]):
+        key = (snapshot_key(snapshot), seq)
+        if len(self) == 0 or (snapshot_key(self.snapshots[-1]), self.seqs[-1]) <= key:
+            self.append(snapshot, seq, value)
+            return
+        position = _bisect(len(self), lambda i: (snapshot_key(self.snapshots[i]), self.seqs[i]) <= key)
+        self.snapshots.insert(position, snapshot)
+        self.seqs.insert(position, seq)
+        self.values.insert(position, value)
+
+    def append(self, snapshot: int, seq: int, value: float):
+        """Append a point without keeping order, sort must be called before the series is queried."""
+        self.snapshots.append(snapshot)
+        self.seqs.append(seq)
+        self.values.append(value)
+
+    def sort(self, snapshot_key: Callable[[int], SnapshotKey]):
+        order = sorted(range(len(self)), key=lambda i: (snapshot_key(self.snapshots[i]), self.seqs[i]))
+        self._take(order)
+
+    def remove(self, snapshot: int, snapshot_key: Callable[[int], SnapshotKey]):
+        """Remove points of a snapshot, they are adjacent since points are ordered by snapshot key first."""
+        key = snapshot_key(snapshot)
+        start = _bisect(len(self), lambda i: snapshot_key(self.snapshots[i]) < key)
+        end = _bisect(len(self), lambda i: snapshot_key(self.snapshots[i]) <= key)
+        del self.snapshots[start:end]
+        del self.seqs[start:end]
+        del self.values[start:end]
+
+    def _take(self, positions: List[int]):
+        self.snapshots = array("l", (self.snapshots[i] for i in positions))
+        self.seqs = array("q", (self.seqs[i] for i in positions))
+        self.values = array("d", (self.values[i] for i in positions))
+
+    def range(
+        self,
+        start_time: Optional[datetime.datetime],
+        end_time: Optional[datetime.datetime],
+        timestamps: List[datetime.datetime],
+    ) -> Tuple[int, int]:
+        start = 0 if start_time is None else _bisect(len(self), lambda i: timestamps[self.snapshots[i]] < start_time)
+        end = len(self) if end_time is None else _bisect(len(self), lambda i: timestamps[self.snapshots[i]] <= end_time)
+        return start, end
+
+
+def _bisect(size: int, is_before: Callable[[int], bool]) -> int:
+    """Return the first position in [0, size) for which is_before is false (is_before must be monotonic)."""
+    low, high = 0, size
+    while low < high:
+        middle = (low + high) // 2
+        if is_before(middle):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class ProjectPointsIndex:
+    """
+    Index of project metric points.
+
+    Points are grouped by series (metric type and params) and kept sorted by time,
+    snapshots are indexed by tags and metadata keys, so a query only touches
+    series and snapshots that can match it. Bulk loads add points unordered
+    and sort every series once at the end. Distinct metric params are kept
+    once and referenced by snapshots, to list metrics and labels without
+    parsing snapshots. The index follows `ProjectSnapshots` changes after `version`.
+    """
+
+    def __init__(self):
+        self.series: Dict[str, SeriesPoints] = {}
+        self.series_by_type: Dict[str, List[str]] = {}
+        self.snapshots: Set[SnapshotID] = set()
+        self.snapshots_by_tag: Dict[str, Set[SnapshotID]] = {}
+        self.snapshots_by_metadata_key: Dict[str, Set[SnapshotID]] = {}
+        self.snapshot_filters: Dict[SnapshotID, Tuple[List[str], List[str]]] = {}
+        self.snapshot_refs: Dict[SnapshotID, int] = {}
+        self.snapshot_ids: List[SnapshotID] = []
+        self.snapshot_timestamps: List[datetime.datetime] = []
+        self.snapshot_series: Dict[int, Set[str]] = {}
+        self.metric_ids: Dict[str, int] = {}
+        self.metric_params: List[Dict[str, Any]] = []
+        self.metric_snapshots: Dict[int, int] = {}
+        self.snapshot_metrics: Dict[SnapshotID, array] = {}
+        self.source: Optional[ProjectSnapshots] = None
+        self.version = 0
+        self._seq = itertools.count()
+
+    def add_snapshot(self, snapshot_id: SnapshotID, snapshot: SnapshotHeader, metrics: SnapshotMetrics):
+        if snapshot_id in self.snapshots:
+            self.remove_snapshot(snapshot_id)
+        self.snapshots.add(snapshot_id)
+        if snapshot_id not in self.snapshot_refs:
+            self.snapshot_refs[snapshot_id] = len(self.snapshot_ids)
+            self.snapshot_ids.append(snapshot_id)
+            self.snapshot_timestamps.append(snapshot.timestamp)
+        else:
+            self.snapshot_timestamps[self.snapshot_refs[snapshot_id]] = snapshot.timestamp
+        for tag in snapshot.tags:
+            self.snapshots_by_tag.setdefault(tag, set()).add(snapshot_id)
+        for key in snapshot.metadata:
+            self.snapshots_by_metadata_key.setdefault(key, set()).add(snapshot_id)
+        self.snapshot_filters[snapshot_id] = (list(snapshot.tags), list(snapshot.metadata))
+        metric_ids = array("l", dict.fromkeys(self._metric_id(params) for params in metrics))
+        for metric_id in metric_ids:
+            self.metric_snapshots[metric_id] = self.metric_snapshots.get(metric_id, 0) + 1
+        self.snapshot_metrics[snapshot_id] = metric_ids
+
+    def _metric_id(self, params: Dict[str, Any]) -> int:
+        key = json.dumps(params, sort_keys=True, cls=NumpyEncoder)
+        metric_id = self.metric_ids.get(key)
+        if metric_id is None:
+            metric_id = self.metric_ids[key] = len(self.metric_params)
+            self.metric_params.append(params)
+        return metric_id
+
+    def add_point(
+        self, snapshot_id: SnapshotID, metric_type: str, params: Dict[str, str], value: float, ordered: bool = True
+    ):
+        series_id = _series_id(metric_type, params)
+        series = self.series.get(series_id)
+        if series is None:
+            series = SeriesPoints(metric_type, params)
+            self.series[series_id] = series
+            self.series_by_type.setdefault(metric_type, []).append(series_id)
+        ref = self.snapshot_refs[snapshot_id]
+        self.snapshot_series.setdefault(ref, set()).add(series_id)
+        if ordered:
+            series.add(ref, next(self._seq), value, self.snapshot_key)
+        else:
+            series.append(ref, next(self._seq), value)
+
+    def sort(self):
+        for series in self.series.values():
+            series.sort(self.snapshot_key)
+
+    def remove_snapshot(self, snapshot_id: SnapshotID):
+        self.snapshots.discard(snapshot_id)
+        for metric_id in self.snapshot_metrics.pop(snapshot_id, ()):
+            self.metric_snapshots[metric_id] -= 1
+        tags, metadata_keys = self.snapshot_filters.pop(snapshot_id, ([], []))
+        for tag in tags:
+            self.snapshots_by_tag[tag].discard(snapshot_id)
+        for key in metadata_keys:
+            self.snapshots_by_metadata_key[key].discard(snapshot_id)
+        ref = self.snapshot_refs.get(snapshot_id)
+        if ref is not None:
+            for series_id in self.snapshot_series.pop(ref, ()):
+                self.series[series_id].remove(ref, self.snapshot_key)
+
+    def snapshot_key(self, snapshot: int) -> SnapshotKey:
+        return self.snapshot_timestamps[snapshot], self.snapshot_ids[snapshot]
+
+    def series_for(self, series_filter: List[SeriesFilter]) -> List[str]:
+        if any(f.metric == "*" for f in series_filter):
+            return list(self.series.keys())
+        metric_types = dict.fromkeys(f.metric for f in series_filter)
+        return [series_id for metric_type in metric_types for series_id in self.series_by_type.get(metric_type, [])]
+
+    def matching_snapshots(
+        self, tags: List[str], metadata: Dict[str, str], snapshots: Dict[SnapshotID, SnapshotHeader]
+    ) -> Optional[Set[SnapshotID]]:
+        """Snapshots matching tags and metadata, None if all snapshots match (there are no filters)."""
+        if not tags and not metadata:
+            return None
+        candidates: Optional[Set[SnapshotID]] = None
+        # the smallest sets are intersected first, tags sets are exact and metadata values are checked after
+        for indexed in sorted(
+            [self.snapshots_by_tag.get(tag, set()) for tag in tags]
+            + [self.snapshots_by_metadata_key.get(key, set()) for key in metadata],
+            key=len,
+        ):
+            candidates = set(indexed) if candidates is None else candidates & indexed
+        return {
+            snapshot_id
+            for snapshot_id in candidates or ()
+            if not metadata or snapshots[snapshot_id].metadata.items() >= metadata.items()
+        }
+
+    def metrics_for(
+        self, tags: List[str], metadata: Dict[str, str], snapshots: Dict[SnapshotID, SnapshotHeader]
+    ) -> List[Dict[str, Any]]:
+        """Distinct params of metrics in snapshots matching tags and metadata."""
+        matching = self.matching_snapshots(tags, metadata, snapshots)
+        if matching is None:
+            return [self.metric_params[metric_id] for metric_id, count in self.metric_snapshots.items() if count > 0]
+        metric_ids: Set[int] = set()
+        for snapshot_id in matching:
+            metric_ids.update(self.snapshot_metrics.get(snapshot_id, ()))
+        return [self.metric_params[metric_id] for metric_id in metric_ids]
 
 
 class InMemoryDataStorage(DataStorage):
     path: str
 
     _state: LocalState = PrivateAttr(None)
-    _metrics_points: Dict[uuid.UUID, Dict[uuid.UUID, List[MetricItem]]] = PrivateAttr(None)
+    _points_index: Dict[ProjectID, ProjectPointsIndex] = PrivateAttr(None)
 
     def __init__(self, path: str, local_state: Optional[LocalState] = None):
         self.path = path
         self._state = local_state or LocalState.load(self.path, None)
-        self._metrics_points = {}
-        for project_id, snapshots in self._state.snapshots.items():
-            for snapshot_id, snapshot in snapshots.items():
-                self._add_snapshot_points_sync(project_id, snapshot_id, snapshot)
+        self._points_index = {}
+        for project_id in self._state.snapshots:
+            self._index_project(project_id)
 
     @property
     def state(self):
@@ -283,67 +805,78 @@ class InMemoryDataStorage(DataStorage):
         return self._add_snapshot_points_sync(project_id, snapshot_id, snapshot)
 
     def _add_snapshot_points_sync(self, project_id: ProjectID, snapshot_id: SnapshotID, snapshot: SnapshotModel):
-        for result in snapshot.metric_results.values():
-            if isinstance(result, SingleValue):
-                self._add_value(project_id, snapshot_id, snapshot.timestamp, result)
-            elif isinstance(result, ByLabelValue):
-                for value in result.values.values():
-                    self._add_value(project_id, snapshot_id, snapshot.timestamp, value)
-            elif isinstance(result, CountValue):
-                self._add_value(project_id, snapshot_id, snapshot.timestamp, result.count)
-                self._add_value(project_id, snapshot_id, snapshot.timestamp, result.share)
-            elif isinstance(result, MeanStdValue):
-                self._add_value(project_id, snapshot_id, snapshot.timestamp, result.mean)
-                self._add_value(project_id, snapshot_id, snapshot.timestamp, result.std)
-            elif isinstance(result, ByLabelCountValue):
-                for value in result.counts.values():
-                    self._add_value(project_id, snapshot_id, snapshot.timestamp, value)
-                for value in result.shares.values():
-                    self._add_value(project_id, snapshot_id, snapshot.timestamp, value)
-            else:
-                raise ValueError(f"type {type(result)} isn't supported")
-
-    def _add_value(
+        self._add_points(
+            project_id,
+            snapshot_id,
+            SnapshotHeader.from_snapshot(snapshot),
+            snapshot_points(snapshot),
+            snapshot_metrics(snapshot),
+        )
+
+    def _index_project(self, project_id: ProjectID):
+        points_index = self._points_index[project_id] = ProjectPointsIndex()
+        snapshots = self.state.snapshots[project_id]
+        headers = snapshots.headers()
+        for snapshot_id, points, metrics in self.state.iter_snapshot_points(project_id):
+            self._add_points(project_id, snapshot_id, headers[snapshot_id], points, metrics, ordered=False)
+        points_index.sort()
+        points_index.source, points_index.version = snapshots, snapshots.version
+
+    def _add_points(
         self,
         project_id: ProjectID,
         snapshot_id: SnapshotID,
-        timestamp: datetime.datetime,
-        result: SingleValue,
-    ) -> None:
-        params = {}
-        if result.metric_value_location is None:
-            raise ValueError("metric_value_location should be set")
-        for k, v in result.metric_value_location.param.items():
-            if k in params:
-                raise ValueError("duplicated key?")
-            params[k] = str(v)
-        for k, v in result.metric_value_location.metric.params.items():
-            if k in ["type", "tests", "count_tests", "share_tests", "mean_tests", "std_tests"]:
-                continue
-            params[k] = str(v)
-        if project_id not in self._metrics_points:
-            self._metrics_points[project_id] = {}
-        if snapshot_id not in self._metrics_points[project_id]:
-            self._metrics_points[project_id][snapshot_id] = []
-        self._metrics_points[project_id][snapshot_id].append(
-            MetricItem(
-                snapshot_id=snapshot_id,
-                timestamp=timestamp,
-                metric_id=result.metric_value_location.metric.metric_id,
-                metric_type=result.metric_value_location.metric.params["type"],
-                params=params,
-                value=result.value,
-            )
-        )
+        header: SnapshotHeader,
+        points: List[SnapshotPoint],
+        metrics: SnapshotMetrics,
+        ordered: bool = True,
+    ):
+        if project_id not in self._points_index:
+            self._points_index[project_id] = ProjectPointsIndex()
+        points_index = self._points_index[project_id]
+        points_index.add_snapshot(snapshot_id, header, metrics)
+        for metric_type, params, value in points:
+            points_index.add_point(snapshot_id, metric_type, params, value, ordered=ordered)
+
+    def _project_index(self, project_id: ProjectID) -> Optional[ProjectPointsIndex]:
+        """Project points index in sync with project snapshots: deleted ones are dropped, new and changed ones indexed.
+
+        Only snapshots changed since the last sync are checked, all snapshot ids are compared
+        only after project snapshots were reloaded.
+        """
+        snapshots = self.state.snapshots.get(project_id)
+        if snapshots is None:
+            self._points_index.pop(project_id, None)
+            return None
+        if project_id not in self._points_index:
+            self._index_project(project_id)
+        points_index = self._points_index[project_id]
+        if points_index.source is snapshots and points_index.version == snapshots.version:
+            return points_index
+        headers = snapshots.headers()
+        if points_index.source is snapshots:
+            # logged snapshots may be replaced in place, so indexed ones are indexed again
+            changed: Iterable[SnapshotID] = dict.fromkeys(snapshots.changed_since(points_index.version))
+            reindex = True
+        else:
+            changed = points_index.snapshots ^ headers.keys()
+            reindex = False
+        for snapshot_id in changed:
+            if snapshot_id in points_index.snapshots and (reindex or snapshot_id not in headers):
+                points_index.remove_snapshot(snapshot_id)
+            if snapshot_id in headers and snapshot_id not in points_index.snapshots:
+                self._add_snapshot_points_sync(project_id, snapshot_id, snapshots[snapshot_id])
+        points_index.source, points_index.version = snapshots, snapshots.version
+        return points_index
+
+    def _metric_params(self, project_id: ProjectID, tags: List[str], metadata: Dict[str, str]) -> List[Dict[str, Any]]:
+        points_index = self._project_index(project_id)
+        if points_index is None:
+            return []
+        return points_index.metrics_for(tags, metadata, self.state.snapshots[project_id].headers())
 
     async def get_metrics(self, project_id: ProjectID, tags: List[str], metadata: Dict[str, str]) -> List[str]:
-        metrics = []
-        for snapshot_id, snapshot in self.state.snapshots[project_id].items():
-            if set(snapshot.tags) >= set(tags) and snapshot.metadata.items() >= metadata.items():
-                metrics.extend(
-                    [x.metric_value_location.metric.params["type"] for x in snapshot.metric_results.values()]
-                )
-        return list(set(metrics))
+        return list({params["type"] for params in self._metric_params(project_id, tags, metadata)})
 
     async def get_metric_labels(
         self,
@@ -353,11 +886,9 @@ class InMemoryDataStorage(DataStorage):
         metric: str,
     ) -> List[str]:
         labels = []
-        for snapshot_id, snapshot in self.state.snapshots[project_id].items():
-            if set(snapshot.tags) >= set(tags) and snapshot.metadata.items() >= metadata.items():
-                for x in snapshot.metric_results.values():
-                    if x.metric_value_location.metric.params["type"] == metric:
-                        labels.extend(list(x.metric_value_location.metric.params.keys()))
+        for params in self._metric_params(project_id, tags, metadata):
+            if params["type"] == metric:
+                labels.extend(list(params.keys()))
         return list(set(x for x in labels if x not in ["type"]))
 
     async def get_metric_label_values(
@@ -369,11 +900,9 @@ class InMemoryDataStorage(DataStorage):
         label: str,
     ) -> List[str]:
         values = []
-        for snapshot_id, snapshot in self.state.snapshots[project_id].items():
-            if set(snapshot.tags) >= set(tags) and snapshot.metadata.items() >= metadata.items():
-                for x in snapshot.metric_results.values():
-                    if x.metric_value_location.metric.params["type"] == metric:
-                        values.append(x.metric_value_location.metric.params.get(label))
+        for params in self._metric_params(project_id, tags, metadata):
+            if params["type"] == metric:
+                values.append(params.get(label))
         return list(set(x for x in values if x and x not in ["type"]))
 
     async def get_data_series(
@@ -383,94 +912,123 @@ class InMemoryDataStorage(DataStorage):
         start_time: Optional[datetime.datetime],
         end_time: Optional[datetime.datetime],
     ) -> SeriesResponse:
-        matching_snapshots = []
-        sources = []
-        series = {}
-        for snapshot_id, snapshot in self.state.snapshots[project_id].items():
-            if start_time is not None and snapshot.timestamp < start_time:
-                continue
-            if end_time is not None and snapshot.timestamp > end_time:
+        snapshots = self.state.snapshots[project_id].headers()
+        points_index = self._project_index(project_id)
+        points: List[Tuple[SnapshotKey, int, str, SeriesPoints, float]] = []
+        filter_snapshots: Dict[int, Optional[Set[int]]] = {}
+        for candidate_series_id in points_index.series_for(series_filter) if points_index is not None else []:
+            series_points = points_index.series[candidate_series_id]  # type: ignore[union-attr]
+            filter_position = series_filter_position(series_filter, series_points.metric_type, series_points.params)
+            if filter_position is None:
                 continue
-            for filter_item in series_filter:
-                if (
-                    set(snapshot.tags) >= set(filter_item.tags)
-                    and snapshot.metadata.items() >= filter_item.metadata.items()
-                ):
-                    matching_snapshots.append((snapshot_id, snapshot.timestamp, snapshot))
-        matching_snapshots = sorted(matching_snapshots, key=lambda x: (x[1], x[0]))
-        matching_snapshots_map = {snapshot_id: snapshot for snapshot_id, timestamp, snapshot in matching_snapshots}
-
-        last_snapshot = None
-        series_filters_map: Dict[tuple, int] = {}
-        index = 0
-        for snapshot_id, timestamp, snapshot in matching_snapshots:
-            for item in self._metrics_points.get(project_id, {}).get(snapshot_id, []):
-                metric_type = item.metric_type
-                params = item.params
-                snapshot_tags = matching_snapshots_map[snapshot_id].tags
-                snapshot_metadata = matching_snapshots_map[snapshot_id].metadata
-                value = item.value
-
-                filter = next(
-                    (
-                        f
-                        for f in series_filter
-                        if f.metric in ("*", metric_type) and params.items() >= f.metric_labels.items()
-                    ),
-                    None,
+            if filter_position not in filter_snapshots:
+                matching_ids = points_index.matching_snapshots(  # type: ignore[union-attr]
+                    series_filter[filter_position].tags, series_filter[filter_position].metadata, snapshots
                 )
+                filter_snapshots[filter_position] = (
+                    None
+                    if matching_ids is None
+                    else {points_index.snapshot_refs[snapshot_id] for snapshot_id in matching_ids}  # type: ignore[union-attr]
+                )
+            matching = filter_snapshots[filter_position]
+            start, end = series_points.range(start_time, end_time, points_index.snapshot_timestamps)  # type: ignore[union-attr]
+            points.extend(
+                (
+                    points_index.snapshot_key(series_points.snapshots[position]),  # type: ignore[union-attr]
+                    series_points.seqs[position],
+                    candidate_series_id,
+                    series_points,
+                    series_points.values[position],
+                )
+                for position in range(start, end)
+                if matching is None or series_points.snapshots[position] in matching
+            )
+        points.sort(key=lambda x: (x[0], x[1]))
+        return build_series_response(
+            (
+                (timestamp, snapshot_id, series_id, series_points.metric_type, series_points.params, value)
+                for (timestamp, snapshot_id), _, series_id, series_points, value in points
+            ),
+            snapshots,
+            series_filter,
+        )
+
 
-                if filter is None or not (
-                    set(snapshot_tags) >= set(filter.tags) and snapshot_metadata.items() >= filter.metadata.items()
-                ):
-                    continue
-
-                if last_snapshot is None:
-                    last_snapshot = snapshot_id
-                    sources.append(
-                        SeriesSource(
-                            snapshot_id=snapshot_id, timestamp=timestamp, tags=snapshot_tags, metadata=snapshot_metadata
-                        )
-                    )
-                if last_snapshot != snapshot_id:
-                    last_snapshot = snapshot_id
-                    sources.append(
-                        SeriesSource(
-                            snapshot_id=snapshot_id, timestamp=timestamp, tags=snapshot_tags, metadata=snapshot_metadata
-                        )
-                    )
-                    index += 1
-                series_id = metric_type + ":" + ",".join([f"{k}={v}" for k, v in params.items()])
-                key = (
-                    metric_type,
-                    frozenset(params.items()),
-                    frozenset(snapshot_tags),
-                    frozenset(snapshot_metadata.items()),
+def series_filter_position(
+    series_filter: List[SeriesFilter], metric_type: str, params: Dict[str, str]
+) -> Optional[int]:
+    """Position of the first filter a series may match by metric type and labels (tags and metadata not checked)."""
+    return next(
+        (
+            position
+            for position, f in enumerate(series_filter)
+            if f.metric in ("*", metric_type) and params.items() >= f.metric_labels.items()
+        ),
+        None,
+    )
+
+
+def build_series_response(
+    points: Iterable[Tuple[datetime.datetime, SnapshotID, str, str, Dict[str, str], float]],
+    snapshots: Mapping[SnapshotID, SnapshotHeader],
+    series_filter: List[SeriesFilter],
+) -> SeriesResponse:
+    """
+    Build series response from points ordered by timestamp, snapshot id and insertion order.
+
+    Each point is (timestamp, snapshot id, series id, metric type, params, value).
+    """
+    sources = []
+    series: Dict[str, Series] = {}
+    last_snapshot = None
+    series_filters_map: Dict[tuple, int] = {}
+    index = 0
+    for timestamp, snapshot_id, series_id, metric_type, params, value in points:
+        snapshot_tags = snapshots[snapshot_id].tags
+        snapshot_metadata = snapshots[snapshot_id].metadata
+        if last_snapshot is None:
+            last_snapshot = snapshot_id
+            sources.append(
+                SeriesSource(
+                    snapshot_id=snapshot_id, timestamp=timestamp, tags=snapshot_tags, metadata=snapshot_metadata
+                )
+            )
+        if last_snapshot != snapshot_id:
+            last_snapshot = snapshot_id
+            sources.append(
+                SeriesSource(
+                    snapshot_id=snapshot_id, timestamp=timestamp, tags=snapshot_tags, metadata=snapshot_metadata
                 )
-                filter_index = series_filters_map.get(key)
-                if filter_index is None:
-                    filter_index = _find_filter_index(
-                        series_filter, metric_type, params, snapshot_tags, snapshot_metadata
-                    )
-                    if filter_index is not None:
-                        series_filters_map[key] = filter_index
-
-                if filter_index is None and len(series_filter) > 0:
-                    raise ValueError("No filters found for series ({})")
-
-                if series_id not in series:
-                    series[series_id] = Series(
-                        metric_type=metric_type,
-                        filter_index=filter_index or 0,
-                        params={k: v for k, v in params.items() if v and v != "None"},
-                        values=([None] * index) + [value],
-                    )
-                else:
-                    if len(series[series_id].values) < (index + 1):
-                        series[series_id].values.extend([None] * (index - len(series[series_id].values) + 1))
-                    series[series_id].values[index] = value
-
-        return SeriesResponse(sources=sources, series=list(series.values()))
+            )
+            index += 1
+        key = (
+            metric_type,
+            frozenset(params.items()),
+            frozenset(snapshot_tags),
+            frozenset(snapshot_metadata.items()),
+        )
+        filter_index = series_filters_map.get(key)
+        if filter_index is None:
+            filter_index = _find_filter_index(series_filter, metric_type, params, snapshot_tags, snapshot_metadata)
+            if filter_index is not None:
+                series_filters_map[key] = filter_index
+
+        if filter_index is None and len(series_filter) > 0:
+            raise ValueError("No filters found for series ({})")
+
+        if series_id not in series:
+            series[series_id] = Series(
+                metric_type=metric_type,
+                filter_index=filter_index or 0,
+                params={k: v for k, v in params.items() if v and v != "None"},
+                values=([None] * index) + [value],
+            )
+        else:
+            if len(series[series_id].values) < (index + 1):
+                series[series_id].values.extend([None] * (index - len(series[series_id].values) + 1))
+            series[series_id].values[index] = value
+
+    return SeriesResponse(sources=sources, series=list(series.values()))
 
 
 def _find_filter_index(
@@ -489,3 +1047,7 @@ def _find_filter_index(
         ):
             return idx
     return None
+
+
+def _series_id(metric_type: str, params: Dict[str, str]) -> str:
+    return metric_type + ":" + ",".join([f"{k}={v}" for k, v in params.items()])
@@ -14,6 +14,7 @@ from servequery.ui.service.storage.common import NO_USER
 from servequery.ui.service.storage.local.base import METADATA_PATH
 from servequery.ui.service.storage.local.base import SNAPSHOTS
 from servequery.ui.service.storage.local.base import LocalState
+from servequery.ui.service.storage.local.base import ProjectSnapshots
 from servequery.ui.service.storage.local.base import load_project
 
 uuid4hex = "[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
@@ -78,6 +79,10 @@ class WorkspaceDirHandler(FileSystemEventHandler):
             return None, None
         return path.parent.parent.name, snapshot_id
 
+    def invalidate_snapshots(self, project_id, snapshot_id=None):
+        if self.state.project_manager is not None:
+            self.state.project_manager.snapshot_cache.invalidate(project_id, snapshot_id)
+
     def on_project_event(self, event: FileSystemEvent):
         project_id = self.parse_project_id(event.src_path)
         if project_id is None:
@@ -88,7 +93,7 @@ class WorkspaceDirHandler(FileSystemEventHandler):
                 return
             self.state.projects[project.id] = project.bind(self.state.project_manager, NO_USER.id)
             if project.id not in self.state.snapshots:
-                self.state.snapshots[project.id] = {}
+                self.state.snapshots[project.id] = ProjectSnapshots(self.state.location, project.id)
                 self.state.snapshot_data[project.id] = {}
         if event.event_type in (EVENT_TYPE_MODIFIED,):
             project = load_project(self.state.location, project_id)
@@ -97,6 +102,7 @@ class WorkspaceDirHandler(FileSystemEventHandler):
             self.state.projects[project.id] = project.bind(self.state.project_manager, NO_USER.id)
         if event.event_type == EVENT_TYPE_DELETED:
             pid = uuid6.UUID(project_id)
+            self.invalidate_snapshots(pid)
             del self.state.projects[pid]
             del self.state.snapshots[pid]
             del self.state.snapshot_data[pid]
@@ -107,6 +113,7 @@ class WorkspaceDirHandler(FileSystemEventHandler):
             return
         pid = uuid6.UUID(project_id)
         sid = uuid6.UUID(snapshot_id)
+        self.invalidate_snapshots(pid, sid)
         project = self.state.projects.get(pid)
         if project is None:
             return
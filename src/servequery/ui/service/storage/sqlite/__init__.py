@@ -0,0 +1,47 @@
+from fsspec.implementations.local import LocalFileSystem
+
+from ...managers.auth import AuthManager
+from ...managers.projects import ProjectManager
+from ...services.dashbord.file import JsonFileDashboardManager
+from ..common import NoopAuthManager
+from ..local import FSSpecBlobStorage
+from .base import SQLITE_PATH
+from .base import SQLiteDatabase
+from .base import SQLiteDataStorage
+from .base import SQLiteProjectMetadataStorage
+
+
+def start_sqlite_workspace_watchdog(path: str, metadata: SQLiteProjectMetadataStorage):
+    from watchdog.observers import Observer
+
+    from servequery.ui.service.storage.sqlite.watcher import SQLiteWorkspaceDirHandler
+
+    observer = Observer()
+    observer.schedule(SQLiteWorkspaceDirHandler(metadata), path, recursive=True)
+    observer.start()
+    print(f"Observer for '{path}' started")
+
+
+def create_sqlite_project_manager(path: str, autorefresh: bool = False, auth: AuthManager = None) -> ProjectManager:
+    metadata = SQLiteProjectMetadataStorage(path=path)
+    data = SQLiteDataStorage(path=path, database=metadata.database)
+    project_manager = ProjectManager(
+        project_metadata=metadata,
+        blob_storage=FSSpecBlobStorage(base_path=path),
+        data_storage=data,
+        auth_manager=auth or NoopAuthManager(),
+        dashboard_manager=JsonFileDashboardManager(path=path),
+    )
+    if autorefresh and isinstance(metadata.location.fs, LocalFileSystem):
+        start_sqlite_workspace_watchdog(path, metadata)
+    return project_manager
+
+
+__all__ = [
+    "SQLITE_PATH",
+    "SQLiteDatabase",
+    "SQLiteDataStorage",
+    "SQLiteProjectMetadataStorage",
+    "create_sqlite_project_manager",
+    "start_sqlite_workspace_watchdog",
+]
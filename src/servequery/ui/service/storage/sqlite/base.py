@@ -0,0 +1,549 @@
+import contextlib
+import datetime
+import json
+import os
+import posixpath
+import sqlite3
+import threading
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import uuid6
+
+from servequery._pydantic_compat import parse_obj_as
+from servequery.core.serialization import SnapshotModel
+from servequery.legacy.suite.base_suite import SnapshotLinks
+from servequery.legacy.utils import NumpyEncoder
+from servequery.sdk.models import SnapshotMetadataModel
+from servequery.ui.service.base import DataStorage
+from servequery.ui.service.base import Project
+from servequery.ui.service.base import ProjectMetadataStorage
+from servequery.ui.service.base import SeriesFilter
+from servequery.ui.service.base import SeriesResponse
+from servequery.ui.service.base import User
+from servequery.ui.service.errors import ProjectNotFound
+from servequery.ui.service.errors import SnapshotNotFound
+from servequery.ui.service.storage.common import NO_USER
+from servequery.ui.service.storage.fslocation import FSLocation
+from servequery.ui.service.storage.local.base import METADATA_PATH
+from servequery.ui.service.storage.local.base import SNAPSHOTS
+from servequery.ui.service.storage.local.base import UUID_REGEX
+from servequery.ui.service.storage.local.base import SnapshotHeader
+from servequery.ui.service.storage.local.base import build_series_response
+from servequery.ui.service.storage.local.base import load_project
+from servequery.ui.service.storage.local.base import series_filter_position
+from servequery.ui.service.storage.local.base import snapshot_points
+from servequery.ui.service.type_aliases import OrgID
+from servequery.ui.service.type_aliases import ProjectID
+from servequery.ui.service.type_aliases import SnapshotID
+
+SQLITE_PATH = "servequery.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS projects_name ON projects (name);
+CREATE TABLE IF NOT EXISTS snapshots (
+    project_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    PRIMARY KEY (project_id, id)
+);
+CREATE INDEX IF NOT EXISTS snapshots_timestamp ON snapshots (project_id, timestamp);
+CREATE TABLE IF NOT EXISTS snapshot_tags (
+    project_id TEXT NOT NULL,
+    snapshot_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (project_id, tag, snapshot_id)
+);
+CREATE INDEX IF NOT EXISTS snapshot_tags_snapshot ON snapshot_tags (project_id, snapshot_id);
+CREATE TABLE IF NOT EXISTS snapshot_metadata (
+    project_id TEXT NOT NULL,
+    snapshot_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value,
+    PRIMARY KEY (project_id, key, value, snapshot_id)
+);
+CREATE INDEX IF NOT EXISTS snapshot_metadata_snapshot ON snapshot_metadata (project_id, snapshot_id);
+CREATE TABLE IF NOT EXISTS metrics (
+    project_id TEXT NOT NULL,
+    snapshot_id TEXT NOT NULL,
+    metric_type TEXT NOT NULL,
+    params TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS metrics_type ON metrics (project_id, metric_type, snapshot_id);
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    project_id TEXT NOT NULL,
+    metric_type TEXT NOT NULL,
+    params TEXT NOT NULL,
+    UNIQUE (project_id, metric_type, params)
+);
+CREATE TABLE IF NOT EXISTS points (
+    series_id INTEGER NOT NULL,
+    snapshot_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS points_series_timestamp ON points (series_id, timestamp);
+CREATE INDEX IF NOT EXISTS points_snapshot ON points (snapshot_id);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+WORKSPACE_IMPORTED = "workspace_imported"
+# tags and metadata of snapshots stored before the side tables existed
+BACKFILL_SNAPSHOT_FILTERS = """
+INSERT OR IGNORE INTO snapshot_tags (project_id, snapshot_id, tag)
+    SELECT s.project_id, s.id, t.value FROM snapshots s, json_each(s.tags) t;
+INSERT OR IGNORE INTO snapshot_metadata (project_id, snapshot_id, key, value)
+    SELECT s.project_id, s.id, m.key, m.value FROM snapshots s, json_each(s.metadata) m;
+"""
+
+
+class SQLiteDatabase:
+    """SQLite database in WAL mode shared by one storage, queries are serialized with a lock."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'snapshot_tags'"
+        has_filter_tables = bool(self._connection.execute(query).fetchall())
+        self._connection.executescript(SCHEMA)
+        if not has_filter_tables:
+            self._connection.executescript(BACKFILL_SNAPSHOT_FILTERS)
+        self._lock = threading.RLock()
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock, self._connection:
+            yield self._connection
+
+    def query(self, sql: str, parameters: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def get_setting(self, key: str) -> Optional[str]:
+        rows = self.query("SELECT value FROM settings WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def set_setting(self, key: str, value: str):
+        with self.transaction() as connection:
+            connection.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+
+
+def _timestamp_key(timestamp: datetime.datetime) -> str:
+    return timestamp.isoformat(sep=" ", timespec="microseconds")
+
+
+def _snapshot_headers(database: SQLiteDatabase, project_id: ProjectID) -> Dict[SnapshotID, SnapshotHeader]:
+    return {
+        uuid6.UUID(snapshot_id): SnapshotHeader(
+            datetime.datetime.fromisoformat(timestamp), json.loads(tags), json.loads(metadata)
+        )
+        for snapshot_id, timestamp, tags, metadata in database.query(
+            "SELECT id, timestamp, tags, metadata FROM snapshots WHERE project_id = ? ORDER BY rowid",
+            (str(project_id),),
+        )
+    }
+
+
+def _snapshot_condition(
+    project_id: ProjectID, tags: List[str], metadata: Dict[str, str], alias: str = "s"
+) -> Tuple[str, tuple]:
+    """SQL condition on snapshots table which have all given tags and metadata values, looked up by index"""
+    conditions = [
+        f"{alias}.id IN (SELECT snapshot_id FROM snapshot_tags WHERE project_id = ? AND tag = ?)" for _ in tags
+    ]
+    conditions += [
+        f"{alias}.id IN (SELECT snapshot_id FROM snapshot_metadata WHERE project_id = ? AND key = ? AND value = ?)"
+        for _ in metadata
+    ]
+    parameters = tuple(item for tag in tags for item in (str(project_id), tag))
+    parameters += tuple(item for key, value in metadata.items() for item in (str(project_id), key, value))
+    return " AND ".join(conditions) or "1", parameters
+
+
+def _delete_snapshot_filters(connection: sqlite3.Connection, project_id: ProjectID, snapshot_id: SnapshotID):
+    for table in ("snapshot_tags", "snapshot_metadata"):
+        connection.execute(
+            f"DELETE FROM {table} WHERE project_id = ? AND snapshot_id = ?", (str(project_id), str(snapshot_id))
+        )
+
+
+def insert_snapshot(
+    connection: sqlite3.Connection, project_id: ProjectID, snapshot_id: SnapshotID, snapshot: SnapshotModel
+):
+    tags = json.dumps(snapshot.tags)
+    metadata = json.dumps(snapshot.metadata, cls=NumpyEncoder)
+    connection.execute(
+        "INSERT OR REPLACE INTO snapshots (project_id, id, timestamp, tags, metadata) VALUES (?, ?, ?, ?, ?)",
+        (str(project_id), str(snapshot_id), _timestamp_key(snapshot.timestamp), tags, metadata),
+    )
+    _delete_snapshot_filters(connection, project_id, snapshot_id)
+    # values are taken with json_each, so they compare the same way as values of the stored JSON
+    connection.execute(
+        "INSERT OR IGNORE INTO snapshot_tags (project_id, snapshot_id, tag) SELECT ?, ?, value FROM json_each(?)",
+        (str(project_id), str(snapshot_id), tags),
+    )
+    connection.execute(
+        "INSERT OR IGNORE INTO snapshot_metadata (project_id, snapshot_id, key, value)"
+        " SELECT ?, ?, key, value FROM json_each(?)",
+        (str(project_id), str(snapshot_id), metadata),
+    )
+
+
+def insert_snapshot_points(
+    connection: sqlite3.Connection, project_id: ProjectID, snapshot_id: SnapshotID, snapshot: SnapshotModel
+):
+    connection.executemany(
+        "INSERT INTO metrics (project_id, snapshot_id, metric_type, params) VALUES (?, ?, ?, ?)",
+        [
+            (
+                str(project_id),
+                str(snapshot_id),
+                result.metric_value_location.metric.params["type"],
+                json.dumps(result.metric_value_location.metric.params, cls=NumpyEncoder),
+            )
+            for result in snapshot.metric_results.values()
+        ],
+    )
+    points = [(metric_type, json.dumps(params), value) for metric_type, params, value in snapshot_points(snapshot)]
+    keys = list(dict.fromkeys((metric_type, params_json) for metric_type, params_json, _ in points))
+    connection.executemany(
+        "INSERT OR IGNORE INTO series (project_id, metric_type, params) VALUES (?, ?, ?)",
+        [(str(project_id), metric_type, params_json) for metric_type, params_json in keys],
+    )
+    metric_types = list(dict.fromkeys(metric_type for metric_type, _ in keys))
+    series_ids = {
+        (metric_type, params_json): series_id
+        for series_id, metric_type, params_json in connection.execute(
+            "SELECT id, metric_type, params FROM series WHERE project_id = ?"
+            " AND metric_type IN (SELECT value FROM json_each(?))",
+            (str(project_id), json.dumps(metric_types)),
+        )
+    }
+    timestamp = _timestamp_key(snapshot.timestamp)
+    connection.executemany(
+        "INSERT INTO points (series_id, snapshot_id, timestamp, value) VALUES (?, ?, ?, ?)",
+        [
+            (series_ids[(metric_type, params_json)], str(snapshot_id), timestamp, value)
+            for metric_type, params_json, value in points
+        ],
+    )
+
+
+def import_workspace_snapshots(database: SQLiteDatabase, location: FSLocation, project_id: ProjectID):
+    """Add snapshots of a workspace project directory which are not in the database yet."""
+    query = "SELECT id FROM snapshots WHERE project_id = ?"
+    known = {snapshot_id for (snapshot_id,) in database.query(query, (str(project_id),))}
+    for file in location.listdir(posixpath.join(str(project_id), SNAPSHOTS)):
+        filename = posixpath.basename(file)
+        if not filename.endswith(".json"):
+            continue
+        sid_str = filename[: -len(".json")]
+        if not UUID_REGEX.match(sid_str) or sid_str in known:
+            continue
+        snapshot_id = uuid6.UUID(sid_str)
+        with location.open(posixpath.join(str(project_id), SNAPSHOTS, filename)) as f:
+            snapshot = parse_obj_as(SnapshotModel, json.load(f))
+        with database.transaction() as connection:
+            insert_snapshot(connection, project_id, snapshot_id, snapshot)
+            insert_snapshot_points(connection, project_id, snapshot_id, snapshot)
+
+
+class SQLiteProjectMetadataStorage(ProjectMetadataStorage):
+    """
+    Projects and snapshot headers in a SQLite database in the workspace.
+
+    Snapshots are still written to the workspace directory by blob storage. Projects and snapshots
+    of an existing JSON workspace are imported when the database is created, project directories and
+    snapshot files written to the workspace later are imported on start, on snapshots reload and,
+    with autorefresh, when they are written (see `start_sqlite_workspace_watchdog`).
+    """
+
+    def __init__(self, path: str, database: Optional[SQLiteDatabase] = None):
+        self.path = path
+        self.location = FSLocation(path)
+        self.location.makedirs("")
+        self.database = database or SQLiteDatabase(os.path.join(path, SQLITE_PATH))
+        imported = self.database.get_setting(WORKSPACE_IMPORTED) is not None
+        # import is idempotent, so it is retried until it completes once
+        self.import_workspace(reload_projects=not imported)
+        if not imported:
+            self.database.set_setting(WORKSPACE_IMPORTED, datetime.datetime.now().isoformat())
+
+    def import_workspace(self, reload_projects: bool = False):
+        """Import project directories and snapshot files of the workspace which are not in the database yet.
+
+        Metadata of projects already in the database is read again only with `reload_projects`.
+        """
+        known = {project_id for (project_id,) in self.database.query("SELECT id FROM projects")}
+        for path in self.location.listdir(""):
+            if not self.location.isdir(path):
+                continue
+            if reload_projects or path not in known:
+                self.import_project(path)
+            else:
+                import_workspace_snapshots(self.database, self.location, uuid6.UUID(path))
+
+    def import_project(self, path: str):
+        """Import project directory of the workspace with its snapshots not in the database yet."""
+        project = load_project(self.location, path)
+        if project is None:
+            return
+        self._write_project(project)
+        import_workspace_snapshots(self.database, self.location, project.id)
+
+    def import_snapshots(self, path: str):
+        """Import snapshot files of a workspace project directory, the project is imported if it is new."""
+        if not self.database.query("SELECT 1 FROM projects WHERE id = ?", (path,)):
+            self.import_project(path)
+            return
+        import_workspace_snapshots(self.database, self.location, uuid6.UUID(path))
+
+    def _write_project(self, project: Project):
+        with self.database.transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO projects (id, name, data) VALUES (?, ?, ?)",
+                (str(project.id), project.name, project.json()),
+            )
+
+    async def add_project(self, project: Project, user: User, org_id: Optional[OrgID] = None) -> Project:
+        project_id = str(project.id)
+        project.org_id = org_id
+        self.location.makedirs(posixpath.join(project_id, SNAPSHOTS))
+        with self.location.open(posixpath.join(project_id, METADATA_PATH), "w") as f:
+            json.dump(project.dict(), f, indent=2, cls=NumpyEncoder)
+        self._write_project(project)
+        return project
+
+    async def update_project(self, project: Project) -> Project:
+        return await self.add_project(project, NO_USER, org_id=None)
+
+    async def get_project(self, project_id: ProjectID) -> Optional[Project]:
+        rows = self.database.query("SELECT data FROM projects WHERE id = ?", (str(project_id),))
+        if not rows:
+            return None
+        return parse_obj_as(Project, json.loads(rows[0][0]))
+
+    async def delete_project(self, project_id: ProjectID):
+        with self.database.transaction() as connection:
+            connection.execute("DELETE FROM projects WHERE id = ?", (str(project_id),))
+            connection.execute("DELETE FROM snapshots WHERE project_id = ?", (str(project_id),))
+            connection.execute("DELETE FROM snapshot_tags WHERE project_id = ?", (str(project_id),))
+            connection.execute("DELETE FROM snapshot_metadata WHERE project_id = ?", (str(project_id),))
+            connection.execute("DELETE FROM metrics WHERE project_id = ?", (str(project_id),))
+            connection.execute(
+                "DELETE FROM points WHERE series_id IN (SELECT id FROM series WHERE project_id = ?)", (str(project_id),)
+            )
+            connection.execute("DELETE FROM series WHERE project_id = ?", (str(project_id),))
+        path = str(project_id)
+        if self.location.exists(path):
+            self.location.rmtree(path)
+
+    async def list_projects(self, project_ids: Optional[Set[ProjectID]]) -> List[Project]:
+        projects = [
+            parse_obj_as(Project, json.loads(data)) for (data,) in self.database.query("SELECT data FROM projects")
+        ]
+        projects = [p for p in projects if project_ids is None or p.id in project_ids]
+        default_date = datetime.datetime.fromisoformat("1900-01-01T00:00:00")
+        projects.sort(key=lambda x: x.created_at or default_date, reverse=True)
+        return projects
+
+    async def add_snapshot(self, project_id: ProjectID, snapshot: SnapshotModel) -> SnapshotID:
+        project = await self.get_project(project_id)
+        if project is None:
+            raise ProjectNotFound()
+        snapshot_id = uuid6.uuid7()
+        with self.database.transaction() as connection:
+            insert_snapshot(connection, project_id, snapshot_id, snapshot)
+        return snapshot_id
+
+    async def delete_snapshot(self, project_id: ProjectID, snapshot_id: SnapshotID):
+        with self.database.transaction() as connection:
+            connection.execute(
+                "DELETE FROM snapshots WHERE project_id = ? AND id = ?", (str(project_id), str(snapshot_id))
+            )
+            _delete_snapshot_filters(connection, project_id, snapshot_id)
+            connection.execute(
+                "DELETE FROM metrics WHERE project_id = ? AND snapshot_id = ?", (str(project_id), str(snapshot_id))
+            )
+            connection.execute(
+                "DELETE FROM points WHERE snapshot_id = ? AND series_id IN (SELECT id FROM series WHERE project_id = ?)",
+                (str(snapshot_id), str(project_id)),
+            )
+        path = posixpath.join(str(project_id), SNAPSHOTS, f"{snapshot_id}.json")
+        if self.location.exists(path):
+            self.location.rmtree(path)
+
+    async def search_project(self, project_name: str, project_ids: Optional[Set[ProjectID]]) -> List[Project]:
+        projects = [
+            parse_obj_as(Project, json.loads(data))
+            for (data,) in self.database.query("SELECT data FROM projects WHERE name = ?", (project_name,))
+        ]
+        return [p for p in projects if project_ids is None or p.id in project_ids]
+
+    async def list_snapshots(
+        self, project_id: ProjectID, include_reports: bool = True, include_test_suites: bool = True
+    ) -> List[SnapshotMetadataModel]:
+        return [
+            SnapshotMetadataModel(
+                id=snapshot_id,
+                metadata=header.metadata,
+                tags=header.tags,
+                timestamp=header.timestamp,
+                links=SnapshotLinks(),
+            )
+            for snapshot_id, header in _snapshot_headers(self.database, project_id).items()
+        ]
+
+    async def get_snapshot_metadata(self, project_id: ProjectID, snapshot_id: SnapshotID) -> SnapshotMetadataModel:
+        rows = self.database.query(
+            "SELECT timestamp, tags, metadata FROM snapshots WHERE project_id = ? AND id = ?",
+            (str(project_id), str(snapshot_id)),
+        )
+        if not rows:
+            raise SnapshotNotFound()
+        ((timestamp, tags, metadata),) = rows
+        return SnapshotMetadataModel(
+            id=snapshot_id,
+            metadata=json.loads(metadata),
+            tags=json.loads(tags),
+            timestamp=datetime.datetime.fromisoformat(timestamp),
+            links=SnapshotLinks(),
+        )
+
+    async def reload_snapshots(self, project_id: ProjectID):
+        # projects written to the workspace directory since the last import are found as well
+        self.import_workspace()
+
+
+class SQLiteDataStorage(DataStorage):
+    """Metric points in a SQLite database, series are indexed by project, metric type and labels."""
+
+    def __init__(self, path: str, database: Optional[SQLiteDatabase] = None):
+        self.path = path
+        self.database = database or SQLiteDatabase(os.path.join(path, SQLITE_PATH))
+
+    async def add_snapshot_points(self, project_id: ProjectID, snapshot_id: SnapshotID, snapshot: SnapshotModel):
+        with self.database.transaction() as connection:
+            insert_snapshot_points(connection, project_id, snapshot_id, snapshot)
+
+    def _metric_rows(
+        self,
+        select: str,
+        project_id: ProjectID,
+        tags: List[str],
+        metadata: Dict[str, str],
+        metric: Optional[str] = None,
+        label: Optional[str] = None,
+    ) -> List[tuple]:
+        """Distinct rows of `select` over metrics of matching snapshots, `p` is a label of metric params"""
+        condition, condition_parameters = _snapshot_condition(project_id, tags, metadata)
+        query = f"SELECT DISTINCT {select} FROM metrics m JOIN snapshots s ON s.project_id = m.project_id"
+        query += " AND s.id = m.snapshot_id"
+        if "p." in select or label is not None:
+            query += ", json_each(m.params) p"
+        query += f" WHERE m.project_id = ? AND {condition}"
+        parameters = (str(project_id),) + condition_parameters
+        if metric is not None:
+            query += " AND m.metric_type = ?"
+            parameters += (metric,)
+        if label is not None:
+            query += " AND p.key = ?"
+            parameters += (label,)
+        return self.database.query(query, parameters)
+
+    async def get_metrics(self, project_id: ProjectID, tags: List[str], metadata: Dict[str, str]) -> List[str]:
+        return [metric_type for (metric_type,) in self._metric_rows("m.metric_type", project_id, tags, metadata)]
+
+    async def get_metric_labels(
+        self,
+        project_id: ProjectID,
+        tags: List[str],
+        metadata: Dict[str, str],
+        metric: str,
+    ) -> List[str]:
+        labels = [label for (label,) in self._metric_rows("p.key", project_id, tags, metadata, metric)]
+        return [x for x in labels if x not in ["type"]]
+
+    async def get_metric_label_values(
+        self,
+        project_id: ProjectID,
+        tags: List[str],
+        metadata: Dict[str, str],
+        metric: str,
+        label: str,
+    ) -> List[str]:
+        values = [value for (value,) in self._metric_rows("p.value", project_id, tags, metadata, metric, label)]
+        return [x for x in values if x and x not in ["type"]]
+
+    async def get_data_series(
+        self,
+        project_id: ProjectID,
+        series_filter: List[SeriesFilter],
+        start_time: Optional[datetime.datetime],
+        end_time: Optional[datetime.datetime],
+    ) -> SeriesResponse:
+        query = "SELECT id, metric_type, params FROM series WHERE project_id = ?"
+        parameters: tuple = (str(project_id),)
+        if not any(f.metric == "*" for f in series_filter):
+            metric_types = list(dict.fromkeys(f.metric for f in series_filter))
+            query += f" AND metric_type IN ({', '.join('?' * len(metric_types))})"
+            parameters += tuple(metric_types)
+        series: Dict[int, Tuple[str, Dict[str, str]]] = {}
+        filter_series: Dict[int, List[int]] = {}
+        for series_id, metric_type, params_json in self.database.query(query, parameters):
+            params = json.loads(params_json)
+            filter_position = series_filter_position(series_filter, metric_type, params)
+            if filter_position is None:
+                continue
+            series[series_id] = (metric_type, params)
+            filter_series.setdefault(filter_position, []).append(series_id)
+        headers: Dict[SnapshotID, SnapshotHeader] = {}
+        if not series:
+            return build_series_response([], headers, series_filter)
+
+        # points of each series are taken from snapshots matching tags and metadata of its filter
+        conditions = []
+        parameters = (str(project_id),)
+        for position, series_ids in filter_series.items():
+            f = series_filter[position]
+            condition, condition_parameters = _snapshot_condition(project_id, f.tags, f.metadata)
+            conditions.append(f"(p.series_id IN (SELECT value FROM json_each(?)) AND {condition})")
+            parameters += (json.dumps(series_ids),) + condition_parameters
+        query = (
+            "SELECT p.series_id, p.snapshot_id, p.value, s.timestamp, s.tags, s.metadata FROM points p"
+            " JOIN snapshots s ON s.project_id = ? AND s.id = p.snapshot_id"
+            f" WHERE ({' OR '.join(conditions)})"
+        )
+        if start_time is not None:
+            query += " AND p.timestamp >= ?"
+            parameters += (_timestamp_key(start_time),)
+        if end_time is not None:
+            query += " AND p.timestamp <= ?"
+            parameters += (_timestamp_key(end_time),)
+        query += " ORDER BY p.timestamp, p.snapshot_id, p.rowid"
+        points = []
+        for series_id, snapshot_id, value, timestamp, tags, metadata in self.database.query(query, parameters):
+            snapshot_id = uuid6.UUID(snapshot_id)
+            if snapshot_id not in headers:
+                headers[snapshot_id] = SnapshotHeader(
+                    datetime.datetime.fromisoformat(timestamp), json.loads(tags), json.loads(metadata)
+                )
+            metric_type, params = series[series_id]
+            points.append((headers[snapshot_id].timestamp, snapshot_id, str(series_id), metric_type, params, value))
+        return build_series_response(points, headers, series_filter)
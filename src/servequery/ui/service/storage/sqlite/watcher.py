@@ -0,0 +1,48 @@
+import re
+from pathlib import Path
+from typing import Optional
+
+from watchdog.events import EVENT_TYPE_CREATED
+from watchdog.events import EVENT_TYPE_MODIFIED
+from watchdog.events import EVENT_TYPE_MOVED
+from watchdog.events import FileSystemEvent
+from watchdog.events import FileSystemEventHandler
+
+from servequery.ui.service.storage.local.base import METADATA_PATH
+from servequery.ui.service.storage.local.base import SNAPSHOTS
+from servequery.ui.service.storage.local.watcher import uuid4hex
+from servequery.ui.service.storage.sqlite.base import SQLiteProjectMetadataStorage
+
+
+class SQLiteWorkspaceDirHandler(FileSystemEventHandler):
+    """Imports project directories and snapshot files written to the workspace into the SQLite database.
+
+    Snapshots already in the database are not imported again, so snapshots added through the storage
+    are not duplicated.
+    """
+
+    def __init__(self, metadata: SQLiteProjectMetadataStorage):
+        self.metadata = metadata
+        self.path = Path(metadata.location.path)
+
+    def dispatch(self, event: FileSystemEvent):
+        if event.event_type not in (EVENT_TYPE_CREATED, EVENT_TYPE_MODIFIED, EVENT_TYPE_MOVED):
+            return
+        path = Path(event.dest_path if event.event_type == EVENT_TYPE_MOVED else event.src_path)
+        try:
+            if path.name == METADATA_PATH:
+                project_id = self.parse_project_id(path.parent)
+                if project_id is not None:
+                    self.metadata.import_project(project_id)
+            elif re.fullmatch(uuid4hex + r"\.json", path.name) and path.parent.name == SNAPSHOTS:
+                project_id = self.parse_project_id(path.parent.parent)
+                if project_id is not None:
+                    self.metadata.import_snapshots(project_id)
+        except (OSError, ValueError):
+            # partially written files are not valid JSON yet, they are imported on one of the next events
+            pass
+
+    def parse_project_id(self, project_dir: Path) -> Optional[str]:
+        if not re.fullmatch(uuid4hex, project_dir.name) or not project_dir.parent.samefile(self.path):
+            return None
+        return project_dir.name
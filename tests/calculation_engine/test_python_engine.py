@@ -6,10 +6,17 @@ from servequery.legacy.base_metric import Metric
 from servequery.legacy.calculation_engine.engine import metric_implementation
 from servequery.legacy.calculation_engine.python_engine import PythonEngine
 from servequery.legacy.calculation_engine.python_engine import PythonMetricImplementation
+from servequery.legacy.calculation_engine.python_engine import _generate_chunk_features
+from servequery.legacy.features import _text_processing
+from servequery.legacy.features.text_length_feature import TextLength
+from servequery.legacy.features.word_count_feature import WordCount
+from servequery.legacy.options.agg_data import DescriptorExecutionOptions
+from servequery.legacy.options.base import Options
 from servequery.legacy.pipeline.column_mapping import ColumnMapping
 from servequery.legacy.renderers.base_renderer import DEFAULT_RENDERERS
 from servequery.legacy.suite.base_suite import Context
 from servequery.legacy.suite.base_suite import States
+from servequery.legacy.utils.data_preprocessing import create_data_definition
 
 
 class OldTypeSimpleMetric(Metric[int]):
@@ -70,3 +77,40 @@ def test_python_engine2():
     ctx = Context(None, [metric], [], dict(), dict(), States.Verified, renderers=DEFAULT_RENDERERS)
     engine.execute_metrics(ctx, GenericInputData(pd.DataFrame(), pd.DataFrame(), ColumnMapping(), None, {}))
     assert ctx.metric_results[metric] == 25
+
+
+def test_python_engine_features_in_processes():
+    current = pd.DataFrame({"text": ["a b", "hello world", None, "x y z", "", "one"]}, index=list("abcdef"))
+    reference = pd.DataFrame({"text": ["ref text", "more"]})
+    data_definition = create_data_definition(reference, current, ColumnMapping(text_features=["text"]))
+    data = InputData(reference, current, None, None, ColumnMapping(text_features=["text"]), data_definition, {})
+    features = [TextLength(column_name="text"), WordCount(column_name="text")]
+    engine = PythonEngine()
+
+    serial = engine.calculate_additional_features(data, features, Options())
+    parallel = engine.calculate_additional_features(
+        data, features, Options.from_any_options([DescriptorExecutionOptions(processes=2, chunk_size=4)])
+    )
+
+    assert list(parallel) == features
+    for feature in features:
+        pd.testing.assert_frame_equal(parallel[feature].current, serial[feature].current)
+        pd.testing.assert_frame_equal(parallel[feature].reference, serial[feature].reference)
+
+
+def test_chunk_features_share_text_columns(monkeypatch):
+    data = pd.DataFrame({"text": ["a b", "hello world", None]})
+    data_definition = create_data_definition(None, data, ColumnMapping(text_features=["text"]))
+    processed = []
+
+    class CountingTextColumn(_text_processing.TextColumn):
+        def __init__(self, values):
+            processed.append(values.name)
+            super().__init__(values)
+
+    monkeypatch.setattr(_text_processing, "TextColumn", CountingTextColumn)
+    _generate_chunk_features(
+        data, [TextLength(column_name="text"), WordCount(column_name="text")], data_definition, Options()
+    )
+
+    assert processed == ["text"]
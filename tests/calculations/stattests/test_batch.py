@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from servequery.legacy.calculations import stattests
+from servequery.legacy.calculations.stattests.registry import BatchStatTestData
+from servequery.legacy.calculations.stattests.registry import get_batch_stattest_impl
+from servequery.legacy.core import ColumnType
+
+
+def _columns(reference_size: int, current_size: int):
+    rng = np.random.RandomState(0)
+    reference_nans = rng.exponential(size=reference_size)
+    reference_nans[::7] = np.nan
+    current_nans = rng.exponential(size=current_size)
+    current_nans[::11] = np.nan
+    current_nans[5] = np.inf
+    return [
+        (rng.normal(size=reference_size), rng.normal(0.1, size=current_size)),
+        (rng.randint(0, 4, reference_size).astype(float), rng.randint(0, 5, current_size).astype(float)),
+        (np.round(rng.normal(size=reference_size), 1), np.round(rng.normal(size=current_size) * 2, 1)),
+        (reference_nans, current_nans),
+        (rng.randint(0, 30, reference_size).astype(float), rng.randint(0, 25, current_size).astype(float)),
+    ]
+
+
+@pytest.mark.parametrize(
+    "stattest",
+    [
+        stattests.psi_stat_test,
+        stattests.kl_div_stat_test,
+        stattests.jensenshannon_stat_test,
+        stattests.wasserstein_stat_test,
+        stattests.ks_stat_test,
+    ],
+)
+@pytest.mark.parametrize("reference_size, current_size", [(2000, 1500), (50, 700)])
+def test_batch_stattest_matches_column_stattest(stattest, reference_size, current_size):
+    columns = _columns(reference_size, current_size)
+    data = BatchStatTestData.from_arrays(
+        np.column_stack([reference for reference, _ in columns]),
+        np.column_stack([current for _, current in columns]),
+    )
+    thresholds = np.full(len(columns), stattest.default_threshold)
+
+    scores, drifted = get_batch_stattest_impl(stattest)(data, thresholds)
+
+    for index, (reference, current) in enumerate(columns):
+        reference_column = pd.Series(reference).replace([-np.inf, np.inf], np.nan).dropna()
+        current_column = pd.Series(current).replace([-np.inf, np.inf], np.nan).dropna()
+        score, detected = stattest.func(reference_column, current_column, ColumnType.Numerical, thresholds[index])
+        assert scores[index] == pytest.approx(score, rel=1e-9)
+        assert drifted[index] == detected
+
+
+def test_batch_stattest_data():
+    data = BatchStatTestData.from_arrays(
+        np.array([[3.0, np.nan], [1.0, 1.0], [np.inf, 1.0]]),
+        np.array([[2.0, 5.0], [2.0, np.nan]]),
+    )
+    assert data.reference_size.tolist() == [2, 2]
+    assert data.current_size.tolist() == [2, 1]
+    assert data.reference_column(0).tolist() == [1.0, 3.0]
+    assert data.reference_nunique.tolist() == [2, 1]
+    assert data.nunique.tolist() == [3, 2]
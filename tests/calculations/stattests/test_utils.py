@@ -3,9 +3,12 @@ import pandas as pd
 import pytest
 
 from servequery.legacy.calculations.stattests.tvd_stattest import _total_variation_distance
+from servequery.legacy.calculations.stattests.tvd_stattest import _total_variation_distance_counts
 from servequery.legacy.calculations.stattests.utils import generate_fisher2x2_contingency_table
+from servequery.legacy.calculations.stattests.utils import get_category_counts
 from servequery.legacy.calculations.stattests.utils import get_unique_not_nan_values_list_from_series
 from servequery.legacy.calculations.stattests.utils import permutation_test
+from servequery.legacy.calculations.stattests.utils import permutation_test_counts
 
 
 @pytest.mark.parametrize(
@@ -55,12 +58,39 @@ def test_get_unique_not_nan_values_list_from_series(current_data: pd.Series, ref
             _total_variation_distance,
             1.0,
         ),
+        (
+            pd.Series(["a", "b", np.nan, "b"] * 10),
+            pd.Series(["a", "a", np.nan, "b"] * 10),
+            0.3,
+            _total_variation_distance,
+            0.33,
+        ),
     ),
 )
 def test_permutation_test(reference, current, observed, test_statistic_func, pvalue):
     assert permutation_test(reference, current, observed, test_statistic_func) == pvalue
 
 
+def test_permutation_test_counts():
+    reference = pd.Series(["a", "b", "b", np.nan, "c"]).repeat(20)
+    current = pd.Series(["a", "a", "b", "c", np.nan]).repeat(20)
+    reference_counts, current_counts = get_category_counts(reference, current)
+    assert reference_counts.sum() == current_counts.sum() == 100
+    assert reference_counts[-1] == current_counts[-1] == 20
+
+    observed = _total_variation_distance_counts(reference_counts, current_counts)
+    assert observed == pytest.approx(_total_variation_distance(reference, current))
+    p_values = [
+        permutation_test_counts(
+            reference_counts, current_counts, observed, _total_variation_distance_counts, 1000, seed
+        )
+        for seed in (0, 0, 1)
+    ]
+    assert p_values[0] == p_values[1]
+    assert p_values[0] == pytest.approx(p_values[2], abs=0.05)
+    assert 0 < p_values[0] < 0.1
+
+
 @pytest.mark.parametrize(
     "reference_data, current_data ,expected_contingency_table",
     (
@@ -2,10 +2,14 @@ from typing import List
 from typing import Optional
 from typing import Union
 
+import numpy as np
 import pandas as pd
 import pytest
 
+from servequery.legacy.calculations import data_drift
 from servequery.legacy.calculations.data_drift import ensure_prediction_column_is_string
+from servequery.legacy.calculations.data_drift import get_drift_for_columns
+from servequery.legacy.calculations.data_drift import get_numerical_drift_batch
 from servequery.legacy.calculations.data_drift import get_one_column_drift
 from servequery.legacy.core import ColumnType
 from servequery.legacy.options.data_drift import DataDriftOptions
@@ -208,3 +212,72 @@ def test_get_one_column_drift_value_error(
             agg_data=False,
         )
     assert error.value.args[0] == expected_value_error
+
+
+@pytest.mark.parametrize("num_stattest", [None, "psi", "ks", "t_test"])
+def test_get_drift_for_columns_batch(num_stattest):
+    rng = np.random.RandomState(0)
+    reference_data = pd.DataFrame(rng.normal(size=(1500, 4)), columns=["a", "b", "c", "d"])
+    current_data = pd.DataFrame(rng.normal(0.1, size=(1000, 4)), columns=["a", "b", "c", "d"])
+    reference_data["b"] = rng.randint(0, 4, 1500)
+    current_data.loc[::10, "c"] = np.nan
+    current_data.loc[5, "c"] = np.inf
+    current_data.loc[5, "d"] = np.inf
+    dataset_columns = process_columns(reference_data, ColumnMapping())
+    options = DataDriftOptions(num_features_stattest=num_stattest)
+
+    batch = get_numerical_drift_batch(
+        current_data=current_data,
+        reference_data=reference_data,
+        columns=["a", "b", "c", "d"],
+        options=options,
+        dataset_columns=dataset_columns,
+    )
+    # infinite values are not cleaned from columns without NaNs, such columns use the per column path
+    assert "d" not in batch
+    if num_stattest == "t_test":
+        assert batch == {}
+
+    result = get_drift_for_columns(
+        current_data=current_data,
+        reference_data=reference_data,
+        dataset_columns=dataset_columns,
+        data_drift_options=options,
+        columns=["a", "b", "c"],
+        agg_data=True,
+    )
+    for column in ["a", "b", "c"]:
+        expected = get_one_column_drift(
+            current_data=current_data,
+            reference_data=reference_data,
+            column_name=column,
+            options=options,
+            dataset_columns=dataset_columns,
+            column_type=ColumnType.Numerical,
+            agg_data=True,
+        )
+        actual = result.drift_by_columns[column]
+        assert actual.stattest_name == expected.stattest_name
+        assert actual.drift_score == pytest.approx(expected.drift_score, rel=1e-9)
+        assert actual.drift_detected == expected.drift_detected
+
+
+def test_get_drift_for_columns_batch_in_chunks(monkeypatch):
+    rng = np.random.RandomState(0)
+    reference_data = pd.DataFrame(rng.normal(size=(1500, 5)), columns=list("abcde"))
+    current_data = pd.DataFrame(rng.normal(0.1, size=(1000, 5)), columns=list("abcde"))
+    kwargs = dict(
+        current_data=current_data,
+        reference_data=reference_data,
+        columns=list("abcde"),
+        options=DataDriftOptions(),
+        dataset_columns=process_columns(reference_data, ColumnMapping()),
+    )
+    expected = get_numerical_drift_batch(**kwargs)
+
+    monkeypatch.setattr(data_drift, "BATCH_STATTEST_MAX_VALUES", 5000)
+    result = get_numerical_drift_batch(**kwargs)
+    assert result.keys() == expected.keys()
+    for column, (stattest, stattest_result) in result.items():
+        assert stattest == expected[column][0]
+        assert stattest_result.drift_score == pytest.approx(expected[column][1].drift_score, rel=1e-9)
@@ -1,12 +1,18 @@
+import warnings
+
 import numpy as np
 import pandas as pd
 import pytest
+from scipy.stats import chi2_contingency
 
+from servequery.legacy.calculations.data_quality import _get_rank_correlations
 from servequery.legacy.calculations.data_quality import calculate_column_distribution
 from servequery.legacy.calculations.data_quality import calculate_cramer_v_correlation
+from servequery.legacy.calculations.data_quality import get_pairwise_cramer_v
 from servequery.legacy.calculations.data_quality import get_rows_count
 from servequery.legacy.metric_results import ColumnCorrelations
 from servequery.legacy.metric_results import Distribution
+from servequery.legacy.options.agg_data import CorrelationOptions
 
 
 @pytest.mark.parametrize(
@@ -52,3 +58,70 @@ def test_calculate_cramer_v_correlations():
             y=[1.0, 1.0, 1.0],
         ),
     )
+
+
+def _crosstab_cramer_v(x: pd.Series, y: pd.Series) -> float:
+    table = pd.crosstab(x, y)
+    if min(table.shape) <= 1:
+        return np.nan
+    chi2 = chi2_contingency(table, correction=False)[0]
+    return np.sqrt(chi2 / table.to_numpy().sum() / (min(table.shape) - 1))
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_get_pairwise_cramer_v(max_workers):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "a": rng.choice(["x", "y", "z"], 500),
+            "b": rng.integers(0, 4, 500),
+            "c": rng.integers(0, 300, 500),
+            "d": pd.Categorical(rng.choice(["p", "q"], 500), categories=["p", "q", "r"]),
+        }
+    )
+    df.loc[::7, "a"] = None
+    df["e"] = df["b"].astype(str) + df["a"].fillna("")
+
+    result = get_pairwise_cramer_v(df, max_workers=max_workers)
+
+    for i in df.columns:
+        for j in df.columns:
+            expected = 1.0 if i == j else _crosstab_cramer_v(df[i], df[j])
+            assert result.loc[i, j] == pytest.approx(expected, rel=1e-9)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_rank_correlations(max_workers):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"a": rng.normal(size=300), "b": rng.integers(0, 5, 300).astype(float)})
+    df["c"] = df["a"] + rng.normal(size=300)
+    df.loc[::5, "c"] = np.nan
+
+    spearman, kendall = _get_rank_correlations(df, CorrelationOptions(max_workers=max_workers))
+
+    pd.testing.assert_frame_equal(spearman, df.corr("spearman"))
+    pd.testing.assert_frame_equal(kendall, df.corr("kendall"))
+
+
+def test_rank_correlations_constant_column_next_to_missing_values():
+    df = pd.DataFrame({"a": [1, 2, 3, 4, 5, 6], "k": [1] * 6, "c": [1, np.nan, 3, 2, 5, 4]}, dtype=float)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        spearman, _ = _get_rank_correlations(df, CorrelationOptions())
+
+    pd.testing.assert_frame_equal(spearman, df.corr("spearman"))
+    assert np.isnan(spearman.loc["a", "k"])
+    assert np.isnan(spearman.loc["k", "k"])
+
+
+def test_sampled_kendall_correlation():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"a": rng.normal(size=5000)})
+    df["b"] = df["a"] + rng.normal(size=5000)
+
+    _, kendall = _get_rank_correlations(df, CorrelationOptions(kendall_sample_size=1000))
+    _, same_seed = _get_rank_correlations(df, CorrelationOptions(kendall_sample_size=1000))
+
+    assert kendall.loc["a", "b"] == same_seed.loc["a", "b"]
+    assert kendall.loc["a", "b"] == pytest.approx(df.corr("kendall").loc["a", "b"], abs=0.05)
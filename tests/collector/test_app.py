@@ -10,6 +10,9 @@ from servequery._pydantic_compat import parse_obj_as
 from servequery.legacy.collector.app import check_snapshots_factory
 from servequery.legacy.collector.config import CollectorConfig
 from servequery.legacy.collector.config import CollectorServiceConfig
+from servequery.legacy.collector.serialization import ARROW_CONTENT_TYPE
+from servequery.legacy.collector.serialization import PARQUET_CONTENT_TYPE
+from servequery.legacy.collector.serialization import encode_data
 from servequery.legacy.ui.storage.common import NoopAuthManager
 from servequery.legacy.ui.storage.local import create_local_project_manager
 from servequery.legacy.ui.workspace.view import WorkspaceView
@@ -81,6 +84,84 @@ def test_push_data(
     assert collector_service_config.storage.get_buffer_size("new") == 1
 
 
+@pytest.mark.parametrize("content_type", [ARROW_CONTENT_TYPE, PARQUET_CONTENT_TYPE])
+def test_push_columnar_data(
+    collector_test_client: TestClient,
+    collector_service_config: CollectorServiceConfig,
+    mock_collector_config,
+    content_type,
+):
+    mock_collector_config.id = "new"
+    collector_service_config.collectors["new"] = mock_collector_config
+    collector_service_config.storage.init("new")
+    first = pd.DataFrame({"a": [1.0, 2.0], "b": ["x", None]}, index=[0, 1])
+    second = pd.DataFrame({"a": [3.0], "b": ["z"]}, index=[2])
+
+    for data in (first, second):
+        r = collector_test_client.post(
+            "/new/data", content=encode_data(data, content_type), headers={"Content-Type": content_type}
+        )
+        r.raise_for_status()
+
+    assert collector_service_config.storage.get_buffer_size("new") == 2
+    flushed = collector_service_config.storage.get_and_flush("new")
+    pd.testing.assert_frame_equal(flushed, pd.concat([first, second]))
+    assert collector_service_config.storage.get_and_flush("new") is None
+
+
+def test_push_mixed_data(
+    collector_test_client: TestClient,
+    collector_service_config: CollectorServiceConfig,
+    mock_collector_config,
+    mock_reference,
+):
+    mock_collector_config.id = "new"
+    collector_service_config.collectors["new"] = mock_collector_config
+    collector_service_config.storage.init("new")
+
+    collector_test_client.post("/new/data", json=mock_reference.to_dict()).raise_for_status()
+    collector_test_client.post(
+        "/new/data",
+        content=encode_data(mock_reference, ARROW_CONTENT_TYPE),
+        headers={"Content-Type": ARROW_CONTENT_TYPE},
+    ).raise_for_status()
+
+    flushed = collector_service_config.storage.get_and_flush("new")
+    pd.testing.assert_frame_equal(flushed, pd.concat([mock_reference, mock_reference]))
+
+
+def test_push_data_unsupported_content_type(
+    collector_test_client: TestClient,
+    collector_service_config: CollectorServiceConfig,
+    mock_collector_config,
+):
+    mock_collector_config.id = "new"
+    collector_service_config.collectors["new"] = mock_collector_config
+    collector_service_config.storage.init("new")
+
+    r = collector_test_client.post("/new/data", content=b"a,b", headers={"Content-Type": "text/csv"})
+
+    assert r.status_code == 415
+    assert collector_service_config.storage.get_buffer_size("new") == 0
+
+
+@pytest.mark.parametrize("content_type", [ARROW_CONTENT_TYPE, PARQUET_CONTENT_TYPE, "application/json"])
+def test_push_malformed_data(
+    collector_test_client: TestClient,
+    collector_service_config: CollectorServiceConfig,
+    mock_collector_config,
+    content_type,
+):
+    mock_collector_config.id = "new"
+    collector_service_config.collectors["new"] = mock_collector_config
+    collector_service_config.storage.init("new")
+
+    r = collector_test_client.post("/new/data", content=b"not data", headers={"Content-Type": content_type})
+
+    assert r.status_code == 400
+    assert collector_service_config.storage.get_buffer_size("new") == 0
+
+
 @pytest.fixture()
 def ui_workspace(tmp_path) -> WorkspaceView:
     project_manager = create_local_project_manager(str(tmp_path / "ui_ws"), False, NoopAuthManager())
@@ -109,9 +190,7 @@ async def test_create_snapshot_and_get_logs(
     r.raise_for_status()
 
     assert len(project.list_snapshots()) == 0
-    asyncio.get_event_loop().run_until_complete(
-        check_snapshots_factory(collector_service_config, collector_service_config.storage)
-    )
+    asyncio.get_event_loop().run_until_complete(check_snapshots_factory(collector_service_config))
     assert len(project.list_snapshots()) == 1
 
     snapshot_id = str(project.list_snapshots()[0].id)
@@ -0,0 +1,271 @@
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from litestar.testing import TestClient
+
+from servequery.legacy.collector.config import CollectorConfig
+from servequery.legacy.collector.config import CollectorServiceConfig
+from servequery.legacy.collector.config import ReportConfig
+from servequery.legacy.collector.config import RowsCountTrigger
+from servequery.legacy.collector.incremental import ColumnAggregate
+from servequery.legacy.collector.incremental import IncrementalReport
+from servequery.legacy.collector.scheduler import ReportScheduler
+from servequery.legacy.collector.serialization import ARROW_CONTENT_TYPE
+from servequery.legacy.collector.serialization import encode_data
+from servequery.legacy.collector.storage import InMemoryStorage
+from servequery.legacy.core import ColumnType
+from servequery.legacy.metrics import ColumnSummaryMetric
+from servequery.legacy.metrics import DatasetSummaryMetric
+from servequery.legacy.options.base import Options
+from servequery.legacy.report import Report
+from tests.collector.test_scheduler import FlakyWorkspace
+from tests.ui.conftest import HEADERS
+from tests.ui.conftest import _dumps
+
+EXACT_FIELDS = ["number_of_rows", "count", "missing", "missing_percentage", "mean", "std", "min", "max"]
+
+
+def _data(size: int, shift: float, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame(
+        {
+            "num": rng.normal(shift, 1, size),
+            "discrete": rng.integers(0, 5, size).astype(float),
+            "cat": rng.choice(list("abcdefg"), size),
+        }
+    )
+    data.loc[::7, "num"] = np.nan
+    data.loc[::11, "cat"] = None
+    return data
+
+
+def _metrics():
+    return [ColumnSummaryMetric(column_name=column) for column in ["num", "discrete", "cat"]]
+
+
+def test_incremental_report_matches_report():
+    reference = _data(1000, 0, 0)
+    batches = [_data(300, 0.3, seed) for seed in range(1, 5)]
+    incremental = IncrementalReport(Report(metrics=_metrics()), reference)
+    for batch in batches:
+        incremental.update(batch)
+
+    report = Report(metrics=_metrics())
+    report.run(reference_data=reference, current_data=pd.concat(batches, ignore_index=True))
+
+    assert incremental.rows == 1200
+    assert incremental.pushes == 4
+    results = incremental.finalize().as_dict()["metrics"]
+    for result, expected in zip(results, report.as_dict()["metrics"]):
+        current = result["result"]["current_characteristics"]
+        expected_current = expected["result"]["current_characteristics"]
+        assert {field: current[field] for field in EXACT_FIELDS if field in current} == pytest.approx(
+            {field: expected_current[field] for field in EXACT_FIELDS if field in expected_current}
+        )
+        if expected["result"]["column_type"] == "cat":
+            assert json.dumps(current) == json.dumps(expected_current)
+        for percentile in ["p25", "p50", "p75"]:
+            if percentile in expected_current:
+                assert current[percentile] == pytest.approx(expected_current[percentile], abs=0.1)
+        assert json.dumps(result["result"]["reference_characteristics"]) == json.dumps(
+            expected["result"]["reference_characteristics"]
+        )
+
+
+def test_column_aggregate_merge():
+    values = _data(1000, 0, 0)["num"].round(1)
+    values.iloc[5] = np.inf
+    reference = _data(1000, 0, 1)["num"]
+    whole = ColumnAggregate(ColumnType.Numerical, reference)
+    whole.update(values)
+    first = ColumnAggregate(ColumnType.Numerical, reference)
+    first.update(values.iloc[:300])
+    second = ColumnAggregate(ColumnType.Numerical, reference)
+    second.update(values.iloc[300:])
+
+    first.merge(second)
+
+    assert first.stats() == whole.stats()
+    np.testing.assert_array_equal(first.histogram, whole.histogram)
+    assert first.infinite == 1
+    assert first.mean == pytest.approx(values[np.isfinite(values)].mean())
+
+
+def test_column_aggregate_widens_histogram():
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0, 1000, 5000)
+    aggregate = ColumnAggregate(ColumnType.Numerical)
+    aggregate.update(pd.Series([5.0]))
+    aggregate.update(pd.Series(values))
+
+    assert aggregate.value_counts is None
+    assert aggregate.histogram.sum() == 5001
+    assert len(aggregate.histogram) <= 50
+    assert aggregate.edges[0] <= 0 and aggregate.edges[-1] >= values.max()
+    assert aggregate.quantile(0.5) == pytest.approx(np.median(values), abs=aggregate.edges[1] - aggregate.edges[0])
+
+
+def test_column_aggregate_extreme_outlier():
+    reference = pd.Series(np.linspace(0, 1, 100, endpoint=False))
+    aggregate = ColumnAggregate(ColumnType.Numerical, reference)
+    aggregate.update(pd.Series([0.5, 1e9]))
+    aggregate.update(pd.Series([-1e300]))
+
+    assert aggregate.histogram.sum() == 3
+    assert len(aggregate.histogram) <= 50
+    assert aggregate.edges[0] <= -1e300 and aggregate.edges[-1] >= 1e9
+
+    aggregate = ColumnAggregate(ColumnType.Numerical, reference)
+    with pytest.raises(ValueError, match="too far"):
+        aggregate.update(pd.Series([0.5, 1.7e308]))
+    assert (aggregate.number_of_rows, aggregate.count, aggregate.max) == (0, 0, None)
+    assert aggregate.histogram.sum() == 0
+
+
+def test_column_aggregate_merge_widened():
+    values = pd.Series(np.random.default_rng(0).normal(0, 10, 2000))
+    reference = values.iloc[:10]
+    whole = ColumnAggregate(ColumnType.Numerical, reference)
+    whole.update(values)
+    first = ColumnAggregate(ColumnType.Numerical, reference)
+    first.update(values.iloc[:1000])
+    second = ColumnAggregate(ColumnType.Numerical, reference)
+    second.update(values.iloc[1000:])
+
+    first.merge(second)
+
+    np.testing.assert_array_equal(first.edges, whole.edges)
+    np.testing.assert_array_equal(first.histogram, whole.histogram)
+    np.testing.assert_array_equal(first.log_histogram, whole.log_histogram)
+
+
+def test_column_aggregate_folds_rare_categories(monkeypatch):
+    monkeypatch.setattr("servequery.legacy.collector.incremental.INCREMENTAL_MAX_CATEGORIES", 3)
+    aggregate = ColumnAggregate(ColumnType.Categorical)
+    aggregate.update(pd.Series(list("aaaabbbccd")))
+    other = ColumnAggregate(ColumnType.Categorical)
+    other.update(pd.Series(list("eeeee")))
+
+    aggregate.merge(other)
+
+    assert aggregate.value_counts == {"e": 5, "a": 4, "b": 3}
+    assert aggregate.other_count == 3
+    assert aggregate.count == 15
+    stats = aggregate.stats()
+    assert stats.unique_count is None
+    assert (stats.most_common_value, stats.most_common_value_percentage) == ("e", 33.33)
+
+
+def test_incremental_report_requires_reference():
+    with pytest.raises(ValueError, match="require reference"):
+        IncrementalReport(Report(metrics=_metrics()), None)
+    with pytest.raises(ValueError, match="not found in reference"):
+        IncrementalReport(Report(metrics=_metrics()), _data(10, 0, 0).drop(columns=["cat"]))
+
+
+def test_incremental_report_column_types_from_reference():
+    reference = pd.DataFrame({"value": np.arange(100)})
+    incremental = IncrementalReport(Report(metrics=[ColumnSummaryMetric(column_name="value")]), reference)
+    incremental.update(pd.DataFrame({"value": [1, 2, 1]}))
+    incremental.update(pd.DataFrame({"value": np.arange(50)}))
+
+    assert incremental.columns["value"].column_type == ColumnType.Numerical
+
+
+def test_incremental_report_rejects_batch_without_changes():
+    incremental = IncrementalReport(Report(metrics=_metrics()), _data(100, 0, 2))
+    incremental.update(_data(10, 0, 0))
+    with pytest.raises(ValueError, match="not found"):
+        incremental.update(_data(5, 0, 1).drop(columns=["cat"]))
+    bad = _data(5, 0, 1)
+    bad["discrete"] = "x"
+    with pytest.raises(ValueError, match="non-numeric"):
+        incremental.update(bad)
+    huge = _data(5, 0, 1)
+    huge["discrete"] = 1.7e308
+    with pytest.raises(ValueError, match="too far"):
+        incremental.update(huge)
+
+    assert (incremental.rows, incremental.pushes) == (10, 1)
+    assert {name: aggregate.number_of_rows for name, aggregate in incremental.columns.items()} == {
+        "num": 10,
+        "discrete": 10,
+        "cat": 10,
+    }
+
+
+def test_failed_first_batch_does_not_create_window():
+    storage = InMemoryStorage()
+    storage.init("new")
+
+    def create_window():
+        return IncrementalReport(Report(metrics=_metrics()), _data(100, 0, 2))
+
+    with pytest.raises(ValueError):
+        storage.aggregate("new", _data(5, 0, 0).drop(columns=["num"]), create_window)
+    assert storage.take_window("new") is None
+
+
+def test_incremental_report_unsupported_metric():
+    with pytest.raises(ValueError, match="support only"):
+        IncrementalReport(Report(metrics=[DatasetSummaryMetric()]), _data(100, 0, 2))
+
+
+def test_incremental_collector(
+    collector_test_client: TestClient, collector_service_config: CollectorServiceConfig, tmp_path
+):
+    reference_path = str(tmp_path / "reference.parquet")
+    _data(100, 0, 2).to_parquet(reference_path)
+    collector = CollectorConfig(
+        trigger=RowsCountTrigger(rows_count=2),
+        report_config=ReportConfig(metrics=_metrics(), tests=[], options=Options(), metadata={}, tags=["window"]),
+        reference_path=reference_path,
+        project_id="",
+        incremental=True,
+    )
+    collector_test_client.post("/new", content=_dumps(collector), headers=HEADERS).raise_for_status()
+    collector = collector_service_config.collectors["new"]
+    workspace = FlakyWorkspace(0)
+    collector._workspace = workspace
+
+    for seed in range(2):
+        collector_test_client.post(
+            "/new/data",
+            content=encode_data(_data(100, 0, seed), ARROW_CONTENT_TYPE),
+            headers={"Content-Type": ARROW_CONTENT_TYPE},
+        ).raise_for_status()
+
+    assert collector_service_config.storage.get_buffer_size("new") == 2
+    assert collector_service_config.storage.get_window_size("new") == 2
+
+    scheduler = ReportScheduler(collector_service_config)
+
+    async def check():
+        await scheduler.start()
+        await scheduler.check()
+        await scheduler.wait()
+        await scheduler.stop()
+
+    asyncio.run(check())
+
+    assert collector_service_config.storage.get_buffer_size("new") == 0
+    assert len(workspace.reports) == 1
+    report = workspace.reports[0]
+    assert report.tags == ["window"]
+    assert report.as_dict()["metrics"][0]["result"]["current_characteristics"]["number_of_rows"] == 200
+
+
+def test_incremental_collector_rejects_unsupported_metrics(collector_test_client: TestClient):
+    collector = CollectorConfig(
+        trigger=RowsCountTrigger(),
+        report_config=ReportConfig(metrics=[DatasetSummaryMetric()], tests=[], options=Options(), metadata={}, tags=[]),
+        project_id="",
+        incremental=True,
+    )
+
+    r = collector_test_client.post("/new", content=_dumps(collector), headers=HEADERS)
+
+    assert r.status_code == 400
@@ -0,0 +1,190 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+from litestar.testing import TestClient
+
+from servequery.legacy.collector.config import CollectorConfig
+from servequery.legacy.collector.config import CollectorServiceConfig
+from servequery.legacy.collector.config import ReportConfig
+from servequery.legacy.collector.config import RowsCountTrigger
+from servequery.legacy.collector.scheduler import ReportScheduler
+from servequery.legacy.metrics import ColumnSummaryMetric
+from servequery.legacy.options.base import Options
+from servequery.legacy.ui.storage.common import NoopAuthManager
+from servequery.legacy.ui.storage.local import create_local_project_manager
+from servequery.legacy.ui.workspace.view import WorkspaceView
+
+
+class SlowWorkspace:
+    def __init__(self):
+        self.reports = []
+
+    def _add_report_base(self, project_id, report, include_data):
+        time.sleep(0.2)
+        self.reports.append(report)
+
+
+class FlakyWorkspace:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.reports = []
+
+    def _add_report_base(self, project_id, report, include_data):
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("unavailable")
+        self.reports.append(report)
+
+
+@pytest.fixture()
+def ui_workspace(tmp_path) -> WorkspaceView:
+    project_manager = create_local_project_manager(str(tmp_path / "ui_ws"), False, NoopAuthManager())
+    return WorkspaceView(None, project_manager)
+
+
+def _add_collector(service: CollectorServiceConfig, collector: CollectorConfig, workspace, id: str = "new"):
+    collector.id = id
+    collector.reference_path = None
+    collector._workspace = workspace
+    service.collectors[id] = collector
+    service.storage.init(id)
+    service.storage.append(id, pd.DataFrame({"a": [1.0, 2.0, 3.0]}).to_dict())
+
+
+def _run_check(scheduler: ReportScheduler):
+    async def check():
+        await scheduler.start()
+        try:
+            await scheduler.check()
+            await scheduler.wait()
+        finally:
+            await scheduler.stop()
+
+    asyncio.run(check())
+
+
+def test_scheduler_creates_and_uploads_reports(ui_workspace, mock_collector_config):
+    service = CollectorServiceConfig()
+    project = ui_workspace.create_project("proj")
+    mock_collector_config.project_id = str(project.id)
+    _add_collector(service, mock_collector_config, ui_workspace)
+    scheduler = ReportScheduler(service)
+
+    _run_check(scheduler)
+
+    assert len(project.list_snapshots()) == 1
+    assert [(event.type, event.ok) for event in service.storage.get_logs("new")] == [
+        ("UploadReport", True),
+        ("CreateReport", True),
+    ]
+    metrics = scheduler.metrics["new"]
+    assert metrics.report_queue_depth == 0
+    assert metrics.upload_queue_depth == 0
+    assert metrics.report_latency.count == 1
+    assert metrics.upload_latency.count == 1
+
+
+def test_scheduler_runs_reports_in_processes(ui_workspace):
+    service = CollectorServiceConfig(report_processes=1)
+    project = ui_workspace.create_project("proj")
+    collector = CollectorConfig(
+        trigger=RowsCountTrigger(),
+        report_config=ReportConfig(
+            metrics=[ColumnSummaryMetric(column_name="a")], tests=[], options=Options(), metadata={}, tags=[]
+        ),
+        project_id=str(project.id),
+    )
+    _add_collector(service, collector, ui_workspace)
+
+    _run_check(ReportScheduler(service))
+
+    snapshots = project.list_snapshots()
+    assert len(snapshots) == 1
+    report = asyncio.run(snapshots[0].as_report_base())
+    assert report.as_dict()["metrics"][0]["result"]["current_characteristics"]["count"] == 3
+
+
+@pytest.mark.parametrize("failures,uploaded", [(2, True), (3, False)])
+def test_scheduler_retries_uploads(mock_collector_config, failures, uploaded):
+    service = CollectorServiceConfig(upload_retries=2, upload_retry_delay=0)
+    workspace = FlakyWorkspace(failures)
+    _add_collector(service, mock_collector_config, workspace)
+    scheduler = ReportScheduler(service)
+
+    _run_check(scheduler)
+
+    metrics = scheduler.metrics["new"]
+    assert metrics.upload_retries == 2
+    assert len(workspace.reports) == int(uploaded)
+    assert metrics.uploads_failed == int(not uploaded)
+    assert service.storage.get_logs("new")[0].ok == uploaded
+    # not uploaded report is kept to be uploaded at the next check
+    assert len(list(service.storage.take_reports("new"))) == int(not uploaded)
+
+
+def test_scheduler_stop_keeps_queued_uploads(mock_collector_config):
+    service = CollectorServiceConfig(upload_workers=1)
+    workspace = SlowWorkspace()
+    _add_collector(service, mock_collector_config, workspace)
+    for _ in range(5):
+        service.storage.add_report("new", mock_collector_config.report_config.to_report_base())
+    scheduler = ReportScheduler(service)
+
+    async def run():
+        await scheduler.start()
+        scheduler._queue_uploads(mock_collector_config)
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+
+    asyncio.run(run())
+
+    assert scheduler.metrics["new"].upload_queue_depth == 0
+    assert len(list(service.storage.take_reports("new"))) + len(workspace.reports) >= 5
+
+
+def test_scheduler_does_not_flush_while_reports_pending(mock_collector_config, monkeypatch):
+    service = CollectorServiceConfig(max_concurrent_reports=1)
+    _add_collector(service, mock_collector_config, FlakyWorkspace(0))
+    scheduler = ReportScheduler(service)
+
+    async def run():
+        release = asyncio.Event()
+        run_report = scheduler._run_report
+
+        async def slow_run_report(*args):
+            await release.wait()
+            return await run_report(*args)
+
+        monkeypatch.setattr(scheduler, "_run_report", slow_run_report)
+        await scheduler.start()
+        try:
+            await scheduler.check()
+            await asyncio.sleep(0.05)
+            service.storage.append("new", pd.DataFrame({"a": [4.0]}).to_dict())
+            await scheduler.check()
+            await asyncio.sleep(0.05)
+            assert service.storage.get_buffer_size("new") == 1
+            release.set()
+            await scheduler.wait()
+        finally:
+            await scheduler.stop()
+
+    asyncio.run(run())
+
+    assert service.storage.get_buffer_size("new") == 1
+
+
+def test_get_metrics(
+    collector_test_client: TestClient, collector_service_config: CollectorServiceConfig, mock_collector_config
+):
+    mock_collector_config.id = "new"
+    collector_service_config.collectors["new"] = mock_collector_config
+
+    r = collector_test_client.get("/new/metrics")
+    r.raise_for_status()
+
+    assert r.json()["report_queue_depth"] == 0
+    assert r.json()["upload_latency"] == {"count": 0, "mean": 0, "max": 0, "last": 0}
+    assert collector_test_client.get("/other/metrics").status_code == 404
@@ -0,0 +1,130 @@
+import os
+
+import pandas as pd
+import pytest
+from litestar.testing import TestClient
+
+from servequery.legacy.collector.config import CollectorServiceConfig
+from servequery.legacy.collector.serialization import to_table
+from servequery.legacy.collector.storage import DiskStorage
+from servequery.legacy.collector.storage import StorageFullError
+
+
+def _data(start: int, size: int = 10) -> pd.DataFrame:
+    return pd.DataFrame(
+        {"a": [float(i) for i in range(start, start + size)], "b": [str(i) for i in range(start, start + size)]},
+        index=range(start, start + size),
+    )
+
+
+def _segments(path, id: str = "c"):
+    return sorted(name for name in os.listdir(os.path.join(path, id)))
+
+
+def test_disk_storage_reads_segments_over_memory_limit(tmp_path):
+    storage = DiskStorage(path=str(tmp_path), memory_limit=1)
+    storage.init("c")
+
+    storage.append("c", to_table(_data(0)))
+    storage.append("c", _data(10).to_dict())
+    storage.append("c", to_table(_data(20)))
+
+    assert storage.get_buffer_size("c") == 3
+    assert storage._buffers["c"] == []
+    assert len(_segments(tmp_path)) == 1
+    flushed = storage.get_and_flush("c")
+    expected = pd.concat([_data(0), _data(10), _data(20)])
+    pd.testing.assert_frame_equal(flushed, expected, check_index_type=False)
+    assert list(flushed.index.astype(int)) == list(expected.index)
+    assert _segments(tmp_path) == []
+    assert storage.get_and_flush("c") is None
+
+
+def test_disk_storage_writes_every_push_ahead(tmp_path):
+    storage = DiskStorage(path=str(tmp_path))
+    storage.init("c")
+
+    storage.append("c", to_table(_data(0)))
+    storage.append("c", to_table(_data(10)))
+    storage.append("c", to_table(pd.DataFrame({"x": [1]})))
+
+    assert _segments(tmp_path) == ["000000000000.arrow", "000000000001.arrow"]
+    assert storage.get_buffer_size("c") == 3
+    # a crashed service is recovered from segments which were not closed
+    recovered = DiskStorage(path=str(tmp_path))
+    recovered.init("c")
+    assert recovered.get_buffer_size("c") == 3
+    flushed = recovered.get_and_flush("c")
+    pd.testing.assert_frame_equal(flushed.iloc[:20, :2], pd.concat([_data(0), _data(10)]), check_index_type=False)
+    assert flushed["x"].tolist()[20:] == [1]
+
+
+def test_disk_storage_keeps_segments_until_flush_is_completed(tmp_path):
+    storage = DiskStorage(path=str(tmp_path))
+    storage.init("c")
+    storage.append("c", to_table(_data(0)))
+
+    pd.testing.assert_frame_equal(storage.get_and_flush("c", "flush"), _data(0))
+    assert storage.get_buffer_size("c") == 0
+    assert _segments(tmp_path) == ["000000000000.arrow"]
+
+    recovered = DiskStorage(path=str(tmp_path))
+    recovered.init("c")
+    assert recovered.get_buffer_size("c") == 1
+
+    storage.complete_flush("c", "flush")
+    assert _segments(tmp_path) == []
+
+
+def test_disk_storage_recovery(tmp_path):
+    storage = DiskStorage(path=str(tmp_path), memory_limit=0)
+    storage.init("c")
+    storage.append("c", to_table(_data(0)))
+    storage.append("c", to_table(_data(10)))
+    segment = tmp_path / "c" / "000000000000.arrow"
+    # a push torn by a crash is dropped
+    segment.write_bytes(segment.read_bytes() + b"partial")
+    (tmp_path / "c" / "000000000001.arrow.tmp").write_bytes(b"partial")
+    (tmp_path / "c" / "000000000002.arrow").write_bytes(b"broken")
+
+    recovered = DiskStorage(path=str(tmp_path), memory_limit=0)
+    recovered.init_all(CollectorServiceConfig(collectors={}))
+    recovered.init("c")
+
+    assert recovered.get_buffer_size("c") == 2
+    assert _segments(tmp_path) == ["000000000000.arrow", "000000000002.arrow.broken"]
+    recovered.append("c", to_table(_data(20)))
+    assert "000000000001.arrow" in _segments(tmp_path)
+    pd.testing.assert_frame_equal(recovered.get_and_flush("c"), pd.concat([_data(0), _data(10), _data(20)]))
+
+
+def test_disk_storage_limit(tmp_path):
+    storage = DiskStorage(path=str(tmp_path), memory_limit=0, disk_limit=1500)
+    storage.init("c")
+    storage.append("c", to_table(_data(0)))
+
+    with pytest.raises(StorageFullError):
+        storage.append("c", to_table(_data(10, 100)))
+    assert storage.get_buffer_size("c") == 1
+
+    storage.get_and_flush("c")
+    storage.append("c", to_table(_data(10)))
+    assert storage.get_buffer_size("c") == 1
+
+
+def test_push_data_backpressure(
+    collector_test_client: TestClient,
+    collector_service_config: CollectorServiceConfig,
+    mock_collector_config,
+    tmp_path,
+):
+    mock_collector_config.id = "new"
+    collector_service_config.collectors["new"] = mock_collector_config
+    collector_service_config.storage = DiskStorage(path=str(tmp_path / "buffer"), disk_limit=1)
+    collector_service_config.storage.init("new")
+
+    r = collector_test_client.post("/new/data", json=_data(0).to_dict())
+
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == "1"
+    assert collector_service_config.storage.get_buffer_size("new") == 0
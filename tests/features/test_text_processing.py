@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from servequery.legacy.features._text_processing import get_text_column
+from servequery.legacy.features._text_processing import shared_text_columns
+from servequery.legacy.features.non_letter_character_percentage_feature import NonLetterCharacterPercentage
+from servequery.legacy.features.sentence_count_feature import SentenceCount
+from servequery.legacy.features.text_length_feature import TextLength
+from servequery.legacy.features.trigger_words_presence_feature import TriggerWordsPresent
+from servequery.legacy.features.word_count_feature import WordCount
+from servequery.legacy.features.words_feature import ExcludesWords
+from servequery.legacy.features.words_feature import IncludesWords
+from servequery.legacy.pipeline.column_mapping import ColumnMapping
+from servequery.legacy.utils.data_preprocessing import create_data_definition
+
+DATA = pd.DataFrame(
+    dict(
+        column_1=[
+            "Hello world. It's Mr. Smith, e.g. this one?  Yes",
+            "",
+            None,
+            "a1 123 cats\nand-dogs",
+            np.nan,
+            "Über straße 42!",
+            "green   apples. Green apples",
+        ]
+    ),
+    index=[10, 11, 12, 13, 14, 15, 16],
+)
+
+
+@pytest.mark.parametrize(
+    "feature",
+    [
+        TextLength(column_name="column_1"),
+        WordCount(column_name="column_1"),
+        SentenceCount(column_name="column_1"),
+        NonLetterCharacterPercentage(column_name="column_1"),
+        TriggerWordsPresent(column_name="column_1", words_list=["apples", "cats"], lemmatize=False),
+        IncludesWords(column_name="column_1", words_list=["green", "apples"], mode="any", lemmatize=False),
+        IncludesWords(column_name="column_1", words_list=["green", "apples"], mode="all", lemmatize=False),
+        ExcludesWords(column_name="column_1", words_list=["world", "a1"], mode="any", lemmatize=False),
+        ExcludesWords(column_name="column_1", words_list=["world", "a1"], mode="all", lemmatize=False),
+    ],
+)
+def test_text_features_match_per_row_values(feature):
+    result = feature.generate_feature(DATA, create_data_definition(None, DATA, ColumnMapping()))
+
+    expected = pd.DataFrame({feature._feature_column_name(): DATA["column_1"].apply(feature.apply)})
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_text_column_is_processed_once():
+    data = DATA.copy()
+
+    with shared_text_columns():
+        assert get_text_column(data["column_1"]) is get_text_column(data["column_1"])
+        assert get_text_column(data["column_1"]) is not get_text_column(DATA["column_1"])
+        assert get_text_column(pd.Series([1, "a"])) is None
+
+
+def test_text_column_is_not_kept_after_pass():
+    column = pd.Series(["a", "bb"])
+    with shared_text_columns():
+        assert list(get_text_column(column).length) == [1, 2]
+
+    column.iloc[0] = "ccc"
+    assert list(get_text_column(column).length) == [3, 2]
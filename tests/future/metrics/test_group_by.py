@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from servequery.core.datasets import DataDefinition
+from servequery.core.datasets import Dataset
+from servequery.core.report import Report
+from servequery.metrics import GroupBy
+from servequery.metrics import MaxValue
+from servequery.metrics import MeanValue
+from servequery.metrics import QuantileValue
+from servequery.metrics import RowCount
+from servequery.metrics.column_statistics import MaxValueCalculation
+from servequery.metrics.column_statistics import StatisticsCalculation
+
+
+def test_group_by_partitions_once():
+    data = pd.DataFrame({"a": [1.0, 2.0, 3.0, 4.0], "b": ["x", "y", "x", "z"]})
+    dataset = Dataset.from_pandas(data)
+
+    groups = dataset.group_by("b")
+
+    assert set(groups.keys()) == {"x", "y", "z"}
+    assert groups["x"].as_dataframe()["a"].tolist() == [1.0, 3.0]
+    assert dataset.subdataset("b", "x") is groups["x"]
+    assert dataset.subdataset("b", "missing").as_dataframe().empty
+
+
+@pytest.mark.parametrize(
+    "metric,expected,expected_reference",
+    [
+        (MaxValue(column="a"), {"x": 3.0, "y": 2.0, "z": 4.0}, 6.0),
+        (MeanValue(column="a"), {"x": 2.0, "y": 2.0, "z": 4.0}, 5.5),
+        (QuantileValue(column="a", quantile=0.5), {"x": 2.0, "y": 2.0, "z": 4.0}, 5.5),
+        (RowCount(), {"x": 2, "y": 1, "z": 1}, 2),
+    ],
+)
+def test_group_by_metric_values(metric, expected, expected_reference):
+    definition = DataDefinition(numerical_columns=["a"], categorical_columns=["b"])
+    current = Dataset.from_pandas(
+        pd.DataFrame({"a": [1.0, 2.0, 3.0, 4.0], "b": ["x", "y", "x", "z"]}), data_definition=definition
+    )
+    reference = Dataset.from_pandas(pd.DataFrame({"a": [5.0, 6.0], "b": ["x", "x"]}), data_definition=definition)
+
+    snapshot = Report([GroupBy(metric, "b")]).run(current, reference)
+
+    labels = {
+        snapshot.context.get_metric(metric_id).to_metric().label: metric_id for metric_id in snapshot._top_level_metrics
+    }
+    assert {label: snapshot.context.get_metric_result(metric_id).value for label, metric_id in labels.items()} == (
+        expected
+    )
+    assert snapshot.context.get_reference_metric_result(labels["x"]).value == expected_reference
+
+
+def test_group_by_falls_back_to_value_per_group(monkeypatch):
+    monkeypatch.setattr(MaxValueCalculation, "calculate_group_value", StatisticsCalculation.calculate_group_value)
+    test_group_by_metric_values(MaxValue(column="a"), {"x": 3.0, "y": 2.0, "z": 4.0}, 6.0)
@@ -8,6 +8,7 @@ from servequery.metrics import CategoryCount
 from servequery.metrics import MeanValue
 from servequery.metrics import MinValue
 from servequery.metrics import RowCount
+from servequery.presets import DataSummaryPreset
 from servequery.tests import eq
 from servequery.tests import lt
 
@@ -44,3 +45,21 @@ def test_report_run(current, reference):
     assert snapshot_2 is not None
     assert snapshot.dumps() == snapshot_2.dumps()
     snapshot.json()
+
+
+def test_report_run_parallel():
+    data = pd.DataFrame(
+        {
+            **{f"num_{i}": [float(j * i) for j in range(20)] for i in range(10)},
+            **{f"cat_{i}": [str(j % (i + 2)) for j in range(20)] for i in range(5)},
+        }
+    )
+    sequential = Report([DataSummaryPreset(), MinValue(column="num_1")], include_tests=True).run(data, data)
+    parallel = Report([DataSummaryPreset(), MinValue(column="num_1")], include_tests=True, max_workers=4).run(
+        data, data
+    )
+
+    assert list(parallel._metrics.keys()) == list(sequential._metrics.keys())
+    assert parallel._top_level_metrics == sequential._top_level_metrics
+    assert parallel.dict() == sequential.dict()
+    assert len(parallel._widgets) == len(sequential._widgets)
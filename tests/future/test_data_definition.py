@@ -4,12 +4,17 @@ import random
 import pandas as pd
 import pytest
 
+from servequery.core import datasets
 from servequery.core.datasets import DEFAULT_TRACE_LINK_COLUMN
 from servequery.core.datasets import DataDefinition
 from servequery.core.datasets import Dataset
 from servequery.core.datasets import ServiceColumns
 from servequery.core.datasets import infer_column_type
+from servequery.core.report import Report
 from servequery.legacy.core import ColumnType
+from servequery.legacy.options.agg_data import DataDefinitionOptions
+from servequery.legacy.options.base import Options
+from servequery.metrics import RowCount
 
 
 @pytest.mark.parametrize(
@@ -246,3 +251,45 @@ def test_data_definition_without_service(definition, numerical, categorical, dat
     assert set(datetime_cols) == set(dataset.data_definition.get_datetime_columns())
     assert set(text) == set(dataset.data_definition.get_text_columns())
     assert service_columns == dataset.data_definition.service_columns
+
+
+def test_infer_column_type_on_sample():
+    data = pd.Series([f"value_{i % 3}" for i in range(1000)] + [f"unique_{i}" for i in range(10)])
+
+    assert infer_column_type(data, sample_size=100, random_seed=1) == ColumnType.Categorical
+    assert infer_column_type(data[-10:], sample_size=100) == ColumnType.Text
+
+
+def test_infer_column_type_on_sample_verifies_cardinality():
+    categories = pd.Series([f"value_{i % 400}" for i in range(10000)])
+    assert infer_column_type(categories) == ColumnType.Categorical
+    assert infer_column_type(categories, sample_size=500) == ColumnType.Categorical
+    assert infer_column_type(pd.Series(range(10000)).astype(str), sample_size=500) == ColumnType.Text
+
+    integers = pd.Series([0] * 9000 + list(range(1000)))
+    assert infer_column_type(integers, sample_size=100) == ColumnType.Numerical
+
+
+def test_report_uses_data_definition_options(monkeypatch):
+    sample_sizes = []
+    infer = datasets.infer_column_type
+    monkeypatch.setattr(
+        datasets,
+        "infer_column_type",
+        lambda data, sample_size=None, random_seed=0: sample_sizes.append(sample_size)
+        or infer(data, sample_size, random_seed),
+    )
+    options = Options(data_definition=DataDefinitionOptions(inference_sample_size=10))
+    Report([RowCount()], options=options).run(pd.DataFrame({"a": [1, 2, 3]}))
+
+    assert sample_sizes == [10]
+
+
+def test_inferred_data_definition_cache():
+    options = Options(data_definition=DataDefinitionOptions(cache_inferred_definition=True))
+    first = Dataset.from_pandas(pd.DataFrame({"a": [1, 2, 1, 2], "b": [0.1, 0.2, 0.3, 0.4]}), options=options)
+    second = Dataset.from_pandas(pd.DataFrame({"a": list(range(20)), "b": [0.1] * 20}), options=options)
+
+    assert first.data_definition.categorical_columns == ["a"]
+    assert second.data_definition.categorical_columns == ["a"]
+    assert second.data_definition is not first.data_definition
@@ -0,0 +1,168 @@
+import io
+import json
+import tarfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from servequery.core import datasets
+from servequery.core.datasets import DATA_FILENAME
+from servequery.core.datasets import MARKER_CONTENT
+from servequery.core.datasets import MARKER_FILENAME
+from servequery.core.datasets import META_FILENAME
+from servequery.core.datasets import DataDefinition
+from servequery.core.datasets import Dataset
+from servequery.core.datasets import DatasetColumn
+from servequery.legacy.core import ColumnType
+
+
+def test_stats_are_collected_on_demand():
+    data = pd.DataFrame({"a": [1.0, 2.0, np.inf, 4.0], "b": [1.0, 2.0, 3.0, 5.0], "c": ["x", "y", "x", "x"]})
+    dataset = Dataset.from_pandas(
+        data, data_definition=DataDefinition(numerical_columns=["a", "b"], categorical_columns=["c"])
+    )
+
+    stats = dataset.stats()
+    assert (stats.row_count, stats.column_count) == (4, 3)
+    assert dataset._column_stats == {}
+
+    assert stats.column_stats["b"].numerical_stats.max == 5.0
+    assert list(dataset._column_stats.keys()) == ["b"]
+
+    all_stats = dict(stats.column_stats)
+    assert all_stats["a"].numerical_stats.infinite.count == 1
+    assert all_stats["c"].categorical_stats.label_stats["x"].count.count == 3
+
+
+def test_stats_include_added_columns():
+    dataset = Dataset.from_pandas(pd.DataFrame({"a": [1.0, 2.0, 3.0]}))
+    dataset.stats()
+
+    dataset.add_column("d", DatasetColumn(ColumnType.Numerical, pd.Series([3.0, 4.0, 5.0])))
+
+    stats = dataset.stats()
+    assert stats.column_count == 2
+    assert stats.column_stats["d"].numerical_stats.mean == 4.0
+
+
+def test_from_pandas_without_copy_keeps_frame_intact():
+    data = pd.DataFrame({"a": [1.0, 2.0, 3.0]})
+    dataset = Dataset.from_pandas(data, copy=False)
+
+    dataset.add_column("d", DatasetColumn(ColumnType.Numerical, pd.Series([3.0, 4.0, 5.0])))
+
+    assert list(data.columns) == ["a"]
+    assert list(dataset.as_dataframe().columns) == ["a", "d"]
+    assert np.shares_memory(data["a"].values, dataset.as_dataframe()["a"].values)
+
+
+def _save_v1(dataset: Dataset, path: str):
+    with tarfile.open(path, "w") as tar:
+        for name, content in [
+            (MARKER_FILENAME, MARKER_CONTENT.encode("utf-8")),
+            (DATA_FILENAME, dataset.as_dataframe().to_parquet(index=False)),
+            (
+                META_FILENAME,
+                json.dumps(
+                    {
+                        "tags": dataset.tags,
+                        "metadata": dataset.metadata,
+                        "data_definition": dataset.data_definition.dict(),
+                    }
+                ).encode(),
+            ),
+        ]:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+
+
+@pytest.mark.parametrize("version", ["v1", "v2"])
+def test_servequery_dataset_columns_and_batches(tmp_path, monkeypatch, version):
+    monkeypatch.setattr(datasets, "WRITE_BATCH_ROWS", 2)
+    data = pd.DataFrame({"a": [1.0, 2.0, 3.0], "b": ["x", "y", "x"], "c": [1, 2, 3]})
+    dataset = Dataset.from_pandas(
+        data,
+        data_definition=DataDefinition(numerical_columns=["a", "c"], categorical_columns=["b"]),
+        metadata={"k": "v"},
+        tags=["t"],
+    )
+    path = str(tmp_path / f"data.{datasets.SERVEQUERY_DATASET_EXT}")
+    if version == "v1":
+        _save_v1(dataset, path)
+    else:
+        dataset.save(path)
+
+    loaded = Dataset.load(path)
+    pd.testing.assert_frame_equal(loaded.as_dataframe(), data)
+    assert loaded.data_definition == dataset.data_definition
+
+    projected = datasets._read_servequery_dataset(path, columns=["b", "c"])
+    assert list(projected.as_dataframe().columns) == ["b", "c"]
+    assert projected.data_definition.numerical_columns == ["c"]
+    assert projected.data_definition.categorical_columns == ["b"]
+
+    batches = list(datasets.iter_servequery_dataset(path, columns=["a"], batch_rows=2))
+    assert [batch.as_dataframe()["a"].tolist() for batch in batches] == [[1.0, 2.0], [3.0]]
+    assert [(batch.tags, batch.metadata) for batch in batches] == [(["t"], {"k": "v"})] * 2
+
+
+def test_iter_dataset_closes_memory_map(tmp_path, monkeypatch):
+    import pyarrow as pa
+
+    monkeypatch.setattr(datasets, "WRITE_BATCH_ROWS", 2)
+    path = str(tmp_path / f"data.{datasets.SERVEQUERY_DATASET_EXT}")
+    Dataset.from_pandas(pd.DataFrame({"a": [1.0, 2.0, 3.0]})).save(path)
+    opened = []
+    memory_map = pa.memory_map
+    monkeypatch.setattr(pa, "memory_map", lambda *args: opened.append(memory_map(*args)) or opened[-1])
+
+    assert len(list(datasets.iter_servequery_dataset(path, batch_rows=2))) == 2
+    assert opened and all(source.closed for source in opened)
+
+    batches = datasets.iter_servequery_dataset(path, batch_rows=2)
+    next(batches)
+    assert not opened[-1].closed
+    batches.close()
+    assert all(source.closed for source in opened)
+
+
+@pytest.mark.parametrize("size", [0, 100, 9 * 2**30])
+def test_tar_header_size(size):
+    header = datasets._tar_header(datasets.ARROW_DATA_FILENAME, size)
+    assert len(header) == tarfile.BLOCKSIZE
+    info = tarfile.TarInfo.frombuf(header, tarfile.ENCODING, "surrogateescape")
+    assert (info.name, info.size) == (datasets.ARROW_DATA_FILENAME, size)
+
+
+def _upper_share(data: DatasetColumn) -> DatasetColumn:
+    return DatasetColumn(ColumnType.Numerical, data.data.str.count("[A-Z]") / data.data.str.len())
+
+
+def test_descriptors_in_processes_match_serial():
+    from servequery.descriptors import CustomColumnDescriptor
+    from servequery.descriptors import IncludesWords
+    from servequery.descriptors import TextLength
+    from servequery.legacy.options.agg_data import DescriptorExecutionOptions
+    from servequery.tests import gte
+
+    data = pd.DataFrame(
+        {"text": ["Hello world", "abc", "", "Green apples", "More Text here", None, "x"]}, index=range(3, 10)
+    )
+
+    def descriptors():
+        return [
+            TextLength("text", tests=[gte(3)]),
+            CustomColumnDescriptor("text", lambda column: DatasetColumn(ColumnType.Numerical, column.data.isna())),
+            IncludesWords("text", words_list=["apples"], lemmatize=False),
+            CustomColumnDescriptor("text", _upper_share, alias="upper"),
+        ]
+
+    serial = Dataset.from_pandas(data, data_definition=DataDefinition(text_columns=["text"]))
+    serial.add_descriptors(descriptors())
+    parallel = Dataset.from_pandas(data, data_definition=DataDefinition(text_columns=["text"]))
+    parallel.add_descriptors(descriptors(), options=[DescriptorExecutionOptions(processes=2, chunk_size=3)])
+
+    pd.testing.assert_frame_equal(parallel.as_dataframe(), serial.as_dataframe())
+    assert parallel.data_definition == serial.data_definition
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from servequery.core.datasets import DataDefinition
+from servequery.core.datasets import Dataset
+from servequery.core.profile import ReferenceProfile
+from servequery.core.profile import get_profile_column_drift
+from servequery.core.report import Report
+from servequery.legacy.calculations.stattests import get_stattest
+from servequery.legacy.core import ColumnType
+from servequery.metrics import DriftedColumnsCount
+from servequery.metrics import MaxValue
+from servequery.metrics import MeanValue
+from servequery.metrics import MissingValueCount
+from servequery.metrics import QuantileValue
+from servequery.metrics import UniqueValueCount
+from servequery.metrics import ValueDrift
+
+DEFINITION = DataDefinition(numerical_columns=["num", "discrete"], categorical_columns=["cat"])
+
+
+def _dataset(size: int, shift: float, seed: int) -> Dataset:
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame(
+        {
+            "num": rng.normal(shift, 1, size),
+            "discrete": rng.integers(0, 4, size).astype(float),
+            "cat": rng.choice(["a", "b", "c"], size, p=[0.5 - shift / 2, 0.3, 0.2 + shift / 2]),
+        }
+    )
+    data.loc[::10, "num"] = np.nan
+    return Dataset.from_pandas(data, data_definition=DEFINITION)
+
+
+@pytest.fixture
+def reference():
+    return _dataset(1100, 0.0, 0)
+
+
+@pytest.fixture
+def current():
+    return _dataset(1000, 0.2, 1)
+
+
+def _values(reference, current, metrics):
+    context = Report(metrics).run(current, reference).context
+    results = [context.get_metric_result(metric) for metric in metrics]
+    results += [
+        context.get_reference_metric_result(metric.metric_id)
+        for metric in metrics
+        if metric.metric_id in context._reference_metrics
+    ]
+    values = []
+    for result in results:
+        value = result.to_simple_dict()
+        values.extend(value.values() if isinstance(value, dict) else [value])
+    return values
+
+
+def test_reference_profile_metrics_match_reference_dataset(reference, current):
+    metrics = [
+        MaxValue(column="num"),
+        MeanValue(column="num"),
+        MissingValueCount(column="num"),
+        ValueDrift(column="num"),
+        ValueDrift(column="discrete"),
+        ValueDrift(column="cat", method="psi"),
+        DriftedColumnsCount(),
+    ]
+
+    assert _values(ReferenceProfile.from_dataset(reference), current, metrics) == pytest.approx(
+        _values(reference, current, metrics), rel=1e-9
+    )
+
+
+def test_reference_profile_quantiles(reference, current):
+    profile = ReferenceProfile.from_dataset(reference)
+    metric = QuantileValue(column="num", quantile=0.9)
+    context = Report([metric]).run(current, profile).context
+
+    expected = reference.as_dataframe()["num"].quantile(0.9)
+    assert context.get_reference_metric_result(metric.metric_id).value == pytest.approx(expected, abs=1e-3)
+
+
+def test_reference_profile_save_load(tmp_path, reference, current):
+    profile = ReferenceProfile.from_dataset(reference)
+    profile.save(str(tmp_path / "reference"))
+    loaded = Dataset.load(str(tmp_path / "reference"))
+
+    assert isinstance(loaded, ReferenceProfile)
+    assert loaded.data_definition == profile.data_definition
+    metrics = [MeanValue(column="num"), ValueDrift(column="cat"), ValueDrift(column="num", method="ks")]
+    assert _values(loaded, current, metrics) == pytest.approx(_values(profile, current, metrics), rel=1e-9)
+
+
+def test_reference_profile_unsupported_metric(reference, current):
+    with pytest.raises(ValueError, match="reference dataset is required"):
+        Report([UniqueValueCount(column="cat")]).run(current, ReferenceProfile.from_dataset(reference))
+
+
+def test_reference_profile_drift_with_text_columns():
+    data = pd.DataFrame({"num": [1.0, 2.0, 3.0, 4.0], "text": ["a b", "b c", "c d", "d e"]})
+    definition = DataDefinition(numerical_columns=["num"], text_columns=["text"])
+    reference = Dataset.from_pandas(data, data_definition=definition)
+    current = Dataset.from_pandas(data, data_definition=definition)
+
+    with pytest.raises(ValueError, match="Text columns \\['text'\\] are not profiled"):
+        Report([DriftedColumnsCount()]).run(current, ReferenceProfile.from_dataset(reference))
+
+
+@pytest.mark.parametrize("stattest", ["wasserstein", "ks", "psi", "jensenshannon"])
+def test_profile_drift_of_continuous_column(stattest):
+    rng = np.random.default_rng(0)
+    reference = pd.Series(rng.normal(0, 1, 50000))
+    current = pd.Series(rng.normal(0.1, 1, 20000))
+    profile = ReferenceProfile.from_dataset(pd.DataFrame({"a": reference})).column_profile("a")
+
+    _, result = get_profile_column_drift(profile, current, stattest, None)
+    expected = get_stattest(reference, current, ColumnType.Numerical, stattest)(
+        reference, current, ColumnType.Numerical, None
+    )
+
+    assert result.drifted == expected.drifted
+    assert result.drift_score == pytest.approx(expected.drift_score, rel=0.15)
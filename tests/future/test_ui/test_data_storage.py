@@ -0,0 +1,194 @@
+import datetime
+import os
+import posixpath
+
+import pandas as pd
+import pytest
+import uuid6
+
+from servequery.core.report import Report
+from servequery.metrics import MeanValue
+from servequery.metrics import RowCount
+from servequery.ui.service.base import Project
+from servequery.ui.service.base import SeriesFilter
+from servequery.ui.service.storage.local import base as local_base
+from servequery.ui.service.storage.local.base import InMemoryDataStorage
+from servequery.ui.service.storage.local.base import LocalState
+from servequery.ui.service.storage.local.base import ProjectSnapshots
+
+PROJECT_ID = uuid6.UUID(int=1, version=7)
+
+
+@pytest.fixture
+def storage(tmpdir):
+    state = LocalState.load(str(tmpdir), None)
+    state.projects[PROJECT_ID] = Project(id=PROJECT_ID, name="project")
+    state.snapshots[PROJECT_ID] = ProjectSnapshots(state.location, PROJECT_ID)
+    return InMemoryDataStorage(str(tmpdir), state)
+
+
+def _snapshot(hour: int, data: pd.DataFrame, tags):
+    return (
+        Report([RowCount(), MeanValue(column="a")])
+        .run(data, timestamp=datetime.datetime(2024, 1, 1, hour), tags=tags)
+        .to_snapshot_model()
+    )
+
+
+async def _add_snapshot(storage: InMemoryDataStorage, snapshot_id: int, hour: int, data: pd.DataFrame, tags):
+    snapshot = _snapshot(hour, data, tags)
+    sid = uuid6.UUID(int=snapshot_id, version=7)
+    storage.state.snapshots[PROJECT_ID][sid] = snapshot
+    await storage.add_snapshot_points(PROJECT_ID, sid, snapshot)
+    return sid
+
+
+@pytest.mark.asyncio
+async def test_get_data_series(storage: InMemoryDataStorage):
+    late = await _add_snapshot(storage, 1, 10, pd.DataFrame({"a": [1.0, 2.0, 3.0]}), ["prod"])
+    early = await _add_snapshot(storage, 2, 5, pd.DataFrame({"a": [4.0, 6.0]}), ["prod"])
+    await _add_snapshot(storage, 3, 7, pd.DataFrame({"a": [0.0]}), ["dev"])
+
+    response = await storage.get_data_series(
+        PROJECT_ID,
+        [SeriesFilter(tags=["prod"], metadata={}, metric="servequery:metric_v2:MeanValue", metric_labels={})],
+        None,
+        None,
+    )
+    assert [source.snapshot_id for source in response.sources] == [early, late]
+    assert [series.values for series in response.series] == [[5.0, 2.0]]
+
+    response = await storage.get_data_series(
+        PROJECT_ID,
+        [SeriesFilter(tags=[], metadata={}, metric="*", metric_labels={})],
+        datetime.datetime(2024, 1, 1, 6),
+        datetime.datetime(2024, 1, 1, 10),
+    )
+    assert len(response.sources) == 2
+    assert sorted(series.values for series in response.series) == [[0.0, 2.0], [1, 3]]
+
+
+@pytest.fixture
+def workspace(tmpdir):
+    state = LocalState.load(str(tmpdir), None)
+    state.location.makedirs(str(PROJECT_ID))
+    with state.location.open(posixpath.join(str(PROJECT_ID), "metadata.json"), "w") as f:
+        f.write(Project(id=PROJECT_ID, name="project").json())
+    for i in range(5):
+        state.write_snapshot(PROJECT_ID, uuid6.UUID(int=i + 1, version=7), _snapshot(i, pd.DataFrame({"a": [i]}), []))
+    return str(tmpdir)
+
+
+async def _all_series(storage: InMemoryDataStorage):
+    response = await storage.get_data_series(
+        PROJECT_ID, [SeriesFilter(tags=[], metadata={}, metric="*", metric_labels={})], None, None
+    )
+    return sorted(series.values for series in response.series)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("parallel", [False, True])
+async def test_load_snapshots_lazily(workspace, monkeypatch, parallel):
+    if parallel:
+        monkeypatch.setattr(local_base, "PARALLEL_LOAD_MIN_SNAPSHOTS", 1)
+    state = LocalState.load(workspace, None, max_workers=2 if parallel else 1)
+    snapshots = state.snapshots[PROJECT_ID]
+    storage = InMemoryDataStorage(workspace, state)
+
+    assert len(snapshots) == 5
+    assert snapshots._models == {}
+    assert await _all_series(storage) == [[0.0, 1.0, 2.0, 3.0, 4.0], [1, 1, 1, 1, 1]]
+    assert sorted(await storage.get_metrics(PROJECT_ID, [], {})) == [
+        "servequery:metric_v2:MeanValue",
+        "servequery:metric_v2:RowCount",
+    ]
+    assert await storage.get_metric_label_values(PROJECT_ID, [], {}, "servequery:metric_v2:MeanValue", "column") == [
+        "a"
+    ]
+    assert snapshots._models == {}
+    assert snapshots[uuid6.UUID(int=3, version=7)].timestamp == datetime.datetime(2024, 1, 1, 2)
+
+    monkeypatch.setattr(local_base, "PARSED_SNAPSHOTS_CACHE_SIZE", 2)
+    for snapshot_id in snapshots:
+        snapshots[snapshot_id]
+    assert list(snapshots._models) == list(snapshots)[-2:]
+
+
+@pytest.mark.asyncio
+async def test_load_snapshots_from_points_cache(workspace, monkeypatch):
+    LocalState.load(workspace, None)
+    assert os.path.exists(os.path.join(workspace, str(PROJECT_ID), "points_cache.json"))
+
+    loaded = []
+    read_snapshots_points = local_base._read_snapshots_points
+    monkeypatch.setattr(
+        local_base,
+        "_read_snapshots_points",
+        lambda base_path, paths: loaded.extend(paths) or read_snapshots_points(base_path, paths),
+    )
+    snapshot_path = os.path.join(workspace, str(PROJECT_ID), "snapshots", f"{uuid6.UUID(int=1, version=7)}.json")
+    os.utime(snapshot_path, (0, 0))
+
+    storage = InMemoryDataStorage(workspace, LocalState.load(workspace, None, max_workers=1))
+
+    assert [posixpath.basename(path) for path in loaded] == [os.path.basename(snapshot_path)]
+    assert await _all_series(storage) == [[0.0, 1.0, 2.0, 3.0, 4.0], [1, 1, 1, 1, 1]]
+
+
+@pytest.mark.asyncio
+async def test_deleted_snapshot_points_removed(storage: InMemoryDataStorage):
+    first = await _add_snapshot(storage, 1, 10, pd.DataFrame({"a": [1.0]}), ["prod"])
+    await _add_snapshot(storage, 2, 5, pd.DataFrame({"a": [3.0]}), ["prod"])
+    storage._index_project(PROJECT_ID)
+
+    del storage.state.snapshots[PROJECT_ID][first]
+    assert await _all_series(storage) == [[1], [3.0]]
+    points_index = storage._points_index[PROJECT_ID]
+    assert first not in points_index.snapshots
+    assert all(len(series) == 1 for series in points_index.series.values())
+
+
+@pytest.mark.asyncio
+async def test_points_index_follows_snapshot_changes(storage: InMemoryDataStorage):
+    first = await _add_snapshot(storage, 1, 10, pd.DataFrame({"a": [1.0]}), ["prod"])
+    storage._index_project(PROJECT_ID)
+    points_index = storage._points_index[PROJECT_ID]
+    snapshots = storage.state.snapshots[PROJECT_ID]
+
+    second = uuid6.UUID(int=2, version=7)
+    snapshots[second] = _snapshot(5, pd.DataFrame({"a": [3.0]}), ["dev"])
+    del snapshots[first]
+
+    assert storage._project_index(PROJECT_ID) is points_index
+    assert points_index.snapshots == {second}
+    assert points_index.version == snapshots.version
+    assert points_index.matching_snapshots([], {}, snapshots.headers()) is None
+    assert points_index.matching_snapshots(["dev"], {}, snapshots.headers()) == {second}
+    assert points_index.matching_snapshots(["prod"], {}, snapshots.headers()) == set()
+    assert len(await storage.get_metrics(PROJECT_ID, [], {})) == 2
+    assert await _all_series(storage) == [[1], [3.0]]
+
+
+@pytest.mark.asyncio
+async def test_points_index_follows_reloaded_snapshot(workspace):
+    state = LocalState.load(workspace, None)
+    storage = InMemoryDataStorage(workspace, state)
+    assert await _all_series(storage) == [[0.0, 1.0, 2.0, 3.0, 4.0], [1, 1, 1, 1, 1]]
+
+    snapshot_id = uuid6.UUID(int=3, version=7)
+    state.write_snapshot(PROJECT_ID, snapshot_id, _snapshot(2, pd.DataFrame({"a": [10.0, 20.0]}), []))
+    state.reload_snapshot(state.projects[PROJECT_ID], snapshot_id)
+
+    assert await _all_series(storage) == [[0.0, 1.0, 15.0, 3.0, 4.0], [1, 1, 2, 1, 1]]
+
+
+def test_points_cache_tmp_removed_when_loading_fails(tmpdir):
+    state = LocalState.load(str(tmpdir), None)
+    snapshots_path = os.path.join(str(tmpdir), str(PROJECT_ID), "snapshots")
+    os.makedirs(snapshots_path)
+    with open(os.path.join(snapshots_path, f"{uuid6.uuid7()}.json"), "w") as f:
+        f.write("{}")
+
+    with pytest.raises(ValueError, match="malformed"):
+        state.reload_snapshots(PROJECT_ID, skip_errors=False)
+    assert os.listdir(os.path.join(str(tmpdir), str(PROJECT_ID))) == ["snapshots"]
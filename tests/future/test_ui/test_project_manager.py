@@ -0,0 +1,120 @@
+import datetime
+import os
+
+import pandas as pd
+import pytest
+import uuid6
+from watchdog.events import FileDeletedEvent
+from watchdog.events import FileModifiedEvent
+
+from servequery.core.report import Report
+from servequery.legacy.model.widget import AdditionalGraphInfo
+from servequery.legacy.model.widget import BaseWidgetInfo
+from servequery.metrics import RowCount
+from servequery.ui.service.base import Project
+from servequery.ui.service.managers.projects import PARSED_SNAPSHOT_SIZE_FACTOR
+from servequery.ui.service.managers.projects import CachedSnapshot
+from servequery.ui.service.managers.projects import ProjectManager
+from servequery.ui.service.managers.projects import SnapshotCache
+from servequery.ui.service.storage.common import NO_USER
+from servequery.ui.service.storage.local import create_local_project_manager
+from servequery.ui.service.storage.local.watcher import WorkspaceDirHandler
+
+PROJECT_ID = uuid6.UUID(int=1, version=7)
+SNAPSHOT_ID = uuid6.UUID(int=1, version=7)
+
+
+def _snapshot(hour: int = 0):
+    snapshot = (
+        Report([RowCount()]).run(pd.DataFrame({"a": [1, 2]}), timestamp=datetime.datetime(2024, 1, 1, hour))
+    ).to_snapshot_model()
+    snapshot.widgets.append(
+        BaseWidgetInfo(
+            type="counter",
+            title="graphs",
+            size=2,
+            additionalGraphs=[
+                AdditionalGraphInfo(id="graph-1", params={"hour": hour}),
+                AdditionalGraphInfo(id="graph-1", params={"duplicate": True}),
+                AdditionalGraphInfo(id="graph-2", params={}),
+            ],
+        )
+    )
+    return snapshot
+
+
+@pytest.fixture
+def project_manager(tmpdir) -> ProjectManager:
+    project_manager = create_local_project_manager(str(tmpdir), autorefresh=False)
+    state = project_manager.project_metadata.state
+    state.location.makedirs(str(PROJECT_ID))
+    with state.location.open(os.path.join(str(PROJECT_ID), "metadata.json"), "w") as f:
+        f.write(Project(id=PROJECT_ID, name="project").json())
+    state.write_snapshot(PROJECT_ID, SNAPSHOT_ID, _snapshot())
+    state.reload(force=True)
+    return project_manager
+
+
+def _snapshot_path(project_manager: ProjectManager):
+    return os.path.join(
+        project_manager.project_metadata.state.path, str(PROJECT_ID), "snapshots", f"{SNAPSHOT_ID}.json"
+    )
+
+
+@pytest.mark.asyncio
+async def test_load_snapshot_cached(project_manager: ProjectManager):
+    snapshot = await project_manager.load_snapshot(NO_USER.id, PROJECT_ID, SNAPSHOT_ID)
+    assert await project_manager.load_snapshot(NO_USER.id, PROJECT_ID, SNAPSHOT_ID) is snapshot
+    cache = project_manager.snapshot_cache
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+    assert cache.size == os.path.getsize(_snapshot_path(project_manager)) * PARSED_SNAPSHOT_SIZE_FACTOR
+
+    graph = await project_manager.get_snapshot_graph(NO_USER.id, PROJECT_ID, SNAPSHOT_ID, "graph-1")
+    assert graph.params == {"hour": 0}
+    assert await project_manager.get_snapshot_graph(NO_USER.id, PROJECT_ID, SNAPSHOT_ID, "missing") is None
+    assert cache.misses == 1
+
+    await project_manager.delete_snapshot(NO_USER.id, PROJECT_ID, SNAPSHOT_ID)
+    assert len(cache) == 0
+    with pytest.raises(FileNotFoundError):
+        await project_manager.load_snapshot(NO_USER.id, PROJECT_ID, SNAPSHOT_ID)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_cache_invalidated_by_watcher(project_manager: ProjectManager):
+    state = project_manager.project_metadata.state
+    handler = WorkspaceDirHandler(state)
+    await project_manager.load_snapshot(NO_USER.id, PROJECT_ID, SNAPSHOT_ID)
+
+    state.write_snapshot(PROJECT_ID, SNAPSHOT_ID, _snapshot(5))
+    handler.dispatch(FileModifiedEvent(_snapshot_path(project_manager)))
+    assert len(project_manager.snapshot_cache) == 0
+    graph = await project_manager.get_snapshot_graph(NO_USER.id, PROJECT_ID, SNAPSHOT_ID, "graph-1")
+    assert graph.params == {"hour": 5}
+
+    os.remove(_snapshot_path(project_manager))
+    handler.dispatch(FileDeletedEvent(_snapshot_path(project_manager)))
+    assert len(project_manager.snapshot_cache) == 0
+
+
+def test_snapshot_cache_eviction():
+    cache = SnapshotCache(max_size=25)
+    snapshot = _snapshot()
+    project_id = uuid6.uuid7()
+    ids = [uuid6.UUID(int=i + 1, version=7) for i in range(3)]
+    for snapshot_id in ids[:2]:
+        cache.put(project_id, snapshot_id, CachedSnapshot(snapshot, 10), cache.generation)
+    assert cache.get(project_id, ids[0]) is not None
+    cache.put(project_id, ids[2], CachedSnapshot(snapshot, 10), cache.generation)
+
+    assert cache.get(project_id, ids[1]) is None
+    assert cache.get(project_id, ids[0]) is not None
+    assert cache.size == 20
+
+    cache.put(project_id, uuid6.uuid7(), CachedSnapshot(snapshot, 30), cache.generation)
+    assert len(cache) == 2
+
+    generation = cache.generation
+    cache.invalidate(project_id)
+    cache.put(project_id, ids[1], CachedSnapshot(snapshot, 10), generation)
+    assert (len(cache), cache.size) == (0, 0)
@@ -0,0 +1,184 @@
+import datetime
+import os
+import posixpath
+
+import pandas as pd
+import pytest
+import uuid6
+from watchdog.events import FileCreatedEvent
+from watchdog.events import FileModifiedEvent
+
+from servequery.core.report import Report
+from servequery.metrics import MeanValue
+from servequery.metrics import RowCount
+from servequery.ui.service.base import Project
+from servequery.ui.service.base import SeriesFilter
+from servequery.ui.service.errors import SnapshotNotFound
+from servequery.ui.service.storage.common import NO_USER
+from servequery.ui.service.storage.local.base import InMemoryDataStorage
+from servequery.ui.service.storage.local.base import LocalState
+from servequery.ui.service.storage.sqlite import SQLiteDataStorage
+from servequery.ui.service.storage.sqlite import SQLiteProjectMetadataStorage
+from servequery.ui.service.storage.sqlite import base as sqlite_base
+from servequery.ui.service.storage.sqlite.watcher import SQLiteWorkspaceDirHandler
+
+PROJECT_ID = uuid6.UUID(int=1, version=7)
+
+
+def _snapshot(hour: int, value: float, tags, metadata=None):
+    return (
+        Report([RowCount(), MeanValue(column="a")])
+        .run(
+            pd.DataFrame({"a": [value, value]}),
+            timestamp=datetime.datetime(2024, 1, 1, hour),
+            tags=tags,
+            metadata=metadata,
+        )
+        .to_snapshot_model()
+    )
+
+
+@pytest.fixture
+def workspace(tmpdir):
+    state = LocalState.load(str(tmpdir), None)
+    state.location.makedirs(str(PROJECT_ID))
+    with state.location.open(posixpath.join(str(PROJECT_ID), "metadata.json"), "w") as f:
+        f.write(Project(id=PROJECT_ID, name="project").json())
+    for i in range(4):
+        state.write_snapshot(
+            PROJECT_ID,
+            uuid6.UUID(int=i + 1, version=7),
+            _snapshot(i, i, ["even" if i % 2 else "odd"], {"half": "low" if i < 2 else "high", "hour": i}),
+        )
+    return str(tmpdir)
+
+
+@pytest.mark.asyncio
+async def test_sqlite_storage_matches_inmemory(workspace):
+    metadata = SQLiteProjectMetadataStorage(workspace)
+    sqlite_data = SQLiteDataStorage(workspace, metadata.database)
+    inmemory_data = InMemoryDataStorage(workspace)
+
+    assert [p.id for p in await metadata.list_projects(None)] == [PROJECT_ID]
+    assert len(await metadata.list_snapshots(PROJECT_ID)) == 4
+    for series_filter, start_time, end_time in [
+        ([SeriesFilter(tags=[], metadata={}, metric="*", metric_labels={})], None, None),
+        (
+            [SeriesFilter(tags=["odd"], metadata={}, metric="servequery:metric_v2:MeanValue", metric_labels={})],
+            datetime.datetime(2024, 1, 1, 1),
+            None,
+        ),
+        (
+            [
+                SeriesFilter(tags=[], metadata={"half": "high"}, metric="*", metric_labels={}),
+                SeriesFilter(tags=["odd"], metadata={"half": "low"}, metric="*", metric_labels={}),
+            ],
+            None,
+            datetime.datetime(2024, 1, 1, 2),
+        ),
+        ([SeriesFilter(tags=[], metadata={"hour": "1"}, metric="*", metric_labels={})], None, None),
+    ]:
+        expected = await inmemory_data.get_data_series(PROJECT_ID, series_filter, start_time, end_time)
+        assert await sqlite_data.get_data_series(PROJECT_ID, series_filter, start_time, end_time) == expected
+    for storage in (sqlite_data, inmemory_data):
+        assert sorted(await storage.get_metrics(PROJECT_ID, ["even"], {})) == [
+            "servequery:metric_v2:MeanValue",
+            "servequery:metric_v2:RowCount",
+        ]
+        assert await storage.get_metric_label_values(
+            PROJECT_ID, [], {}, "servequery:metric_v2:MeanValue", "column"
+        ) == ["a"]
+        labels = await storage.get_metric_labels(PROJECT_ID, ["odd"], {"half": "low"}, "servequery:metric_v2:MeanValue")
+        assert sorted(labels) == ["column", "tests"]
+        assert await storage.get_metrics(PROJECT_ID, [], {"half": "none"}) == []
+
+
+@pytest.mark.asyncio
+async def test_sqlite_storage_persists_snapshots(tmpdir):
+    metadata = SQLiteProjectMetadataStorage(str(tmpdir))
+    data = SQLiteDataStorage(str(tmpdir), metadata.database)
+    await metadata.add_project(Project(id=PROJECT_ID, name="project"), NO_USER)
+    snapshot = _snapshot(1, 2.0, ["a"])
+    snapshot_id = await metadata.add_snapshot(PROJECT_ID, snapshot)
+    await data.add_snapshot_points(PROJECT_ID, snapshot_id, snapshot)
+
+    reopened = SQLiteDataStorage(str(tmpdir))
+    series_filter = [SeriesFilter(tags=[], metadata={}, metric="servequery:metric_v2:MeanValue", metric_labels={})]
+    response = await reopened.get_data_series(PROJECT_ID, series_filter, None, None)
+    assert [source.snapshot_id for source in response.sources] == [snapshot_id]
+    assert [series.values for series in response.series] == [[2.0]]
+
+    await metadata.delete_snapshot(PROJECT_ID, snapshot_id)
+    assert (await reopened.get_data_series(PROJECT_ID, series_filter, None, None)).series == []
+    assert metadata.database.query("SELECT COUNT(*) FROM points") == [(0,)]
+    assert metadata.database.query("SELECT COUNT(*) FROM snapshot_tags") == [(0,)]
+    with pytest.raises(SnapshotNotFound):
+        await metadata.get_snapshot_metadata(PROJECT_ID, snapshot_id)
+
+
+@pytest.mark.asyncio
+async def test_sqlite_storage_retries_failed_import(workspace, monkeypatch):
+    import_snapshots = sqlite_base.import_workspace_snapshots
+
+    def failing_import(database, location, project_id):
+        raise OSError("interrupted")
+
+    monkeypatch.setattr(sqlite_base, "import_workspace_snapshots", failing_import)
+    with pytest.raises(OSError):
+        SQLiteProjectMetadataStorage(workspace)
+
+    monkeypatch.setattr(sqlite_base, "import_workspace_snapshots", import_snapshots)
+    metadata = SQLiteProjectMetadataStorage(workspace)
+    assert len(await metadata.list_snapshots(PROJECT_ID)) == 4
+
+
+def _write_project(workspace: str, project_id, snapshot_ids):
+    state = LocalState.load(workspace, None)
+    state.location.makedirs(str(project_id))
+    with state.location.open(posixpath.join(str(project_id), "metadata.json"), "w") as f:
+        f.write(Project(id=project_id, name="written").json())
+    for i, snapshot_id in enumerate(snapshot_ids):
+        state.write_snapshot(project_id, snapshot_id, _snapshot(i, i, []))
+
+
+@pytest.mark.asyncio
+async def test_sqlite_storage_imports_workspace_writes(workspace):
+    metadata = SQLiteProjectMetadataStorage(workspace)
+    project_id = uuid6.UUID(int=2, version=7)
+    _write_project(workspace, project_id, [uuid6.UUID(int=10, version=7)])
+    _write_project(workspace, PROJECT_ID, [uuid6.UUID(int=11, version=7)])
+
+    await metadata.reload_snapshots(PROJECT_ID)
+    assert {p.id for p in await metadata.list_projects(None)} == {PROJECT_ID, project_id}
+    assert len(await metadata.list_snapshots(PROJECT_ID)) == 5
+    assert len(await metadata.list_snapshots(project_id)) == 1
+
+    _write_project(workspace, project_id, [uuid6.UUID(int=12, version=7)])
+    reopened = SQLiteProjectMetadataStorage(workspace)
+    assert len(await reopened.list_snapshots(project_id)) == 2
+
+
+@pytest.mark.asyncio
+async def test_sqlite_workspace_handler_imports_written_files(workspace):
+    metadata = SQLiteProjectMetadataStorage(workspace)
+    handler = SQLiteWorkspaceDirHandler(metadata)
+    project_id = uuid6.UUID(int=2, version=7)
+    snapshot_id = uuid6.UUID(int=10, version=7)
+    _write_project(workspace, project_id, [snapshot_id])
+    snapshot_path = os.path.join(workspace, str(project_id), "snapshots", f"{snapshot_id}.json")
+
+    handler.dispatch(FileCreatedEvent(snapshot_path))
+    handler.dispatch(FileModifiedEvent(snapshot_path))
+    assert [p.id for p in await metadata.search_project("written", None)] == [project_id]
+    assert [s.id for s in await metadata.list_snapshots(project_id)] == [snapshot_id]
+    series_filter = [SeriesFilter(tags=[], metadata={}, metric="servequery:metric_v2:MeanValue", metric_labels={})]
+    response = await SQLiteDataStorage(workspace, metadata.database).get_data_series(
+        project_id, series_filter, None, None
+    )
+    assert [series.values for series in response.series] == [[0.0]]
+
+    partial_path = os.path.join(workspace, str(project_id), "snapshots", f"{uuid6.UUID(int=11, version=7)}.json")
+    with open(partial_path, "w") as f:
+        f.write("{")
+    handler.dispatch(FileCreatedEvent(partial_path))
+    assert len(await metadata.list_snapshots(project_id)) == 1
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from servequery.legacy.metrics.data_drift.embedding_drift_methods import MMD2u
+from servequery.legacy.metrics.data_drift.embedding_drift_methods import MMD2u_bstrp_batch
+from servequery.legacy.metrics.data_drift.embedding_drift_methods import MMD2u_features
+from servequery.legacy.metrics.data_drift.embedding_drift_methods import MMDDriftMethod
+
+
+def test_mmd2u_features_matches_kernel_matrix():
+    features = np.random.default_rng(0).normal(size=(30, 8))
+    kernel = features @ features.T
+
+    assert MMD2u_features(features, 20, 10) == pytest.approx(MMD2u(kernel, 20, 10))
+
+
+def test_mmd2u_bootstrap_batch_matches_reindexed_kernel():
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(30, 8))
+    kernel = features @ features.T
+    x_idxs = rng.integers(0, 30, size=(5, 12))
+    y_idxs = rng.integers(0, 30, size=(5, 7))
+
+    expected = [
+        MMD2u(kernel[np.ix_(np.concatenate([x, y]), np.concatenate([x, y]))], len(x), len(y))
+        for x, y in zip(x_idxs, y_idxs)
+    ]
+
+    assert MMD2u_bstrp_batch(kernel, 12, 7, x_idxs, y_idxs) == pytest.approx(expected)
+    assert MMD2u_bstrp_batch(features, 12, 7, x_idxs, y_idxs, features=True) == pytest.approx(expected)
+
+
+def _embeddings(shift: float):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(rng.normal(size=(150, 4))), pd.DataFrame(rng.normal(shift, 1, size=(50, 4)))
+
+
+# both the whole data (200 rows) and the bootstrap kernel (150 rows) are approximated by features
+KERNEL_BUDGET = 200 * 64
+
+
+@pytest.mark.parametrize("shift, drift_detected", ((0.0, False), (1.0, True)))
+def test_mmd_drift_method_with_kernel_budget(shift, drift_detected):
+    reference, current = _embeddings(shift)
+
+    dense = MMDDriftMethod()(current, reference)
+    approximated = MMDDriftMethod(max_kernel_elements=KERNEL_BUDGET)(current, reference)
+
+    assert dense[1] == approximated[1] == drift_detected
+    assert approximated[0] == pytest.approx(dense[0], abs=0.05)
+
+
+@pytest.mark.parametrize("shift", (0.0, 1.0))
+def test_mmd_drift_method_bootstrap_with_kernel_budget(shift):
+    reference, current = _embeddings(shift)
+
+    dense = MMDDriftMethod(bootstrap=True)(current, reference)
+    approximated = MMDDriftMethod(bootstrap=True, max_kernel_elements=KERNEL_BUDGET)(current, reference)
+
+    assert dense[1] == approximated[1]
+    assert approximated[0] == pytest.approx(dense[0], abs=0.05)
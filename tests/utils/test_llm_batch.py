@@ -0,0 +1,161 @@
+import asyncio
+from typing import List
+
+import pandas as pd
+import pytest
+
+from servequery.core.datasets import Dataset
+from servequery.descriptors.llm_judges import GenericLLMDescriptor
+from servequery.legacy.options.base import Options
+from servequery.legacy.utils.llm import wrapper as wrapper_module
+from servequery.legacy.utils.llm.base import LLMMessage
+from servequery.legacy.utils.llm.errors import LLMRateLimitError
+from servequery.legacy.utils.llm.errors import LLMRequestError
+from servequery.legacy.utils.llm.wrapper import AdaptiveConcurrency
+from servequery.legacy.utils.llm.wrapper import LLMRequest
+from servequery.legacy.utils.llm.wrapper import LLMResult
+from servequery.legacy.utils.llm.wrapper import LLMWrapper
+from servequery.legacy.utils.llm.wrapper import llm_provider
+from servequery.legacy.utils.llm.wrapper import shared_llm_responses
+from servequery.llm.models import LLMMessage as PromptMessage
+
+
+class MockLLMWrapper(LLMWrapper):
+    retry_backoff = 0.001
+
+    def __init__(self, fail: List[str] = (), rate_limited: int = 0):
+        self.fail = set(fail)
+        self.rate_limited = rate_limited
+        self.calls: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def complete(self, messages: List[LLMMessage]) -> LLMResult[str]:
+        text = messages[-1].content
+        self.calls.append(text)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001 * (int(text) % 3))
+            if self.rate_limited > 0:
+                self.rate_limited -= 1
+                raise LLMRateLimitError("rate limited")
+            if text in self.fail:
+                raise LLMRequestError("failed")
+            return LLMResult(text, 1, 1)
+        finally:
+            self.in_flight -= 1
+
+
+def _requests(count: int, consumed: List[int]):
+    for i in range(count):
+        consumed.append(i)
+        yield LLMRequest([LLMMessage.user(str(i))], int, int, retries=2)
+
+
+@pytest.mark.asyncio
+async def test_run_stream_yields_results_in_order_with_bounded_window():
+    wrapper = MockLLMWrapper()
+    consumed: List[int] = []
+    results = []
+    async for result in wrapper.run_stream(_requests(100, consumed), batch_size=5):
+        results.append(result)
+        assert len(consumed) - len(results) <= 10
+
+    assert results == list(range(100))
+    assert wrapper.max_in_flight <= 5
+
+
+def test_run_batch_retries_rate_limited_requests():
+    wrapper = MockLLMWrapper(rate_limited=3)
+
+    assert wrapper.run_batch_sync(_requests(10, []), batch_size=4) == list(range(10))
+    assert len(wrapper.calls) == 13
+
+
+def test_adaptive_concurrency():
+    concurrency = AdaptiveConcurrency(max_limit=16)
+    concurrency.on_rate_limit()
+    concurrency.on_rate_limit()
+    assert concurrency.limit == 8
+
+    for _ in range(8):
+        concurrency.on_success(1.0)
+    assert 8 < concurrency.limit < 9
+    concurrency.on_success(10.0)
+    assert 4 < concurrency.limit < 5
+    for _ in range(1000):
+        concurrency.on_success(1.0)
+    assert concurrency.limit == 16
+
+
+def test_run_batch_resumes_from_checkpoint(tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    with pytest.raises(LLMRequestError):
+        MockLLMWrapper(fail=["7"]).run_batch_sync(_requests(10, []), batch_size=2, checkpoint_path=checkpoint)
+
+    wrapper = MockLLMWrapper()
+    assert wrapper.run_batch_sync(_requests(10, []), batch_size=2, checkpoint_path=checkpoint) == list(range(10))
+    assert wrapper.calls[0] == "7"
+    assert "0" not in wrapper.calls
+
+
+def test_identical_requests_are_sent_once():
+    wrapper = MockLLMWrapper()
+    requests = [LLMRequest([LLMMessage.user(str(i % 3))], int, int) for i in range(10)]
+
+    assert wrapper.run_batch_sync(requests, batch_size=2) == [i % 3 for i in range(10)]
+    assert sorted(wrapper.calls) == ["0", "1", "2"]
+    assert wrapper.complete_batch_sync([[LLMMessage.user("4")], [LLMMessage.user("4")]]) == ["4", "4"]
+    assert sorted(wrapper.calls) == ["0", "1", "2", "4"]
+
+
+def test_shared_responses_between_wrappers():
+    first, second = MockLLMWrapper(), MockLLMWrapper()
+    with shared_llm_responses():
+        first.run_batch_sync(_requests(5, []))
+        assert second.run_batch_sync(_requests(6, [])) == list(range(6))
+    assert second.calls == ["5"]
+
+    second.run_batch_sync(_requests(1, []))
+    assert second.calls == ["5", "0"]
+
+
+def test_shared_responses_are_bounded(monkeypatch):
+    monkeypatch.setattr(wrapper_module, "SHARED_LLM_RESPONSES_MAX_SIZE", 3)
+    first, second = MockLLMWrapper(), MockLLMWrapper()
+    with shared_llm_responses():
+        first.run_batch_sync(_requests(5, []), batch_size=1)
+        assert len(wrapper_module._shared.responses) == 3
+        assert second.run_batch_sync(list(_requests(5, []))[::-1], batch_size=1) == [4, 3, 2, 1, 0]
+    assert second.calls == ["1", "0"]
+
+
+class CountingLLMWrapper(MockLLMWrapper):
+    calls: List[str] = []
+
+    def __init__(self, model: str, options: Options):
+        super().__init__()
+        self.calls = CountingLLMWrapper.calls
+
+
+@pytest.fixture
+def counting_provider(monkeypatch):
+    monkeypatch.setattr(CountingLLMWrapper, "calls", [])
+    llm_provider("mock_counting", None)(CountingLLMWrapper)
+    yield
+    del wrapper_module._wrappers[("mock_counting", None)]
+
+
+def test_add_descriptors_deduplicates_llm_requests(counting_provider):
+    dataset = Dataset.from_pandas(pd.DataFrame({"text": ["1", "2", "1", "1"]}))
+    prompt = [PromptMessage.user("{text}")]
+    dataset.add_descriptors(
+        [
+            GenericLLMDescriptor("mock_counting", "model", {"text": "text"}, prompt, alias="first"),
+            GenericLLMDescriptor("mock_counting", "model", {"text": "text"}, prompt, alias="second"),
+        ]
+    )
+
+    assert dataset.as_dataframe()["second"].tolist() == ["1", "2", "1", "1"]
+    assert sorted(CountingLLMWrapper.calls) == ["1", "2"]
@@ -0,0 +1,91 @@
+import datetime
+from typing import List
+
+import pytest
+
+from servequery.legacy.options.base import Options
+from servequery.legacy.utils.llm import wrapper as wrapper_module
+from servequery.legacy.utils.llm.base import LLMMessage
+from servequery.legacy.utils.llm.cache import LLMCacheOptions
+from servequery.legacy.utils.llm.cache import LLMResponseCache
+from servequery.legacy.utils.llm.wrapper import LLMRequest
+from servequery.legacy.utils.llm.wrapper import LLMResult
+from servequery.legacy.utils.llm.wrapper import LLMWrapper
+from servequery.legacy.utils.llm.wrapper import get_llm_wrapper
+from servequery.legacy.utils.llm.wrapper import llm_provider
+
+
+class CountingLLMWrapper(LLMWrapper):
+    def __init__(self, model: str, options: Options):
+        self.model = model
+        self.calls: List[str] = []
+
+    async def complete(self, messages: List[LLMMessage]) -> LLMResult[str]:
+        self.calls.append(messages[-1].content)
+        return LLMResult(messages[-1].content.upper(), 10, 1)
+
+
+@pytest.fixture
+def cached_provider():
+    llm_provider("mock_cached", None)(CountingLLMWrapper)
+    yield
+    del wrapper_module._wrappers[("mock_cached", None)]
+
+
+def _request(text: str) -> LLMRequest[str]:
+    return LLMRequest([LLMMessage.user(text)], lambda response: f"parsed {response}", str)
+
+
+def test_cached_responses_skip_provider(tmp_path, cached_provider):
+    options = Options.from_any_options([LLMCacheOptions(path=str(tmp_path))])
+    wrapper = get_llm_wrapper("mock_cached", "model", options)
+
+    assert wrapper.run_batch_sync([_request("a"), _request("b")]) == ["parsed A", "parsed B"]
+    assert wrapper.calls == ["a", "b"]
+
+    wrapper = get_llm_wrapper("mock_cached", "model", options)
+    assert wrapper.run_batch_sync([_request("b"), _request("c"), _request("a")]) == ["parsed B", "parsed C", "parsed A"]
+    assert wrapper.calls == ["c"]
+    assert wrapper.complete_batch_sync([[LLMMessage.user("c")]]) == ["C"]
+    assert wrapper.calls == ["c"]
+    assert (wrapper.cache.hits, wrapper.cache.misses) == (3, 3)
+
+    other_model = get_llm_wrapper("mock_cached", "other", options)
+    other_model.run_batch_sync([_request("a")])
+    assert other_model.calls == ["a"]
+
+
+def test_cache_eviction(tmp_path):
+    cache = LLMResponseCache(str(tmp_path), max_entries=2)
+    for key in ["a", "b", "c"]:
+        cache.put(key, key, 1, 1)
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.get("c") == ("c", 1, 1)
+
+    expiring = LLMResponseCache(str(tmp_path / "ttl"), ttl=datetime.timedelta(seconds=-1))
+    expiring.put("a", "a", 1, 1)
+    assert expiring.get("a") is None
+
+
+def test_cache_evicts_least_recently_used_in_chunks(tmp_path):
+    cache = LLMResponseCache(str(tmp_path), max_entries=10)
+    for key in range(10):
+        cache.put(str(key), str(key), 1, 1)
+    assert cache.get("0") == ("0", 1, 1)
+
+    cache.put("10", "10", 1, 1)
+
+    assert len(cache) == 9
+    assert cache.get("1") is None and cache.get("2") is None
+    assert cache.get("0") == ("0", 1, 1)
+
+
+def test_cache_is_disabled_by_default(cached_provider):
+    assert get_llm_wrapper("mock_cached", "model", Options()).cache is None
+
+
+@pytest.mark.parametrize("max_entries", [None, 1])
+def test_cache_persists_between_instances(tmp_path, max_entries):
+    LLMResponseCache(str(tmp_path), max_entries=max_entries).put("key", "value", 3, 4)
+    assert LLMResponseCache(str(tmp_path), max_entries=max_entries).get("key") == ("value", 3, 4)